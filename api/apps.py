@@ -7,5 +7,14 @@ class ApiConfig(AppConfig):
 
     def ready(self):
         """Carrega o modelo ML na inicialização da aplicação"""
+        from django.conf import settings
+        if not getattr(settings, 'PRELOAD_MODELO', True):
+            return
+        # Inferência remota: o modelo fica nos workers da fila
+        if getattr(settings, 'INFERENCIA_REMOTA', False):
+            from api.servicos.inferencia_remota import ServicoInferenciaRemota
+            if ServicoInferenciaRemota.obter() is not None:
+                return
+        
         from modelos.carregador import CarregadorModelo
         CarregadorModelo.carregar_modelo()
\ No newline at end of file
@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import JsonResponse
+
+from app.core.admission import AdmissionController, AdmissionRejected, client_key, parse_networks, peer_address
+
+class AdmissaoMiddleware:
+    """Middleware de controle de admissão (limite de taxa e descarte de carga)"""
+    
+    instancia = None
+    
+    def __init__(self, get_response):
+        if not settings.ADMISSAO_ATIVA:
+            raise MiddlewareNotUsed
+        
+        self.get_response = get_response
+        self.caminhos = tuple(settings.ADMISSAO_CAMINHOS)
+        self.chaves_api = frozenset(settings.ADMISSAO_CHAVES_API)
+        self.proxies_confiaveis = parse_networks(settings.ADMISSAO_PROXIES_CONFIAVEIS)
+        self.controlador = AdmissionController(
+            rate_per_minute=settings.RATE_LIMIT_PER_MINUTE,
+            burst=settings.RATE_LIMIT_BURST,
+            max_concurrent=settings.MAX_REQUISICOES_CONCORRENTES,
+            max_rss_mb=settings.LIMITE_RSS_MB
+        )
+        # Exposto para o health check
+        AdmissaoMiddleware.instancia = self
+    
+    def _cliente(self, request):
+        endereco = peer_address(
+            request.META.get('REMOTE_ADDR'),
+            request.headers.get('X-Forwarded-For'),
+            self.proxies_confiaveis
+        )
+        return client_key(request.headers.get('X-API-Key'), endereco, self.chaves_api)
+    
+    def __call__(self, request):
+        if request.method != 'POST' or not request.path.startswith(self.caminhos):
+            return self.get_response(request)
+        
+        try:
+            self.controlador.acquire(self._cliente(request))
+        except AdmissionRejected as e:
+            response = JsonResponse(
+                {'erro': e.detail, 'motivo': e.motivo, 'timestamp': time.time()},
+                status=e.status_code
+            )
+            if e.retry_after is not None:
+                response['Retry-After'] = str(max(1, round(e.retry_after)))
+            return response
+        
+        try:
+            return self.get_response(request)
+        finally:
+            self.controlador.release()
@@ -1,6 +1,11 @@
 import logging
 import time
 
+from django.conf import settings
+
+from app.utils.async_logging import begin_request, end_request, new_request_id, request_timings_ms
+from app.utils.tracing import configure_exporter, finish_trace, server_timing, start_trace
+
 logger = logging.getLogger(__name__)
 
 class LogMiddleware:
@@ -8,21 +13,60 @@ class LogMiddleware:
     
     def __init__(self, get_response):
         self.get_response = get_response
+        self.tracing = getattr(settings, 'TRACING_ATIVO', False)
+        if self.tracing:
+            configure_exporter(getattr(settings, 'TRACING_ARQUIVO', None), 'pulmovision-django')
     
     def __call__(self, request):
         inicio = time.time()
+        request_id = new_request_id(request.headers.get('X-Request-ID'))
+        contexto = begin_request(request_id)
+        trace = start_trace(
+            f"{request.method} {request.path}",
+            request_id=request_id,
+            traceparent=request.headers.get('traceparent'),
+            attributes={'http.method': request.method, 'http.target': request.path}
+        ) if self.tracing else None
+        status_code = 500
         
-        # Processar requisição
-        response = self.get_response(request)
-        
-        # Calcular tempo
-        duracao = time.time() - inicio
-        
-        # Log
-        logger.info(
-            f"{request.method} {request.path} - "
-            f"Status: {response.status_code} - "
-            f"Tempo: {duracao:.2f}s"
-        )
+        try:
+            # Processar requisição
+            response = self.get_response(request)
+            status_code = response.status_code
+            
+            # Calcular tempo
+            duracao = time.time() - inicio
+            
+            # Log: sucesso pode ser amostrado, 4xx/5xx nunca
+            if response.status_code >= 500:
+                nivel = logging.ERROR
+            elif response.status_code >= 400:
+                nivel = logging.WARNING
+            else:
+                nivel = logging.INFO
+            if logger.isEnabledFor(nivel):
+                logger.log(
+                    nivel,
+                    "%s %s - Status: %d - Tempo: %.2fs",
+                    request.method, request.path, response.status_code, duracao,
+                    extra={
+                        'metodo': request.method,
+                        'caminho': request.path,
+                        'status': response.status_code,
+                        'duracao_ms': round(duracao * 1000, 2),
+                        'etapas_ms': request_timings_ms(),
+                        'trace_id': trace[0].trace_id if trace else None,
+                    }
+                )
+            
+            # Durações por etapa (Server-Timing) e id do trace
+            if trace is not None:
+                response['Server-Timing'] = server_timing(trace[0])
+                response['X-Trace-ID'] = trace[0].trace_id
+        finally:
+            if trace is not None:
+                finish_trace(trace, status_code)
+            end_request(contexto)
         
+        response['X-Request-ID'] = request_id
         return response
@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.http import JsonResponse
+
+from app.core.recycling import WorkerRecycler
+
+class ReciclagemMiddleware:
+    """Middleware de reciclagem do worker (por número de requisições ou RSS)"""
+    
+    instancia = None
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.caminhos = tuple(settings.ADMISSAO_CAMINHOS)
+        self.reciclador = None
+        if settings.RECICLAGEM_MAX_REQUISICOES > 0 or settings.RECICLAGEM_MAX_RSS_MB > 0:
+            self.reciclador = WorkerRecycler(
+                max_requests=settings.RECICLAGEM_MAX_REQUISICOES,
+                max_rss_mb=settings.RECICLAGEM_MAX_RSS_MB,
+                drain_timeout=settings.RECICLAGEM_TIMEOUT_DRENAGEM
+            )
+        # Exposto para o health check
+        ReciclagemMiddleware.instancia = self
+    
+    def __call__(self, request):
+        if self.reciclador is None or not request.path.startswith(self.caminhos):
+            return self.get_response(request)
+        
+        if not self.reciclador.begin():
+            response = JsonResponse(
+                {'erro': 'Worker reiniciando. Tente novamente.', 'motivo': 'reciclando', 'timestamp': time.time()},
+                status=503
+            )
+            response['Retry-After'] = '1'
+            response['Connection'] = 'close'
+            return response
+        
+        try:
+            return self.get_response(request)
+        finally:
+            self.reciclador.end()
@@ -0,0 +1,37 @@
+import atexit
+import threading
+
+from django.conf import settings
+
+from app.core.audit import AuditLog
+
+
+class ServicoAuditoria:
+    """Registro de auditoria das predições da API Django (um por processo)"""
+    
+    _auditoria = None
+    _lock = threading.Lock()
+    
+    @classmethod
+    def obter(cls):
+        """
+        Retorna o AuditLog, criado na primeira chamada (None se
+        AUDITORIA_ATIVA for False)
+        """
+        if not settings.AUDITORIA_ATIVA:
+            return None
+        
+        with cls._lock:
+            if cls._auditoria is None:
+                cls._auditoria = AuditLog(
+                    directory=settings.AUDITORIA_DIR,
+                    queue_size=settings.AUDITORIA_TAMANHO_FILA,
+                    batch_size=settings.AUDITORIA_TAMANHO_LOTE,
+                    flush_interval=settings.AUDITORIA_INTERVALO_GRAVACAO,
+                    synchronous=settings.AUDITORIA_SYNCHRONOUS,
+                    on_full=settings.AUDITORIA_FILA_CHEIA
+                )
+                # Gravar os registros pendentes quando o worker encerrar
+                atexit.register(cls._auditoria.close)
+        
+        return cls._auditoria
@@ -0,0 +1,31 @@
+import threading
+
+from django.conf import settings
+
+from app.core.result_cache import ResultCache
+
+
+class ServicoCacheResultados:
+    """Cache de resultados compartilhado pelos workers Django do nó"""
+    
+    _cache = None
+    _lock = threading.Lock()
+    
+    @classmethod
+    def obter(cls):
+        """
+        Retorna o ResultCache, aberto na primeira chamada (None se
+        CACHE_RESULTADOS_ATIVO for False)
+        """
+        if not settings.CACHE_RESULTADOS_ATIVO:
+            return None
+        
+        with cls._lock:
+            if cls._cache is None:
+                cls._cache = ResultCache(
+                    path=settings.CACHE_RESULTADOS_CAMINHO,
+                    max_entries=settings.CACHE_RESULTADOS_MAX_ENTRADAS,
+                    touch_interval=settings.CACHE_RESULTADOS_INTERVALO_ACESSO
+                )
+        
+        return cls._cache
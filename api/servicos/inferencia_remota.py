@@ -0,0 +1,88 @@
+import logging
+import threading
+
+from django.conf import settings
+
+from app.core.broker import create_broker
+from app.core.model_cache import model_fingerprint
+from app.core.remote import NORMALIZE_EFFICIENTNET, RemoteInferenceClient
+
+logger = logging.getLogger(__name__)
+
+
+class ServicoInferenciaRemota:
+    """Cliente da frota de workers de inferência (INFERENCIA_REMOTA)"""
+    
+    _cliente = None
+    _desativada = False
+    _lock = threading.Lock()
+    
+    @classmethod
+    def _identidade_modelo(cls):
+        """
+        Modelo que os workers precisam ter: INFERENCIA_REMOTA_MODELO ou o
+        hash do modelo.keras mais recente (sem carregá-lo)
+        """
+        if settings.INFERENCIA_REMOTA_MODELO:
+            return settings.INFERENCIA_REMOTA_MODELO
+        
+        from modelos.carregador import CarregadorModelo
+        diretorio = CarregadorModelo._obter_modelo_mais_recente()
+        if diretorio is None:
+            return None
+        try:
+            return model_fingerprint(diretorio / 'modelo.keras')
+        except OSError as e:
+            logger.warning("Identidade do modelo indisponível: %s", e)
+            return None
+    
+    @classmethod
+    def obter(cls):
+        """
+        Retorna o RemoteInferenceClient, conectado na primeira chamada
+        (None se INFERENCIA_REMOTA for False ou se não houver como
+        identificar o modelo; nesse caso a inferência continua local)
+        """
+        if not settings.INFERENCIA_REMOTA or cls._desativada:
+            return None
+        
+        with cls._lock:
+            if cls._cliente is None and not cls._desativada:
+                modelo = cls._identidade_modelo()
+                if modelo is None:
+                    logger.warning(
+                        "Inferência remota desativada: configure INFERENCIA_REMOTA_MODELO "
+                        "com a identidade do modelo dos workers"
+                    )
+                    cls._desativada = True
+                    return None
+                
+                if settings.BROKER_URL.startswith('memory://'):
+                    # Sem broker compartilhado: worker em threads neste processo,
+                    # que carrega o modelo da API FastAPI (MODEL_PATH)
+                    from app.worker import model_id, start_inference_worker
+                    try:
+                        modelo_worker = model_id()
+                    except OSError as e:
+                        modelo_worker = f"indisponível ({e})"
+                    if modelo_worker != modelo:
+                        logger.warning(
+                            "Inferência remota desativada: o worker em memória usa o modelo %s "
+                            "(MODEL_PATH), diferente do modelo da API (%s)",
+                            modelo_worker, modelo
+                        )
+                        cls._desativada = True
+                        return None
+                    worker = start_inference_worker()
+                    broker, fila = worker.broker, worker.queue_name
+                else:
+                    broker, fila = create_broker(settings.BROKER_URL), settings.BROKER_FILA
+                cls._cliente = RemoteInferenceClient(
+                    broker,
+                    fila,
+                    timeout=settings.INFERENCIA_REMOTA_TIMEOUT,
+                    normalization=NORMALIZE_EFFICIENTNET,
+                    model=modelo
+                )
+        
+        return cls._cliente
@@ -1,22 +1,79 @@
+import logging
 import numpy as np
+from app.core import profiling
+from app.core.model_cache import model_fingerprint
+from app.core.result_cache import cache_key
+from api.servicos.cache_resultados import ServicoCacheResultados
+from api.servicos.inferencia_remota import ServicoInferenciaRemota
 from modelos.carregador import CarregadorModelo
 from api.utilitarios.constantes import CLASSES
 
+logger = logging.getLogger(__name__)
+
 class ServicoPredicao:
     """Serviço responsável por fazer predições com o modelo"""
     
+    _versao_modelo = None
+    
     @classmethod
-    def predizer(cls, imagem_processada):
+    def _chave_cache(cls, hash_conteudo):
         """
-        Faz a predição usando o modelo carregado
+        Chave no cache de resultados: diretório e versão do modelo, hash
+        dos pesos e hash da imagem (None sem cache ou sem modelo; na
+        inferência remota os pesos estão nos workers)
         """
-        modelo = CarregadorModelo.obter_modelo()
+        if hash_conteudo is None or ServicoCacheResultados.obter() is None:
+            return None
+        if ServicoInferenciaRemota.obter() is not None:
+            return None
         
-        if modelo is None:
-            raise RuntimeError("Modelo não carregado")
+        if cls._versao_modelo is None:
+            diretorio = CarregadorModelo.obter_diretorio()
+            if diretorio is None:
+                return None
+            try:
+                pesos = model_fingerprint(diretorio / 'modelo.keras')
+            except OSError as e:
+                logger.warning("Cache de resultados ignorado: %s", e)
+                return None
+            versao = CarregadorModelo.obter_informacoes().get('versao')
+            cls._versao_modelo = ':'.join(['django', diretorio.name, str(versao), pesos])
         
-        # Fazer predição
-        predicao = modelo.predict(imagem_processada, verbose=0)
+        return cache_key(hash_conteudo, cls._versao_modelo)
+    
+    @classmethod
+    def consultar_cache(cls, hash_conteudo):
+        """
+        Retorna o resultado já calculado para a imagem (por qualquer
+        worker do nó) ou None
+        """
+        chave = cls._chave_cache(hash_conteudo)
+        if chave is None:
+            return None
+        return ServicoCacheResultados.obter().get(chave)
+    
+    @classmethod
+    def predizer(cls, imagem_processada, hash_conteudo=None):
+        """
+        Faz a predição usando o modelo carregado (ou a frota de workers,
+        com INFERENCIA_REMOTA); com o hash da imagem, guarda o resultado
+        no cache compartilhado
+        """
+        cliente = ServicoInferenciaRemota.obter()
+        if cliente is not None:
+            predicao = cls._predizer_remoto(cliente, imagem_processada)
+        else:
+            modelo = CarregadorModelo.obter_modelo()
+            
+            if modelo is None:
+                raise RuntimeError("Modelo não carregado")
+            
+            # Fazer predição
+            captura = profiling.tf_capture
+            if captura is not None:
+                predicao = captura.around(lambda: modelo.predict(imagem_processada, verbose=0))
+            else:
+                predicao = modelo.predict(imagem_processada, verbose=0)
         
         # Extrair resultados
         idx_classe = int(np.argmax(predicao, axis=1)[0])
@@ -32,4 +89,18 @@ class ServicoPredicao:
             }
         }
         
-        return resultado
\ No newline at end of file
+        chave = cls._chave_cache(hash_conteudo)
+        if chave is not None:
+            ServicoCacheResultados.obter().put(chave, resultado)
+        
+        return resultado
+    
+    @classmethod
+    def _predizer_remoto(cls, cliente, imagem_processada):
+        """
+        Envia a imagem (uint8, 1x224x224x3) para a fila de inferência e
+        retorna as probabilidades na ordem de CLASSES
+        """
+        imagem = np.clip(np.rint(imagem_processada), 0, 255).astype(np.uint8)
+        classes, probabilidades, _ = cliente.infer(imagem)
+        return probabilidades[:, [classes.index(classe) for classe in CLASSES]]
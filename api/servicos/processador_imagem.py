@@ -1,7 +1,7 @@
 from PIL import Image
 import numpy as np
 from io import BytesIO
-from tensorflow.keras.applications.efficientnet import preprocess_input
+from api.servicos.inferencia_remota import ServicoInferenciaRemota
 from api.utilitarios.excecoes import ImagemInvalidaException
 
 class ProcessadorImagem:
@@ -28,7 +28,13 @@ class ProcessadorImagem:
             # Converter para array
             img_array = np.array(imagem)
             
-            # Preprocessar com EfficientNet
+            # Inferência remota: o uint8 vai para a fila e o worker aplica
+            # o mesmo preprocess_input
+            if ServicoInferenciaRemota.obter() is not None:
+                return np.expand_dims(img_array, axis=0)
+            
+            # Preprocessar com EfficientNet (TensorFlow só é importado aqui)
+            from tensorflow.keras.applications.efficientnet import preprocess_input
             img_array = preprocess_input(img_array)
             
             # Adicionar dimensão batch
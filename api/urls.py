@@ -2,10 +2,16 @@ from django.urls import path
 from api.views.saude import health_check
 from api.views.predicao import PredicaoView
 from api.views.informacoes import ModeloInfoView, LimitacoesView
+from api.views.auditoria import consultar_auditoria
+from api.views.perfilamento import perfil_cpu, perfil_tensorflow, perfil_memoria
 
 urlpatterns = [
     path('health', health_check, name='health'),
     path('predicao', PredicaoView.as_view(), name='predicao'),
     path('modelo/info', ModeloInfoView.as_view(), name='modelo-info'),
     path('limitacoes', LimitacoesView.as_view(), name='limitacoes'),
+    path('admin/perfil/cpu', perfil_cpu, name='perfil-cpu'),
+    path('admin/perfil/tensorflow', perfil_tensorflow, name='perfil-tensorflow'),
+    path('admin/perfil/memoria', perfil_memoria, name='perfil-memoria'),
+    path('admin/auditoria', consultar_auditoria, name='auditoria'),
 ]
\ No newline at end of file
@@ -0,0 +1,53 @@
+from datetime import datetime
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_GET
+from api.servicos.auditoria import ServicoAuditoria
+from app.core import profiling
+
+
+def _data(request, nome):
+    """Lê uma data/hora ISO 8601 da query string (epoch em segundos)"""
+    valor = request.GET.get(nome)
+    if not valor:
+        return None
+    try:
+        return datetime.fromisoformat(valor).timestamp()
+    except ValueError:
+        raise ValueError(f"Parâmetro '{nome}' deve ser uma data ISO 8601")
+
+
+@require_GET
+def consultar_auditoria(request):
+    """
+    Registros de auditoria das predições, mais recentes primeiro.
+    Filtros: hash (sha256 da imagem), inicio, fim (ISO 8601), classe e limite.
+    Exige o header X-Admin-Token.
+    """
+    if not settings.ADMIN_TOKEN:
+        raise Http404()
+    if not profiling.check_admin_token(settings.ADMIN_TOKEN, request.headers.get('X-Admin-Token')):
+        return JsonResponse({'erro': 'Token de administração inválido'}, status=401)
+    
+    auditoria = ServicoAuditoria.obter()
+    if auditoria is None:
+        return JsonResponse({'erro': 'Auditoria desabilitada (AUDITORIA_ATIVA=False)'}, status=404)
+    
+    try:
+        inicio = _data(request, 'inicio')
+        fim = _data(request, 'fim')
+        limite = int(request.GET.get('limite', 100))
+        if not 1 <= limite <= 1000:
+            raise ValueError
+    except ValueError as e:
+        return JsonResponse({'erro': str(e) or "Parâmetro 'limite' deve estar entre 1 e 1000"}, status=400)
+    
+    hash_imagem = request.GET.get('hash')
+    registros = auditoria.query(
+        hash_imagem.lower() if hash_imagem else None,
+        inicio, fim, request.GET.get('classe'), limite
+    )
+    return JsonResponse(
+        {'total': len(registros), 'registros': registros},
+        json_dumps_params={'ensure_ascii': False}
+    )
@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from app.core import profiling
+import functools
+import os
+
+
+def _parametro(request, nome, padrao, tipo, minimo, maximo):
+    """Lê um parâmetro da query string dentro dos limites"""
+    try:
+        valor = tipo(request.GET.get(nome, padrao))
+    except ValueError:
+        raise ValueError(f"Parâmetro '{nome}' inválido")
+    if not minimo <= valor <= maximo:
+        raise ValueError(f"Parâmetro '{nome}' deve estar entre {minimo} e {maximo}")
+    return valor
+
+
+def apenas_admin(view):
+    """
+    Exige o header X-Admin-Token. Sem ADMIN_TOKEN configurado, as rotas
+    não existem (404).
+    """
+    @csrf_exempt
+    @require_POST
+    @functools.wraps(view)
+    def envoltorio(request):
+        if not settings.ADMIN_TOKEN:
+            raise Http404()
+        if not profiling.check_admin_token(settings.ADMIN_TOKEN, request.headers.get('X-Admin-Token')):
+            return JsonResponse({'erro': 'Token de administração inválido'}, status=401)
+        try:
+            resposta = view(request)
+        except ValueError as e:
+            return JsonResponse({'erro': str(e)}, status=400)
+        except profiling.ProfilerBusy as e:
+            return JsonResponse({'erro': str(e)}, status=409)
+        # Com vários workers, o perfil é só do que atendeu
+        resposta['X-Worker-PID'] = str(os.getpid())
+        return resposta
+    return envoltorio
+
+
+@apenas_admin
+def perfil_cpu(request):
+    """Pilhas Python amostradas (formato collapsed, para flamegraph)"""
+    segundos = _parametro(request, 'segundos', 10, float, 0.1, 120)
+    intervalo_ms = _parametro(request, 'intervalo_ms', 5, float, 1, 1000)
+
+    pilhas, amostras = profiling.sample_stacks(segundos, intervalo_ms / 1000)
+    resposta = HttpResponse(pilhas, content_type='text/plain; charset=utf-8')
+    resposta['X-Profile-Samples'] = str(amostras)
+    return resposta
+
+
+@apenas_admin
+def perfil_tensorflow(request):
+    """Trace do profiler do TensorFlow das próximas inferências (zip para o TensorBoard)"""
+    chamadas = _parametro(request, 'chamadas', 5, int, 1, 100)
+    timeout = _parametro(request, 'timeout', 60, float, 1, 600)
+
+    arquivo, capturadas = profiling.profile_tf_inference(chamadas, timeout)
+    if capturadas == 0:
+        return JsonResponse({'erro': 'Nenhuma inferência no intervalo'}, status=504)
+
+    resposta = HttpResponse(arquivo, content_type='application/zip')
+    resposta['Content-Disposition'] = 'attachment; filename="tf-profile.zip"'
+    resposta['X-Profile-Calls'] = str(capturadas)
+    return resposta
+
+
+@apenas_admin
+def perfil_memoria(request):
+    """Diferença de alocações (tracemalloc) numa janela de tempo"""
+    segundos = _parametro(request, 'segundos', 10, float, 0.1, 300)
+    top = _parametro(request, 'top', 25, int, 1, 500)
+    quadros = _parametro(request, 'quadros', 1, int, 1, 50)
+
+    return JsonResponse(
+        profiling.diff_allocations(segundos, top, quadros),
+        json_dumps_params={'ensure_ascii': False}
+    )
@@ -2,11 +2,17 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from api.serializadores.predicao import PredicaoSerializer
+from api.servicos.auditoria import ServicoAuditoria
 from api.servicos.processador_imagem import ProcessadorImagem
 from api.servicos.predictor import ServicoPredicao
 from api.servicos.formatador_resposta import FormatadorResposta
 from api.utilitarios.excecoes import ImagemInvalidaException
+from app.core.audit import REJEITAR, content_hash
+from app.core.remote import RemoteInferenceTimeout
+from app.utils.async_logging import current_request_id
+from app.utils.tracing import span
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -17,24 +23,53 @@ class PredicaoView(APIView):
     
     def post(self, request):
         """Recebe imagem e retorna diagnóstico"""
+        inicio = time.perf_counter()
+        auditoria = ServicoAuditoria.obter()
+        if auditoria is not None and auditoria.on_full == REJEITAR and not auditoria.has_capacity():
+            return Response(
+                {'erro': 'Registro de auditoria saturado. Tente novamente em instantes.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        
         try:
             # Validar dados recebidos
             serializer = PredicaoSerializer(data=request.data)
-            serializer.is_valid(raise_exception=True)
+            with span('validacao'):
+                serializer.is_valid(raise_exception=True)
             
             arquivo_imagem = serializer.validated_data['file']
+            hash_imagem = content_hash(arquivo_imagem.chunks())
+            arquivo_imagem.seek(0)
             
-            # Processar imagem
-            logger.info(f"Processando imagem: {arquivo_imagem.name}")
-            imagem_processada = ProcessadorImagem.processar(arquivo_imagem)
+            # Mesma imagem já predita por algum worker do nó
+            with span('cache'):
+                resultado_predicao = ServicoPredicao.consultar_cache(hash_imagem)
             
-            # Fazer predição
-            resultado_predicao = ServicoPredicao.predizer(imagem_processada)
+            if resultado_predicao is None:
+                # Processar imagem
+                logger.info("Processando imagem: %s", arquivo_imagem.name)
+                with span('processamento'):
+                    imagem_processada = ProcessadorImagem.processar(arquivo_imagem)
+                
+                # Fazer predição
+                with span('predicao'):
+                    resultado_predicao = ServicoPredicao.predizer(imagem_processada, hash_imagem)
             
             # Formatar resposta
-            resposta = FormatadorResposta.formatar(resultado_predicao)
+            with span('formatacao'):
+                resposta = FormatadorResposta.formatar(resultado_predicao)
+            
+            # Auditoria: só enfileira; a gravação é feita em segundo plano
+            if auditoria is not None:
+                auditoria.record(
+                    hash_imagem, resposta,
+                    latency_ms=(time.perf_counter() - inicio) * 1000,
+                    filename=arquivo_imagem.name,
+                    request_id=current_request_id(),
+                    origin='django'
+                )
             
-            logger.info(f"Predição concluída: {resposta['resultado']['rotulo']}")
+            logger.info("Predição concluída: %s", resposta['resultado']['rotulo'])
             return Response(resposta, status=status.HTTP_200_OK)
             
         except ImagemInvalidaException as e:
@@ -43,6 +78,13 @@ class PredicaoView(APIView):
                 {'erro': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        except RemoteInferenceTimeout as e:
+            logger.error("Inferência remota sem resposta: %s", e)
+            return Response(
+                {'erro': 'Workers de inferência indisponíveis. Tente novamente em instantes.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': '1'}
+            )
         except Exception as e:
             logger.error(f"Erro na predição: {str(e)}", exc_info=True)
             return Response(
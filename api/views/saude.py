@@ -1,16 +1,25 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from django.conf import settings
+from api.middlewares.admissao import AdmissaoMiddleware
+from api.middlewares.reciclagem import ReciclagemMiddleware
 import datetime
 
 
 @api_view(['GET'])
 def health_check(request):
     """Endpoint para verificar se a API está funcionando"""
+    reciclador = ReciclagemMiddleware.instancia.reciclador if ReciclagemMiddleware.instancia else None
+    drenando = reciclador is not None and reciclador.draining
     return Response({
-        'status': 'ok',
+        'status': 'drenando' if drenando else 'ok',
         'servico': 'PulmoVision API',
         'versao': '1.0.0',
         'timestamp': datetime.datetime.now().isoformat(),
-        'ambiente': 'desenvolvimento' if settings.DEBUG else 'producao'
-    })
+        'ambiente': 'desenvolvimento' if settings.DEBUG else 'producao',
+        'admissao': (
+            AdmissaoMiddleware.instancia.controlador.metrics()
+            if AdmissaoMiddleware.instancia else None
+        ),
+        'reciclagem': reciclador.metrics() if reciclador is not None else None
+    }, status=503 if drenando else 200)
@@ -0,0 +1,140 @@
+# ==================== app/api/middleware.py ====================
+"""
+Middlewares ASGI puros da API
+
+Diferente do @app.middleware("http"), o `await self.app(...)` de um
+middleware ASGI só retorna depois do último byte da resposta (inclusive
+em streaming) ou quando o cliente desconecta; o `finally` libera o que
+foi reservado em qualquer caso.
+"""
+import time
+from typing import Iterable, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from app.core.admission import (
+    AdmissionRejected,
+    client_key,
+    get_admission_controller,
+    parse_networks,
+    peer_address,
+)
+from app.core.jobs import InteractiveTraffic
+from app.core.recycling import get_worker_recycler
+
+
+def _error_response(status_code: int, tipo: str, message: str, headers: Optional[dict] = None) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        headers=headers,
+        content={
+            "error": {
+                "type": tipo,
+                "message": message,
+                "timestamp": time.time()
+            }
+        }
+    )
+
+
+def _matches(scope, prefixes: tuple, method: Optional[str] = None) -> bool:
+    return (
+        scope["type"] == "http"
+        and (method is None or scope["method"] == method)
+        and scope["path"].startswith(prefixes)
+    )
+
+
+class InteractiveTrafficMiddleware:
+    """Conta as requisições POST de predição em andamento (os jobs cedem a vez a elas)."""
+
+    def __init__(self, app, traffic: InteractiveTraffic, prefix: str = "/predict"):
+        self.app = app
+        self.traffic = traffic
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if not _matches(scope, (self.prefix,), "POST"):
+            await self.app(scope, receive, send)
+            return
+
+        self.traffic.begin()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.traffic.end()
+
+
+class AdmissionMiddleware:
+    """Recusa rapidamente (429/503) requisições de predição acima da capacidade."""
+
+    def __init__(
+        self,
+        app,
+        paths: Iterable[str],
+        api_keys: Iterable[str] = (),
+        trusted_proxies: Iterable[str] = ()
+    ):
+        self.app = app
+        self.paths = tuple(paths)
+        self.api_keys = frozenset(api_keys)
+        self.trusted_proxies = parse_networks(trusted_proxies)
+
+    async def __call__(self, scope, receive, send):
+        admission = get_admission_controller()
+        if admission is None or not _matches(scope, self.paths, "POST"):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        peer = peer_address(
+            scope["client"][0] if scope.get("client") else None,
+            request_headers.get("X-Forwarded-For"),
+            self.trusted_proxies
+        )
+        client = client_key(request_headers.get("X-API-Key"), peer, self.api_keys)
+
+        try:
+            admission.acquire(client)
+        except AdmissionRejected as e:
+            headers = {}
+            if e.retry_after is not None:
+                headers["Retry-After"] = str(max(1, round(e.retry_after)))
+            response = _error_response(e.status_code, e.motivo, e.detail, headers)
+            await response(scope, receive, send)
+            return
+
+        # A vaga fica ocupada até o fim do corpo (streaming) ou a desconexão
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.release()
+
+
+class WorkerRecyclingMiddleware:
+    """Conta as requisições atendidas e recusa novas enquanto o worker drena."""
+
+    def __init__(self, app, paths: Iterable[str]):
+        self.app = app
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope, receive, send):
+        recycler = get_worker_recycler()
+        if recycler is None or not _matches(scope, self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        if not recycler.begin():
+            response = _error_response(
+                503, "reciclando", "Worker reiniciando. Tente novamente.",
+                {"Retry-After": "1", "Connection": "close"}
+            )
+            await response(scope, receive, send)
+            return
+
+        # A drenagem espera o fim do corpo (streaming) ou a desconexão
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            recycler.end()
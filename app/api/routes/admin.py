@@ -0,0 +1,103 @@
+"""
+Rotas de Administração
+Perfilamento sob demanda do worker que atende a requisição
+"""
+
+import asyncio
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+
+from app.config import settings
+from app.core import profiling
+
+router = APIRouter(prefix="/admin/profile")
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    """Exige o header X-Admin-Token. Sem ADMIN_TOKEN configurado, as rotas não existem."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not profiling.check_admin_token(settings.ADMIN_TOKEN, x_admin_token):
+        raise HTTPException(status_code=401, detail="Token de administração inválido")
+
+
+def _worker_headers(**extra) -> dict:
+    # Com vários workers (uvicorn/gunicorn), o perfil é só do que atendeu
+    return {"X-Worker-PID": str(os.getpid()), **{k: str(v) for k, v in extra.items()}}
+
+
+@router.post("/cpu", dependencies=[Depends(require_admin)])
+async def profile_cpu(
+    seconds: float = Query(10.0, gt=0, le=120),
+    interval_ms: float = Query(5.0, ge=1, le=1000)
+):
+    """
+    Amostra as pilhas Python de todas as threads por `seconds` segundos.
+
+    Retorna texto no formato collapsed (uma pilha por linha seguida do
+    número de amostras), pronto para flamegraph.pl ou speedscope.
+    """
+    try:
+        stacks, samples = await asyncio.to_thread(
+            profiling.sample_stacks, seconds, interval_ms / 1000
+        )
+    except profiling.ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return PlainTextResponse(stacks, headers=_worker_headers(**{"X-Profile-Samples": samples}))
+
+
+@router.post("/tensorflow", dependencies=[Depends(require_admin)])
+async def profile_tensorflow(
+    calls: int = Query(5, ge=1, le=100),
+    timeout: float = Query(60.0, gt=0, le=600)
+):
+    """
+    Trace do profiler do TensorFlow das próximas `calls` inferências
+    deste worker (espera no máximo `timeout` segundos).
+
+    Retorna um zip do diretório de logs, para abrir no TensorBoard
+    (aba Profile).
+    """
+    try:
+        archive, captured = await asyncio.to_thread(
+            profiling.profile_tf_inference, calls, timeout
+        )
+    except profiling.ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if captured == 0:
+        raise HTTPException(status_code=504, detail="Nenhuma inferência no intervalo")
+
+    return Response(
+        archive,
+        media_type="application/zip",
+        headers=_worker_headers(**{
+            "Content-Disposition": 'attachment; filename="tf-profile.zip"',
+            "X-Profile-Calls": captured,
+        })
+    )
+
+
+@router.post("/memory", dependencies=[Depends(require_admin)])
+async def profile_memory(
+    seconds: float = Query(10.0, gt=0, le=300),
+    top: int = Query(25, ge=1, le=500),
+    frames: int = Query(1, ge=1, le=50)
+):
+    """
+    Diferença de alocações Python (tracemalloc) entre o início e o fim de
+    uma janela de `seconds` segundos, agrupada por linha de código (ou
+    pela pilha de `frames` chamadas, se maior que 1).
+
+    O tracemalloc só fica ligado durante a janela.
+    """
+    try:
+        result = await asyncio.to_thread(profiling.diff_allocations, seconds, top, frames)
+    except profiling.ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return JSONResponse(result, headers=_worker_headers())
@@ -0,0 +1,48 @@
+"""
+Rota de Auditoria
+Consulta dos registros de predição (rastreabilidade clínica)
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.api.routes.admin import require_admin
+from app.core.audit import get_audit_log
+
+router = APIRouter()
+
+
+@router.get("/audit", dependencies=[Depends(require_admin)])
+async def query_audit(
+    hash: Optional[str] = Query(None, min_length=64, max_length=64, description="sha256 da imagem"),
+    inicio: Optional[datetime] = Query(None, description="Data/hora inicial (ISO 8601)"),
+    fim: Optional[datetime] = Query(None, description="Data/hora final (ISO 8601)"),
+    classe: Optional[str] = Query(None, description="Classe predita"),
+    limite: int = Query(100, ge=1, le=1000)
+):
+    """
+    Registros de auditoria das predições, mais recentes primeiro.
+    
+    Cada registro traz horário, id da requisição, sha256 da imagem,
+    arquivo, classe, confiança, probabilidades, versão do modelo e
+    latência. Filtros combináveis por hash, intervalo de tempo e classe.
+    
+    Exige o header `X-Admin-Token`. Registros ainda na fila (até
+    `AUDIT_FLUSH_INTERVAL` segundos) não aparecem.
+    """
+    audit = get_audit_log()
+    if audit is None:
+        raise HTTPException(status_code=404, detail="Auditoria desabilitada (AUDIT_ENABLED=False)")
+    
+    registros = await asyncio.to_thread(
+        audit.query,
+        hash.lower() if hash else None,
+        inicio.timestamp() if inicio else None,
+        fim.timestamp() if fim else None,
+        classe,
+        limite
+    )
+    return {"total": len(registros), "registros": registros}
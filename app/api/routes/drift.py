@@ -0,0 +1,35 @@
+"""
+Rota de Deriva
+Comparação das entradas recentes com a distribuição de referência
+"""
+
+from fastapi import APIRouter
+
+from app.core.drift import get_drift_monitor
+
+router = APIRouter()
+
+
+@router.get("/drift")
+async def get_drift():
+    """
+    Deriva das entradas em relação à linha de base.
+    
+    Para a janela atual, a última janela fechada e o agregado das
+    janelas em memória, compara com a linha de base (PSI) cada
+    característica acompanhada:
+    - Intensidade média e desvio padrão da imagem (as grandezas da
+      validação de radiografia)
+    - Largura, altura e proporção da imagem original
+    - Distribuição das classes preditas e da confiança
+    
+    PSI abaixo de 0.1 é estável, até 0.25 deriva moderada e acima
+    disso deriva significativa. Sem linha de base, retorna apenas as
+    estatísticas das janelas.
+    """
+    monitor = get_drift_monitor()
+    
+    return {
+        "ativo": monitor is not None,
+        **(monitor.report() if monitor is not None else {})
+    }
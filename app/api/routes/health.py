@@ -3,51 +3,62 @@ Rotas de Health Check
 Verifica se a API está funcionando corretamente
 """
 
-from fastapi import APIRouter, Depends
-from datetime import datetime
-import psutil
-import os
+from fastapi import APIRouter, Query, Response
+from typing import Optional
 
 from app.config import settings
 from app.schemas.common import HealthResponse
-from app.core.model_loader import get_model
+from app.core.health_sampler import get_health_sampler
+from app.core.recycling import get_worker_recycler
 
 router = APIRouter()
 
 
 @router.get("/health", response_model=HealthResponse)
-async def health_check():
+async def health_check(response: Response):
     """
     Health check completo da API.
     
     Retorna informações sobre:
     - Status da API
-    - Status do modelo
-    - Uso de memória
-    - Timestamp
+    - Status e versão do modelo
+    - Uso de memória do sistema
+    - RSS, CPU e threads do processo
+    - Atraso do event loop e profundidade da fila de inferência
+    - Timestamp da amostra
+    
+    Os valores vêm da última amostra do amostrador em segundo plano
+    (HEALTH_SAMPLE_INTERVAL): a resposta não mede nada na hora, então
+    probes frequentes não custam CPU.
+    
+    Responde 503 ("draining") enquanto o worker drena para reciclar,
+    para o balanceador deixar de enviar tráfego.
     """
+    sample = get_health_sampler().latest()
     
-    # Verificar se modelo está carregado
-    try:
-        model = get_model()
-        model_status = "loaded"
-        model_loaded = True
-    except Exception as e:
-        model_status = f"error: {str(e)}"
-        model_loaded = False
+    status = "healthy" if sample["model_loaded"] else "unhealthy"
+    recycler = get_worker_recycler()
+    if recycler is not None and recycler.draining:
+        status = "draining"
+        response.status_code = 503
     
-    # Obter informações de sistema
-    memory = psutil.virtual_memory()
+    return HealthResponse(status=status, version=settings.API_VERSION, **sample)
+
+
+@router.get("/health/history")
+async def health_history(limit: Optional[int] = Query(None, ge=1)):
+    """
+    Histórico curto das amostras de saúde (mais antigas primeiro).
     
-    return HealthResponse(
-        status="healthy" if model_loaded else "unhealthy",
-        timestamp=datetime.utcnow(),
-        version=settings.API_VERSION,
-        model_status=model_status,
-        model_loaded=model_loaded,
-        memory_usage_percent=memory.percent,
-        memory_available_gb=round(memory.available / (1024**3), 2)
-    )
+    O buffer guarda as últimas HEALTH_HISTORY_SIZE amostras, o que permite
+    ver a tendência de memória e de fila sem um sistema de monitoramento
+    externo.
+    """
+    sampler = get_health_sampler()
+    return {
+        "interval_s": sampler.interval,
+        "samples": sampler.history(limit)
+    }
 
 
 @router.get("/")
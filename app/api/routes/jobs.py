@@ -0,0 +1,161 @@
+"""
+Rotas de Jobs Assíncronos
+Submissão de grandes lotes para triagem offline
+"""
+
+from fastapi import APIRouter, File, UploadFile, HTTPException, Query
+from typing import Annotated, List
+from datetime import datetime
+import tarfile
+import zipfile
+import logging
+
+from app.config import settings
+from app.core.jobs import get_job_store
+from app.schemas.jobs import JobResponse, JobResultsResponse
+from app.utils.archive import ArchiveTooLarge, is_archive, iter_archive_images
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+def _job_response(job: dict) -> JobResponse:
+    return JobResponse(
+        job_id=job["id"],
+        status=job["status"],
+        total=job["total"],
+        processados=job["processados"],
+        falhas=job["falhas"],
+        progresso=job["processados"] / job["total"] if job["total"] else 1.0,
+        criado_em=datetime.utcfromtimestamp(job["criado_em"]),
+        atualizado_em=datetime.utcfromtimestamp(job["atualizado_em"])
+    )
+
+
+def _require_jobs():
+    """503 com JOBS_ENABLED=False (sem criar o banco nem o diretório dos jobs)."""
+    if not settings.JOBS_ENABLED:
+        raise HTTPException(
+            status_code=503,
+            detail="Jobs em lote desabilitados (configure JOBS_ENABLED=True)."
+        )
+
+
+@router.post("/jobs", response_model=JobResponse, status_code=202)
+def create_job(
+    files: Annotated[
+        List[UploadFile],
+        File(description="Radiografias (JPG, PNG) e/ou arquivos ZIP/TAR com radiografias")
+    ]
+):
+    """
+    Cria um job de predição em lote.
+    
+    Aceita várias imagens e/ou arquivos compactados (.zip, .tar, .tar.gz).
+    As imagens são gravadas na fila persistente e processadas em
+    background, com prioridade menor que o tráfego de `/predict`.
+    
+    Retorna imediatamente o `job_id` (HTTP 202). Acompanhe com
+    `GET /jobs/{job_id}` e leia os resultados em
+    `GET /jobs/{job_id}/results`.
+    
+    Cada imagem (inclusive dentro dos arquivos compactados) tem no máximo
+    `MAX_IMAGE_SIZE_MB`, e o job inteiro, já descompactado, no máximo
+    `JOBS_MAX_TOTAL_MB` (HTTP 413 acima disso).
+    
+    Desabilitado por padrão (HTTP 503): configure `JOBS_ENABLED=True`.
+    """
+    _require_jobs()
+    
+    max_entry_size = settings.MAX_IMAGE_SIZE_MB * 1024 * 1024
+    max_total_size = settings.JOBS_MAX_TOTAL_MB * 1024 * 1024
+    
+    def iter_files():
+        count = 0
+        total_size = 0
+        for upload in files:
+            if is_archive(upload.filename):
+                entries = iter_archive_images(
+                    upload.file, upload.filename, settings.ALLOWED_EXTENSIONS, max_entry_size
+                )
+            else:
+                data = upload.file.read(max_entry_size + 1)
+                if len(data) > max_entry_size:
+                    raise ArchiveTooLarge(
+                        f"{upload.filename}: imagem muito grande. "
+                        f"Tamanho máximo: {settings.MAX_IMAGE_SIZE_MB}MB"
+                    )
+                entries = [(upload.filename, data)]
+            
+            for name, data in entries:
+                count += 1
+                total_size += len(data)
+                if count > settings.JOBS_MAX_FILES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Máximo de {settings.JOBS_MAX_FILES} imagens por job."
+                    )
+                if total_size > max_total_size:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Máximo de {settings.JOBS_MAX_TOTAL_MB}MB de imagens por job."
+                    )
+                yield name, data
+    
+    try:
+        job_id = get_job_store().create_job(iter_files())
+    except ArchiveTooLarge as e:
+        logger.warning("Job rejeitado: %s", e)
+        raise HTTPException(status_code=413, detail=str(e))
+    except (zipfile.BadZipFile, tarfile.TarError) as e:
+        logger.warning(f"Arquivo compactado inválido: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Arquivo compactado inválido: {str(e)}")
+    finally:
+        for upload in files:
+            upload.file.close()
+    
+    return _job_response(get_job_store().get_job(job_id))
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """
+    Progresso de um job.
+    
+    Retorna status, total de imagens, processadas e falhas.
+    """
+    _require_jobs()
+    job = get_job_store().get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+    
+    return _job_response(job)
+
+
+@router.get("/jobs/{job_id}/results", response_model=JobResultsResponse)
+async def get_job_results(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """
+    Resultados paginados de um job.
+    
+    Lista os itens já processados em ordem de envio. Use
+    `proximo_offset` para buscar a próxima página.
+    """
+    _require_jobs()
+    store = get_job_store()
+    job = store.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+    
+    itens = store.get_results(job_id, offset, limit)
+    
+    return JobResultsResponse(
+        job_id=job_id,
+        offset=offset,
+        limit=limit,
+        itens=itens,
+        proximo_offset=offset + len(itens) if len(itens) == limit else None
+    )
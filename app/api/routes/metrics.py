@@ -0,0 +1,122 @@
+"""
+Rota de Métricas
+Métricas operacionais do processamento de predições
+"""
+
+from fastapi import APIRouter
+
+from app.config import settings
+from app.core.admission import get_admission_controller
+from app.core.audit import get_audit_log
+from app.core.cascade import get_cascade
+from app.core.pipeline import get_pipeline
+from app.core.recycling import get_worker_recycler
+from app.core.remote import get_remote_client
+from app.core.result_cache import get_result_cache
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Métricas operacionais da API.
+    
+    Retorna, para cada estágio do pipeline de predição:
+    - Concorrência configurada e threads ocupadas
+    - Ocupação acumulada (fração do tempo com trabalho)
+    - Profundidade e capacidade da fila
+    - Itens processados, erros e tamanho médio de batch
+    
+    Útil para ajustar a concorrência de cada estágio ao
+    número de núcleos do nó.
+    
+    Por faixa de prioridade (alta, normal, baixa): imagens submetidas,
+    concluídas, respondidas pelo cache de resultados, descartadas por prazo expirado ou cancelamento e
+    concluídas após o prazo (atrasadas).
+    
+    Com a cascata de modelos habilitada: taxa de escalonamento para o
+    modelo completo, custo médio por imagem de cada modelo e economia
+    estimada em relação a usar só o modelo completo.
+    
+    Inclui também os contadores do controle de admissão: requisições
+    em andamento, aceitas e rejeitadas por motivo (limite de taxa,
+    concorrência, fila ou memória).
+    
+    Com a reciclagem de workers configurada: requisições atendidas,
+    limites e se o worker está drenando para reiniciar.
+    
+    Do registro de auditoria: registros enfileirados, gravados e
+    descartados, ocupação da fila e duração do último lote.
+    
+    Do cache de resultados compartilhado: hits, misses, gravações e
+    remoções deste worker e as entradas ocupadas por todos os workers
+    do nó.
+    
+    Com o serviço gRPC habilitado: chamadas por método, imagens, erros
+    por código e streams abertos (as imagens do gRPC também entram nas
+    métricas do pipeline).
+    
+    Com INFERENCE_MODE=remote: requisições enviadas à frota de workers,
+    prazos esgotados, erros e espera média pela resposta (e os batches
+    do worker local, com BROKER_URL=memory://).
+    """
+    pipeline = get_pipeline()
+    admission = get_admission_controller()
+    cascade = get_cascade()
+    recycler = get_worker_recycler()
+    audit = get_audit_log()
+    result_cache = get_result_cache()
+    remote = get_remote_client()
+    
+    return {
+        "pipeline": {
+            "ativo": pipeline is not None,
+            "estagios": pipeline.metrics() if pipeline is not None else {},
+            "faixas": pipeline.lane_metrics() if pipeline is not None else {}
+        },
+        "cascata": {
+            "ativo": cascade is not None,
+            **(cascade.metrics() if cascade is not None else {})
+        },
+        "admissao": {
+            "ativo": admission is not None,
+            **(admission.metrics() if admission is not None else {})
+        },
+        "reciclagem": {
+            "ativo": recycler is not None,
+            **(recycler.metrics() if recycler is not None else {})
+        },
+        "auditoria": {
+            "ativo": audit is not None,
+            **(audit.metrics() if audit is not None else {})
+        },
+        "cache_resultados": {
+            "ativo": result_cache is not None,
+            **(result_cache.metrics() if result_cache is not None else {})
+        },
+        "inferencia_remota": {
+            "ativo": remote is not None,
+            **(remote.metrics() if remote is not None else {}),
+            **_local_worker_metrics()
+        },
+        "grpc": _grpc_metrics()
+    }
+
+
+def _local_worker_metrics() -> dict:
+    # Worker em threads só existe com INFERENCE_MODE=remote e BROKER_URL=memory://
+    if settings.INFERENCE_MODE != "remote":
+        return {}
+    from app.worker import get_inference_worker
+    worker = get_inference_worker()
+    return {"worker_local": worker.metrics()} if worker is not None else {}
+
+
+def _grpc_metrics() -> dict:
+    # app.rpc só é importado com o serviço habilitado (depende do grpcio)
+    if not settings.GRPC_ENABLED:
+        return {"ativo": False}
+    from app.rpc.server import get_grpc_server
+    server = get_grpc_server()
+    return {"ativo": server is not None, **(server.metrics() if server is not None else {})}
@@ -10,6 +10,7 @@ from datetime import datetime
 from app.config import settings
 from app.schemas.model import ModelInfoResponse
 from app.core.model_loader import get_model
+from app.core.autotune import get_active_tuning
 
 router = APIRouter()
 
@@ -28,6 +29,8 @@ async def get_model_info():
     - Métricas de performance
     - Data de criação
     - Tamanho do modelo
+    - Configuração de execução em uso (threads, batch, workers e
+      se veio do autotune)
     
     Útil para:
     - Auditoria e rastreabilidade
@@ -42,9 +45,11 @@ async def get_model_info():
     
     # Obter modelo para contar parâmetros
     try:
+        import tensorflow as tf
+        
         model = get_model()
         total_params = model.count_params()
-        trainable_params = sum([tf.size(w).numpy() for w in model.trainable_weights])
+        trainable_params = int(sum([tf.size(w).numpy() for w in model.trainable_weights]))
     except:
         total_params = None
         trainable_params = None
@@ -114,7 +119,8 @@ async def get_model_info():
             "optimizer": "Adam",
             "data_augmentation": True,
             "transfer_learning": True
-        }
+        },
+        execucao=get_active_tuning()
     )
 
 
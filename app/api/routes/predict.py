@@ -3,30 +3,121 @@ Rota de Predição - Endpoint Principal
 Recebe radiografia e retorna diagnóstico
 """
 
-from fastapi import APIRouter, File, UploadFile, HTTPException
-from typing import Annotated
+from fastapi import APIRouter, File, UploadFile, HTTPException, Query, Request
+from typing import Annotated, List, Optional
+import asyncio
 import logging
+import math
+import time
 
+from app.config import settings
+from app.core.audit import REJEITAR, content_hash, get_audit_log
 from app.schemas.predict import PredictResponse
-from app.core.predictor import Predictor
+from app.schemas.jobs import BatchPredictResponse, PathPredictRequest
+from app.core.predictor import create_predictor
+from app.core.preprocess_pool import get_preprocess_pool
+from app.core.pipeline import PRIORIDADE_NORMAL, get_pipeline, parse_priority
+from app.core.streaming import ArchivePredictionStream, DuplexStreamingResponse
 from app.core.validator import ImageValidator
+from app.core.vector_index import get_vector_index
+from app.api.tracing import TracedRoute
+from app.utils.async_logging import add_timings, current_request_id
+from app.utils.mounted_storage import read_mounted, resolve_mounted_path
+from app.utils.tracing import span
 from app.utils.exceptions import (
+    DeadlineExceededException,
     InvalidImageException,
     ImageTooLargeException,
-    PredictionException
+    PredictionException,
+    ServiceOverloadedException
 )
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 logger = logging.getLogger(__name__)
 
 # Instanciar validador e preditor
 validator = ImageValidator()
-predictor = Predictor()
+predictor = create_predictor(preprocess_pool=get_preprocess_pool())
+
+# Pipeline em estágios (None se PIPELINE_ENABLED=False)
+pipeline = get_pipeline(predictor, validator)
+
+# Registro de auditoria (None se AUDIT_ENABLED=False)
+audit = get_audit_log()
+
+
+def _scheduling(request: Request) -> dict:
+    """
+    Prioridade e prazo da requisição, a partir dos headers:
+    
+    - `X-Priority`: alta, normal (padrão) ou baixa
+    - `X-Deadline-Ms`: tempo máximo, em ms, que o cliente aguarda
+    """
+    try:
+        priority = parse_priority(request.headers.get("X-Priority"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    deadline = None
+    deadline_ms = request.headers.get("X-Deadline-Ms")
+    if deadline_ms:
+        try:
+            deadline_ms = float(deadline_ms)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="X-Deadline-Ms deve ser numérico")
+        # nan/inf/negativos passariam pelo float() e quebrariam a ordenação das filas
+        if not math.isfinite(deadline_ms) or deadline_ms <= 0:
+            raise HTTPException(status_code=400, detail="X-Deadline-Ms deve ser um número positivo")
+        deadline = time.monotonic() + deadline_ms / 1000.0
+    
+    return {"priority": priority, "deadline": deadline}
+
+
+def _check_deadline(deadline):
+    """Caminho sequencial: não iniciar a inferência se o prazo já passou."""
+    if deadline is not None and time.monotonic() >= deadline:
+        raise DeadlineExceededException("Prazo da requisição expirou antes do processamento.")
+
+
+def _check_audit():
+    """Com AUDIT_ON_FULL=rejeitar, não predizer sem espaço para o registro."""
+    if audit is not None and audit.on_full == REJEITAR and not audit.has_capacity():
+        raise ServiceOverloadedException(
+            "Registro de auditoria saturado. Tente novamente em instantes."
+        )
+
+
+def _audit(image_data: bytes, filename: str, result: dict, started: float):
+    """Enfileira o registro de auditoria (a gravação é feita em segundo plano)."""
+    if audit is not None:
+        audit.record(
+            content_hash(image_data), result,
+            latency_ms=(time.perf_counter() - started) * 1000,
+            filename=filename,
+            request_id=current_request_id(),
+            origin="fastapi"
+        )
+
+
+def _check_similar(similar: int):
+    """Casos semelhantes exigem o índice de referência configurado."""
+    if similar > settings.SIMILARITY_MAX_K:
+        raise HTTPException(
+            status_code=400,
+            detail=f"similar deve ser no máximo {settings.SIMILARITY_MAX_K}"
+        )
+    if similar > 0 and get_vector_index() is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Casos semelhantes indisponíveis: índice de referência não configurado"
+        )
 
 
 @router.post("/predict", response_model=PredictResponse)
 async def predict(
-    file: Annotated[UploadFile, File(description="Radiografia torácica (JPG, PNG)")]
+    request: Request,
+    file: Annotated[UploadFile, File(description="Radiografia torácica (JPG, PNG)")],
+    similar: int = Query(0, ge=0, description="Casos de referência semelhantes a incluir")
 ):
     """
     **Endpoint Principal: Predição de Doenças Pulmonares**
@@ -38,11 +129,33 @@ async def predict(
     - Tamanho máximo: 10MB
     - Formato: RGB ou Grayscale
     
+    ## Clientes leves
+    Clientes que já reduzem a imagem podem enviar, no lugar do arquivo,
+    um tensor uint8 `(224, 224, 3)` ou `(224, 224, 1)` (~150KB): um `.npy`
+    ou os bytes crus precedidos do cabeçalho PVT1 (`b"PVT1"`, altura e
+    largura em uint16 little-endian, canais em uint8). O formato é
+    reconhecido pelo conteúdo; só forma e tipo são validados e o tensor
+    vai direto ao modelo, sem decodificação.
+    
+    ## Headers opcionais
+    - **X-Priority**: `alta`, `normal` (padrão) ou `baixa`. Faixas mais
+      altas são atendidas primeiro na fila de inferência.
+    - **X-Deadline-Ms**: tempo máximo de espera do cliente. Se expirar
+      antes do processamento, a imagem é descartada (504).
+    
+    ## Parâmetros opcionais
+    - **similar**: inclui os `k` casos confirmados mais semelhantes do
+      índice de referência (SIMILARITY_INDEX_PATH). O embedding vem da
+      mesma inferência da classificação. Com a cascata habilitada, só
+      imagens decididas pelo modelo completo têm casos semelhantes.
+    
     ## Saída
     - **resultado**: Classe predita e confiança
     - **probabilidades**: Probabilidades de cada classe
     - **modelo**: Informações do modelo usado
     - **aviso_legal**: Disclaimer médico
+    - **casos_semelhantes**: arquivo, rótulo e similaridade de cada caso
+      (com `similar` > 0)
     
     ## Classes Possíveis
     - `normal`: Pulmões saudáveis
@@ -53,6 +166,7 @@ async def predict(
     - `400`: Imagem inválida ou formato não suportado
     - `413`: Imagem muito grande (> 10MB)
     - `500`: Erro interno no processamento
+    - `504`: Prazo (`X-Deadline-Ms`) expirado
     
     ## Exemplo de Uso
     ```python
@@ -65,21 +179,39 @@ async def predict(
     ```
     """
     
-    logger.info(f"Nova requisição de predição: {file.filename}")
+    started = time.perf_counter()
+    logger.info("Nova requisição de predição: %s", file.filename)
+    scheduling = _scheduling(request)
+    _check_similar(similar)
     
     try:
-        # 1. Validar imagem
-        logger.debug("Validando imagem...")
-        image_data = await file.read()
-        validator.validate(image_data, file.filename)
+        _check_audit()
         
-        # 2. Fazer predição
-        logger.debug("Processando predição...")
-        result = predictor.predict(image_data)
+        with span("leitura"):
+            image_data = await file.read()
+        
+        if pipeline is not None:
+            # Validação, preprocessamento e inferência nos estágios do pipeline
+            logger.debug("Enviando imagem ao pipeline...")
+            future = pipeline.submit(image_data, file.filename, similar=similar, **scheduling)
+            result = await asyncio.wrap_future(future)
+            add_timings(future.timings)
+        else:
+            # 1. Validar imagem
+            logger.debug("Validando imagem...")
+            with span("validacao"):
+                validator.validate(image_data, file.filename)
+            
+            # 2. Fazer predição (spans por etapa dentro do Predictor)
+            logger.debug("Processando predição...")
+            _check_deadline(scheduling["deadline"])
+            result = predictor.predict(image_data, similar=similar)
+        
+        _audit(image_data, file.filename, result, started)
         
         logger.info(
-            f"Predição concluída: {result['resultado']['rotulo']} "
-            f"(confiança: {result['resultado']['confianca']:.2%})"
+            "Predição concluída: %s (confiança: %.2f%%)",
+            result['resultado']['rotulo'], 100 * result['resultado']['confianca']
         )
         
         return result
@@ -96,6 +228,14 @@ async def predict(
         logger.error(f"Erro na predição: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
     
+    except ServiceOverloadedException as e:
+        logger.warning(f"Pipeline sobrecarregado: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    except DeadlineExceededException as e:
+        logger.warning(f"Prazo expirado: {file.filename}")
+        raise HTTPException(status_code=504, detail=str(e))
+    
     except Exception as e:
         logger.error(f"Erro inesperado: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -108,15 +248,217 @@ async def predict(
         await file.close()
 
 
-@router.post("/predict/batch")
-async def predict_batch():
+async def _predict_many(
+    images: List[tuple],
+    priority: int = PRIORIDADE_NORMAL,
+    deadline: Optional[float] = None
+) -> List[dict]:
+    """
+    Valida e prediz uma lista de (nome, dados) com inferência em batch.
+    
+    Retorna um resultado por imagem, na ordem recebida, com o erro
+    individual em "erro" quando a imagem falha.
+    """
+    started = time.perf_counter()
+    _check_audit()
+    
+    if pipeline is not None:
+        async def run(filename, image_data):
+            return await asyncio.wrap_future(
+                pipeline.submit(image_data, filename, priority=priority, deadline=deadline)
+            )
+        
+        # Imagens entram juntas no pipeline e são agrupadas na inferência
+        outcomes = await asyncio.gather(
+            *[run(filename, image_data) for filename, image_data in images],
+            return_exceptions=True
+        )
+    else:
+        outcomes = [None] * len(images)
+        valid = []
+        for i, (filename, image_data) in enumerate(images):
+            try:
+                validator.validate(image_data, filename)
+                valid.append(i)
+            except Exception as e:
+                outcomes[i] = e
+        
+        try:
+            _check_deadline(deadline)
+        except DeadlineExceededException as e:
+            outcomes = [outcome or e for outcome in outcomes]
+            valid = []
+        
+        results = predictor.predict_batch([images[i][1] for i in valid]) if valid else []
+        for i, result in zip(valid, results):
+            outcomes[i] = PredictionException(result["error"]) if "error" in result else result
+    
+    resultados = []
+    for (filename, image_data), outcome in zip(images, outcomes):
+        if isinstance(outcome, BaseException):
+            resultados.append({"arquivo": filename, "erro": getattr(outcome, "detail", str(outcome))})
+        else:
+            _audit(image_data, filename, outcome, started)
+            resultados.append({"arquivo": filename, **outcome})
+    
+    return resultados
+
+
+@router.post("/predict/batch", response_model=BatchPredictResponse)
+async def predict_batch(
+    request: Request,
+    files: Annotated[
+        List[UploadFile],
+        File(description="Radiografias torácicas (JPG, PNG)")
+    ]
+):
     """
     Predição em lote (múltiplas imagens).
     
-    Endpoint futuro para processar várias radiografias de uma vez.
-    Atualmente não implementado.
+    Processa várias radiografias numa única requisição, com inferência
+    em batch. Cada arquivo recebe seu próprio resultado ou erro, na
+    ordem de envio.
+    
+    Para lotes grandes (acima de `MAX_BATCH_FILES`), use `POST /jobs`.
+    Aceita os tensores de clientes leves e os headers `X-Priority` e
+    `X-Deadline-Ms` de `POST /predict`.
+    """
+    if len(files) > settings.MAX_BATCH_FILES:
+        raise HTTPException(
+            status_code=413,
+            detail=(
+                f"Máximo de {settings.MAX_BATCH_FILES} imagens por requisição. "
+                "Para lotes maiores, use POST /jobs."
+            )
+        )
+    
+    logger.info(f"Nova requisição de predição em lote: {len(files)} imagens")
+    scheduling = _scheduling(request)
+    
+    try:
+        images = [(file.filename, await file.read()) for file in files]
+    finally:
+        for file in files:
+            await file.close()
+    
+    resultados = await _predict_many(images, **scheduling)
+    
+    return BatchPredictResponse(total=len(resultados), resultados=resultados)
+
+
+@router.post("/predict/archive")
+async def predict_archive(
+    request: Request,
+    formato: Optional[str] = Query(
+        None,
+        description="zip ou tar (padrão: deduzido do Content-Type)"
+    )
+):
+    """
+    Predição em streaming sobre um arquivo ZIP ou TAR.
+    
+    O corpo da requisição é o próprio arquivo compactado (não multipart),
+    lido de forma incremental, sem extrair para disco. Cada radiografia
+    passa pela validação e pelo pipeline em batches, e o resultado é
+    devolvido como uma linha NDJSON assim que o batch termina. A última
+    linha traz `{"fim": true, "total": ..., "falhas": ...}`. O header
+    `X-Priority` define a faixa de prioridade das imagens no pipeline.
+    
+    ## Exemplo de Uso
+    ```bash
+    curl -X POST "http://localhost:8000/predict/archive" \\
+         -H "Content-Type: application/zip" \\
+         --data-binary @radiografias.zip
+    ```
+    """
+    content_type = request.headers.get("content-type", "").lower()
+    scheduling = _scheduling(request)
+    kind = (formato or "").lower()
+    if not kind:
+        # "gzip" também contém "zip": testar os tipos tar primeiro
+        if any(t in content_type for t in ("tar", "gzip", "bzip2", "xz")):
+            kind = "tar"
+        elif "zip" in content_type:
+            kind = "zip"
+    
+    if kind not in ("zip", "tar"):
+        raise HTTPException(
+            status_code=415,
+            detail="Envie um arquivo ZIP ou TAR (Content-Type ou ?formato=zip|tar)."
+        )
+    
+    logger.info(f"Nova predição em streaming: arquivo {kind}")
+    
+    stream = ArchivePredictionStream(
+        kind,
+        predictor=predictor,
+        validator=validator,
+        pipeline=pipeline,
+        batch_size=settings.MAX_BATCH_SIZE,
+        priority=scheduling["priority"],
+        audit=audit,
+        request_id=current_request_id()
+    )
+    
+    return DuplexStreamingResponse(
+        stream.run(request.stream()),
+        media_type="application/x-ndjson"
+    )
+
+
+@router.post("/predict/path", response_model=BatchPredictResponse)
+async def predict_path(request: Request, body: PathPredictRequest):
+    """
+    Predição de radiografias em volume montado.
+    
+    Lê as imagens diretamente do disco compartilhado, sem upload
+    multipart. Os caminhos são relativos a `MOUNTED_IMAGES_ROOT`;
+    caminhos fora desse diretório são recusados. A validação e a
+    inferência em batch são as mesmas de `POST /predict/batch`,
+    incluindo os headers `X-Priority` e `X-Deadline-Ms`.
+    
+    ## Exemplo de Uso
+    ```bash
+    curl -X POST "http://localhost:8000/predict/path" \\
+         -H "Content-Type: application/json" \\
+         -d '{"caminhos": ["estudo-123/pa.png"]}'
+    ```
     """
-    raise HTTPException(
-        status_code=501,
-        detail="Predição em lote não implementada ainda. Use /predict para imagens individuais."
-    )
\ No newline at end of file
+    root = settings.MOUNTED_IMAGES_ROOT
+    if not root:
+        raise HTTPException(
+            status_code=403,
+            detail="Predição por caminho desabilitada (configure MOUNTED_IMAGES_ROOT)."
+        )
+    
+    if len(body.caminhos) > settings.MAX_BATCH_FILES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Máximo de {settings.MAX_BATCH_FILES} caminhos por requisição."
+        )
+    
+    try:
+        paths = [resolve_mounted_path(root, caminho) for caminho in body.caminhos]
+    except PermissionError as e:
+        logger.warning(f"Caminho recusado: {str(e)}")
+        raise HTTPException(status_code=403, detail=str(e))
+    except ValueError as e:
+        logger.warning(f"Caminho inválido: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    logger.info(f"Nova predição por caminho: {len(paths)} imagens")
+    scheduling = _scheduling(request)
+    
+    images = []
+    failures = {}
+    for i, (caminho, path) in enumerate(zip(body.caminhos, paths)):
+        try:
+            images.append((caminho, await asyncio.to_thread(read_mounted, path, validator.max_size_bytes)))
+        except FileNotFoundError:
+            failures[i] = {"arquivo": caminho, "erro": "Arquivo não encontrado"}
+        except (OSError, ValueError) as e:
+            failures[i] = {"arquivo": caminho, "erro": str(e)}
+    
+    resultados = iter(await _predict_many(images, **scheduling))
+    resultados = [failures[i] if i in failures else next(resultados) for i in range(len(paths))]
+    return BatchPredictResponse(total=len(resultados), resultados=resultados)
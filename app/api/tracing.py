@@ -0,0 +1,47 @@
+# ==================== app/api/tracing.py ====================
+"""Rotas do FastAPI com spans do endpoint e da serialização da resposta"""
+import asyncio
+import functools
+import time
+
+from fastapi.routing import APIRoute
+
+from app.utils.async_logging import add_timing
+from app.utils.tracing import current_context, span
+
+
+class TracedRoute(APIRoute):
+    """
+    Separa o tempo do endpoint (span "endpoint") do tempo da validação e
+    serialização da resposta pelo FastAPI (span "serializacao").
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        if asyncio.iscoroutinefunction(endpoint):
+            original = endpoint
+
+            @functools.wraps(original)
+            async def endpoint(*args, **kw):
+                with span("endpoint"):
+                    return await original(*args, **kw)
+
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def traced_handler(request):
+            trace, _ = current_context()
+            response = await handler(request)
+            if trace is not None:
+                # Do fim do endpoint até a resposta pronta
+                endpoint = next(
+                    (s for s in reversed(trace.spans) if s.name == "endpoint" and s.end_ns), None
+                )
+                if endpoint is not None:
+                    end_ns = time.time_ns()
+                    trace.record("serializacao", endpoint.end_ns, end_ns)
+                    add_timing("serializacao", (end_ns - endpoint.end_ns) / 1e9)
+            return response
+
+        return traced_handler
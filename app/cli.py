@@ -0,0 +1,544 @@
+"""
+PulmoVision CLI
+Ferramentas de linha de comando que reutilizam configurações e modelo da API
+
+Uso:
+    python -m app.cli predict-dir /dados/radiografias --output resultados.csv
+    python -m app.cli cascade-eval /dados/validacao
+    python -m app.cli autotune --slo-ms 300
+    python -m app.cli build-index /dados/casos_confirmados --lists 256
+    python -m app.cli drift-baseline /dados/validacao
+"""
+
+import argparse
+import csv
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+from app.config import settings
+from app.utils.logging import setup_logging
+
+logger = logging.getLogger("app.cli")
+
+
+# ==================== predict-dir ====================
+
+def _list_images(directory: Path, recursive: bool) -> List[str]:
+    """Lista as imagens do diretório em ordem estável (necessária para retomar)."""
+    pattern = "**/*" if recursive else "*"
+    return sorted(
+        str(path) for path in directory.glob(pattern)
+        if path.is_file() and path.suffix.lower().lstrip(".") in settings.ALLOWED_EXTENSIONS
+    )
+
+
+def _build_dataset(paths: List[str], batch_size: int, image_size: int = None):
+    """
+    Pipeline tf.data: leitura paralela, decode, resize e normalização.
+
+    Equivale a Predictor._preprocess: RGB, resize bilinear para
+    IMAGE_SIZE (com antialias e quantização em uint8, como o PIL) e
+    normalização para [-1, 1].
+    """
+    import tensorflow as tf
+
+    size = image_size or settings.IMAGE_SIZE
+
+    def load(path):
+        data = tf.io.read_file(path)
+        img = tf.io.decode_image(data, channels=3, expand_animations=False)
+        img = tf.image.resize(img, (size, size), method="bilinear", antialias=True)
+        img = tf.cast(tf.round(tf.clip_by_value(img, 0.0, 255.0)), tf.float32)
+        img = img / 127.5 - 1.0
+        return path, img
+
+    dataset = tf.data.Dataset.from_tensor_slices(paths)
+    dataset = dataset.map(load, num_parallel_calls=tf.data.AUTOTUNE, deterministic=True)
+    # Arquivos corrompidos são descartados aqui e reportados ao final
+    dataset = dataset.ignore_errors()
+    dataset = dataset.batch(batch_size)
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+class _CsvWriter:
+    """Escrita incremental em CSV (append, compatível com retomada)."""
+
+    def __init__(self, path: Path, columns: List[str]):
+        exists = path.exists() and path.stat().st_size > 0
+        self._file = open(path, "a", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=columns)
+        if not exists:
+            self._writer.writeheader()
+
+    def write(self, rows: List[dict]):
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetWriter:
+    """Escrita incremental em Parquet: um row group por batch, um arquivo por execução."""
+
+    def __init__(self, path: Path, columns: List[str]):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Saída Parquet requer pyarrow: pip install pyarrow")
+
+        # Parquet não aceita append: cada execução (retomada) gera uma parte
+        part = 0
+        while path.with_suffix(f".part{part:04d}.parquet").exists():
+            part += 1
+
+        self._pa = pa
+        self._schema = pa.schema([
+            (c, pa.float32() if c.startswith("prob_") or c == "confianca" else pa.string())
+            for c in columns
+        ])
+        self._writer = pq.ParquetWriter(
+            str(path.with_suffix(f".part{part:04d}.parquet")), self._schema
+        )
+
+    def write(self, rows: List[dict]):
+        table = self._pa.Table.from_pylist(rows, schema=self._schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        self._writer.close()
+
+
+def cmd_predict_dir(args):
+    """Predição em massa de um diretório local."""
+    import numpy as np
+    from app.core.model_loader import get_model
+
+    directory = Path(args.directory)
+    output = Path(args.output)
+    output_format = args.format or ("parquet" if output.suffix == ".parquet" else "csv")
+    checkpoint = Path(args.checkpoint or f"{output}.done")
+
+    paths = _list_images(directory, args.recursive)
+
+    done = set()
+    if checkpoint.exists():
+        done = set(checkpoint.read_text(encoding="utf-8").splitlines())
+        logger.info("Retomando: %d imagens já processadas", len(done))
+
+    pending = [p for p in paths if p not in done]
+    logger.info("%d imagens encontradas, %d pendentes", len(paths), len(pending))
+    if not pending:
+        return
+
+    columns = ["arquivo", "rotulo", "confianca"] + [f"prob_{c}" for c in settings.CLASSES] + ["erro"]
+    writer_cls = _ParquetWriter if output_format == "parquet" else _CsvWriter
+    writer = writer_cls(output, columns)
+
+    model = get_model()
+    dataset = _build_dataset(pending, args.batch_size)
+
+    processed = 0
+    start = time.perf_counter()
+
+    try:
+        with open(checkpoint, "a", encoding="utf-8") as done_file:
+            for batch_paths, images in dataset:
+                predictions = model.predict_on_batch(images)
+                predictions = np.asarray(predictions)
+                batch_paths = [p.decode("utf-8") for p in batch_paths.numpy()]
+
+                rows = []
+                for path, probs in zip(batch_paths, predictions):
+                    idx = int(np.argmax(probs))
+                    row = {
+                        "arquivo": path,
+                        "rotulo": settings.CLASSES[idx],
+                        "confianca": float(probs[idx]),
+                        "erro": None,
+                    }
+                    row.update({f"prob_{c}": float(probs[i]) for i, c in enumerate(settings.CLASSES)})
+                    rows.append(row)
+
+                # Resultado primeiro, checkpoint depois: uma falha entre os dois
+                # repete no máximo um batch na retomada
+                writer.write(rows)
+                done_file.write("".join(f"{p}\n" for p in batch_paths))
+                done_file.flush()
+                done.update(batch_paths)
+
+                processed += len(rows)
+                elapsed = time.perf_counter() - start
+                logger.info(
+                    "%d/%d imagens (%.0f imagens/min)",
+                    processed, len(pending), 60 * processed / elapsed
+                )
+
+            # Arquivos descartados pelo tf.data (corrompidos/ilegíveis)
+            failed = [p for p in pending if p not in done]
+            if failed:
+                writer.write([
+                    {"arquivo": p, "erro": "Imagem corrompida ou inválida"} for p in failed
+                ])
+                done_file.write("".join(f"{p}\n" for p in failed))
+                logger.warning("%d imagens não puderam ser decodificadas", len(failed))
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    logger.info(
+        "Concluído: %d imagens em %.1fs (%.0f imagens/min) -> %s",
+        processed, elapsed, 60 * processed / max(elapsed, 1e-9), output
+    )
+
+
+# ==================== cascade-eval ====================
+
+def _list_labelled(directory: Path, labels_csv: str = None):
+    """
+    Imagens rotuladas: CSV (arquivo,rotulo) ou um subdiretório por classe.
+    """
+    if labels_csv:
+        with open(labels_csv, newline="", encoding="utf-8") as f:
+            return [
+                (str(directory / row["arquivo"]), row["rotulo"])
+                for row in csv.DictReader(f)
+                if row["rotulo"] in settings.CLASSES
+            ]
+
+    return [
+        (path, classe)
+        for classe in settings.CLASSES
+        if (directory / classe).is_dir()
+        for path in _list_images(directory / classe, recursive=True)
+    ]
+
+
+def cmd_cascade_eval(args):
+    """Avalia limiares da cascata (triagem -> completo) num conjunto rotulado."""
+    import numpy as np
+    from app.core.model_loader import get_model, get_screening_model
+
+    if args.screening_model:
+        settings.SCREENING_MODEL_PATH = args.screening_model
+
+    samples = _list_labelled(Path(args.directory), args.labels)
+    if not samples:
+        raise SystemExit(
+            f"Nenhuma imagem rotulada em {args.directory} "
+            f"(use subdiretórios {', '.join(settings.CLASSES)} ou --labels)"
+        )
+    labels = dict(samples)
+    logger.info("%d imagens rotuladas", len(samples))
+
+    full_model = get_model()
+    screening_model = get_screening_model()
+    screening_size = settings.SCREENING_IMAGE_SIZE or None
+
+    import tensorflow as tf
+
+    # Aquecer os dois modelos: a compilação não entra no custo medido
+    full_model.predict_on_batch(np.zeros((1, settings.IMAGE_SIZE, settings.IMAGE_SIZE, 3), np.float32))
+    size = screening_size or settings.IMAGE_SIZE
+    screening_model.predict_on_batch(np.zeros((1, size, size, 3), np.float32))
+
+    paths, y_true, screening, full = [], [], [], []
+    screening_seconds = full_seconds = 0.0
+
+    for batch_paths, images in _build_dataset([p for p, _ in samples], args.batch_size):
+        screening_images = images
+        if screening_size and screening_size != images.shape[1]:
+            screening_images = tf.image.resize(
+                images, (screening_size, screening_size), antialias=True
+            )
+
+        start = time.perf_counter()
+        screening.append(np.asarray(screening_model.predict_on_batch(screening_images)))
+        screening_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        full.append(np.asarray(full_model.predict_on_batch(images)))
+        full_seconds += time.perf_counter() - start
+
+        for path in batch_paths.numpy():
+            path = path.decode("utf-8")
+            paths.append(path)
+            y_true.append(settings.CLASSES.index(labels[path]))
+
+    if not paths:
+        raise SystemExit("Nenhuma imagem pôde ser decodificada")
+
+    y_true = np.array(y_true)
+    screening = np.concatenate(screening)
+    full = np.concatenate(full)
+    n = len(y_true)
+
+    screening_ms = 1000 * screening_seconds / n
+    full_ms = 1000 * full_seconds / n
+    screening_conf = screening.max(axis=1)
+    screening_pred = screening.argmax(axis=1)
+    full_pred = full.argmax(axis=1)
+    full_accuracy = float(np.mean(full_pred == y_true))
+
+    thresholds = (
+        [float(t) for t in args.thresholds.split(",")] if args.thresholds
+        else [round(t, 2) for t in np.arange(0.5, 1.0, 0.05)] + [0.97, 0.99]
+    )
+
+    rows = []
+    for threshold in thresholds:
+        escalated = screening_conf < threshold
+        decided = ~escalated
+        cascade_pred = np.where(escalated, full_pred, screening_pred)
+        rows.append({
+            "limiar": threshold,
+            "taxa_escalonamento": float(escalated.mean()),
+            "acuracia_cascata": float(np.mean(cascade_pred == y_true)),
+            "acuracia_completo": full_accuracy,
+            "acuracia_triagem_decididas": (
+                float(np.mean(screening_pred[decided] == y_true[decided])) if decided.any() else None
+            ),
+            "custo_relativo": (screening_ms + escalated.mean() * full_ms) / full_ms,
+        })
+
+    print(f"\nImagens: {n} | triagem {screening_ms:.2f} ms/img | completo {full_ms:.2f} ms/img")
+    print(f"Acurácia só com o modelo completo: {full_accuracy:.4f}\n")
+    print(f"{'limiar':>7} {'escalon.':>9} {'acur.':>7} {'acur.triagem':>13} {'custo':>7}")
+    for row in rows:
+        decided_accuracy = row["acuracia_triagem_decididas"]
+        print(
+            f"{row['limiar']:>7.2f} {row['taxa_escalonamento']:>9.1%} "
+            f"{row['acuracia_cascata']:>7.4f} "
+            f"{decided_accuracy if decided_accuracy is not None else float('nan'):>13.4f} "
+            f"{row['custo_relativo']:>7.2f}"
+        )
+
+    # Menor custo mantendo a acurácia dentro da tolerância
+    eligible = [r for r in rows if r["acuracia_cascata"] >= full_accuracy - args.max_accuracy_drop]
+    if eligible:
+        best = min(eligible, key=lambda r: r["custo_relativo"])
+        print(
+            f"\nSugestão: CASCADE_THRESHOLD={best['limiar']:.2f} "
+            f"(custo {best['custo_relativo']:.2f}x, acurácia {best['acuracia_cascata']:.4f})"
+        )
+    else:
+        print("\nNenhum limiar mantém a acurácia dentro da tolerância")
+
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        logger.info("Resultados salvos em %s", args.output)
+
+
+# ==================== autotune ====================
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",")]
+
+
+def cmd_autotune(args):
+    """Varredura de threads/batch/workers e persistência do resultado."""
+    from app.core import autotune
+
+    threads = None
+    if args.threads:
+        threads = [tuple(int(v) for v in pair.split("x")) for pair in args.threads.split(",")]
+
+    best, candidates = autotune.tune_full(
+        threads=threads,
+        batch_sizes=_int_list(args.batch_sizes) if args.batch_sizes else None,
+        workers_options=_int_list(args.workers) if args.workers else None,
+        duration=args.duration,
+        slo_ms=args.slo_ms
+    )
+
+    print(f"\n{'intra':>5} {'inter':>5} {'batch':>5} {'workers':>7} {'img/s':>9} {'p95 ms':>8}")
+    for c in sorted(candidates, key=lambda c: -c["throughput_ips"]):
+        print(
+            f"{c['intra_op_threads']:>5} {c['inter_op_threads']:>5} {c['batch_size']:>5} "
+            f"{c['workers']:>7} {c['throughput_ips']:>9.1f} {c['latencia_p95_ms']:>8.1f}"
+        )
+
+    print(
+        f"\nEscolhido (SLO p95 {best['slo_ms']:.0f} ms): threads {best['intra_op_threads']}x"
+        f"{best['inter_op_threads']}, batch {best['max_batch_size']}, "
+        f"workers {best['inference_workers']} -> {best['throughput_ips']:.1f} img/s"
+    )
+
+    if not args.dry_run:
+        autotune.save_tuning(best)
+        logger.info(
+            "Resultado salvo em %s (use AUTOTUNE_ENABLED=True para aplicar)",
+            settings.AUTOTUNE_CACHE_PATH
+        )
+
+
+# ==================== build-index ====================
+
+def cmd_build_index(args):
+    """Índice de casos semelhantes a partir de um conjunto rotulado de casos confirmados."""
+    import numpy as np
+    from app.core.model_cache import model_fingerprint
+    from app.core.model_loader import get_embedding_model, get_model
+    from app.core.vector_index import build_index
+
+    directory = Path(args.directory)
+    samples = _list_labelled(directory, args.labels)
+    if not samples:
+        raise SystemExit(
+            f"Nenhuma imagem rotulada em {args.directory} "
+            f"(use subdiretórios {', '.join(settings.CLASSES)} ou --labels)"
+        )
+    labels = dict(samples)
+    logger.info("%d casos de referência", len(samples))
+
+    model = get_embedding_model()
+    dataset = _build_dataset([path for path, _ in samples], args.batch_size)
+
+    cases, chunks = [], []
+    start = time.perf_counter()
+    for batch_paths, images in dataset:
+        _, embeddings = model.predict_on_batch(images)
+        chunks.append(np.asarray(embeddings, dtype=np.float32))
+        for path in batch_paths.numpy():
+            path = path.decode("utf-8")
+            cases.append({"arquivo": str(Path(path).relative_to(directory)), "rotulo": labels[path]})
+        logger.info("%d/%d embeddings", len(cases), len(samples))
+
+    skipped = len(samples) - len(cases)
+    if skipped:
+        logger.warning("%d imagens não puderam ser decodificadas", skipped)
+
+    output = args.output or settings.SIMILARITY_INDEX_PATH
+    if not output:
+        raise SystemExit("Informe --output ou defina SIMILARITY_INDEX_PATH")
+
+    manifest = build_index(
+        np.concatenate(chunks),
+        cases,
+        output,
+        n_lists=args.lists,
+        model=model_fingerprint(settings.MODEL_PATH),
+        layer=settings.EMBEDDING_LAYER or f"entrada de {get_model().layers[-1].name}"
+    )
+    logger.info(
+        "Índice gravado em %s: %d casos, dimensão %d, %d listas (%.1fs)",
+        output, manifest["total"], manifest["dimensao"], manifest["listas"],
+        time.perf_counter() - start
+    )
+
+
+# ==================== drift-baseline ====================
+
+def cmd_drift_baseline(args):
+    """Linha de base do monitor de deriva a partir de um conjunto de referência."""
+    from app.core.drift import DriftMonitor
+    from app.core.predictor import Predictor
+
+    paths = _list_images(Path(args.directory), recursive=True)
+    if not paths:
+        raise SystemExit(f"Nenhuma imagem em {args.directory}")
+
+    # Mesmo caminho das requisições (decode, características, predição),
+    # com uma única janela cobrindo todo o conjunto
+    monitor = DriftMonitor(settings.CLASSES, window_size=len(paths) + 1, windows=1)
+    predictor = Predictor()
+    predictor.drift = monitor
+    # Todas as imagens passam pelo modelo e pelo monitor, mesmo as já em cache
+    predictor.result_cache = None
+
+    failed = 0
+    for start in range(0, len(paths), args.batch_size):
+        chunk = paths[start:start + args.batch_size]
+        images = [Path(path).read_bytes() for path in chunk]
+        failed += sum("error" in result for result in predictor.predict_batch(images))
+        logger.info("%d/%d imagens", min(start + args.batch_size, len(paths)), len(paths))
+
+    if failed:
+        logger.warning("%d imagens não puderam ser processadas", failed)
+
+    output = args.output or settings.DRIFT_BASELINE_PATH
+    baseline = monitor.save(output)
+    logger.info("Linha de base gravada em %s: %d observações", output, baseline["observacoes"])
+
+
+# ==================== main ====================
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="PulmoVision CLI")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    predict_dir = subparsers.add_parser(
+        "predict-dir", help="Predição em massa de radiografias em disco local"
+    )
+    predict_dir.add_argument("directory", help="Diretório com as radiografias")
+    predict_dir.add_argument("--output", "-o", required=True, help="Arquivo de saída (.csv ou .parquet)")
+    predict_dir.add_argument("--format", choices=["csv", "parquet"], default=None,
+                             help="Formato de saída (padrão: pela extensão)")
+    predict_dir.add_argument("--batch-size", type=int, default=64)
+    predict_dir.add_argument("--checkpoint", help="Arquivo de checkpoint (padrão: <output>.done)")
+    predict_dir.add_argument("--recursive", "-r", action="store_true", help="Incluir subdiretórios")
+    predict_dir.set_defaults(func=cmd_predict_dir)
+
+    cascade_eval = subparsers.add_parser(
+        "cascade-eval", help="Escolha do limiar da cascata num conjunto rotulado"
+    )
+    cascade_eval.add_argument("directory", help="Diretório com um subdiretório por classe")
+    cascade_eval.add_argument("--labels", help="CSV com colunas arquivo,rotulo (relativo ao diretório)")
+    cascade_eval.add_argument("--screening-model", help="Modelo de triagem (padrão: SCREENING_MODEL_PATH)")
+    cascade_eval.add_argument("--thresholds", help="Limiares separados por vírgula (padrão: 0.50 a 0.99)")
+    cascade_eval.add_argument("--max-accuracy-drop", type=float, default=0.005,
+                              help="Perda de acurácia tolerada na sugestão (padrão: 0.005)")
+    cascade_eval.add_argument("--batch-size", type=int, default=64)
+    cascade_eval.add_argument("--output", "-o", help="Salvar a tabela em CSV")
+    cascade_eval.set_defaults(func=cmd_cascade_eval)
+
+    tune = subparsers.add_parser(
+        "autotune", help="Ajuste de threads, batch e workers para este host e modelo"
+    )
+    tune.add_argument("--slo-ms", type=float, default=None,
+                      help="Latência p95 máxima por batch (padrão: AUTOTUNE_SLO_MS)")
+    tune.add_argument("--duration", type=float, default=None,
+                      help="Segundos por medição (padrão: AUTOTUNE_DURATION)")
+    tune.add_argument("--threads", help="Combinações intra x inter, ex.: 8x1,4x2")
+    tune.add_argument("--batch-sizes", help="Ex.: 1,4,8,16")
+    tune.add_argument("--workers", help="Ex.: 1,2")
+    tune.add_argument("--dry-run", action="store_true", help="Não salvar o resultado")
+    tune.set_defaults(func=cmd_autotune)
+
+    index = subparsers.add_parser(
+        "build-index", help="Índice de casos semelhantes (embeddings de casos confirmados)"
+    )
+    index.add_argument("directory", help="Diretório com um subdiretório por classe")
+    index.add_argument("--labels", help="CSV com colunas arquivo,rotulo (relativo ao diretório)")
+    index.add_argument("--output", "-o", help="Diretório do índice (padrão: SIMILARITY_INDEX_PATH)")
+    index.add_argument("--lists", type=int, default=0,
+                       help="Listas invertidas para a busca aproximada (0 = só exata)")
+    index.add_argument("--batch-size", type=int, default=64)
+    index.set_defaults(func=cmd_build_index)
+
+    drift = subparsers.add_parser(
+        "drift-baseline", help="Linha de base do monitor de deriva (ex.: conjunto de validação)"
+    )
+    drift.add_argument("directory", help="Diretório com as radiografias (inclui subdiretórios)")
+    drift.add_argument("--output", "-o", help="Arquivo JSON (padrão: DRIFT_BASELINE_PATH)")
+    drift.add_argument("--batch-size", type=int, default=64)
+    drift.set_defaults(func=cmd_drift_baseline)
+
+    return parser
+
+
+def main(argv=None):
+    setup_logging()
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
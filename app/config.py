@@ -3,7 +3,7 @@ Configurações da API PulmoVision
 """
 
 import os
-from typing import List
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -40,6 +40,24 @@ class Settings(BaseSettings):
     MODEL_VERSION: str = Field(default="1.0.0", env="MODEL_VERSION")
     MODEL_ARCHITECTURE: str = Field(default="EfficientNetB0", env="MODEL_ARCHITECTURE")
     
+    # Carregamento rápido: pesos convertidos e lidos (mmap) a partir do cache.
+    # Só reduz o tempo de carregamento; cada processo mantém sua cópia dos pesos
+    MODEL_FAST_LOAD: bool = Field(default=False, env="MODEL_FAST_LOAD")
+    MODEL_CACHE_DIR: str = Field(default="./data/model_cache", env="MODEL_CACHE_DIR")
+    
+    # Cascata: modelo de triagem rápido antes do modelo completo
+    CASCADE_ENABLED: bool = Field(default=False, env="CASCADE_ENABLED")
+    SCREENING_MODEL_PATH: Optional[str] = Field(default=None, env="SCREENING_MODEL_PATH")
+    SCREENING_IMAGE_SIZE: int = Field(default=0, env="SCREENING_IMAGE_SIZE")  # 0 = IMAGE_SIZE
+    CASCADE_THRESHOLD: float = Field(default=0.9, env="CASCADE_THRESHOLD")
+    
+    # Casos semelhantes (/predict?similar=k): índice de embeddings de casos
+    # confirmados, gerado com `python -m app.cli build-index`
+    SIMILARITY_INDEX_PATH: Optional[str] = Field(default=None, env="SIMILARITY_INDEX_PATH")
+    SIMILARITY_NPROBE: int = Field(default=8, env="SIMILARITY_NPROBE")  # 0 = busca exata
+    SIMILARITY_MAX_K: int = Field(default=20, env="SIMILARITY_MAX_K")
+    EMBEDDING_LAYER: Optional[str] = Field(default=None, env="EMBEDDING_LAYER")  # padrão: entrada do classificador
+    
     # Classes
     CLASSES: List[str] = ["normal", "pneumonia", "tuberculose"]
     
@@ -47,10 +65,133 @@ class Settings(BaseSettings):
     IMAGE_SIZE: int = Field(default=224, env="IMAGE_SIZE")
     MAX_IMAGE_SIZE_MB: int = Field(default=10, env="MAX_IMAGE_SIZE_MB")
     ALLOWED_EXTENSIONS: List[str] = ["jpg", "jpeg", "png"]
+    # Clientes leves: tensores uint8 (.npy ou PVT1) já em IMAGE_SIZE, sem decode
+    TENSOR_INPUT_ENABLED: bool = Field(default=True, env="TENSOR_INPUT_ENABLED")
+    
+    # Pool de preprocessamento (0 = preprocessa na thread da requisição)
+    PREPROCESS_WORKERS: int = Field(default=0, env="PREPROCESS_WORKERS")
+    PREPROCESS_SLOTS: int = Field(default=32, env="PREPROCESS_SLOTS")
+    
+    # Pipeline de inferência (estágios conectados por filas limitadas)
+    PIPELINE_ENABLED: bool = Field(default=True, env="PIPELINE_ENABLED")
+    PIPELINE_DECODE_WORKERS: int = Field(default=2, env="PIPELINE_DECODE_WORKERS")
+    PIPELINE_PREPROCESS_WORKERS: int = Field(default=1, env="PIPELINE_PREPROCESS_WORKERS")
+    PIPELINE_INFERENCE_WORKERS: int = Field(default=1, env="PIPELINE_INFERENCE_WORKERS")
+    PIPELINE_FORMAT_WORKERS: int = Field(default=1, env="PIPELINE_FORMAT_WORKERS")
+    PIPELINE_QUEUE_SIZE: int = Field(default=64, env="PIPELINE_QUEUE_SIZE")
+    MAX_BATCH_SIZE: int = Field(default=8, env="MAX_BATCH_SIZE")
+    BATCH_TIMEOUT_MS: float = Field(default=0.0, env="BATCH_TIMEOUT_MS")
+    MAX_BATCH_FILES: int = Field(default=32, env="MAX_BATCH_FILES")
+    
+    # Threads do TensorFlow (0 = padrão) e autotune por host/modelo
+    TF_INTRA_OP_THREADS: int = Field(default=0, env="TF_INTRA_OP_THREADS")
+    TF_INTER_OP_THREADS: int = Field(default=0, env="TF_INTER_OP_THREADS")
+    AUTOTUNE_ENABLED: bool = Field(default=False, env="AUTOTUNE_ENABLED")
+    AUTOTUNE_SLO_MS: float = Field(default=500.0, env="AUTOTUNE_SLO_MS")
+    AUTOTUNE_DURATION: float = Field(default=2.0, env="AUTOTUNE_DURATION")
+    AUTOTUNE_MAX_BATCH_SIZE: int = Field(default=32, env="AUTOTUNE_MAX_BATCH_SIZE")
+    AUTOTUNE_CACHE_PATH: str = Field(default="./data/autotune.json", env="AUTOTUNE_CACHE_PATH")
+    
+    # Predição por caminho em volume montado (desabilitada se vazio)
+    MOUNTED_IMAGES_ROOT: Optional[str] = Field(default=None, env="MOUNTED_IMAGES_ROOT")
+    
+    # Controle de admissão, desligado por padrão (limites com valor 0 ficam desativados)
+    ADMISSION_ENABLED: bool = Field(default=False, env="ADMISSION_ENABLED")
+    ADMISSION_PATHS: List[str] = ["/predict", "/jobs"]
+    RATE_LIMIT_PER_MINUTE: int = Field(default=60, env="RATE_LIMIT_PER_MINUTE")
+    RATE_LIMIT_BURST: int = Field(default=10, env="RATE_LIMIT_BURST")
+    ADMISSION_API_KEYS: List[str] = Field(default=[], env="ADMISSION_API_KEYS")  # X-API-Key com limite próprio; as demais contam pelo IP
+    TRUSTED_PROXIES: List[str] = Field(default=[], env="TRUSTED_PROXIES")  # IPs/CIDRs cujo X-Forwarded-For vale (ex.: o roteador)
+    MAX_CONCURRENT_REQUESTS: int = Field(default=16, env="MAX_CONCURRENT_REQUESTS")
+    SHED_QUEUE_DEPTH: int = Field(default=48, env="SHED_QUEUE_DEPTH")
+    SHED_RSS_MB: int = Field(default=0, env="SHED_RSS_MB")
+    
+    # Reciclagem do worker (drena e encerra com SIGTERM; 0 = desativado)
+    RECYCLE_MAX_REQUESTS: int = Field(default=0, env="RECYCLE_MAX_REQUESTS")
+    RECYCLE_MAX_RSS_MB: int = Field(default=0, env="RECYCLE_MAX_RSS_MB")
+    RECYCLE_JITTER: float = Field(default=0.1, env="RECYCLE_JITTER")
+    RECYCLE_DRAIN_TIMEOUT: float = Field(default=30.0, env="RECYCLE_DRAIN_TIMEOUT")
+    
+    # Amostragem de saúde em segundo plano (/health e /health/history)
+    HEALTH_SAMPLE_INTERVAL: float = Field(default=5.0, env="HEALTH_SAMPLE_INTERVAL")
+    HEALTH_HISTORY_SIZE: int = Field(default=120, env="HEALTH_HISTORY_SIZE")  # 10 min com 5 s
+    
+    # Monitor de deriva das entradas (GET /drift), desligado por padrão;
+    # linha de base gerada com `python -m app.cli drift-baseline`
+    DRIFT_ENABLED: bool = Field(default=False, env="DRIFT_ENABLED")
+    DRIFT_BASELINE_PATH: str = Field(default="./data/drift_baseline.json", env="DRIFT_BASELINE_PATH")
+    DRIFT_WINDOW_SIZE: int = Field(default=500, env="DRIFT_WINDOW_SIZE")  # predições por janela
+    DRIFT_WINDOWS: int = Field(default=12, env="DRIFT_WINDOWS")  # janelas fechadas mantidas
+    
+    # Auditoria das predições (segmentos SQLite diários, gravados em lotes); desligada por padrão
+    AUDIT_ENABLED: bool = Field(default=False, env="AUDIT_ENABLED")
+    AUDIT_DIR: str = Field(default="./data/audit", env="AUDIT_DIR")
+    AUDIT_QUEUE_SIZE: int = Field(default=10000, env="AUDIT_QUEUE_SIZE")
+    AUDIT_BATCH_SIZE: int = Field(default=256, env="AUDIT_BATCH_SIZE")
+    AUDIT_FLUSH_INTERVAL: float = Field(default=1.0, env="AUDIT_FLUSH_INTERVAL")  # perda máxima num crash
+    AUDIT_SYNCHRONOUS: str = Field(default="NORMAL", env="AUDIT_SYNCHRONOUS")  # OFF, NORMAL ou FULL
+    AUDIT_ON_FULL: str = Field(default="descartar", env="AUDIT_ON_FULL")  # descartar ou rejeitar (503)
+    
+    # Cache de resultados compartilhado pelos workers do nó (hash do conteúdo + versão do modelo);
+    # em tmpfs (ex.: /dev/shm/pulmovision-resultados.sqlite3) fica todo em memória. Desligado por padrão
+    RESULT_CACHE_ENABLED: bool = Field(default=False, env="RESULT_CACHE_ENABLED")
+    RESULT_CACHE_PATH: str = Field(default="./data/result_cache.sqlite3", env="RESULT_CACHE_PATH")
+    RESULT_CACHE_MAX_ENTRIES: int = Field(default=100000, env="RESULT_CACHE_MAX_ENTRIES")
+    RESULT_CACHE_TOUCH_INTERVAL: float = Field(default=60.0, env="RESULT_CACHE_TOUCH_INTERVAL")  # precisão do LRU (s)
+    
+    # Serviço gRPC interno (app/rpc), no mesmo processo e pipeline da API HTTP
+    GRPC_ENABLED: bool = Field(default=False, env="GRPC_ENABLED")
+    GRPC_PORT: int = Field(default=50051, env="GRPC_PORT")
+    GRPC_MAX_WORKERS: int = Field(default=16, env="GRPC_MAX_WORKERS")  # chamadas/streams simultâneos
+    GRPC_STREAM_WINDOW: int = Field(default=32, env="GRPC_STREAM_WINDOW")  # imagens pendentes por stream
+    
+    # Roteador com afinidade de cache (app.router.main) na frente de várias instâncias
+    ROUTER_BACKENDS: List[str] = Field(default=[], env="ROUTER_BACKENDS")  # ex.: ["http://10.0.0.1:8000"]
+    ROUTER_PORT: int = Field(default=8080, env="ROUTER_PORT")
+    ROUTER_REPLICAS: int = Field(default=160, env="ROUTER_REPLICAS")  # pontos virtuais por instância
+    ROUTER_LOAD_FACTOR: float = Field(default=1.25, env="ROUTER_LOAD_FACTOR")  # carga máxima / média
+    ROUTER_MAX_ATTEMPTS: int = Field(default=3, env="ROUTER_MAX_ATTEMPTS")  # instâncias tentadas por requisição
+    ROUTER_TIMEOUT: float = Field(default=60.0, env="ROUTER_TIMEOUT")
+    ROUTER_HEALTH_INTERVAL: float = Field(default=5.0, env="ROUTER_HEALTH_INTERVAL")
+    
+    # Inferência numa frota separada de workers (python -m app.worker) via broker:
+    # "local" (modelo neste processo) ou "remote" (as APIs só decodificam e enfileiram).
+    # Em remote, cada thread de inferência do pipeline espera por um batch na frota:
+    # aumente PIPELINE_INFERENCE_WORKERS para manter vários batches em voo.
+    INFERENCE_MODE: str = Field(default="local", env="INFERENCE_MODE")
+    BROKER_URL: str = Field(default="memory://", env="BROKER_URL")  # memory:// (worker no processo) ou redis://host:6379/0
+    BROKER_QUEUE: str = Field(default="pulmovision:inferencia", env="BROKER_QUEUE")
+    REMOTE_TIMEOUT: float = Field(default=30.0, env="REMOTE_TIMEOUT")  # espera pela resposta da frota (s)
+    # Identidade do modelo dos workers (python -c "from app.worker import model_id; print(model_id())");
+    # vazio usa a do MODEL_PATH deste nó. Workers com outro modelo recusam as requisições.
+    REMOTE_MODEL: Optional[str] = Field(default=None, env="REMOTE_MODEL")
+    WORKER_BATCH_SIZE: int = Field(default=32, env="WORKER_BATCH_SIZE")  # mensagens por batch no worker
+    WORKER_POLL_TIMEOUT: float = Field(default=1.0, env="WORKER_POLL_TIMEOUT")
+    
+    # Jobs assíncronos (lotes offline persistidos em SQLite); desligados por padrão
+    JOBS_ENABLED: bool = Field(default=False, env="JOBS_ENABLED")
+    JOBS_DB_PATH: str = Field(default="./data/jobs.sqlite3", env="JOBS_DB_PATH")
+    JOBS_STORAGE_DIR: str = Field(default="./data/jobs", env="JOBS_STORAGE_DIR")
+    JOBS_WORKERS: int = Field(default=1, env="JOBS_WORKERS")
+    JOBS_BATCH_SIZE: int = Field(default=16, env="JOBS_BATCH_SIZE")
+    JOBS_POLL_INTERVAL: float = Field(default=1.0, env="JOBS_POLL_INTERVAL")
+    JOBS_MAX_FILES: int = Field(default=10000, env="JOBS_MAX_FILES")
+    JOBS_MAX_TOTAL_MB: int = Field(default=2048, env="JOBS_MAX_TOTAL_MB")  # imagens descompactadas por job
     
     # Logging
     LOG_LEVEL: str = Field(default="INFO", env="LOG_LEVEL")
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    LOG_JSON: bool = Field(default=False, env="LOG_JSON")  # uma linha JSON por registro
+    LOG_ASYNC: bool = Field(default=False, env="LOG_ASYNC")  # escrita numa thread dedicada
+    LOG_QUEUE_SIZE: int = Field(default=10000, env="LOG_QUEUE_SIZE")
+    LOG_SAMPLE_RATE: float = Field(default=1.0, env="LOG_SAMPLE_RATE")  # fração dos logs de sucesso
+    
+    # Tracing por requisição (Server-Timing) e exportação OTLP/JSON opcional; desligado por padrão
+    TRACING_ENABLED: bool = Field(default=False, env="TRACING_ENABLED")
+    TRACING_EXPORT_PATH: Optional[str] = Field(default=None, env="TRACING_EXPORT_PATH")
+    
+    # Rotas de administração (/admin/profile/*, /audit); sem token, respondem 404
+    ADMIN_TOKEN: Optional[str] = Field(default=None, env="ADMIN_TOKEN")
     
     # Aviso Legal
     DISCLAIMER: str = (
@@ -74,6 +215,8 @@ class Settings(BaseSettings):
     class Config:
         env_file = ".env"
         case_sensitive = True
+        # O .env da raiz também traz as variáveis da API Django
+        extra = "ignore"
 
 
 # Instância global de configurações
@@ -84,8 +227,19 @@ settings = Settings()
 def validate_settings():
     """Valida configurações na inicialização."""
     
+    # Verificar modo de inferência
+    if settings.INFERENCE_MODE not in ("local", "remote"):
+        raise ValueError(f"INFERENCE_MODE inválido: {settings.INFERENCE_MODE} (local ou remote)")
+    
+    # Em remote, o modelo fica nos workers, mas a API precisa da sua identidade
+    if settings.INFERENCE_MODE == "remote" and not settings.REMOTE_MODEL and not os.path.exists(settings.MODEL_PATH):
+        raise ValueError(
+            f"Modelo não encontrado em: {settings.MODEL_PATH}\n"
+            f"Em INFERENCE_MODE=remote, configure REMOTE_MODEL com a identidade do modelo dos workers."
+        )
+    
     # Verificar se modelo existe
-    if not os.path.exists(settings.MODEL_PATH):
+    if settings.INFERENCE_MODE == "local" and not os.path.exists(settings.MODEL_PATH):
         raise FileNotFoundError(
             f"Modelo não encontrado em: {settings.MODEL_PATH}\n"
             f"Por favor, coloque o modelo treinado neste caminho."
@@ -99,6 +253,10 @@ def validate_settings():
     if settings.IMAGE_SIZE <= 0:
         raise ValueError("IMAGE_SIZE deve ser maior que 0")
     
+    # Verificar modelo de triagem da cascata
+    if settings.CASCADE_ENABLED and not settings.SCREENING_MODEL_PATH:
+        raise ValueError("CASCADE_ENABLED requer SCREENING_MODEL_PATH")
+    
     print("✓ Configurações validadas com sucesso")
 
 
@@ -0,0 +1,271 @@
+"""
+Admission - Controle de Admissão
+Limite de taxa por cliente, teto de concorrência e descarte de carga.
+
+Independente de framework: usado pelo middleware do FastAPI (app.main)
+e pelo middleware do Django (api.middlewares.admissao).
+"""
+
+import ipaddress
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Collection, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Motivos de rejeição (chaves dos contadores)
+LIMITE_TAXA = "limite_taxa"
+CONCORRENCIA = "concorrencia"
+FILA = "fila"
+MEMORIA = "memoria"
+
+
+class AdmissionRejected(Exception):
+    """Requisição recusada pelo controle de admissão."""
+
+    def __init__(self, status_code: int, motivo: str, detail: str, retry_after: Optional[float] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.motivo = motivo
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Balde de fichas: `rate` fichas por segundo, acumulando até `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def take(self) -> float:
+        """
+        Consome uma ficha.
+
+        Returns:
+            0.0 se havia ficha; caso contrário, segundos até a próxima
+        """
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return 0.0
+        return (1.0 - self._tokens) / self.rate
+
+
+def read_rss_mb() -> Optional[float]:
+    """RSS atual do processo em MB (None se não for possível medir)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def parse_networks(values: Iterable[str]) -> Tuple:
+    """Endereços e redes (CIDR) de proxies confiáveis."""
+    return tuple(ipaddress.ip_network(value.strip(), strict=False) for value in values if value.strip())
+
+
+def _trusted(address: Optional[str], networks: Tuple) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+def peer_address(peer: Optional[str], forwarded_for: Optional[str], trusted_proxies: Tuple) -> Optional[str]:
+    """
+    Endereço de origem do cliente.
+
+    O X-Forwarded-For só vale quando a conexão vem de um proxy confiável
+    (ex.: o roteador); de qualquer outro, o header é do cliente e é
+    ignorado. Vale o último endereço da cadeia que não é um proxy confiável.
+    """
+    if not forwarded_for or not _trusted(peer, trusted_proxies):
+        return peer
+    for address in reversed([a.strip() for a in forwarded_for.split(",")]):
+        if address and not _trusted(address, trusted_proxies):
+            return address
+    return peer
+
+
+def client_key(api_key: Optional[str], peer: Optional[str], api_keys: Collection[str]) -> str:
+    """
+    Chave do limite de taxa do cliente.
+
+    A X-API-Key só identifica o cliente se for uma das chaves configuradas;
+    qualquer outro valor é ignorado (senão, trocar de chave a cada
+    requisição daria um balde novo) e vale o endereço de origem.
+    """
+    if api_key and api_key in api_keys:
+        return f"chave:{api_key}"
+    return peer or "anonimo"
+
+
+class AdmissionController:
+    """
+    Decide, antes de qualquer trabalho, se uma requisição é aceita.
+
+    Na ordem:
+    1. Descarte por memória: RSS acima de `max_rss_mb` -> 503
+    2. Descarte por fila: `queue_depth()` acima de `max_queue_depth` -> 503
+    3. Teto de concorrência: `max_concurrent` requisições em andamento -> 503
+    4. Limite de taxa por cliente (token bucket) -> 429
+
+    Limites com valor 0 ficam desativados.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: int = 0,
+        burst: int = 0,
+        max_concurrent: int = 0,
+        max_queue_depth: int = 0,
+        max_rss_mb: int = 0,
+        queue_depth: Optional[Callable[[], int]] = None,
+        max_clients: int = 10000,
+        rss_interval: float = 1.0
+    ):
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst or max(1, rate_per_minute // 6)
+        self.max_concurrent = max_concurrent
+        self.max_queue_depth = max_queue_depth
+        self.max_rss_mb = max_rss_mb
+        self.queue_depth = queue_depth
+        self.max_clients = max_clients
+        self.rss_interval = rss_interval
+
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._in_flight = 0
+        self._rss_mb = None
+        self._rss_checked = 0.0
+
+        self._accepted = 0
+        self._rejected: Dict[str, int] = {LIMITE_TAXA: 0, CONCORRENCIA: 0, FILA: 0, MEMORIA: 0}
+
+    def _reject(self, status_code: int, motivo: str, detail: str, retry_after: Optional[float] = None):
+        self._rejected[motivo] += 1
+        logger.debug("Requisição recusada (%s): %s", motivo, detail)
+        raise AdmissionRejected(status_code, motivo, detail, retry_after)
+
+    def _current_rss(self) -> Optional[float]:
+        # Medir o RSS no máximo uma vez por intervalo
+        now = time.monotonic()
+        if now - self._rss_checked >= self.rss_interval:
+            self._rss_mb = read_rss_mb()
+            self._rss_checked = now
+        return self._rss_mb
+
+    def acquire(self, client: str):
+        """
+        Admite a requisição do cliente ou levanta AdmissionRejected.
+
+        Toda chamada bem-sucedida deve ser seguida de release().
+        """
+        with self._lock:
+            if self.max_rss_mb > 0:
+                rss = self._current_rss()
+                if rss is not None and rss > self.max_rss_mb:
+                    self._reject(503, MEMORIA, "Serviço sobrecarregado (memória). Tente novamente.", 1.0)
+
+            if self.max_queue_depth > 0 and self.queue_depth is not None:
+                if self.queue_depth() >= self.max_queue_depth:
+                    self._reject(503, FILA, "Serviço sobrecarregado (fila cheia). Tente novamente.", 1.0)
+
+            if self.max_concurrent > 0 and self._in_flight >= self.max_concurrent:
+                self._reject(503, CONCORRENCIA, "Capacidade de inferência esgotada. Tente novamente.", 1.0)
+
+            if self.rate_per_minute > 0:
+                bucket = self._buckets.get(client)
+                if bucket is None:
+                    bucket = TokenBucket(self.rate_per_minute / 60.0, self.burst)
+                    self._buckets[client] = bucket
+                    if len(self._buckets) > self.max_clients:
+                        self._buckets.popitem(last=False)
+                else:
+                    self._buckets.move_to_end(client)
+
+                wait = bucket.take()
+                if wait > 0:
+                    self._reject(
+                        429, LIMITE_TAXA,
+                        f"Limite de {self.rate_per_minute} requisições por minuto excedido.",
+                        wait
+                    )
+
+            self._in_flight += 1
+            self._accepted += 1
+
+    def release(self):
+        """Libera a vaga de concorrência de uma requisição admitida."""
+        with self._lock:
+            self._in_flight -= 1
+
+    def metrics(self) -> dict:
+        """Contadores de admissão."""
+        with self._lock:
+            return {
+                "em_andamento": self._in_flight,
+                "max_concorrencia": self.max_concurrent,
+                "limite_por_minuto": self.rate_per_minute,
+                "clientes": len(self._buckets),
+                "rss_mb": round(self._rss_mb, 1) if self._rss_mb is not None else None,
+                "aceitas": self._accepted,
+                "rejeitadas": dict(self._rejected),
+                "total_rejeitadas": sum(self._rejected.values()),
+            }
+
+
+# Instância global da API FastAPI (o Django mantém a sua no middleware)
+_controller = None
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """
+    Obtém o controle de admissão da API FastAPI.
+
+    Returns:
+        AdmissionController ou None se ADMISSION_ENABLED for False
+    """
+    global _controller
+
+    from app.config import settings
+
+    if not settings.ADMISSION_ENABLED:
+        return None
+
+    if _controller is None:
+        from app.core.pipeline import get_pipeline
+
+        def queue_depth() -> int:
+            pipeline = get_pipeline()
+            return pipeline.queue_depth() if pipeline is not None else 0
+
+        _controller = AdmissionController(
+            rate_per_minute=settings.RATE_LIMIT_PER_MINUTE,
+            burst=settings.RATE_LIMIT_BURST,
+            max_concurrent=settings.MAX_CONCURRENT_REQUESTS,
+            max_queue_depth=settings.SHED_QUEUE_DEPTH,
+            max_rss_mb=settings.SHED_RSS_MB,
+            queue_depth=queue_depth
+        )
+
+    return _controller
@@ -0,0 +1,379 @@
+"""
+Audit - Registro de Auditoria das Predições
+Guarda cada predição (horário, hash do conteúdo, versão do modelo,
+probabilidades e latência) para rastreabilidade clínica.
+
+A requisição só enfileira o registro numa fila limitada; uma thread
+grava em lotes (uma transação por lote) em segmentos SQLite diários
+em modo WAL. Os segmentos são somente inclusão: gatilhos impedem
+UPDATE e DELETE.
+
+Com a fila cheia, a política `on_full` decide: "descartar" (o registro
+é perdido e contado) ou "rejeitar" (a API recusa novas predições com
+503 até a fila esvaziar, via has_capacity()).
+
+Independente de framework: usado pela API FastAPI (rotas /predict,
+/predict/archive e jobs em lote), pelo serviço gRPC e pela API Django
+(PredicaoView). O campo `origem` diz de onde veio a predição.
+"""
+
+import hashlib
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Políticas com a fila cheia
+DESCARTAR = "descartar"
+REJEITAR = "rejeitar"
+
+_SEGMENT_PREFIX = "audit-"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS registros (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    request_id TEXT,
+    hash TEXT NOT NULL,
+    arquivo TEXT,
+    classe TEXT NOT NULL,
+    confianca REAL NOT NULL,
+    probabilidades TEXT NOT NULL,
+    modelo_versao TEXT,
+    latencia_ms REAL,
+    origem TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_registros_hash ON registros (hash);
+CREATE INDEX IF NOT EXISTS idx_registros_ts ON registros (ts);
+CREATE INDEX IF NOT EXISTS idx_registros_classe ON registros (classe, ts);
+CREATE TRIGGER IF NOT EXISTS registros_sem_update BEFORE UPDATE ON registros
+BEGIN SELECT RAISE(ABORT, 'auditoria é somente inclusão'); END;
+CREATE TRIGGER IF NOT EXISTS registros_sem_delete BEFORE DELETE ON registros
+BEGIN SELECT RAISE(ABORT, 'auditoria é somente inclusão'); END;
+"""
+
+_COLUMNS = (
+    "ts", "request_id", "hash", "arquivo", "classe", "confianca",
+    "probabilidades", "modelo_versao", "latencia_ms", "origem"
+)
+
+# Sinal para a thread gravadora encerrar
+_STOP = object()
+
+
+def content_hash(data) -> str:
+    """sha256 (hex) do conteúdo enviado: bytes ou partes de um arquivo."""
+    digest = hashlib.sha256()
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        digest.update(data)
+    else:
+        for chunk in data:
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+
+
+class AuditLog:
+    """
+    Fila limitada + gravador em lotes para os segmentos diários
+    `audit-AAAA-MM-DD.sqlite3` de `directory`.
+
+    Args:
+        directory: Diretório dos segmentos
+        queue_size: Registros pendentes no máximo (memória limitada)
+        batch_size: Registros por transação
+        flush_interval: Segundos máximos até gravar um lote incompleto
+        synchronous: PRAGMA synchronous (OFF, NORMAL ou FULL)
+        on_full: DESCARTAR ou REJEITAR
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        queue_size: int = 10000,
+        batch_size: int = 256,
+        flush_interval: float = 1.0,
+        synchronous: str = "NORMAL",
+        on_full: str = DESCARTAR
+    ):
+        if on_full not in (DESCARTAR, REJEITAR):
+            raise ValueError(f"Política de fila cheia inválida: {on_full}")
+        if synchronous.upper() not in ("OFF", "NORMAL", "FULL"):
+            raise ValueError(f"synchronous inválido: {synchronous}")
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.synchronous = synchronous.upper()
+        self.on_full = on_full
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_day: Optional[str] = None
+        self._lock = threading.Lock()
+        self._enqueued = 0
+        self._written = 0
+        self._dropped = 0
+        self._batches = 0
+        self._errors = 0
+        self._last_batch_ms = None
+
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    # ---------------------------------------------------------------- escrita
+
+    def has_capacity(self) -> bool:
+        """False com a fila cheia (a política REJEITAR recusa a predição)."""
+        return not self._queue.full()
+
+    def record(
+        self,
+        digest: str,
+        result: dict,
+        latency_ms: Optional[float] = None,
+        filename: Optional[str] = None,
+        request_id: Optional[str] = None,
+        origin: Optional[str] = None
+    ) -> bool:
+        """
+        Enfileira o registro de uma predição (nunca bloqueia).
+
+        Args:
+            digest: content_hash() da imagem
+            result: Resposta da predição (resultado, probabilidades, modelo)
+
+        Returns:
+            False se a fila estava cheia e o registro foi descartado
+        """
+        row = (
+            time.time(),
+            request_id,
+            digest,
+            filename,
+            result["resultado"]["rotulo"],
+            float(result["resultado"]["confianca"]),
+            json.dumps(result["probabilidades"]),
+            (result.get("modelo") or {}).get("versao"),
+            round(latency_ms, 2) if latency_ms is not None else None,
+            origin,
+        )
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+                dropped = self._dropped
+            if dropped % 100 == 1:
+                # Um aviso a cada 100 descartes, para não inundar o log
+                logger.warning("Fila de auditoria cheia: %d registros descartados até agora", dropped)
+            return False
+        with self._lock:
+            self._enqueued += 1
+        return True
+
+    def _connect(self, day: str) -> sqlite3.Connection:
+        if self._conn_day != day:
+            if self._conn is not None:
+                self._conn.close()
+            path = self.directory / f"{_SEGMENT_PREFIX}{day}.sqlite3"
+            conn = sqlite3.connect(str(path))
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            conn.executescript(_SCHEMA)
+            self._conn, self._conn_day = conn, day
+        return self._conn
+
+    def _write(self, rows: List[tuple]):
+        start = time.perf_counter()
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(_day(row[0]), []).append(row)
+
+        for day, day_rows in by_day.items():
+            conn = self._connect(day)
+            with conn:
+                conn.executemany(
+                    f"INSERT INTO registros ({', '.join(_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                    day_rows
+                )
+
+        with self._lock:
+            self._written += len(rows)
+            self._batches += 1
+            self._last_batch_ms = (time.perf_counter() - start) * 1000
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            rows = []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                rows.append(item)
+                if len(rows) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=max(remaining, 0)) if remaining > 0 \
+                        else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if rows:
+                try:
+                    self._write(rows)
+                except Exception as e:
+                    with self._lock:
+                        self._errors += 1
+                        self._dropped += len(rows)
+                    logger.error("Falha ao gravar %d registros de auditoria: %s", len(rows), e)
+
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def close(self, timeout: float = 10.0):
+        """Grava os registros pendentes e encerra a thread."""
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.error("Auditoria: fila cheia ao encerrar")
+            return
+        self._thread.join(timeout)
+
+    # ---------------------------------------------------------------- consulta
+
+    def segments(self, start: Optional[float] = None, end: Optional[float] = None) -> List[Path]:
+        """Segmentos que podem conter registros em [start, end], do mais recente ao mais antigo."""
+        first = _day(start) if start is not None else None
+        last = _day(end) if end is not None else None
+        found = []
+        for path in self.directory.glob(f"{_SEGMENT_PREFIX}*.sqlite3"):
+            day = path.stem[len(_SEGMENT_PREFIX):]
+            if (first is None or day >= first) and (last is None or day <= last):
+                found.append(path)
+        return sorted(found, reverse=True)
+
+    def query(
+        self,
+        digest: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        label: Optional[str] = None,
+        limit: int = 100
+    ) -> List[dict]:
+        """
+        Registros gravados, mais recentes primeiro.
+
+        Args:
+            digest: Hash do conteúdo
+            start, end: Intervalo (epoch, segundos)
+            label: Classe predita
+            limit: Máximo de registros
+        """
+        conditions, params = [], []
+        for column, op, value in (
+            ("hash", "=", digest), ("ts", ">=", start), ("ts", "<=", end), ("classe", "=", label)
+        ):
+            if value is not None:
+                conditions.append(f"{column} {op} ?")
+                params.append(value)
+        sql = "SELECT * FROM registros"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY ts DESC LIMIT ?"
+
+        rows = []
+        for path in self.segments(start, end):
+            # Somente leitura: não disputa a escrita com o gravador
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            conn.row_factory = sqlite3.Row
+            try:
+                for row in conn.execute(sql, (*params, limit - len(rows))):
+                    entry = dict(row)
+                    entry["probabilidades"] = json.loads(entry["probabilidades"])
+                    entry["segmento"] = path.name
+                    rows.append(entry)
+            finally:
+                conn.close()
+            if len(rows) >= limit:
+                break
+        return rows
+
+    def metrics(self) -> dict:
+        """Contadores do registro de auditoria."""
+        with self._lock:
+            return {
+                "enfileirados": self._enqueued,
+                "gravados": self._written,
+                "descartados": self._dropped,
+                "erros_gravacao": self._errors,
+                "lotes": self._batches,
+                "ultimo_lote_ms": round(self._last_batch_ms, 2) if self._last_batch_ms is not None else None,
+                "fila": self._queue.qsize(),
+                "capacidade_fila": self._queue.maxsize,
+                "politica_fila_cheia": self.on_full,
+                "segmento_atual": self._conn_day,
+            }
+
+
+# Instância global da API FastAPI (o Django mantém a sua em api.servicos.auditoria)
+_audit = None
+
+
+def get_audit_log() -> Optional[AuditLog]:
+    """
+    Obtém o registro de auditoria da API FastAPI.
+
+    Returns:
+        AuditLog ou None se AUDIT_ENABLED for False
+    """
+    global _audit
+
+    from app.config import settings
+
+    if not settings.AUDIT_ENABLED:
+        return None
+
+    if _audit is None:
+        _audit = AuditLog(
+            directory=settings.AUDIT_DIR,
+            queue_size=settings.AUDIT_QUEUE_SIZE,
+            batch_size=settings.AUDIT_BATCH_SIZE,
+            flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+            synchronous=settings.AUDIT_SYNCHRONOUS,
+            on_full=settings.AUDIT_ON_FULL
+        )
+
+    return _audit
+
+
+def shutdown_audit_log():
+    """Grava os registros pendentes e encerra o gravador."""
+    global _audit
+
+    if _audit is not None:
+        _audit.close()
+        _audit = None
@@ -0,0 +1,328 @@
+"""
+Autotune - Ajuste Automático de Execução
+Mede threads do TensorFlow, tamanho de batch e workers de inferência no
+próprio nó e escolhe a configuração de maior throughput dentro do SLO
+de latência. O resultado é persistido por host e versão do modelo.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.core.model_cache import model_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Configuração em uso (reportada em /model)
+_active = None
+
+
+def tuning_key() -> str:
+    """Chave do cache: host, núcleos, versão e hash do modelo."""
+    return (
+        f"{socket.gethostname()}|{os.cpu_count()}cpu|"
+        f"{settings.MODEL_VERSION}|{model_fingerprint(settings.MODEL_PATH)}"
+    )
+
+
+def load_tuning() -> Optional[dict]:
+    """Resultado salvo para este host e modelo (None se não houver)."""
+    path = Path(settings.AUTOTUNE_CACHE_PATH)
+    if not path.exists() or not Path(settings.MODEL_PATH).exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8")).get(tuning_key())
+    except (OSError, ValueError) as e:
+        logger.warning("Cache de autotune ilegível (%s): %s", path, e)
+        return None
+
+
+def save_tuning(result: dict):
+    """Persiste o resultado (um registro por host/modelo no mesmo arquivo)."""
+    path = Path(settings.AUTOTUNE_CACHE_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    data = {}
+    if path.exists():
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except ValueError:
+            pass
+    data[tuning_key()] = result
+
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    tmp.replace(path)
+
+
+# ==================== medição ====================
+
+def benchmark(model, batch_size: int, workers: int, duration: float) -> dict:
+    """
+    Mede throughput e latência de `model.predict` (mesma chamada do
+    Predictor) com `workers` threads enviando batches de `batch_size`.
+    """
+    size = settings.IMAGE_SIZE
+    batch = np.random.uniform(-1, 1, (batch_size, size, size, 3)).astype(np.float32)
+
+    # Aquecimento (compilação do grafo para este shape)
+    model.predict(batch, verbose=0)
+
+    latencies = []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def run():
+        local = []
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            model.predict(batch, verbose=0)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=run) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "batch_size": batch_size,
+        "workers": workers,
+        "throughput_ips": round(len(latencies) * batch_size / elapsed, 2),
+        "latencia_p50_ms": round(float(np.percentile(latencies_ms, 50)), 2),
+        "latencia_p95_ms": round(float(np.percentile(latencies_ms, 95)), 2),
+    }
+
+
+def sweep(model, batch_sizes: List[int], workers_options: List[int], duration: float) -> List[dict]:
+    """Mede todas as combinações de batch e workers."""
+    results = []
+    for workers in workers_options:
+        for batch_size in batch_sizes:
+            result = benchmark(model, batch_size, workers, duration)
+            logger.info(
+                "Autotune: batch=%d workers=%d -> %.1f img/s, p95 %.1f ms",
+                batch_size, workers, result["throughput_ips"], result["latencia_p95_ms"]
+            )
+            results.append(result)
+    return results
+
+
+def select(results: List[dict], slo_ms: float) -> dict:
+    """
+    Maior throughput com p95 dentro do SLO; se nenhuma combinação
+    cumprir o SLO, a de menor latência.
+    """
+    within = [r for r in results if r["latencia_p95_ms"] <= slo_ms]
+    if within:
+        return max(within, key=lambda r: r["throughput_ips"])
+    return min(results, key=lambda r: r["latencia_p95_ms"])
+
+
+def current_threads() -> tuple:
+    """Threads intra/inter-op em vigor (0 = padrão do TensorFlow)."""
+    import tensorflow as tf
+    return (
+        tf.config.threading.get_intra_op_parallelism_threads(),
+        tf.config.threading.get_inter_op_parallelism_threads(),
+    )
+
+
+def _sweep_with_threads(intra: int, inter: int, batch_sizes, workers_options, duration) -> List[dict]:
+    """
+    Executado num processo novo: as threads do TensorFlow só podem ser
+    definidas antes da inicialização do runtime.
+    """
+    os.environ["TF_NUM_INTRAOP_THREADS"] = str(intra)
+    os.environ["TF_NUM_INTEROP_THREADS"] = str(inter)
+
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(intra)
+    tf.config.threading.set_inter_op_parallelism_threads(inter)
+
+    from app.core.model_loader import get_model
+
+    results = sweep(get_model(), batch_sizes, workers_options, duration)
+    for result in results:
+        result["intra_op_threads"] = intra
+        result["inter_op_threads"] = inter
+    return results
+
+
+def default_batch_sizes() -> List[int]:
+    return [b for b in (1, 2, 4, 8, 16, 32, 64) if b <= settings.AUTOTUNE_MAX_BATCH_SIZE]
+
+
+def default_workers() -> List[int]:
+    cpus = os.cpu_count() or 1
+    return sorted({1, min(2, cpus), min(4, cpus)})
+
+
+def default_threads() -> List[tuple]:
+    cpus = os.cpu_count() or 1
+    intra = sorted({cpus, max(1, cpus // 2), max(1, cpus // 4)})
+    return [(i, e) for i in intra for e in sorted({1, min(2, cpus)})]
+
+
+def _result(best: dict, slo_ms: float, candidates: List[dict]) -> dict:
+    return {
+        "intra_op_threads": best["intra_op_threads"],
+        "inter_op_threads": best["inter_op_threads"],
+        "max_batch_size": best["batch_size"],
+        "inference_workers": best["workers"],
+        "throughput_ips": best["throughput_ips"],
+        "latencia_p95_ms": best["latencia_p95_ms"],
+        "slo_ms": slo_ms,
+        "host": socket.gethostname(),
+        "cpus": os.cpu_count(),
+        "modelo_versao": settings.MODEL_VERSION,
+        "modelo_hash": model_fingerprint(settings.MODEL_PATH),
+        "candidatos": len(candidates),
+        "criado_em": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def tune_full(
+    threads: List[tuple] = None,
+    batch_sizes: List[int] = None,
+    workers_options: List[int] = None,
+    duration: float = None,
+    slo_ms: float = None
+) -> tuple:
+    """
+    Varredura completa, incluindo threads do TensorFlow (um processo
+    por combinação de threads). Usada pela CLI.
+
+    Returns:
+        (configuração escolhida, todas as medições)
+    """
+    threads = threads or default_threads()
+    batch_sizes = batch_sizes or default_batch_sizes()
+    workers_options = workers_options or default_workers()
+    duration = duration or settings.AUTOTUNE_DURATION
+    slo_ms = slo_ms or settings.AUTOTUNE_SLO_MS
+
+    candidates = []
+    context = multiprocessing.get_context("spawn")
+    for intra, inter in threads:
+        logger.info("Autotune: threads intra=%d inter=%d", intra, inter)
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            candidates.extend(executor.submit(
+                _sweep_with_threads, intra, inter, batch_sizes, workers_options, duration
+            ).result())
+
+    return _result(select(candidates, slo_ms), slo_ms, candidates), candidates
+
+
+def tune_in_process(model) -> dict:
+    """
+    Varredura rápida de batch e workers com as threads atuais (as
+    threads não podem mudar depois que o TensorFlow inicializou).
+    """
+    intra, inter = current_threads()
+    candidates = sweep(model, default_batch_sizes(), default_workers(), settings.AUTOTUNE_DURATION)
+    for candidate in candidates:
+        candidate["intra_op_threads"] = intra
+        candidate["inter_op_threads"] = inter
+    return _result(select(candidates, settings.AUTOTUNE_SLO_MS), settings.AUTOTUNE_SLO_MS, candidates)
+
+
+# ==================== aplicação ====================
+
+def configure_threads():
+    """
+    Define as threads do TensorFlow antes da inicialização do runtime:
+    valores explícitos (TF_INTRA_OP_THREADS/TF_INTER_OP_THREADS) ou os
+    do autotune salvo para este host e modelo.
+    """
+    intra, inter = settings.TF_INTRA_OP_THREADS, settings.TF_INTER_OP_THREADS
+
+    if settings.AUTOTUNE_ENABLED and not (intra and inter):
+        cached = load_tuning()
+        if cached:
+            intra = intra or cached["intra_op_threads"]
+            inter = inter or cached["inter_op_threads"]
+
+    if intra:
+        os.environ["TF_NUM_INTRAOP_THREADS"] = str(intra)
+    if inter:
+        os.environ["TF_NUM_INTEROP_THREADS"] = str(inter)
+
+    if intra or inter:
+        import tensorflow as tf
+        try:
+            if intra:
+                tf.config.threading.set_intra_op_parallelism_threads(intra)
+            if inter:
+                tf.config.threading.set_inter_op_parallelism_threads(inter)
+        except RuntimeError:
+            logger.warning("TensorFlow já inicializado: threads mantidas (reinicie para aplicar)")
+
+
+def autotune_startup(model, pipeline=None) -> dict:
+    """
+    Aplica a configuração de execução na inicialização.
+
+    Com AUTOTUNE_ENABLED, reutiliza o resultado salvo para este host e
+    modelo ou, se não houver, mede batch/workers e salva. Sem autotune,
+    apenas registra a configuração manual em uso.
+    """
+    global _active
+
+    if settings.AUTOTUNE_ENABLED:
+        result = load_tuning()
+        if result is not None:
+            origem = "autotune (cache)"
+        else:
+            logger.info("Autotune: nenhum resultado salvo para este host/modelo, medindo...")
+            result = tune_in_process(model)
+            save_tuning(result)
+            origem = "autotune"
+
+        settings.MAX_BATCH_SIZE = result["max_batch_size"]
+        settings.PIPELINE_INFERENCE_WORKERS = result["inference_workers"]
+        if pipeline is not None:
+            try:
+                pipeline.configure_inference(result["max_batch_size"], result["inference_workers"])
+            except RuntimeError:
+                logger.warning("Pipeline já iniciado: batch/workers valem após reiniciar")
+    else:
+        result = {
+            "max_batch_size": settings.MAX_BATCH_SIZE,
+            "inference_workers": settings.PIPELINE_INFERENCE_WORKERS,
+        }
+        origem = "manual"
+
+    intra, inter = current_threads()
+    _active = {
+        **result,
+        "intra_op_threads": intra,
+        "inter_op_threads": inter,
+        "origem": origem,
+    }
+    logger.info(
+        "Execução: batch=%d workers=%d threads intra=%d inter=%d (%s)",
+        _active["max_batch_size"], _active["inference_workers"], intra, inter, origem
+    )
+    return _active
+
+
+def get_active_tuning() -> Optional[dict]:
+    """Configuração de execução em uso (None antes da inicialização)."""
+    return _active
@@ -0,0 +1,213 @@
+"""
+Broker - Filas entre as APIs e os Workers de Inferência
+Com INFERENCE_MODE=remote, as APIs (FastAPI e Django) só decodificam e
+redimensionam as imagens: os tensores uint8 vão para uma fila do broker
+e uma frota separada de workers (python -m app.worker) os consome em
+batches e devolve as probabilidades por um canal de resposta.
+
+Brokers:
+- memory://  fila no próprio processo (testes e desenvolvimento)
+- redis://   Redis ou compatível (listas LPUSH/BRPOP); requer o pacote redis
+
+Mensagem: 4 bytes com o tamanho do cabeçalho JSON, o cabeçalho e os
+bytes do tensor (sem pickle: o broker pode ser compartilhado).
+
+Independente de framework: usado por app.core.remote (APIs) e app.worker.
+"""
+
+import json
+import logging
+import queue
+import struct
+import threading
+import time
+import uuid
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_HEADER_SIZE = struct.Struct("<I")
+
+
+def encode_message(header: dict, payload: bytes = b"") -> bytes:
+    """Cabeçalho JSON + payload binário numa única mensagem."""
+    encoded = json.dumps(header).encode()
+    return _HEADER_SIZE.pack(len(encoded)) + encoded + payload
+
+
+def decode_message(message: bytes) -> Tuple[dict, memoryview]:
+    """Inverso de encode_message: (cabeçalho, payload sem cópia)."""
+    (size,) = _HEADER_SIZE.unpack_from(message)
+    start = _HEADER_SIZE.size
+    header = json.loads(message[start:start + size])
+    return header, memoryview(message)[start + size:]
+
+
+def new_reply_channel(queue_name: str) -> str:
+    """Canal de resposta exclusivo de uma requisição."""
+    return f"{queue_name}:resposta:{uuid.uuid4().hex}"
+
+
+class Broker:
+    """Interface dos brokers: fila de trabalho e canais de resposta."""
+
+    def push(self, queue_name: str, message: bytes):
+        """Enfileira uma mensagem de trabalho."""
+        raise NotImplementedError
+
+    def pop(self, queue_name: str, max_items: int, timeout: float) -> List[bytes]:
+        """Espera até `timeout` pela primeira mensagem e leva até `max_items` sem esperar mais."""
+        raise NotImplementedError
+
+    def reply(self, channel: str, message: bytes, ttl: float):
+        """Publica a resposta; descartada após `ttl` segundos se ninguém a ler."""
+        raise NotImplementedError
+
+    def wait_reply(self, channel: str, timeout: float) -> Optional[bytes]:
+        """Resposta do canal, ou None se não chegar em `timeout`."""
+        raise NotImplementedError
+
+    def ping(self) -> bool:
+        return True
+
+    def close(self):
+        pass
+
+
+class InProcessBroker(Broker):
+    """Broker em memória para API e workers no mesmo processo (threads)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queues = {}
+        self._replies = {}
+
+    def _queue(self, name: str) -> queue.Queue:
+        with self._lock:
+            if name not in self._queues:
+                self._queues[name] = queue.Queue()
+            return self._queues[name]
+
+    def push(self, queue_name: str, message: bytes):
+        self._queue(queue_name).put(message)
+
+    def pop(self, queue_name: str, max_items: int, timeout: float) -> List[bytes]:
+        work = self._queue(queue_name)
+        try:
+            messages = [work.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while len(messages) < max_items:
+            try:
+                messages.append(work.get_nowait())
+            except queue.Empty:
+                break
+        return messages
+
+    def reply(self, channel: str, message: bytes, ttl: float):
+        now = time.monotonic()
+        with self._lock:
+            # Respostas que ninguém leu (requisição já expirada) somem após o ttl
+            for name in [name for name, (_, expires) in self._replies.items() if expires < now]:
+                del self._replies[name]
+            if channel not in self._replies:
+                self._replies[channel] = (queue.Queue(), now + ttl)
+            replies = self._replies[channel][0]
+        replies.put(message)
+
+    def wait_reply(self, channel: str, timeout: float) -> Optional[bytes]:
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            if channel not in self._replies:
+                self._replies[channel] = (queue.Queue(), deadline)
+            replies = self._replies[channel][0]
+        try:
+            return replies.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        finally:
+            with self._lock:
+                self._replies.pop(channel, None)
+
+
+class RedisBroker(Broker):
+    """
+    Broker Redis (ou compatível): fila de trabalho numa lista (LPUSH/BRPOP)
+    e uma lista com expiração por canal de resposta.
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("Broker Redis requer o pacote redis: pip install redis")
+        self.url = url
+        self._redis = redis.Redis.from_url(url)
+
+    def push(self, queue_name: str, message: bytes):
+        self._redis.lpush(queue_name, message)
+
+    def pop(self, queue_name: str, max_items: int, timeout: float) -> List[bytes]:
+        first = self._redis.brpop([queue_name], timeout=timeout)
+        if first is None:
+            return []
+        messages = [first[1]]
+        if max_items > 1:
+            messages.extend(self._redis.rpop(queue_name, max_items - 1) or [])
+        return messages
+
+    def reply(self, channel: str, message: bytes, ttl: float):
+        with self._redis.pipeline() as pipe:
+            pipe.lpush(channel, message)
+            pipe.expire(channel, max(1, int(ttl)))
+            pipe.execute()
+
+    def wait_reply(self, channel: str, timeout: float) -> Optional[bytes]:
+        reply = self._redis.brpop([channel], timeout=timeout)
+        return reply[1] if reply is not None else None
+
+    def ping(self) -> bool:
+        try:
+            return bool(self._redis.ping())
+        except Exception as e:
+            logger.warning("Broker Redis indisponível: %s", e)
+            return False
+
+    def close(self):
+        self._redis.close()
+
+
+def create_broker(url: str) -> Broker:
+    """Broker a partir da URL (memory:// ou redis://, rediss://, unix://)."""
+    if url.startswith("memory://"):
+        return InProcessBroker()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBroker(url)
+    raise ValueError(f"Broker não suportado: {url}")
+
+
+# Instância global (APIs e workers do mesmo processo compartilham o broker em memória)
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> Broker:
+    """Broker configurado em BROKER_URL (criado na primeira chamada)."""
+    global _broker
+
+    from app.config import settings
+
+    with _broker_lock:
+        if _broker is None:
+            _broker = create_broker(settings.BROKER_URL)
+    return _broker
+
+
+def shutdown_broker():
+    """Fecha a conexão com o broker, se aberta."""
+    global _broker
+
+    with _broker_lock:
+        if _broker is not None:
+            _broker.close()
+            _broker = None
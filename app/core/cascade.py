@@ -0,0 +1,150 @@
+"""
+Cascade - Cascata de Modelos
+Um modelo pequeno faz a triagem de todas as imagens; só as de baixa
+confiança seguem para o modelo completo
+"""
+
+import logging
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Estágio que decidiu a predição
+TRIAGEM = "triagem"
+COMPLETO = "completo"
+
+
+class ModelCascade:
+    """
+    Cascata triagem -> modelo completo, controlada por confiança.
+
+    Imagens cuja confiança da classe predita pela triagem atinge
+    `threshold` são decididas ali; as demais são reprocessadas pelo
+    modelo completo. O custo é medido pelo tempo de inferência de cada
+    modelo por imagem.
+    """
+
+    def __init__(self, screening_model, full_model, threshold: float, screening_size: int = None):
+        self.screening_model = screening_model
+        self.full_model = full_model
+        self.threshold = threshold
+        self.screening_size = screening_size
+
+        self._lock = threading.Lock()
+        self._images = 0
+        self._escalated = 0
+        self._screening_seconds = 0.0
+        self._full_seconds = 0.0
+
+    def _screen(self, batch: np.ndarray) -> np.ndarray:
+        if self.screening_size and self.screening_size != batch.shape[1]:
+            # Variante de menor resolução: reduzir o tensor já normalizado
+            import tensorflow as tf
+            batch = tf.image.resize(
+                batch, (self.screening_size, self.screening_size), antialias=True
+            )
+        return np.asarray(self.screening_model.predict(batch, verbose=0))
+
+    def predict(self, batch: np.ndarray) -> Tuple[np.ndarray, List[str]]:
+        """
+        Executa a cascata em um batch.
+
+        Returns:
+            (probabilidades (N, n_classes), estágio que decidiu cada imagem)
+        """
+        start = time.perf_counter()
+        predictions = self._screen(batch)
+        screening_elapsed = time.perf_counter() - start
+
+        stages = [TRIAGEM] * len(predictions)
+        unsure = np.flatnonzero(predictions.max(axis=1) < self.threshold)
+
+        full_elapsed = 0.0
+        if len(unsure):
+            start = time.perf_counter()
+            full = np.asarray(self.full_model.predict(batch[unsure], verbose=0))
+            full_elapsed = time.perf_counter() - start
+
+            predictions = predictions.copy()
+            predictions[unsure] = full
+            for i in unsure:
+                stages[i] = COMPLETO
+
+        with self._lock:
+            self._images += len(predictions)
+            self._escalated += len(unsure)
+            self._screening_seconds += screening_elapsed
+            self._full_seconds += full_elapsed
+
+        return predictions, stages
+
+    def metrics(self) -> dict:
+        """
+        Taxa de escalonamento e economia estimada.
+
+        A economia compara o custo real (triagem em todas + completo nas
+        escalonadas) com o custo de rodar o modelo completo em todas,
+        usando os tempos médios por imagem medidos.
+        """
+        with self._lock:
+            images, escalated = self._images, self._escalated
+            screening_seconds, full_seconds = self._screening_seconds, self._full_seconds
+
+        screening_ms = 1000 * screening_seconds / images if images else None
+        full_ms = 1000 * full_seconds / escalated if escalated else None
+
+        saved = None
+        if images and full_ms:
+            actual = screening_seconds + full_seconds
+            saved = 1.0 - actual / (images * full_ms / 1000)
+
+        return {
+            "limiar": self.threshold,
+            "imagens": images,
+            "escalonadas": escalated,
+            "taxa_escalonamento": round(escalated / images, 4) if images else 0.0,
+            "custo_triagem_ms": round(screening_ms, 2) if screening_ms is not None else None,
+            "custo_completo_ms": round(full_ms, 2) if full_ms is not None else None,
+            "economia_custo": round(saved, 4) if saved is not None else None,
+        }
+
+
+# Instância global (singleton), criada sob demanda
+_cascade = None
+_cascade_lock = threading.Lock()
+
+
+def get_cascade() -> Optional[ModelCascade]:
+    """
+    Obtém a cascata configurada.
+
+    Returns:
+        ModelCascade ou None se CASCADE_ENABLED for False
+    """
+    global _cascade
+
+    if not settings.CASCADE_ENABLED:
+        return None
+
+    with _cascade_lock:
+        if _cascade is None:
+            from app.core.model_loader import get_model, get_screening_model
+
+            _cascade = ModelCascade(
+                get_screening_model(),
+                get_model(),
+                threshold=settings.CASCADE_THRESHOLD,
+                screening_size=settings.SCREENING_IMAGE_SIZE or None
+            )
+            logger.info(
+                "Cascata ativa: triagem %s, limiar %.2f",
+                settings.SCREENING_MODEL_PATH, settings.CASCADE_THRESHOLD
+            )
+
+    return _cascade
@@ -0,0 +1,342 @@
+"""
+Drift - Monitor de Deriva das Entradas
+Acompanha, a cada predição, estatísticas das imagens recebidas e das
+respostas do modelo e compara janelas recentes com uma linha de base
+(ex.: o conjunto de treino), para detectar mudança de população ou de
+equipamento (novo fabricante de scanner, pacientes adultos...).
+
+Memória constante: cada característica é um histograma de bordas fixas
+mais média/variância incrementais (Welford). A atualização é O(1) por
+requisição e usa o tensor já decodificado (224x224); nenhuma imagem é
+guardada ou relida.
+"""
+
+import bisect
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+# Bordas dos histogramas (valores fora da faixa vão para o primeiro/último bin)
+_DIMENSION_EDGES = [0, 256, 512, 768, 1024, 1280, 1536, 1792, 2048, 2560, 3072, 3584, 4096, 5001]
+FEATURE_EDGES = {
+    # As mesmas grandezas de ImageValidator.is_likely_xray
+    "intensidade_media": [8.0 * i for i in range(33)],     # 0..256
+    "intensidade_desvio": [4.0 * i for i in range(33)],    # 0..128
+    "largura": _DIMENSION_EDGES,
+    "altura": _DIMENSION_EDGES,
+    "proporcao": [0.25 * i for i in range(1, 17)],         # 0.25..4.0
+    "confianca": [0.05 * i for i in range(21)],            # 0..1
+}
+
+# Limiares usuais do PSI (Population Stability Index)
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+
+def psi(expected: np.ndarray, actual: np.ndarray, epsilon: float = 1e-4) -> Optional[float]:
+    """PSI entre duas distribuições (contagens por bin). None se alguma estiver vazia."""
+    expected = np.asarray(expected, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    if expected.sum() == 0 or actual.sum() == 0:
+        return None
+    p = np.maximum(expected / expected.sum(), epsilon)
+    q = np.maximum(actual / actual.sum(), epsilon)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def _severity(value: Optional[float]) -> Optional[str]:
+    if value is None:
+        return None
+    if value >= PSI_SIGNIFICANT:
+        return "significativa"
+    if value >= PSI_MODERATE:
+        return "moderada"
+    return "estavel"
+
+
+class _Feature:
+    """Histograma de bordas fixas + média e variância incrementais."""
+
+    __slots__ = ("edges", "counts", "n", "mean", "m2")
+
+    def __init__(self, edges: List[float]):
+        self.edges = edges
+        self.counts = [0] * (len(edges) - 1)
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value: float):
+        index = min(max(bisect.bisect_right(self.edges, value) - 1, 0), len(self.counts) - 1)
+        self.counts[index] += 1
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other: "_Feature"):
+        """Agrega outra janela (Chan et al. para média e variância)."""
+        if other.n == 0:
+            return
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.mean += delta * other.n / n
+        self.n = n
+
+    def summary(self) -> dict:
+        std = math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+        return {"media": round(self.mean, 4), "desvio": round(std, 4)}
+
+
+class DriftWindow:
+    """Estatísticas de um intervalo de requisições."""
+
+    def __init__(self, classes: List[str]):
+        self.classes = classes
+        self.started = time.time()
+        self.count = 0
+        self.features: Dict[str, _Feature] = {
+            name: _Feature(edges) for name, edges in FEATURE_EDGES.items()
+        }
+        self.class_counts = [0] * len(classes)
+
+    def add(self, values: dict, label: str):
+        self.count += 1
+        for name, value in values.items():
+            if value is not None:
+                self.features[name].add(value)
+        if label in self.classes:
+            self.class_counts[self.classes.index(label)] += 1
+
+    def merge(self, other: "DriftWindow"):
+        self.count += other.count
+        self.started = min(self.started, other.started)
+        for name, feature in other.features.items():
+            self.features[name].merge(feature)
+        for i, count in enumerate(other.class_counts):
+            self.class_counts[i] += count
+
+    def histograms(self) -> Dict[str, list]:
+        histograms = {name: list(f.counts) for name, f in self.features.items()}
+        histograms["classe"] = list(self.class_counts)
+        return histograms
+
+    def to_dict(self) -> dict:
+        """Formato da linha de base gravada em disco."""
+        return {
+            "formato": FORMAT_VERSION,
+            "criado_em": time.time(),
+            "observacoes": self.count,
+            "bordas": FEATURE_EDGES,
+            "classes": self.classes,
+            "histogramas": self.histograms(),
+            "resumo": {name: f.summary() for name, f in self.features.items()},
+        }
+
+
+def describe_input(
+    image_data: bytes,
+    decoded: Optional[np.ndarray] = None,
+    tensor: Optional[np.ndarray] = None
+) -> dict:
+    """
+    Características de entrada de uma imagem, sem redecodificá-la.
+
+    A intensidade vem da imagem já reduzida para o modelo (uint8
+    `decoded`, ou o `tensor` normalizado em [-1, 1] do pool), amostrada
+    a cada 4 pixels (~0,1 ms); as dimensões vêm do cabeçalho.
+
+    Args:
+        image_data: Bytes originais (só o cabeçalho é lido)
+        decoded: uint8 (H, W, 3)
+        tensor: float32 (H, W, 3) em [-1, 1]
+    """
+    from app.utils.image_processing import is_tensor_payload, open_image
+
+    values = {"intensidade_media": None, "intensidade_desvio": None}
+    if decoded is not None:
+        sample = decoded[::4, ::4].astype(np.float32)
+        values["intensidade_media"] = float(sample.mean())
+        values["intensidade_desvio"] = float(sample.std())
+    elif tensor is not None:
+        sample = tensor[::4, ::4]
+        values["intensidade_media"] = float((sample.mean() + 1.0) * 127.5)
+        values["intensidade_desvio"] = float(sample.std() * 127.5)
+
+    values.update(largura=None, altura=None, proporcao=None)
+    if not is_tensor_payload(image_data):
+        # Tensores de clientes leves não têm as dimensões originais
+        try:
+            width, height = open_image(image_data).size
+            values.update(largura=width, altura=height, proporcao=width / height)
+        except Exception:
+            pass
+    return values
+
+
+class DriftMonitor:
+    """
+    Janela atual de `window_size` requisições e as `windows` anteriores,
+    comparadas com a linha de base pelo PSI de cada característica.
+    """
+
+    def __init__(
+        self,
+        classes: List[str],
+        window_size: int = 500,
+        windows: int = 12,
+        baseline: Optional[dict] = None
+    ):
+        self.classes = list(classes)
+        self.window_size = window_size
+        self.baseline = baseline
+        self._lock = threading.Lock()
+        self._current = DriftWindow(self.classes)
+        self._closed = deque(maxlen=windows)
+        self._total = 0
+
+    @classmethod
+    def load_baseline(cls, path: str, classes: List[str]) -> Optional[dict]:
+        """Linha de base gravada por save(); None se ausente ou incompatível."""
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error("Linha de base de deriva ilegível (%s): %s", path, e)
+            return None
+        if baseline.get("formato") != FORMAT_VERSION or baseline.get("bordas") != FEATURE_EDGES \
+                or baseline.get("classes") != list(classes):
+            logger.error("Linha de base de deriva em %s incompatível; gere novamente", path)
+            return None
+        return baseline
+
+    def observe(self, values: Optional[dict], label: str, confidence: float):
+        """Registra uma predição (O(1); valores None são ignorados)."""
+        values = dict(values or {})
+        values["confianca"] = confidence
+        with self._lock:
+            self._current.add(values, label)
+            self._total += 1
+            if self._current.count >= self.window_size:
+                self._closed.append(self._current)
+                self._current = DriftWindow(self.classes)
+
+    def merged(self) -> DriftWindow:
+        """Todas as janelas em memória agregadas."""
+        with self._lock:
+            windows = list(self._closed) + [self._current]
+        merged = DriftWindow(self.classes)
+        for window in windows:
+            merged.merge(window)
+        return merged
+
+    def save(self, path: str) -> dict:
+        """Grava as janelas atuais como linha de base (ex.: conjunto de validação)."""
+        data = self.merged().to_dict()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        return data
+
+    def _compare(self, window: DriftWindow) -> dict:
+        histograms = window.histograms()
+        result = {
+            "inicio": window.started,
+            "observacoes": window.count,
+            "caracteristicas": {},
+        }
+        for name, counts in histograms.items():
+            entry = {}
+            if name in window.features:
+                entry.update(window.features[name].summary())
+            if self.baseline is not None:
+                value = psi(self.baseline["histogramas"][name], counts)
+                entry["psi"] = round(value, 4) if value is not None else None
+                entry["deriva"] = _severity(value)
+                if name in self.baseline["resumo"]:
+                    entry["media_base"] = self.baseline["resumo"][name]["media"]
+            if name == "classe":
+                total = sum(counts) or 1
+                entry["proporcoes"] = {c: round(n / total, 4) for c, n in zip(self.classes, counts)}
+            result["caracteristicas"][name] = entry
+
+        levels = [e.get("deriva") for e in result["caracteristicas"].values()]
+        result["deriva"] = (
+            "significativa" if "significativa" in levels
+            else "moderada" if "moderada" in levels
+            else "estavel" if "estavel" in levels
+            else None
+        )
+        return result
+
+    def report(self) -> dict:
+        """Janela atual, última janela fechada e todas agregadas, contra a linha de base."""
+        with self._lock:
+            current = self._current
+            last = self._closed[-1] if self._closed else None
+            closed = len(self._closed)
+            total = self._total
+
+        return {
+            "linha_de_base": {
+                "ativa": self.baseline is not None,
+                "observacoes": self.baseline["observacoes"] if self.baseline else None,
+                "criada_em": self.baseline["criado_em"] if self.baseline else None,
+            },
+            "tamanho_janela": self.window_size,
+            "janelas_fechadas": closed,
+            "total_observacoes": total,
+            "janela_atual": self._compare(current),
+            "ultima_janela": self._compare(last) if last is not None else None,
+            "agregado": self._compare(self.merged()),
+        }
+
+
+# Instância global
+_monitor = None
+
+
+def get_drift_monitor() -> Optional[DriftMonitor]:
+    """
+    Obtém o monitor de deriva da API FastAPI.
+
+    Returns:
+        DriftMonitor ou None se DRIFT_ENABLED for False
+    """
+    global _monitor
+
+    from app.config import settings
+
+    if not settings.DRIFT_ENABLED:
+        return None
+
+    if _monitor is None:
+        baseline = DriftMonitor.load_baseline(settings.DRIFT_BASELINE_PATH, settings.CLASSES)
+        _monitor = DriftMonitor(
+            classes=settings.CLASSES,
+            window_size=settings.DRIFT_WINDOW_SIZE,
+            windows=settings.DRIFT_WINDOWS,
+            baseline=baseline
+        )
+        if baseline is None:
+            logger.info("Monitor de deriva sem linha de base (gere com `python -m app.cli drift-baseline`)")
+
+    return _monitor
@@ -0,0 +1,134 @@
+"""
+Hash Ring - Hashing Consistente com Carga Limitada
+Distribui chaves (hash da imagem ou id do estudo + versão do modelo)
+entre as instâncias da API: a mesma chave vai sempre para a mesma
+instância, e uma instância que sai ou volta só move as suas chaves.
+
+Carga limitada: nenhuma instância recebe mais que
+`load_factor` x (média de requisições em andamento); acima disso, a
+chave segue para a próxima instância do anel. Instâncias fora do ar são
+puladas até voltarem (failover).
+
+Independente de framework: usado pelo roteador (app.router.main).
+"""
+
+import bisect
+import hashlib
+import math
+import threading
+from typing import Dict, List
+
+
+def _position(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    Anel de hashing consistente sobre `nodes`.
+
+    Args:
+        nodes: Identificadores das instâncias (ex.: URLs)
+        replicas: Pontos virtuais por instância (uniformidade da divisão)
+        load_factor: Carga máxima de uma instância em relação à média (> 1)
+    """
+
+    def __init__(self, nodes: List[str], replicas: int = 160, load_factor: float = 1.25):
+        if not nodes:
+            raise ValueError("O anel precisa de pelo menos uma instância")
+        if load_factor <= 1.0:
+            raise ValueError(f"load_factor deve ser maior que 1: {load_factor}")
+
+        self.nodes = list(dict.fromkeys(nodes))
+        self.replicas = replicas
+        self.load_factor = load_factor
+
+        points = sorted(
+            (_position(f"{node}#{i}"), node)
+            for node in self.nodes
+            for i in range(replicas)
+        )
+        self._positions = [position for position, _ in points]
+        self._owners = [node for _, node in points]
+
+        self._lock = threading.Lock()
+        self._up = {node: True for node in self.nodes}
+        self._load = {node: 0 for node in self.nodes}
+        self._routed = {node: 0 for node in self.nodes}
+        self._overflow = 0
+
+    def _walk(self, key: str) -> List[str]:
+        """Instâncias distintas na ordem do anel a partir da posição da chave."""
+        start = bisect.bisect(self._positions, _position(key))
+        order = []
+        for i in range(len(self._owners)):
+            node = self._owners[(start + i) % len(self._owners)]
+            if node not in order:
+                order.append(node)
+                if len(order) == len(self.nodes):
+                    break
+        return order
+
+    def capacity(self) -> int:
+        """Requisições em andamento permitidas por instância agora."""
+        with self._lock:
+            return self._capacity()
+
+    def _capacity(self) -> int:
+        up = sum(self._up.values()) or 1
+        return math.ceil(self.load_factor * (sum(self._load.values()) + 1) / up)
+
+    def candidates(self, key: str) -> List[str]:
+        """
+        Instâncias no ar para a chave, em ordem de preferência: a dona da
+        chave no anel e as seguintes, com as que estão no limite de carga
+        por último (usadas só se todas estiverem no limite).
+        """
+        order = self._walk(key)
+        with self._lock:
+            capacity = self._capacity()
+            up = [node for node in order if self._up[node]]
+            below = [node for node in up if self._load[node] < capacity]
+            if below and up and below[0] != up[0]:
+                self._overflow += 1
+            return below + [node for node in up if node not in below]
+
+    def acquire(self, node: str):
+        """Conta uma requisição em andamento na instância."""
+        with self._lock:
+            self._load[node] += 1
+            self._routed[node] += 1
+
+    def release(self, node: str):
+        with self._lock:
+            self._load[node] -= 1
+
+    def mark_down(self, node: str):
+        """Tira a instância do anel até mark_up (as chaves dela vão para as vizinhas)."""
+        with self._lock:
+            self._up[node] = False
+
+    def mark_up(self, node: str):
+        with self._lock:
+            self._up[node] = True
+
+    def is_up(self, node: str) -> bool:
+        with self._lock:
+            return self._up[node]
+
+    def metrics(self) -> Dict:
+        """Estado de cada instância e desvios por limite de carga."""
+        with self._lock:
+            return {
+                "instancias": {
+                    node: {
+                        "no_ar": self._up[node],
+                        "em_andamento": self._load[node],
+                        "roteadas": self._routed[node],
+                    }
+                    for node in self.nodes
+                },
+                "capacidade_por_instancia": self._capacity(),
+                "fator_carga": self.load_factor,
+                "desvios_por_carga": self._overflow,
+            }
@@ -0,0 +1,189 @@
+"""
+Health Sampler - Amostragem de Saúde em Segundo Plano
+Atualiza as estatísticas do processo e do sistema num intervalo fixo,
+para que /health (consultado por probes do Kubernetes, balanceadores e
+o HEALTHCHECK do Docker) responda em tempo constante com a última
+amostra. As amostras ficam num buffer circular, como histórico curto.
+"""
+
+import asyncio
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Callable, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+
+class HealthSampler:
+    """
+    Amostra, a cada `interval` segundos: RSS, CPU e threads do processo,
+    memória do sistema, atraso do event loop, profundidade da fila de
+    inferência e estado do modelo.
+
+    O atraso do event loop é medido por uma task no próprio loop; a
+    amostra guarda o maior atraso visto no intervalo.
+    """
+
+    def __init__(
+        self,
+        interval: float = 5.0,
+        history_size: int = 120,
+        queue_depth: Optional[Callable[[], int]] = None,
+        model_state: Optional[Callable[[], tuple]] = None,
+        model_version: Optional[str] = None,
+        lag_interval: float = 0.5
+    ):
+        self.interval = interval
+        self.queue_depth = queue_depth
+        self.model_state = model_state
+        self.model_version = model_version
+        self.lag_interval = lag_interval
+
+        self._process = psutil.Process()
+        self._process.cpu_percent(None)  # referência para a primeira medição
+        self._history = deque(maxlen=history_size)
+        self._latest: Optional[dict] = None
+        self._lag_ms: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lag_task: Optional[asyncio.Task] = None
+
+    def sample(self) -> dict:
+        """Coleta uma amostra e a torna a mais recente."""
+        memory = psutil.virtual_memory()
+        with self._process.oneshot():
+            rss = self._process.memory_info().rss
+            cpu = self._process.cpu_percent(None)
+            threads = self._process.num_threads()
+
+        model_loaded, model_status = self.model_state() if self.model_state else (False, "unknown")
+
+        queue_depth = None
+        if self.queue_depth is not None:
+            try:
+                queue_depth = self.queue_depth()
+            except Exception:
+                pass
+
+        # Maior atraso desde a amostra anterior (None sem event loop monitorado)
+        lag, self._lag_ms = self._lag_ms, None
+
+        sample = {
+            "timestamp": datetime.utcnow(),
+            "model_loaded": model_loaded,
+            "model_status": model_status,
+            "model_version": self.model_version,
+            "memory_usage_percent": memory.percent,
+            "memory_available_gb": round(memory.available / (1024 ** 3), 2),
+            "process_rss_mb": round(rss / (1024 * 1024), 1),
+            "process_cpu_percent": cpu,
+            "process_threads": threads,
+            "event_loop_lag_ms": round(lag, 2) if lag is not None else None,
+            "queue_depth": queue_depth,
+        }
+        self._history.append(sample)
+        self._latest = sample
+        return sample
+
+    def latest(self) -> dict:
+        """Última amostra (coleta uma na hora se o amostrador não rodou ainda)."""
+        sample = self._latest
+        return sample if sample is not None else self.sample()
+
+    def history(self, limit: Optional[int] = None) -> list:
+        """Amostras mais antigas primeiro; `limit` mantém só as últimas."""
+        samples = list(self._history)
+        return samples[-limit:] if limit else samples
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                logger.warning("Falha na amostragem de saúde: %s", e)
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """
+        Inicia a thread de amostragem (idempotente) e, com `loop`, a
+        medição do atraso desse event loop.
+        """
+        if self._thread is not None:
+            return
+        self.sample()
+        self._thread = threading.Thread(target=self._run, name="health-sampler", daemon=True)
+        self._thread.start()
+        if loop is not None:
+            self._lag_task = loop.create_task(self._watch_event_loop())
+
+    async def _watch_event_loop(self):
+        """Mede quanto o loop atrasa para acordar de um sleep."""
+        loop = asyncio.get_running_loop()
+        while not self._stop.is_set():
+            start = loop.time()
+            await asyncio.sleep(self.lag_interval)
+            lag = max(0.0, (loop.time() - start - self.lag_interval) * 1000)
+            if self._lag_ms is None or lag > self._lag_ms:
+                self._lag_ms = lag
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+
+# Instância global
+_sampler = None
+
+
+def get_health_sampler() -> HealthSampler:
+    """Obtém o amostrador de saúde da API FastAPI (criado na primeira chamada)."""
+    global _sampler
+
+    if _sampler is None:
+        from app.config import settings
+        from app.core.model_loader import get_model, is_model_loaded
+        from app.core.pipeline import get_pipeline
+
+        def queue_depth() -> int:
+            pipeline = get_pipeline()
+            return pipeline.queue_depth() if pipeline is not None else 0
+
+        def model_state() -> tuple:
+            if settings.INFERENCE_MODE == "remote":
+                # Modelo nos workers: a API depende só do broker
+                from app.core.broker import get_broker
+                if get_broker().ping():
+                    return True, "remote"
+                return False, f"error: broker indisponível ({settings.BROKER_URL})"
+            if is_model_loaded():
+                return True, "loaded"
+            # Tentar carregar aqui, na thread do amostrador, e não na do probe
+            try:
+                get_model()
+                return True, "loaded"
+            except Exception as e:
+                return False, f"error: {str(e)}"
+
+        _sampler = HealthSampler(
+            interval=settings.HEALTH_SAMPLE_INTERVAL,
+            history_size=settings.HEALTH_HISTORY_SIZE,
+            queue_depth=queue_depth,
+            model_state=model_state,
+            model_version=settings.MODEL_VERSION
+        )
+
+    return _sampler
+
+
+def shutdown_health_sampler():
+    """Encerra a thread de amostragem."""
+    global _sampler
+
+    if _sampler is not None:
+        _sampler.stop()
+        _sampler = None
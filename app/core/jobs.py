@@ -0,0 +1,448 @@
+"""
+Jobs - Processamento Assíncrono de Lotes
+Fila persistente em SQLite (WAL) para triagem offline de muitas imagens
+"""
+
+import json
+import logging
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from app.config import settings
+from app.core.audit import REJEITAR, content_hash, get_audit_log
+from app.core.pipeline import PRIORIDADE_BAIXA
+from app.core.predictor import Predictor, create_predictor
+from app.core.validator import ImageValidator
+
+logger = logging.getLogger(__name__)
+
+# Estados de jobs e itens
+PENDENTE = "pendente"
+PROCESSANDO = "processando"
+CONCLUIDO = "concluido"
+ERRO = "erro"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    processados INTEGER NOT NULL DEFAULT 0,
+    falhas INTEGER NOT NULL DEFAULT 0,
+    criado_em REAL NOT NULL,
+    atualizado_em REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_itens (
+    job_id TEXT NOT NULL,
+    indice INTEGER NOT NULL,
+    arquivo TEXT NOT NULL,
+    caminho TEXT,
+    status TEXT NOT NULL,
+    resultado TEXT,
+    erro TEXT,
+    PRIMARY KEY (job_id, indice)
+);
+CREATE INDEX IF NOT EXISTS idx_job_itens_status ON job_itens (status);
+"""
+
+
+class JobStore:
+    """
+    Fila de jobs persistida em SQLite com journal WAL.
+
+    As imagens de cada job ficam em disco até serem processadas;
+    o banco guarda apenas estado, progresso e resultados. Jobs
+    sobrevivem a reinícios: itens em processamento voltam para a fila.
+    """
+
+    def __init__(self, db_path: str, storage_dir: str):
+        self.db_path = Path(db_path)
+        self.storage_dir = Path(storage_dir)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+        self._recover()
+
+    def _recover(self):
+        """Devolve à fila os itens interrompidos por um reinício."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE job_itens SET status = ? WHERE status = ?",
+                (PENDENTE, PROCESSANDO)
+            )
+        if cursor.rowcount:
+            logger.info("Jobs: %d itens recolocados na fila", cursor.rowcount)
+
+    def create_job(self, files: Iterable[Tuple[str, bytes]]) -> str:
+        """
+        Cria um job a partir de (nome, bytes), gravando cada imagem em disco.
+
+        Returns:
+            str: Identificador do job
+        """
+        job_id = uuid.uuid4().hex
+        job_dir = self.storage_dir / job_id
+        job_dir.mkdir(parents=True)
+
+        rows = []
+        try:
+            for indice, (arquivo, data) in enumerate(files):
+                caminho = job_dir / f"{indice:08d}"
+                caminho.write_bytes(data)
+                rows.append((job_id, indice, arquivo, str(caminho), PENDENTE))
+        except Exception:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, total, criado_em, atualizado_em) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (job_id, PENDENTE if rows else CONCLUIDO, len(rows), now, now)
+            )
+            self._conn.executemany(
+                "INSERT INTO job_itens (job_id, indice, arquivo, caminho, status) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+
+        logger.info("Job %s criado com %d imagens", job_id, len(rows))
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        """Estado e progresso de um job."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def get_results(self, job_id: str, offset: int = 0, limit: int = 100) -> List[dict]:
+        """Resultados dos itens concluídos ou com erro, paginados por índice."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT indice, arquivo, status, resultado, erro FROM job_itens "
+                "WHERE job_id = ? AND status IN (?, ?) "
+                "ORDER BY indice LIMIT ? OFFSET ?",
+                (job_id, CONCLUIDO, ERRO, limit, offset)
+            ).fetchall()
+
+        return [
+            {
+                "indice": row["indice"],
+                "arquivo": row["arquivo"],
+                "status": row["status"],
+                "resultado": json.loads(row["resultado"]) if row["resultado"] else None,
+                "erro": row["erro"],
+            }
+            for row in rows
+        ]
+
+    def claim(self, limit: int) -> List[dict]:
+        """Reserva até `limit` itens pendentes (job mais antigo primeiro)."""
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT i.job_id, i.indice, i.arquivo, i.caminho FROM job_itens i "
+                "JOIN jobs j ON j.id = i.job_id "
+                "WHERE i.status = ? ORDER BY j.criado_em, i.indice LIMIT ?",
+                (PENDENTE, limit)
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE job_itens SET status = ? WHERE job_id = ? AND indice = ?",
+                [(PROCESSANDO, row["job_id"], row["indice"]) for row in rows]
+            )
+            self._conn.executemany(
+                "UPDATE jobs SET status = ?, atualizado_em = ? WHERE id = ? AND status = ?",
+                [(PROCESSANDO, time.time(), job_id, PENDENTE)
+                 for job_id in {row["job_id"] for row in rows}]
+            )
+        return [dict(row) for row in rows]
+
+    def complete(self, items: List[dict]):
+        """
+        Registra os resultados de itens processados.
+
+        Cada item deve ter job_id, indice e "resultado" ou "erro".
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            for item in items:
+                failed = item.get("erro") is not None
+                self._conn.execute(
+                    "UPDATE job_itens SET status = ?, resultado = ?, erro = ?, caminho = NULL "
+                    "WHERE job_id = ? AND indice = ?",
+                    (
+                        ERRO if failed else CONCLUIDO,
+                        None if failed else json.dumps(item["resultado"]),
+                        item.get("erro"),
+                        item["job_id"],
+                        item["indice"],
+                    )
+                )
+                self._conn.execute(
+                    "UPDATE jobs SET processados = processados + 1, "
+                    "falhas = falhas + ?, atualizado_em = ? WHERE id = ?",
+                    (1 if failed else 0, now, item["job_id"])
+                )
+            self._conn.execute(
+                "UPDATE jobs SET status = ? WHERE status = ? AND processados >= total",
+                (CONCLUIDO, PROCESSANDO)
+            )
+
+        for item in items:
+            if item.get("caminho"):
+                Path(item["caminho"]).unlink(missing_ok=True)
+
+        # Remover diretórios de jobs que ficaram vazios
+        for job_id in {item["job_id"] for item in items}:
+            try:
+                (self.storage_dir / job_id).rmdir()
+            except OSError:
+                pass
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class InteractiveTraffic:
+    """
+    Requisições de predição interativas em andamento.
+
+    Sinal de "ocupado" dos jobs quando o pipeline está desligado
+    (PIPELINE_ENABLED=False): contado pelo middleware da API, do início
+    da requisição até o último byte da resposta.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    def begin(self):
+        with self._lock:
+            self._in_flight += 1
+
+    def end(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def busy(self) -> bool:
+        with self._lock:
+            return self._in_flight > 0
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return self._in_flight
+
+
+class JobRunner:
+    """
+    Workers em background que processam os jobs em batches.
+
+    Rodam com prioridade baixa: enquanto o pipeline interativo de
+    /predict tiver trabalho, os workers esperam. Com o pipeline, as
+    imagens entram na faixa baixa, então requisições que chegam no
+    meio de um batch passam à frente.
+
+    Com `audit`, cada predição concluída é registrada (origem "job"); com
+    AUDIT_ON_FULL=rejeitar, os workers esperam a fila de auditoria esvaziar.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        predictor: Predictor,
+        workers: int = 1,
+        batch_size: int = 16,
+        poll_interval: float = 1.0,
+        is_busy=None,
+        pipeline=None,
+        audit=None
+    ):
+        self.store = store
+        self.predictor = predictor
+        self.validator = ImageValidator()
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.is_busy = is_busy or (lambda: False)
+        self.pipeline = pipeline
+        self.audit = audit
+
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"jobs-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info("Jobs: %d worker(s) iniciado(s)", self.workers)
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Tráfego interativo (e espaço para o registro de auditoria) tem prioridade
+            if self.is_busy() or self._audit_full():
+                self._stop.wait(self.poll_interval / 10)
+                continue
+
+            try:
+                items = self.store.claim(self.batch_size)
+            except Exception as e:
+                logger.error("Jobs: erro ao reservar itens: %s", e)
+                self._stop.wait(self.poll_interval)
+                continue
+            if not items:
+                self._stop.wait(self.poll_interval)
+                continue
+
+            try:
+                self._predict(items)
+            except Exception as e:
+                logger.error("Jobs: erro ao processar batch: %s", e, exc_info=True)
+                # Só os itens que ainda não têm resultado nem erro
+                for item in items:
+                    if "resultado" not in item and "erro" not in item:
+                        item["erro"] = f"Erro interno: {str(e)}"
+
+            try:
+                self.store.complete(items)
+            except Exception as e:
+                # Os itens ficam "processando" e voltam à fila no próximo início
+                logger.error("Jobs: erro ao registrar %d resultados: %s", len(items), e, exc_info=True)
+                self._stop.wait(self.poll_interval)
+
+    def _audit_full(self) -> bool:
+        return self.audit is not None and self.audit.on_full == REJEITAR and not self.audit.has_capacity()
+
+    def _record(self, item: dict, data: bytes, started: float):
+        if self.audit is not None:
+            self.audit.record(
+                content_hash(data), item["resultado"],
+                latency_ms=(time.perf_counter() - started) * 1000,
+                filename=item["arquivo"],
+                request_id=item["job_id"],
+                origin="job"
+            )
+
+    def process(self, items: List[dict]):
+        """Valida, prediz em batch e registra os resultados."""
+        self._predict(items)
+        self.store.complete(items)
+
+    def _predict(self, items: List[dict]):
+        """Preenche "resultado" ou "erro" em cada item."""
+        if self.pipeline is not None:
+            self._predict_pipeline(items)
+            return
+
+        started = time.perf_counter()
+        valid = []
+        for item in items:
+            try:
+                data = Path(item["caminho"]).read_bytes()
+                self.validator.validate(data, item["arquivo"])
+                valid.append((item, data))
+            except Exception as e:
+                item["erro"] = getattr(e, "detail", str(e))
+
+        if valid:
+            results = self.predictor.predict_batch([data for _, data in valid])
+            for (item, data), result in zip(valid, results):
+                if "error" in result:
+                    item["erro"] = result["error"]
+                else:
+                    item["resultado"] = result
+                    self._record(item, data, started)
+
+    def _predict_pipeline(self, items: List[dict]):
+        """Envia o batch ao pipeline (que valida) na faixa de prioridade baixa."""
+        pending = []
+        for item in items:
+            try:
+                data = Path(item["caminho"]).read_bytes()
+                started = time.perf_counter()
+                future = self.pipeline.submit(
+                    data, item["arquivo"], block=True, priority=PRIORIDADE_BAIXA
+                )
+                pending.append((item, data, started, future))
+            except Exception as e:
+                item["erro"] = getattr(e, "detail", str(e))
+
+        for item, data, started, future in pending:
+            try:
+                item["resultado"] = future.result()
+            except Exception as e:
+                item["erro"] = getattr(e, "detail", str(e))
+                continue
+            self._record(item, data, started)
+
+
+# Instâncias globais
+_store = None
+_runner = None
+_interactive = InteractiveTraffic()
+
+
+def get_interactive_traffic() -> InteractiveTraffic:
+    """Requisições interativas em andamento na API FastAPI."""
+    return _interactive
+
+
+def get_job_store() -> JobStore:
+    """Obtém a fila de jobs (singleton)."""
+    global _store
+
+    if _store is None:
+        _store = JobStore(settings.JOBS_DB_PATH, settings.JOBS_STORAGE_DIR)
+
+    return _store
+
+
+def start_job_runner(is_busy=None, pipeline=None):
+    """Inicia os workers de jobs, se habilitados."""
+    global _runner
+
+    if not settings.JOBS_ENABLED or _runner is not None:
+        return
+
+    _runner = JobRunner(
+        get_job_store(),
+        create_predictor(),
+        workers=settings.JOBS_WORKERS,
+        batch_size=settings.JOBS_BATCH_SIZE,
+        poll_interval=settings.JOBS_POLL_INTERVAL,
+        is_busy=is_busy,
+        pipeline=pipeline,
+        audit=get_audit_log()
+    )
+    _runner.start()
+
+
+def stop_job_runner():
+    """Encerra os workers de jobs."""
+    global _runner
+
+    if _runner is not None:
+        _runner.stop()
+        _runner = None
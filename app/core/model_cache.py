@@ -0,0 +1,188 @@
+"""
+Model Cache - Carregamento Rápido do Modelo
+Converte o .keras num artefato em cache (arquitetura JSON + pesos num
+arquivo binário contínuo) indexado pelo hash do arquivo. Processos
+seguintes leem os pesos com mmap em vez de descompactar o zip e
+desserializar o HDF5.
+
+Só acelera o carregamento: as variáveis do TensorFlow copiam os pesos,
+então cada processo continua com a sua cópia do modelo em memória.
+
+Os arquivos do artefato nunca são alterados nem apagados depois de
+criados (outro processo pode estar lendo): um artefato novo grava pesos
+e arquitetura com nomes únicos e publica o manifest.json com os.replace.
+
+Independente de framework: usado por app.core.model_loader (FastAPI)
+e por modelos.carregador (Django).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_FORMAT_VERSION = 2
+_ALIGNMENT = 64
+
+_fingerprints = {}
+
+
+def model_fingerprint(path) -> str:
+    """Hash (sha256, 16 hex) do arquivo ou diretório do modelo."""
+    path = Path(path)
+    files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+    stat_key = tuple((str(p), p.stat().st_size, p.stat().st_mtime_ns) for p in files)
+
+    # Recalcular só se tamanho/mtime mudaram
+    if _fingerprints.get(str(path), (None,))[0] != stat_key:
+        digest = hashlib.sha256()
+        for file in files:
+            with open(file, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+        _fingerprints[str(path)] = (stat_key, digest.hexdigest()[:16])
+
+    return _fingerprints[str(path)][1]
+
+
+def _keras():
+    import tensorflow as tf
+    return tf.keras
+
+
+def _keras_version():
+    return getattr(_keras(), "__version__", None)
+
+
+def _write_unique(artifact_dir: Path, suffix: str, write) -> str:
+    """Grava um arquivo novo (nome único) no artefato e retorna o nome."""
+    fd, path = tempfile.mkstemp(prefix="", suffix=suffix, dir=artifact_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return os.path.basename(path)
+
+
+def _write_artifact(model, artifact_dir: Path):
+    """Grava arquitetura e pesos alinhados num único arquivo e publica o manifesto."""
+    weights = [np.asarray(array, order="C") for array in model.get_weights()]
+
+    layout = []
+    offset = 0
+    for array in weights:
+        offset = -(-offset // _ALIGNMENT) * _ALIGNMENT
+        layout.append({
+            "offset": offset,
+            "shape": list(array.shape),
+            "dtype": array.dtype.str,
+        })
+        offset += array.nbytes
+
+    def write_weights(f):
+        for entry, array in zip(layout, weights):
+            f.seek(entry["offset"])
+            f.write(array.tobytes())
+        f.truncate(offset)
+
+    artifact_dir.mkdir(parents=True, exist_ok=True)
+    architecture = _write_unique(
+        artifact_dir, ".json", lambda f: f.write(model.to_json().encode("utf-8"))
+    )
+    weights_file = _write_unique(artifact_dir, ".bin", write_weights)
+    manifest = json.dumps({
+        "formato": _FORMAT_VERSION,
+        "keras": _keras_version(),
+        "arquitetura": architecture,
+        "arquivo_pesos": weights_file,
+        "pesos": layout,
+    }).encode("utf-8")
+
+    # Publicação atômica: quem ler o manifesto encontra arquivos completos.
+    # Outro processo convertendo ao mesmo tempo só troca qual deles vale
+    tmp_manifest = _write_unique(artifact_dir, ".tmp", lambda f: f.write(manifest))
+    os.replace(artifact_dir / tmp_manifest, artifact_dir / "manifest.json")
+
+
+def _read_artifact(artifact_dir: Path):
+    """Reconstrói o modelo e atribui os pesos a partir do arquivo mapeado."""
+    keras = _keras()
+    manifest = json.loads((artifact_dir / "manifest.json").read_text(encoding="utf-8"))
+
+    if manifest.get("formato") != _FORMAT_VERSION or manifest.get("keras") != _keras_version():
+        raise ValueError("Artefato gerado por outra versão do formato ou do Keras")
+
+    model = keras.models.model_from_json(
+        (artifact_dir / manifest["arquitetura"]).read_text(encoding="utf-8")
+    )
+
+    # Somente leitura e sem desserializar: set_weights copia os arrays
+    # para as variáveis e o mapeamento é descartado em seguida
+    mapped = np.memmap(artifact_dir / manifest["arquivo_pesos"], mode="r")
+    arrays = [
+        np.ndarray(
+            tuple(entry["shape"]),
+            dtype=np.dtype(entry["dtype"]),
+            buffer=mapped,
+            offset=entry["offset"],
+        )
+        for entry in manifest["pesos"]
+    ]
+    if len(arrays) != len(model.weights):
+        raise ValueError("Artefato não corresponde à arquitetura")
+
+    model.set_weights(arrays)
+    return model
+
+
+def load_model_fast(model_path, cache_dir):
+    """
+    Carrega o modelo pelo artefato em cache, criando-o na primeira vez.
+
+    Se a conversão não for possível (ex.: camadas customizadas não
+    serializáveis em JSON), usa o load_model padrão.
+
+    Args:
+        model_path: Arquivo .keras
+        cache_dir: Diretório dos artefatos (um subdiretório por hash)
+
+    Returns:
+        Modelo Keras pronto para inferência (não compilado)
+    """
+    keras = _keras()
+    model_path = Path(model_path)
+    artifact_dir = Path(cache_dir) / model_fingerprint(model_path)
+
+    if (artifact_dir / "manifest.json").exists():
+        start = time.perf_counter()
+        try:
+            model = _read_artifact(artifact_dir)
+            logger.info(
+                "Modelo carregado do cache %s em %.2fs",
+                artifact_dir, time.perf_counter() - start
+            )
+            return model
+        except Exception as e:
+            # Sem apagar: outro processo pode estar usando os arquivos antigos
+            logger.warning("Cache do modelo inválido (%s), recriando: %s", artifact_dir, e)
+
+    start = time.perf_counter()
+    model = keras.models.load_model(str(model_path), compile=False)
+    logger.info("Modelo carregado de %s em %.2fs", model_path, time.perf_counter() - start)
+
+    try:
+        _write_artifact(model, artifact_dir)
+        logger.info("Artefato de carregamento rápido criado em %s", artifact_dir)
+    except Exception as e:
+        logger.warning("Não foi possível criar o cache do modelo: %s", e)
+
+    return model
@@ -3,20 +3,26 @@ Model Loader - Carregamento do Modelo
 Singleton para carregar modelo uma única vez
 """
 
-import tensorflow as tf
 import logging
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from app.config import settings
+from app.core.model_cache import load_model_fast
+
+if TYPE_CHECKING:
+    import tensorflow as tf
 
 logger = logging.getLogger(__name__)
 
 # Variável global para armazenar modelo (singleton)
 _model = None
 _model_loaded = False
+_screening_model = None
+_embedding_model = None
 
 
-def get_model() -> tf.keras.Model:
+def get_model() -> "tf.keras.Model":
     """
     Obtém o modelo carregado (singleton).
     
@@ -47,10 +53,14 @@ def get_model() -> tf.keras.Model:
     
     try:
         # Carregar modelo
-        _model = tf.keras.models.load_model(
-            settings.MODEL_PATH,
-            compile=False  # Não precisa compilar para inferência
-        )
+        if settings.MODEL_FAST_LOAD:
+            _model = load_model_fast(settings.MODEL_PATH, settings.MODEL_CACHE_DIR)
+        else:
+            import tensorflow as tf
+            _model = tf.keras.models.load_model(
+                settings.MODEL_PATH,
+                compile=False  # Não precisa compilar para inferência
+            )
         
         # Informações do modelo
         total_params = _model.count_params()
@@ -71,17 +81,93 @@ def get_model() -> tf.keras.Model:
         raise Exception(error_msg)
 
 
+def get_screening_model() -> "tf.keras.Model":
+    """
+    Obtém o modelo de triagem da cascata (singleton).
+    
+    Modelo pequeno e rápido (ex.: quantizado ou de menor resolução),
+    carregado de SCREENING_MODEL_PATH.
+    
+    Returns:
+        tf.keras.Model: Modelo de triagem
+        
+    Raises:
+        FileNotFoundError: Se o modelo não for encontrado
+    """
+    global _screening_model
+    
+    if _screening_model is not None:
+        return _screening_model
+    
+    model_path = Path(settings.SCREENING_MODEL_PATH or "")
+    if not settings.SCREENING_MODEL_PATH or not model_path.exists():
+        error_msg = f"Modelo de triagem não encontrado em: {settings.SCREENING_MODEL_PATH}"
+        logger.error(error_msg)
+        raise FileNotFoundError(error_msg)
+    
+    logger.info(f"Carregando modelo de triagem: {model_path}")
+    if settings.MODEL_FAST_LOAD:
+        _screening_model = load_model_fast(model_path, settings.MODEL_CACHE_DIR)
+    else:
+        import tensorflow as tf
+        _screening_model = tf.keras.models.load_model(str(model_path), compile=False)
+    
+    logger.info(f"✓ Modelo de triagem carregado")
+    logger.info(f"  Parâmetros: {_screening_model.count_params():,}")
+    logger.info(f"  Input shape: {_screening_model.input_shape}")
+    
+    return _screening_model
+
+
+def get_embedding_model() -> "tf.keras.Model":
+    """
+    Modelo principal com uma segunda saída: o embedding da penúltima
+    camada (a entrada do classificador, por padrão, ou EMBEDDING_LAYER).
+    
+    Compartilha camadas e pesos com get_model(); o embedding já é
+    calculado em toda inferência, então a saída extra não custa nada.
+    
+    Returns:
+        tf.keras.Model: Saídas [probabilidades (N, 3), embedding (N, D)]
+    """
+    global _embedding_model
+    
+    if _embedding_model is None:
+        import tensorflow as tf
+        
+        model = get_model()
+        if settings.EMBEDDING_LAYER:
+            embedding = model.get_layer(settings.EMBEDDING_LAYER).output
+        else:
+            embedding = model.layers[-1].input
+        
+        _embedding_model = tf.keras.Model(
+            inputs=model.inputs,
+            outputs=[model.outputs[0], embedding],
+            name=f"{model.name}_embedding"
+        )
+        logger.info(f"✓ Saída de embedding: {embedding.shape[-1]} dimensões")
+    
+    return _embedding_model
+
+
+def is_model_loaded() -> bool:
+    """Indica se o modelo principal já está em memória (sem carregá-lo)."""
+    return _model_loaded
+
+
 def reload_model():
     """
     Recarrega o modelo.
     
     Útil para atualizar o modelo em runtime sem reiniciar a API.
     """
-    global _model, _model_loaded
+    global _model, _model_loaded, _embedding_model
     
     logger.info("Recarregando modelo...")
     _model = None
     _model_loaded = False
+    _embedding_model = None
     
     return get_model()
 
@@ -93,6 +179,8 @@ def get_model_info() -> dict:
     Returns:
         dict: Informações do modelo
     """
+    import tensorflow as tf
+    
     model = get_model()
     
     return {
@@ -105,19 +193,22 @@ def get_model_info() -> dict:
     }
 
 
-def warm_up_model():
+def warm_up_model(model=None):
     """
     Aquece o modelo fazendo uma predição dummy.
     
     A primeira predição sempre é mais lenta.
     Fazer um warm-up acelera predições subsequentes.
+    
+    Args:
+        model: Modelo a aquecer (padrão: get_model())
     """
     import numpy as np
     
     logger.info("Aquecendo modelo (warm-up)...")
     
     try:
-        model = get_model()
+        model = model or get_model()
         
         # Criar imagem dummy
         dummy_input = np.random.rand(1, settings.IMAGE_SIZE, settings.IMAGE_SIZE, 3)
@@ -131,10 +222,3 @@ def warm_up_model():
     except Exception as e:
         logger.warning(f"Falha no warm-up: {str(e)}")
 
-
-# Warm-up automático na inicialização
-if __name__ != "__main__":
-    try:
-        warm_up_model()
-    except:
-        pass  # Falha silenciosa no warm-up
\ No newline at end of file
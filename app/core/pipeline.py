@@ -0,0 +1,624 @@
+"""
+Pipeline de Inferência
+Estágios encadeados por filas limitadas: decodificação, preprocessamento,
+inferência e formatação. A decodificação da imagem N+1 acontece enquanto
+o modelo processa a imagem N.
+
+As filas atendem por faixa de prioridade (alta, normal, baixa) e itens
+com prazo vencido ou cancelados pelo cliente são descartados antes de
+consumir processamento.
+"""
+
+import heapq
+import itertools
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.core.predictor import Predictor, create_predictor
+from app.utils.tracing import current_context, new_span_id
+from app.utils.exceptions import (
+    DeadlineExceededException,
+    PredictionException,
+    ServiceOverloadedException
+)
+
+logger = logging.getLogger(__name__)
+
+# Faixas de prioridade (menor valor é atendido primeiro)
+PRIORITIES = ("alta", "normal", "baixa")
+PRIORIDADE_ALTA = 0
+PRIORIDADE_NORMAL = 1
+PRIORIDADE_BAIXA = 2
+
+_PRIORITY_ALIASES = {"high": PRIORIDADE_ALTA, "low": PRIORIDADE_BAIXA}
+
+
+def parse_priority(value: Optional[str]) -> int:
+    """
+    Converte o nome da faixa ("alta", "normal", "baixa") no seu índice.
+
+    Raises:
+        ValueError: Se o nome não corresponder a nenhuma faixa
+    """
+    if not value:
+        return PRIORIDADE_NORMAL
+    value = value.strip().lower()
+    if value in _PRIORITY_ALIASES:
+        return _PRIORITY_ALIASES[value]
+    if value not in PRIORITIES:
+        raise ValueError(f"Prioridade inválida: {value}. Use: {', '.join(PRIORITIES)}")
+    return PRIORITIES.index(value)
+
+
+# Sinal para encerrar as threads de um estágio
+_STOP = object()
+
+
+class PipelineItem:
+    """Uma imagem em trânsito pelo pipeline."""
+
+    def __init__(
+        self,
+        image_data: bytes,
+        filename: str = None,
+        priority: int = PRIORIDADE_NORMAL,
+        deadline: Optional[float] = None,
+        similar: int = 0
+    ):
+        self.image_data = image_data
+        self.filename = filename
+        self.priority = priority  # índice em PRIORITIES
+        self.deadline = deadline  # time.monotonic() limite, ou None
+        self.decoded = None       # uint8 (H, W, 3)
+        self.tensor = None        # float32 (H, W, 3)
+        self.slot = None          # slot do PreprocessPool, se usado
+        self.predictions = None   # probabilidades (n_classes,)
+        self.stage = None         # estágio da cascata que decidiu
+        self.embedding = None     # embedding (D,), com índice de casos semelhantes
+        self.similar = similar    # casos semelhantes pedidos
+        self.features = None      # características para o monitor de deriva
+        self.cache_key = None     # chave no cache de resultados, se consultado
+        self.result = None        # dict formatado
+        self.timings = {}         # estágio -> segundos
+        self.future = Future()
+        self.future.timings = self.timings  # visível a quem aguarda (logs por etapa)
+        self.trace, self.parent_span = current_context()  # trace da requisição, se houver
+        self.enqueued_ns = time.time_ns()  # entrada na fila do estágio atual
+
+    def expired(self, now: float) -> bool:
+        return self.deadline is not None and now >= self.deadline
+
+    def resolve(self, result=None, error: Exception = None):
+        """Conclui o future (ignorado se o cliente já o cancelou)."""
+        try:
+            if error is not None:
+                self.future.set_exception(error)
+            else:
+                self.future.set_result(result)
+        except InvalidStateError:
+            pass
+
+
+class LaneQueue(queue.PriorityQueue):
+    """
+    Fila limitada por faixas: entrega primeiro a faixa mais prioritária,
+    em ordem de chegada dentro de cada faixa. O sinal de parada entra
+    depois de todos os itens.
+    """
+
+    def _init(self, maxsize):
+        super()._init(maxsize)
+        self._sequence = itertools.count()
+
+    def _put(self, item):
+        priority = getattr(item, "priority", len(PRIORITIES))
+        heapq.heappush(self.queue, (priority, next(self._sequence), item))
+
+    def _get(self):
+        return heapq.heappop(self.queue)[2]
+
+
+class Stage:
+    """
+    Estágio do pipeline com N threads consumindo uma fila limitada.
+
+    O handler recebe uma lista de itens (batch) e os altera no lugar.
+    Itens concluídos seguem para o próximo estágio; a fila do próximo
+    estágio é limitada, então um estágio lento segura os anteriores.
+
+    Antes do handler, itens cancelados ou com prazo vencido são
+    descartados e repassados a `on_drop(item, motivo)`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[List[PipelineItem]], None],
+        concurrency: int = 1,
+        queue_size: int = 64,
+        batch_size: int = 1,
+        batch_timeout: float = 0.0
+    ):
+        self.name = name
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.batch_timeout = batch_timeout
+        self.queue = LaneQueue(maxsize=queue_size)
+        self.next = None
+        self.on_drop = None
+
+        self._threads = []
+        self._lock = threading.Lock()
+        self._busy = 0
+        self._processed = 0
+        self._errors = 0
+        self._batches = 0
+        self._busy_seconds = 0.0
+        self._started_at = None
+
+    def start(self):
+        """Inicia as threads do estágio."""
+        self._started_at = time.monotonic()
+        for i in range(self.concurrency):
+            thread = threading.Thread(
+                target=self._run,
+                name=f"pipeline-{self.name}-{i}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Encerra as threads após esvaziar a fila."""
+        for _ in self._threads:
+            self.queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _take(self) -> list:
+        """Retira um item da fila e, se houver, completa o batch."""
+        first = self.queue.get()
+        if first is _STOP:
+            return None
+
+        items = [first]
+        deadline = time.monotonic() + self.batch_timeout
+
+        while len(items) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    item = self.queue.get(timeout=remaining)
+                else:
+                    item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if item is _STOP:
+                # Devolver o sinal para a próxima iteração
+                self.queue.put(_STOP)
+                break
+            items.append(item)
+
+        return items
+
+    def _discard_stale(self, items: List[PipelineItem]) -> List[PipelineItem]:
+        """Remove itens que não precisam mais ser processados."""
+        now = time.monotonic()
+        live = []
+        for item in items:
+            if item.future.cancelled():
+                reason = "cancelado"
+            elif item.expired(now):
+                reason = "prazo"
+                item.resolve(error=DeadlineExceededException(
+                    "Prazo da requisição expirou antes do processamento."
+                ))
+            else:
+                live.append(item)
+                continue
+
+            if self.on_drop is not None:
+                self.on_drop(item, reason)
+        return live
+
+    def _run(self):
+        while True:
+            items = self._take()
+            if items is None:
+                return
+
+            items = self._discard_stale(items)
+            if not items:
+                continue
+
+            with self._lock:
+                self._busy += 1
+
+            start_ns = time.time_ns()
+            start = time.perf_counter()
+            try:
+                self.handler(items)
+                failed = None
+            except Exception as e:
+                failed = e
+            elapsed = time.perf_counter() - start
+            end_ns = time.time_ns()
+            self._trace(items, start_ns, end_ns, failed is not None)
+
+            with self._lock:
+                self._busy -= 1
+                self._busy_seconds += elapsed
+                self._batches += 1
+                self._processed += len(items)
+                if failed is not None:
+                    self._errors += len(items)
+
+            for item in items:
+                item.timings[self.name] = elapsed
+                if failed is not None:
+                    item.resolve(error=failed)
+                elif self.next is not None:
+                    item.enqueued_ns = end_ns
+                    self.next.queue.put(item)
+                else:
+                    item.resolve(item.result)
+
+    def _trace(self, items: List[PipelineItem], start_ns: int, end_ns: int, failed: bool):
+        """Span do estágio em cada requisição rastreada, com o lote de que participou."""
+        traced = [item for item in items if item.trace is not None]
+        if not traced:
+            return
+
+        batch = {}
+        if len(items) > 1:
+            batch = {"lote.id": new_span_id(), "lote.tamanho": len(items)}
+
+        for item in traced:
+            attributes = {
+                "pipeline.estagio": self.name,
+                "fila_ms": round((start_ns - item.enqueued_ns) / 1e6, 3),
+                **batch,
+            }
+            # Links para as outras requisições do mesmo lote
+            links = [
+                (other.trace.trace_id, other.parent_span)
+                for other in traced
+                if other is not item and other.trace is not item.trace
+            ]
+            item.trace.record(
+                self.name, start_ns, end_ns,
+                parent_id=item.parent_span,
+                attributes=attributes,
+                links=links,
+                error=failed
+            )
+
+    def metrics(self) -> dict:
+        """Ocupação e contadores do estágio."""
+        with self._lock:
+            uptime = time.monotonic() - self._started_at if self._started_at else 0.0
+            capacity = uptime * self.concurrency
+            return {
+                "concorrencia": self.concurrency,
+                "ocupados": self._busy,
+                "ocupacao": round(self._busy_seconds / capacity, 4) if capacity else 0.0,
+                "fila": self.queue.qsize(),
+                "fila_max": self.queue.maxsize,
+                "processados": self._processed,
+                "erros": self._errors,
+                "batches": self._batches,
+                "tamanho_medio_batch": (
+                    round(self._processed / self._batches, 2) if self._batches else 0.0
+                ),
+                "tempo_medio_ms": (
+                    round(1000 * self._busy_seconds / self._batches, 2) if self._batches else 0.0
+                ),
+            }
+
+
+class InferencePipeline:
+    """
+    Pipeline de predição em estágios sobre um Predictor.
+
+    Cada estágio tem concorrência própria, ajustável ao número de
+    núcleos do nó. A inferência agrupa as imagens já preprocessadas
+    em batches de até max_batch_size.
+    """
+
+    def __init__(
+        self,
+        predictor: Predictor,
+        validator=None,
+        decode_workers: int = 2,
+        preprocess_workers: int = 1,
+        inference_workers: int = 1,
+        format_workers: int = 1,
+        queue_size: int = 64,
+        max_batch_size: int = 8,
+        batch_timeout_ms: float = 0.0
+    ):
+        self.predictor = predictor
+        self.validator = validator
+        self.stages = [
+            Stage("decodificacao", self._decode, decode_workers, queue_size),
+            Stage("preprocessamento", self._preprocess, preprocess_workers, queue_size),
+            Stage(
+                "inferencia", self._infer, inference_workers, queue_size,
+                batch_size=max_batch_size, batch_timeout=batch_timeout_ms / 1000.0
+            ),
+            Stage("formatacao", self._format, format_workers, queue_size),
+        ]
+        for stage, next_stage in zip(self.stages, self.stages[1:]):
+            stage.next = next_stage
+        for stage in self.stages:
+            stage.on_drop = self._on_drop
+
+        self._started = False
+        self._lock = threading.Lock()
+        self._lanes_lock = threading.Lock()
+        self._lanes = {
+            name: {
+                "submetidos": 0, "concluidos": 0, "cache": 0,
+                "prazo_expirado": 0, "atrasados": 0, "cancelados": 0
+            }
+            for name in PRIORITIES
+        }
+
+    # ---------------------------------------------------------------- estágios
+
+    def _decode(self, items: List[PipelineItem]):
+        """Validação + decode/resize (ou preprocessamento no pool)."""
+        for item in items:
+            if self.validator is not None:
+                self.validator.validate(item.image_data, item.filename)
+
+            pool = self.predictor.preprocess_pool
+            if pool is not None:
+                item.slot = pool.acquire()
+                try:
+                    pool.submit(item.image_data, item.slot).result()
+                except Exception:
+                    pool.release(item.slot)
+                    item.slot = None
+                    raise
+                item.features = self.predictor._describe(
+                    item.image_data, tensor=pool.view([item.slot])[0]
+                )
+            else:
+                item.decoded = self.predictor._decode(item.image_data)
+                item.features = self.predictor._describe(item.image_data, decoded=item.decoded)
+
+            # Bytes originais não são mais necessários
+            item.image_data = None
+
+    def _preprocess(self, items: List[PipelineItem]):
+        """Normalização (já feita no pool quando há slot)."""
+        for item in items:
+            if item.slot is None:
+                item.tensor = self.predictor._normalize(item.decoded)
+                item.decoded = None
+
+    def _infer(self, items: List[PipelineItem]):
+        """Inferência em batch."""
+        pool = self.predictor.preprocess_pool
+        slots = [item.slot for item in items if item.slot is not None]
+
+        try:
+            if slots:
+                batch = pool.view(slots)
+            else:
+                batch = np.stack([item.tensor for item in items])
+
+            predictions, stages, embeddings = self.predictor._infer_staged(batch)
+        except (ServiceOverloadedException, DeadlineExceededException):
+            raise
+        except Exception as e:
+            logger.error("Erro na inferência: %s", e, exc_info=True)
+            raise PredictionException(f"Erro ao processar imagem: {str(e)}")
+        finally:
+            for slot in slots:
+                pool.release(slot)
+
+        for i, (item, prediction, stage) in enumerate(zip(items, predictions, stages)):
+            item.predictions = prediction
+            item.stage = stage
+            item.embedding = embeddings[i] if embeddings is not None else None
+            item.tensor = None
+            item.slot = None
+
+    def _format(self, items: List[PipelineItem]):
+        """Formatação da resposta."""
+        now = time.monotonic()
+        for item in items:
+            item.result = self.predictor._format_result(
+                item.predictions, item.stage, item.embedding, item.similar, item.features
+            )
+            self.predictor._cache_store(item.cache_key, item.result, item.features)
+            item.embedding = None
+            item.features = None
+            self._count(item, "concluidos")
+            if item.expired(now):
+                self._count(item, "atrasados")
+
+    def _on_drop(self, item: PipelineItem, reason: str):
+        """Item descartado por um estágio (prazo vencido ou cancelado)."""
+        if item.slot is not None:
+            self.predictor.preprocess_pool.release(item.slot)
+            item.slot = None
+        self._count(item, "prazo_expirado" if reason == "prazo" else "cancelados")
+
+    def _count(self, item: PipelineItem, counter: str):
+        with self._lanes_lock:
+            self._lanes[PRIORITIES[item.priority]][counter] += 1
+
+    # ------------------------------------------------------------------- API
+
+    def start(self):
+        """Inicia os estágios (idempotente)."""
+        with self._lock:
+            if self._started:
+                return
+            for stage in self.stages:
+                stage.start()
+            self._started = True
+            logger.info(
+                "Pipeline iniciado: %s",
+                ", ".join(f"{s.name}={s.concurrency}" for s in self.stages)
+            )
+
+    def stop(self):
+        """Encerra os estágios na ordem do fluxo."""
+        with self._lock:
+            if not self._started:
+                return
+            for stage in self.stages:
+                stage.stop()
+            self._started = False
+
+    def configure_inference(self, batch_size: int, workers: int):
+        """
+        Ajusta batch e concorrência da inferência (ex.: autotune).
+
+        Só é possível antes do pipeline iniciar.
+        """
+        with self._lock:
+            if self._started:
+                raise RuntimeError("Pipeline já iniciado")
+            stage = next(s for s in self.stages if s.name == "inferencia")
+            stage.batch_size = max(1, batch_size)
+            stage.concurrency = max(1, workers)
+
+    def submit(
+        self,
+        image_data: bytes,
+        filename: str = None,
+        block: bool = False,
+        timeout: Optional[float] = None,
+        priority: int = PRIORIDADE_NORMAL,
+        deadline: Optional[float] = None,
+        similar: int = 0
+    ) -> Future:
+        """
+        Enfileira uma imagem no pipeline.
+
+        Args:
+            image_data: Bytes da imagem
+            filename: Nome do arquivo (para validação de extensão)
+            block: Esperar vaga na fila em vez de rejeitar (uso em threads)
+            timeout: Espera máxima quando block=True
+            priority: Faixa de prioridade (PRIORIDADE_ALTA/NORMAL/BAIXA)
+            deadline: Instante (time.monotonic) após o qual o resultado
+                não interessa mais; o item é descartado se ainda não
+                tiver sido processado
+            similar: Casos semelhantes a incluir no resultado
+
+        Returns:
+            Future: Resolvido com o resultado formatado (já resolvido se
+                a imagem estiver no cache de resultados)
+
+        Raises:
+            ServiceOverloadedException: Se a fila de entrada estiver cheia
+        """
+        self.start()
+
+        item = PipelineItem(image_data, filename, priority, deadline, similar)
+        if similar == 0:
+            item.cache_key, cached = self.predictor._cache_lookup(image_data)
+            if cached is not None:
+                # Conteúdo já validado quando foi predito; falta só o nome do arquivo
+                if self.validator is not None:
+                    self.validator.validate_cached(image_data, filename)
+                item.resolve(self.predictor._cache_hit(cached))
+                self._count(item, "cache")
+                return item.future
+
+        try:
+            self.stages[0].queue.put(item, block=block, timeout=timeout)
+        except queue.Full:
+            raise ServiceOverloadedException(
+                "Servidor sobrecarregado. Tente novamente em instantes."
+            )
+        self._count(item, "submetidos")
+        return item.future
+
+    def predict(self, image_data: bytes, filename: str = None) -> dict:
+        """Predição síncrona através do pipeline."""
+        return self.submit(image_data, filename).result()
+
+    def queue_depth(self) -> int:
+        """Total de itens aguardando em todas as filas."""
+        return sum(stage.queue.qsize() for stage in self.stages)
+
+    def is_idle(self) -> bool:
+        """True se não há imagens em fila nem estágios ocupados."""
+        return all(
+            stage.queue.qsize() == 0 and stage._busy == 0
+            for stage in self.stages
+        )
+
+    def metrics(self) -> dict:
+        """Métricas por estágio."""
+        return {stage.name: stage.metrics() for stage in self.stages}
+
+    def lane_metrics(self) -> dict:
+        """Contadores por faixa de prioridade, incluindo perdas de prazo."""
+        with self._lanes_lock:
+            return {name: dict(counters) for name, counters in self._lanes.items()}
+
+
+# Instância global (singleton), criada sob demanda
+_pipeline = None
+
+
+def get_pipeline(predictor: Predictor = None, validator=None) -> Optional[InferencePipeline]:
+    """
+    Obtém o pipeline global configurado.
+
+    O predictor/validator só são usados na primeira chamada, que cria
+    o pipeline; chamadas seguintes retornam a mesma instância.
+
+    Returns:
+        InferencePipeline ou None se PIPELINE_ENABLED for False
+    """
+    global _pipeline
+
+    if not settings.PIPELINE_ENABLED:
+        return None
+
+    if _pipeline is None:
+        if predictor is None:
+            from app.core.preprocess_pool import get_preprocess_pool
+            predictor = create_predictor(preprocess_pool=get_preprocess_pool())
+
+        _pipeline = InferencePipeline(
+            predictor,
+            validator=validator,
+            decode_workers=settings.PIPELINE_DECODE_WORKERS,
+            preprocess_workers=settings.PIPELINE_PREPROCESS_WORKERS,
+            inference_workers=settings.PIPELINE_INFERENCE_WORKERS,
+            format_workers=settings.PIPELINE_FORMAT_WORKERS,
+            queue_size=settings.PIPELINE_QUEUE_SIZE,
+            max_batch_size=settings.MAX_BATCH_SIZE,
+            batch_timeout_ms=settings.BATCH_TIMEOUT_MS
+        )
+
+    return _pipeline
+
+
+def shutdown_pipeline():
+    """Encerra o pipeline global, se existir."""
+    global _pipeline
+
+    if _pipeline is not None:
+        _pipeline.stop()
+        _pipeline = None
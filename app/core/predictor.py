@@ -4,36 +4,68 @@ Processa imagem e retorna diagnóstico
 """
 
 import numpy as np
-from PIL import Image
-import io
 import logging
 
 from app.config import settings
-from app.core.model_loader import get_model
-from app.utils.image_processing import preprocess_image
-from app.utils.exceptions import PredictionException
+from app.core import profiling
+from app.core.audit import content_hash
+from app.core.cascade import get_cascade
+from app.core.drift import describe_input, get_drift_monitor
+from app.core.model_cache import model_fingerprint
+from app.core.model_loader import get_embedding_model, get_model
+from app.core.remote import RemoteInferenceTimeout, get_remote_client
+from app.core.result_cache import cache_key, get_result_cache
+from app.core.vector_index import get_vector_index
+from app.utils.image_processing import decode_image, preprocess_image
+from app.utils.exceptions import (
+    DeadlineExceededException,
+    PredictionException,
+    ServiceOverloadedException
+)
+from app.utils.tracing import span
 
 logger = logging.getLogger(__name__)
 
+# Características de entrada guardadas com o resultado no cache, para que
+# os hits também cheguem ao monitor de deriva
+_DRIFT_FEATURES = "_deriva"
+
 
 class Predictor:
     """Classe responsável por fazer predições em radiografias."""
     
-    def __init__(self):
+    def __init__(self, preprocess_pool=None):
         self.model = None
+        self.cascade = None
+        self.index = None
+        self.embedding_model = None
         self.classes = settings.CLASSES
+        # Monitor de deriva das entradas (None se DRIFT_ENABLED=False)
+        self.drift = get_drift_monitor()
+        # Pool opcional de processos para o preprocessamento
+        self.preprocess_pool = preprocess_pool
+        # Cache de resultados compartilhado pelos workers (None se desativado)
+        self.result_cache = get_result_cache()
+        self._cache_version = None
     
     def _load_model(self):
         """Carrega modelo (lazy loading)."""
         if self.model is None:
             self.model = get_model()
+            # Cascata opcional (None se CASCADE_ENABLED=False)
+            self.cascade = get_cascade()
+            # Casos semelhantes: o modelo passa a devolver também o embedding
+            self.index = get_vector_index()
+            if self.index is not None:
+                self.embedding_model = get_embedding_model()
     
-    def predict(self, image_data: bytes) -> dict:
+    def predict(self, image_data: bytes, similar: int = 0) -> dict:
         """
         Faz predição em uma radiografia.
         
         Args:
             image_data: Bytes da imagem
+            similar: Número de casos semelhantes a incluir (0 = nenhum)
             
         Returns:
             dict: Resultado da predição com formato padrão
@@ -41,27 +73,112 @@ class Predictor:
         Raises:
             PredictionException: Se houver erro na predição
         """
+        # Mesma imagem e mesmo modelo já preditos (por qualquer worker do nó)
+        if similar == 0:
+            with span("cache"):
+                key, cached = self._cache_lookup(image_data)
+            if cached is not None:
+                return self._cache_hit(cached)
+        else:
+            key = None
+        
         try:
             # Carregar modelo
             self._load_model()
             
-            # Preprocessar imagem
+            # Preprocessar imagem e fazer predição
             logger.debug("Preprocessando imagem...")
-            img_array = self._preprocess(image_data)
-            
-            # Fazer predição
-            logger.debug("Executando predição...")
-            predictions = self.model.predict(img_array, verbose=0)
+            if self.preprocess_pool is not None:
+                # Tensor escrito em memória compartilhada pelo pool
+                pool = self.preprocess_pool
+                slot = pool.acquire()
+                try:
+                    with span("preprocessamento", pool=True):
+                        pool.submit(image_data, slot).result()
+                        img_array = pool.view([slot])
+                        features = self._describe(image_data, tensor=img_array[0])
+                    logger.debug("Executando predição...")
+                    with span("inferencia"):
+                        predictions, stages, embeddings = self._infer_staged(img_array)
+                finally:
+                    pool.release(slot)
+            else:
+                with span("decodificacao"):
+                    decoded = self._decode(image_data)
+                    features = self._describe(image_data, decoded=decoded)
+                with span("preprocessamento"):
+                    img_array = np.expand_dims(self._normalize(decoded), axis=0)
+                logger.debug("Executando predição...")
+                with span("inferencia"):
+                    predictions, stages, embeddings = self._infer_staged(img_array)
             
             # Processar resultado
-            result = self._format_result(predictions[0])
+            with span("formatacao"):
+                result = self._format_result(
+                    predictions[0], stages[0],
+                    embeddings[0] if embeddings is not None else None, similar,
+                    features
+                )
+            self._cache_store(key, result, features)
             
             return result
             
+        except (ServiceOverloadedException, DeadlineExceededException):
+            raise
         except Exception as e:
             logger.error(f"Erro na predição: {str(e)}", exc_info=True)
             raise PredictionException(f"Erro ao processar imagem: {str(e)}")
     
+    def _model_version(self) -> str:
+        """Versão do modelo nas chaves do cache: versão declarada, hash dos pesos e cascata."""
+        if self._cache_version is None:
+            parts = [settings.MODEL_VERSION, model_fingerprint(settings.MODEL_PATH)]
+            if settings.CASCADE_ENABLED:
+                parts += [model_fingerprint(settings.SCREENING_MODEL_PATH), str(settings.CASCADE_THRESHOLD)]
+            self._cache_version = ":".join(parts)
+        return self._cache_version
+    
+    def _cache_lookup(self, image_data: bytes) -> tuple:
+        """
+        Consulta o cache de resultados compartilhado.
+        
+        Args:
+            image_data: Bytes da imagem
+            
+        Returns:
+            tuple: Chave (None sem cache) e o resultado guardado, ou None
+        """
+        if self.result_cache is None:
+            return None, None
+        try:
+            key = cache_key(content_hash(image_data), self._model_version())
+        except OSError as e:
+            # Sem o arquivo do modelo não há versão confiável para a chave
+            logger.warning("Cache de resultados desativado: %s", e)
+            self.result_cache = None
+            return None, None
+        return key, self.result_cache.get(key)
+    
+    def _cache_store(self, key: str, result: dict, features: dict = None):
+        """
+        Guarda o resultado para os outros workers (sem casos semelhantes),
+        com as características da entrada para o monitor de deriva.
+        """
+        if key is not None and self.result_cache is not None:
+            entry = result if features is None else {**result, _DRIFT_FEATURES: features}
+            self.result_cache.put(key, entry)
+    
+    def _cache_hit(self, cached: dict) -> dict:
+        """
+        Resultado servido do cache: o monitor de deriva observa a entrada
+        como numa predição (as características vêm do cache; entradas
+        gravadas sem elas contam só classe e confiança).
+        """
+        features = cached.pop(_DRIFT_FEATURES, None)
+        if self.drift is not None:
+            self.drift.observe(features, cached["resultado"]["rotulo"], cached["resultado"]["confianca"])
+        return cached
+    
     def _preprocess(self, image_data: bytes) -> np.ndarray:
         """
         Preprocessa imagem para o modelo.
@@ -72,37 +189,103 @@ class Predictor:
         Returns:
             np.ndarray: Array preprocessado (1, 224, 224, 3)
         """
-        try:
-            # Abrir imagem
-            img = Image.open(io.BytesIO(image_data))
-            
-            # Converter para RGB se necessário
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # Resize para tamanho esperado
-            img = img.resize((settings.IMAGE_SIZE, settings.IMAGE_SIZE), Image.BILINEAR)
-            
-            # Converter para array
-            img_array = np.array(img, dtype=np.float32)
+        img_array = self._normalize(self._decode(image_data))
+        
+        # Adicionar dimensão de batch
+        return np.expand_dims(img_array, axis=0)
+    
+    def _decode(self, image_data: bytes) -> np.ndarray:
+        """
+        Estágio de decodificação: abre, converte para RGB e redimensiona.
+        
+        Args:
+            image_data: Bytes da imagem
             
-            # Normalizar (EfficientNet preprocessing)
-            img_array = preprocess_image(img_array)
+        Returns:
+            np.ndarray: Array uint8 (224, 224, 3)
+        """
+        try:
+            return decode_image(image_data, settings.IMAGE_SIZE)
+        except Exception as e:
+            raise PredictionException(f"Erro no preprocessamento: {str(e)}")
+    
+    def _describe(self, image_data: bytes, decoded=None, tensor=None):
+        """Características da entrada para o monitor de deriva (None sem monitor)."""
+        if self.drift is None:
+            return None
+        return describe_input(image_data, decoded=decoded, tensor=tensor)
+    
+    def _normalize(self, img_array: np.ndarray) -> np.ndarray:
+        """
+        Estágio de preprocessamento: normalização do EfficientNet.
+        
+        Args:
+            img_array: Array uint8 (224, 224, 3)
             
-            # Adicionar dimensão de batch
-            img_array = np.expand_dims(img_array, axis=0)
+        Returns:
+            np.ndarray: Array float32 (224, 224, 3) em [-1, 1]
+        """
+        return preprocess_image(img_array.astype(np.float32))
+    
+    def _infer(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Estágio de inferência: executa o modelo em um batch.
+        
+        Args:
+            batch: Array (N, 224, 224, 3)
             
-            return img_array
+        Returns:
+            np.ndarray: Probabilidades (N, 3)
+        """
+        self._load_model()
+        return self.model.predict(batch, verbose=0)
+    
+    def _infer_staged(self, batch: np.ndarray) -> tuple:
+        """
+        Inferência pela cascata, quando habilitada.
+        
+        Args:
+            batch: Array (N, 224, 224, 3)
             
-        except Exception as e:
-            raise PredictionException(f"Erro no preprocessamento: {str(e)}")
+        Returns:
+            tuple: Probabilidades (N, 3), o estágio que decidiu cada
+                imagem ("triagem"/"completo"; None sem cascata) e os
+                embeddings (N, D), ou None sem índice de casos semelhantes
+        """
+        self._load_model()
+        capture = profiling.tf_capture
+        if capture is not None:
+            return capture.around(lambda: self._run_model(batch))
+        return self._run_model(batch)
+    
+    def _run_model(self, batch: np.ndarray) -> tuple:
+        if self.cascade is not None:
+            # Embeddings só do modelo completo; a triagem decide sem eles
+            predictions, stages = self.cascade.predict(batch)
+            return predictions, stages, None
+        if self.embedding_model is not None:
+            predictions, embeddings = self.embedding_model.predict(batch, verbose=0)
+            return predictions, [None] * len(batch), embeddings
+        return self.model.predict(batch, verbose=0), [None] * len(batch), None
     
-    def _format_result(self, predictions: np.ndarray) -> dict:
+    def _format_result(
+        self,
+        predictions: np.ndarray,
+        stage: str = None,
+        embedding: np.ndarray = None,
+        similar: int = 0,
+        features: dict = None
+    ) -> dict:
         """
         Formata resultado da predição.
         
         Args:
             predictions: Array de probabilidades (3,)
+            stage: Estágio da cascata que decidiu (None sem cascata)
+            embedding: Embedding da imagem (D,), se calculado
+            similar: Número de casos semelhantes a buscar no índice
+            features: Características da entrada (describe_input), para
+                o monitor de deriva
             
         Returns:
             dict: Resultado formatado
@@ -112,6 +295,9 @@ class Predictor:
         predicted_class = self.classes[predicted_idx]
         confidence = float(predictions[predicted_idx])
         
+        if features is not None and self.drift is not None:
+            self.drift.observe(features, predicted_class, confidence)
+        
         # Probabilidades de todas as classes
         probabilities = {
             classe: float(predictions[i])
@@ -147,6 +333,17 @@ class Predictor:
         # Adicionar interpretação clínica básica
         result["interpretacao"] = self._get_interpretation(predicted_class, confidence)
         
+        if stage is not None:
+            result["cascata"] = {
+                "estagio": stage,
+                "limiar": self.cascade.threshold
+            }
+        
+        if similar > 0 and embedding is not None and self.index is not None:
+            result["casos_semelhantes"] = self.index.search(
+                embedding, similar, nprobe=settings.SIMILARITY_NPROBE
+            )
+        
         return result
     
     def _get_interpretation(self, classe: str, confianca: float) -> str:
@@ -179,22 +376,112 @@ class Predictor:
     
     def predict_batch(self, images_data: list) -> list:
         """
-        Predição em lote (futuro).
+        Predição em lote.
+        
+        Preprocessa cada imagem e executa o modelo uma única vez sobre
+        todas as válidas e ainda fora do cache de resultados. Falhas
+        individuais não interrompem o lote.
         
         Args:
             images_data: Lista de bytes de imagens
             
         Returns:
-            list: Lista de resultados
+            list: Resultados na mesma ordem ({"error": ...} nas falhas)
         """
         self._load_model()
         
-        results = []
-        for img_data in images_data:
+        results = [None] * len(images_data)
+        keys = [None] * len(images_data)
+        tensors = []
+        indices = []
+        features = []
+        
+        for i, img_data in enumerate(images_data):
+            keys[i], results[i] = self._cache_lookup(img_data)
+            if results[i] is not None:
+                results[i] = self._cache_hit(results[i])
+                continue
+            try:
+                decoded = self._decode(img_data)
+                tensors.append(self._normalize(decoded))
+                features.append(self._describe(img_data, decoded=decoded))
+                indices.append(i)
+            except Exception as e:
+                results[i] = {"error": getattr(e, "detail", str(e))}
+        
+        if tensors:
             try:
-                result = self.predict(img_data)
-                results.append(result)
+                predictions, stages, _ = self._infer_staged(np.stack(tensors))
+                for i, prediction, stage, feats in zip(indices, predictions, stages, features):
+                    results[i] = self._format_result(prediction, stage, features=feats)
+                    self._cache_store(keys[i], results[i], feats)
             except Exception as e:
-                results.append({"error": str(e)})
+                logger.error(f"Erro na predição em lote: {str(e)}", exc_info=True)
+                for i in indices:
+                    results[i] = {"error": f"Erro ao processar imagem: {str(e)}"}
         
-        return results
\ No newline at end of file
+        return results
+
+
+class RemotePredictor(Predictor):
+    """
+    Preditor das APIs sem modelo local (INFERENCE_MODE=remote).
+
+    Decodificação, redimensionamento, cache, deriva e formatação continuam
+    aqui; a inferência vai como uint8 para a frota de workers
+    (python -m app.worker) pelo broker. A normalização e a cascata ficam
+    no worker; com o índice de casos semelhantes, os embeddings voltam
+    na resposta.
+    """
+    
+    def __init__(self, preprocess_pool=None, client=None):
+        super().__init__(preprocess_pool=preprocess_pool)
+        self.client = client or get_remote_client()
+        self.index = get_vector_index()
+    
+    def _load_model(self):
+        """Nenhum modelo a carregar neste processo."""
+    
+    def _model_version(self) -> str:
+        """Os pesos estão nos workers: a chave do cache usa a identidade exigida deles."""
+        return f"remoto:{settings.MODEL_VERSION}:{self.client.model}"
+    
+    def _normalize(self, img_array: np.ndarray) -> np.ndarray:
+        """Mantém o uint8 (4x menor na fila); o worker normaliza."""
+        return img_array
+    
+    def _infer(self, batch: np.ndarray) -> np.ndarray:
+        return self._infer_staged(batch)[0]
+    
+    def _infer_staged(self, batch: np.ndarray) -> tuple:
+        """
+        Inferência na frota de workers.
+        
+        Args:
+            batch: Array (N, 224, 224, 3) uint8, ou float32 em [-1, 1]
+                vindo do pool de preprocessamento (reconvertido sem perda)
+            
+        Returns:
+            tuple: Probabilidades (N, 3) na ordem de settings.CLASSES,
+                estágios (sempre None) e os embeddings, se enviados
+        """
+        if batch.dtype != np.uint8:
+            batch = np.rint((batch + 1.0) * 127.5).clip(0, 255).astype(np.uint8)
+        
+        try:
+            classes, probabilities, embeddings = self.client.infer(batch)
+        except RemoteInferenceTimeout as e:
+            raise ServiceOverloadedException(str(e))
+        
+        if list(classes) != list(self.classes):
+            # Workers com outra ordem de classes: reordenar pelo nome
+            probabilities = probabilities[:, [classes.index(c) for c in self.classes]]
+        
+        return probabilities, [None] * len(batch), embeddings
+
+
+def create_predictor(preprocess_pool=None) -> Predictor:
+    """Preditor local ou remoto, conforme INFERENCE_MODE."""
+    if settings.INFERENCE_MODE == "remote":
+        return RemotePredictor(preprocess_pool=preprocess_pool)
+    return Predictor(preprocess_pool=preprocess_pool)
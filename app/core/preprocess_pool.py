@@ -0,0 +1,158 @@
+"""
+Preprocess Pool - Preprocessamento em Processos
+Decodifica e normaliza imagens em processos separados e entrega os
+tensores prontos em memória compartilhada (sem pickling dos arrays)
+"""
+
+import logging
+import multiprocessing
+import queue
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import List, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.utils.image_processing import preprocess_into
+
+logger = logging.getLogger(__name__)
+
+# Estado de cada processo do pool (preenchido pelo initializer)
+_worker_shm = None
+_worker_buffer = None
+
+
+def _init_worker(shm_name: str, shape: tuple):
+    """Anexa o processo ao bloco de memória compartilhada."""
+    global _worker_shm, _worker_buffer
+
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_buffer = np.ndarray(shape, dtype=np.float32, buffer=_worker_shm.buf)
+
+
+def _preprocess_into_slot(image_data: bytes, slot: int, image_size: int) -> int:
+    """Preprocessa a imagem escrevendo o tensor direto no slot."""
+    preprocess_into(image_data, image_size, _worker_buffer[slot])
+    return slot
+
+
+class PreprocessPool:
+    """
+    Pool de processos para decode/resize/normalização.
+
+    Cada slot guarda um tensor (image_size, image_size, 3) float32 num
+    bloco de memória compartilhada. Os processos escrevem no slot e
+    devolvem apenas o índice; o preditor lê o slot como view, sem cópia.
+    """
+
+    def __init__(self, workers: int, slots: int, image_size: int):
+        self.workers = workers
+        self.slots = slots
+        self.image_size = image_size
+
+        shape = (slots, image_size, image_size, 3)
+        nbytes = int(np.prod(shape)) * np.dtype(np.float32).itemsize
+
+        self._shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._buffer = np.ndarray(shape, dtype=np.float32, buffer=self._shm.buf)
+
+        self._free = queue.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+
+        # spawn: os processos não herdam o runtime do TensorFlow do pai
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self._shm.name, shape)
+        )
+
+        logger.info(
+            "Pool de preprocessamento criado: %d processos, %d slots (%.1f MB)",
+            workers, slots, nbytes / (1024 * 1024)
+        )
+
+    def acquire(self, timeout: Optional[float] = None) -> int:
+        """Reserva um slot livre (bloqueia se todos estiverem em uso)."""
+        return self._free.get(timeout=timeout)
+
+    def release(self, slot: int):
+        """Devolve o slot ao pool."""
+        self._free.put(slot)
+
+    def submit(self, image_data: bytes, slot: int) -> Future:
+        """Agenda o preprocessamento da imagem no slot informado."""
+        return self._executor.submit(
+            _preprocess_into_slot, image_data, slot, self.image_size
+        )
+
+    def view(self, slots: List[int]) -> np.ndarray:
+        """
+        Retorna os tensores dos slots como batch (N, H, W, 3).
+
+        Slots consecutivos são devolvidos como view (sem cópia).
+        """
+        first = slots[0]
+        if list(slots) == list(range(first, first + len(slots))):
+            return self._buffer[first:first + len(slots)]
+        return self._buffer[slots]
+
+    @contextmanager
+    def preprocess(self, image_data: bytes):
+        """
+        Preprocessa uma imagem e expõe o tensor (1, H, W, 3).
+
+        O slot é liberado ao sair do bloco; o array não deve ser usado
+        depois disso.
+        """
+        slot = self.acquire()
+        try:
+            self.submit(image_data, slot).result()
+            yield self.view([slot])
+        finally:
+            self.release(slot)
+
+    def shutdown(self):
+        """Encerra os processos e libera a memória compartilhada."""
+        self._executor.shutdown(wait=True)
+        self._buffer = None
+        self._shm.close()
+        self._shm.unlink()
+
+
+# Instância global (singleton), criada sob demanda
+_pool = None
+
+
+def get_preprocess_pool() -> Optional[PreprocessPool]:
+    """
+    Obtém o pool de preprocessamento configurado.
+
+    Returns:
+        PreprocessPool ou None se PREPROCESS_WORKERS for 0
+    """
+    global _pool
+
+    if settings.PREPROCESS_WORKERS <= 0:
+        return None
+
+    if _pool is None:
+        _pool = PreprocessPool(
+            workers=settings.PREPROCESS_WORKERS,
+            slots=settings.PREPROCESS_SLOTS,
+            image_size=settings.IMAGE_SIZE
+        )
+
+    return _pool
+
+
+def shutdown_preprocess_pool():
+    """Encerra o pool global, se existir."""
+    global _pool
+
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
@@ -0,0 +1,257 @@
+"""
+Profiling - Perfilamento Sob Demanda
+Perfis de um worker em produção, sem reiniciá-lo: amostragem de pilhas
+Python (formato collapsed, para flamegraph), trace do profiler do
+TensorFlow das próximas K inferências e diferença de alocações entre dois
+snapshots do tracemalloc.
+
+Nada fica ativo fora de uma captura: a amostragem é uma thread que só
+existe durante a requisição, o tracemalloc é ligado e desligado pela
+própria captura e o gancho da inferência é uma leitura de variável global.
+
+Independente de framework: usado pelas rotas /admin/profile (FastAPI) e
+pelas views de perfilamento do Django.
+"""
+
+import hmac
+import io
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import zipfile
+from collections import Counter
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilerBusy(Exception):
+    """Já existe uma captura do mesmo tipo em andamento neste worker."""
+
+
+def check_admin_token(expected: Optional[str], received: Optional[str]) -> bool:
+    """Compara o token em tempo constante. Sem token configurado, nega tudo."""
+    if not expected or not received:
+        return False
+    return hmac.compare_digest(expected.encode(), received.encode())
+
+
+# ==================== amostragem de pilhas ====================
+
+_cpu_lock = threading.Lock()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", os.path.basename(code.co_filename))
+    return f"{module}:{code.co_name}:{frame.f_lineno}"
+
+
+def sample_stacks(duration: float, interval: float = 0.005) -> tuple:
+    """
+    Amostra as pilhas de todas as threads por `duration` segundos.
+
+    Returns:
+        (texto collapsed "thread;frame;frame N" por linha, número de amostras)
+
+    Raises:
+        ProfilerBusy: Se outra amostragem estiver em andamento
+    """
+    if not _cpu_lock.acquire(blocking=False):
+        raise ProfilerBusy("Amostragem de CPU já em andamento neste worker")
+
+    logger.info("Amostragem de CPU por %.1fs (intervalo %.1f ms)", duration, interval * 1000)
+    try:
+        me = threading.get_ident()
+        counts = Counter()
+        samples = 0
+        stop_at = time.monotonic() + duration
+
+        while time.monotonic() < stop_at:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                counts[";".join(reversed(stack))] += 1
+            samples += 1
+            time.sleep(interval)
+
+        lines = [f"{stack} {count}" for stack, count in counts.most_common()]
+        return "\n".join(lines) + "\n", samples
+    finally:
+        _cpu_lock.release()
+
+
+# ==================== profiler do TensorFlow ====================
+
+class TFProfileCapture:
+    """
+    Trace do profiler do TensorFlow das próximas `calls` inferências.
+
+    O Predictor chama `around(fn)` enquanto a captura estiver armada
+    (variável global `tf_capture`); a primeira chamada inicia o profiler e
+    a K-ésima o encerra.
+    """
+
+    def __init__(self, calls: int, logdir: str):
+        self.calls = calls
+        self.logdir = logdir
+        self.started = 0
+        self.finished = 0
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+        self._running = False
+
+    def around(self, fn: Callable):
+        import tensorflow as tf
+
+        with self._lock:
+            if self.started >= self.calls:
+                return fn()
+            if not self._running:
+                tf.profiler.experimental.start(self.logdir)
+                self._running = True
+            self.started += 1
+
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                self.finished += 1
+                if self.finished >= self.calls:
+                    self._stop()
+
+    def _stop(self):
+        global tf_capture
+
+        if self._running:
+            import tensorflow as tf
+            tf.profiler.experimental.stop()
+            self._running = False
+        if tf_capture is self:
+            tf_capture = None
+        self.done.set()
+
+    def cancel(self):
+        """Encerra a captura (timeout), mantendo o que foi registrado."""
+        with self._lock:
+            if self.started == self.finished:
+                self._stop()
+            else:
+                # Chamadas em andamento encerram o profiler ao terminar
+                self.calls = self.started
+
+    def archive(self) -> bytes:
+        """Diretório do trace compactado (abrir no TensorBoard, aba Profile)."""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for root, _, files in os.walk(self.logdir):
+                for name in files:
+                    path = os.path.join(root, name)
+                    archive.write(path, os.path.relpath(path, self.logdir))
+        return buffer.getvalue()
+
+
+# Captura armada (None = inativo; lido pelo Predictor a cada inferência)
+tf_capture: Optional[TFProfileCapture] = None
+_tf_lock = threading.Lock()
+
+
+def profile_tf_inference(calls: int, timeout: float) -> tuple:
+    """
+    Arma a captura, espera `calls` inferências (no máximo `timeout`
+    segundos) e devolve o trace compactado.
+
+    Returns:
+        (zip do diretório do trace, inferências capturadas)
+
+    Raises:
+        ProfilerBusy: Se já houver uma captura armada
+    """
+    global tf_capture
+
+    logdir = tempfile.mkdtemp(prefix="pulmovision-tfprof-")
+    capture = TFProfileCapture(calls, logdir)
+
+    with _tf_lock:
+        if tf_capture is not None:
+            shutil.rmtree(logdir, ignore_errors=True)
+            raise ProfilerBusy("Captura do TensorFlow já armada neste worker")
+        tf_capture = capture
+    logger.info("Profiler do TensorFlow armado para %d inferências", calls)
+
+    try:
+        if not capture.done.wait(timeout):
+            capture.cancel()
+            capture.done.wait(timeout)
+        with _tf_lock:
+            if tf_capture is capture:
+                tf_capture = None
+        return capture.archive(), capture.finished
+    finally:
+        shutil.rmtree(logdir, ignore_errors=True)
+
+
+# ==================== tracemalloc ====================
+
+_memory_lock = threading.Lock()
+
+
+def diff_allocations(duration: float, top: int = 25, frames: int = 1) -> dict:
+    """
+    Liga o tracemalloc, tira um snapshot, espera `duration` segundos, tira
+    outro e devolve as maiores diferenças (por linha, ou pela pilha de
+    `frames` chamadas). Desliga o tracemalloc ao final
+    (se não estava ligado antes).
+
+    Raises:
+        ProfilerBusy: Se outra captura de memória estiver em andamento
+    """
+    if not _memory_lock.acquire(blocking=False):
+        raise ProfilerBusy("Captura de memória já em andamento neste worker")
+
+    started_here = not tracemalloc.is_tracing()
+    logger.info("Captura de alocações por %.1fs", duration)
+    try:
+        if started_here:
+            tracemalloc.start(frames)
+        before = tracemalloc.take_snapshot()
+        time.sleep(duration)
+        after = tracemalloc.take_snapshot()
+
+        # Ignorar as alocações do próprio tracemalloc
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        key = "traceback" if frames > 1 else "lineno"
+        stats = after.filter_traces(filters).compare_to(before.filter_traces(filters), key)
+        current, peak = tracemalloc.get_traced_memory()
+
+        return {
+            "duracao_s": duration,
+            "memoria_rastreada_mb": round(current / (1024 * 1024), 2),
+            "pico_mb": round(peak / (1024 * 1024), 2),
+            "variacao_total_kb": round(sum(s.size_diff for s in stats) / 1024, 1),
+            "alocacoes": [
+                {
+                    "local": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+                    "variacao_kb": round(stat.size_diff / 1024, 1),
+                    "total_kb": round(stat.size / 1024, 1),
+                    "variacao_blocos": stat.count_diff,
+                    "blocos": stat.count,
+                }
+                for stat in stats[:top]
+            ],
+        }
+    finally:
+        if started_here:
+            tracemalloc.stop()
+        _memory_lock.release()
@@ -0,0 +1,187 @@
+"""
+Recycling - Reciclagem de Workers
+Reinicia o worker depois de N requisições ou acima de um teto de RSS,
+antes que o crescimento lento de memória (model.predict, decodificação
+do PIL, fragmentação do malloc) termine num OOM kill.
+
+A reciclagem drena o worker: novas requisições recebem 503 (com
+Connection: close, para o cliente tentar outro worker), as em andamento
+terminam e só então o processo recebe SIGTERM. O supervisor (gunicorn,
+uvicorn --workers, systemd, restart policy do Docker) sobe um novo.
+
+Independente de framework: usado pelo middleware do FastAPI (app.main)
+e pelo middleware do Django (api.middlewares.reciclagem).
+"""
+
+import logging
+import os
+import random
+import signal
+import threading
+import time
+from typing import Callable, Optional
+
+from app.core.admission import read_rss_mb
+
+logger = logging.getLogger(__name__)
+
+# Motivos de reciclagem
+REQUISICOES = "requisicoes"
+MEMORIA = "memoria"
+
+
+def terminate_self():
+    """Pede ao próprio processo um encerramento gracioso (SIGTERM)."""
+    os.kill(os.getpid(), signal.SIGTERM)
+
+
+class WorkerRecycler:
+    """
+    Conta as requisições atendidas e mede o RSS; ao atingir um limite,
+    drena o worker e chama `on_recycle`.
+
+    `max_requests` recebe um acréscimo aleatório de até `jitter` (fração)
+    para que workers iniciados juntos não reciclem todos ao mesmo tempo.
+    Limites com valor 0 ficam desativados.
+    """
+
+    def __init__(
+        self,
+        max_requests: int = 0,
+        max_rss_mb: int = 0,
+        jitter: float = 0.1,
+        drain_timeout: float = 30.0,
+        rss_interval: float = 5.0,
+        on_recycle: Optional[Callable[[], None]] = None
+    ):
+        self.max_requests = max_requests + (
+            random.randint(0, int(max_requests * jitter)) if max_requests > 0 else 0
+        )
+        self.max_rss_mb = max_rss_mb
+        self.drain_timeout = drain_timeout
+        self.rss_interval = rss_interval
+        self.on_recycle = on_recycle or terminate_self
+
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._in_flight = 0
+        self._served = 0
+        self._refused = 0
+        self._rss_mb = None
+        self._rss_checked = 0.0
+        self._reason = None
+        self._started = time.time()
+
+    @property
+    def draining(self) -> bool:
+        return self._reason is not None
+
+    def begin(self) -> bool:
+        """
+        Registra o início de uma requisição.
+
+        Returns:
+            False se o worker estiver drenando (responder 503)
+        """
+        with self._lock:
+            if self._reason is not None:
+                self._refused += 1
+                return False
+            self._in_flight += 1
+            return True
+
+    def end(self):
+        """Registra o fim de uma requisição admitida por begin()."""
+        with self._lock:
+            self._in_flight -= 1
+            self._served += 1
+            if self._reason is None:
+                reason = self._check()
+                if reason is not None:
+                    self._start_drain(reason)
+            if self._in_flight == 0:
+                self._idle.notify_all()
+
+    def _check(self) -> Optional[str]:
+        if self.max_requests > 0 and self._served >= self.max_requests:
+            return REQUISICOES
+
+        if self.max_rss_mb > 0:
+            # Medir o RSS no máximo uma vez por intervalo
+            now = time.monotonic()
+            if now - self._rss_checked >= self.rss_interval:
+                self._rss_mb = read_rss_mb()
+                self._rss_checked = now
+            if self._rss_mb is not None and self._rss_mb > self.max_rss_mb:
+                return MEMORIA
+
+        return None
+
+    def _start_drain(self, reason: str):
+        self._reason = reason
+        logger.warning(
+            "Reciclando worker %d (%s): %d requisições atendidas, RSS %s MB",
+            os.getpid(), reason, self._served,
+            f"{self._rss_mb:.0f}" if self._rss_mb is not None else "?"
+        )
+        threading.Thread(target=self._drain, name="worker-recycle", daemon=True).start()
+
+    def _drain(self):
+        deadline = time.monotonic() + self.drain_timeout
+        with self._lock:
+            while self._in_flight > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(
+                        "Drenagem excedeu %.0fs com %d requisições em andamento",
+                        self.drain_timeout, self._in_flight
+                    )
+                    break
+                self._idle.wait(remaining)
+
+        logger.info("Worker %d drenado, reiniciando", os.getpid())
+        self.on_recycle()
+
+    def metrics(self) -> dict:
+        """Contadores da reciclagem."""
+        with self._lock:
+            return {
+                "drenando": self._reason is not None,
+                "motivo": self._reason,
+                "atendidas": self._served,
+                "max_requisicoes": self.max_requests,
+                "max_rss_mb": self.max_rss_mb,
+                "rss_mb": round(self._rss_mb, 1) if self._rss_mb is not None else None,
+                "recusadas_drenando": self._refused,
+                "em_andamento": self._in_flight,
+                "uptime_s": round(time.time() - self._started, 1),
+            }
+
+
+# Instância global da API FastAPI (o Django mantém a sua no middleware)
+_recycler = None
+
+
+def get_worker_recycler() -> Optional[WorkerRecycler]:
+    """
+    Obtém a política de reciclagem da API FastAPI.
+
+    Returns:
+        WorkerRecycler ou None se nenhum limite estiver configurado
+    """
+    global _recycler
+
+    from app.config import settings
+
+    if settings.RECYCLE_MAX_REQUESTS <= 0 and settings.RECYCLE_MAX_RSS_MB <= 0:
+        return None
+
+    if _recycler is None:
+        _recycler = WorkerRecycler(
+            max_requests=settings.RECYCLE_MAX_REQUESTS,
+            max_rss_mb=settings.RECYCLE_MAX_RSS_MB,
+            jitter=settings.RECYCLE_JITTER,
+            drain_timeout=settings.RECYCLE_DRAIN_TIMEOUT
+        )
+
+    return _recycler
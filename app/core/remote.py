@@ -0,0 +1,188 @@
+"""
+Remote - Cliente da Frota de Workers de Inferência
+Envia um batch de imagens já decodificadas e redimensionadas (uint8)
+para a fila do broker e aguarda as probabilidades no canal de resposta
+da requisição, com prazo.
+
+Independente de framework: usado pelo RemotePredictor da API FastAPI e
+pelo ServicoPredicao da API Django. As exceções são próprias deste
+módulo; cada API as converte nas suas respostas (503/500).
+"""
+
+import logging
+import threading
+import time
+import uuid
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.core.broker import Broker, decode_message, encode_message, new_reply_channel
+
+logger = logging.getLogger(__name__)
+
+# Normalizações que o worker aplica (campo "normalizacao" do header)
+NORMALIZE_MINUS1_1 = "menos1_1"          # x / 127.5 - 1 (API FastAPI)
+NORMALIZE_EFFICIENTNET = "efficientnet"  # efficientnet.preprocess_input (API Django)
+
+
+class RemoteInferenceError(Exception):
+    """O worker respondeu com erro (ou com uma resposta inválida)."""
+
+
+class RemoteInferenceTimeout(RemoteInferenceError):
+    """Nenhum worker respondeu dentro do prazo."""
+
+
+class RemoteInferenceClient:
+    """
+    Cliente da fila de inferência.
+
+    Args:
+        broker: Broker compartilhado com os workers
+        queue_name: Fila de trabalho consumida pelos workers
+        timeout: Segundos de espera pela resposta (também o prazo da
+            mensagem: worker que a receber depois disso a descarta)
+        normalization: Normalização que o worker deve aplicar às imagens
+        model: Identidade do modelo esperado (ver app.worker.model_id); o
+            worker com outro modelo recusa a requisição. None aceita
+            qualquer modelo
+    """
+
+    def __init__(
+        self,
+        broker: Broker,
+        queue_name: str,
+        timeout: float = 30.0,
+        normalization: str = NORMALIZE_MINUS1_1,
+        model: Optional[str] = None
+    ):
+        self.broker = broker
+        self.queue_name = queue_name
+        self.timeout = timeout
+        self.normalization = normalization
+        self.model = model
+
+        self._lock = threading.Lock()
+        self._sent = 0
+        self._images = 0
+        self._timeouts = 0
+        self._errors = 0
+        self._wait_seconds = 0.0
+
+    def _count(self, counter: str, n=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + n)
+
+    def infer(self, images: np.ndarray) -> Tuple[List[str], np.ndarray, Optional[np.ndarray]]:
+        """
+        Inferência remota de um batch.
+
+        Args:
+            images: Array uint8 (N, H, W, 3), sem normalização
+
+        Returns:
+            tuple: Classes na ordem do modelo do worker, probabilidades
+                (N, n_classes) e embeddings (N, D), ou None se o worker
+                não calcula embeddings
+
+        Raises:
+            RemoteInferenceTimeout: Se nenhum worker responder no prazo
+            RemoteInferenceError: Se o worker responder com erro
+        """
+        images = np.ascontiguousarray(images, dtype=np.uint8)
+        request_id = uuid.uuid4().hex
+        channel = new_reply_channel(self.queue_name)
+        header = {
+            "id": request_id,
+            "responder_em": channel,
+            "forma": list(images.shape),
+            "prazo": time.time() + self.timeout,
+            "normalizacao": self.normalization,
+        }
+        if self.model is not None:
+            header["modelo"] = self.model
+
+        start = time.perf_counter()
+        self.broker.push(self.queue_name, encode_message(header, images.tobytes()))
+        reply = self.broker.wait_reply(channel, self.timeout)
+        self._count("_wait_seconds", time.perf_counter() - start)
+        self._count("_sent")
+        self._count("_images", len(images))
+
+        if reply is None:
+            self._count("_timeouts")
+            raise RemoteInferenceTimeout(
+                f"Nenhum worker de inferência respondeu em {self.timeout:g}s"
+            )
+
+        try:
+            header, payload = decode_message(reply)
+            if header.get("id") != request_id:
+                raise ValueError(f"resposta de outra requisição: {header.get('id')}")
+            if "erro" in header:
+                raise RemoteInferenceError(f"Erro no worker de inferência: {header['erro']}")
+
+            n, n_classes = header["forma"]
+            data = np.frombuffer(payload, dtype=np.float32)
+            probabilities = data[:n * n_classes].reshape(n, n_classes)
+            embeddings = None
+            if header.get("forma_embeddings"):
+                embeddings = data[n * n_classes:].reshape(header["forma_embeddings"])
+        except RemoteInferenceError:
+            self._count("_errors")
+            raise
+        except (ValueError, KeyError, TypeError) as e:
+            self._count("_errors")
+            raise RemoteInferenceError(f"Resposta inválida do worker de inferência: {e}")
+
+        return header["classes"], probabilities, embeddings
+
+    def metrics(self) -> dict:
+        """Requisições enviadas, prazos esgotados, erros e espera média."""
+        with self._lock:
+            return {
+                "fila": self.queue_name,
+                "normalizacao": self.normalization,
+                "modelo": self.model,
+                "timeout_s": self.timeout,
+                "requisicoes": self._sent,
+                "imagens": self._images,
+                "tempo_esgotado": self._timeouts,
+                "erros": self._errors,
+                "espera_media_ms": round(self._wait_seconds / self._sent * 1000, 2) if self._sent else 0.0,
+            }
+
+
+# Instância global da API FastAPI (o Django mantém a sua em api.servicos.inferencia_remota)
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_remote_client() -> Optional[RemoteInferenceClient]:
+    """
+    Obtém o cliente da frota de inferência da API FastAPI.
+
+    Returns:
+        RemoteInferenceClient ou None se INFERENCE_MODE não for "remote"
+    """
+    global _client
+
+    from app.config import settings
+    from app.core.broker import get_broker
+
+    if settings.INFERENCE_MODE != "remote":
+        return None
+
+    with _client_lock:
+        if _client is None:
+            from app.worker import model_id
+
+            _client = RemoteInferenceClient(
+                get_broker(),
+                settings.BROKER_QUEUE,
+                timeout=settings.REMOTE_TIMEOUT,
+                model=settings.REMOTE_MODEL or model_id()
+            )
+
+    return _client
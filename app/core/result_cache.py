@@ -0,0 +1,278 @@
+"""
+Result Cache - Cache de Resultados Compartilhado entre Workers
+Resultados de predição indexados pelo hash do conteúdo e pela versão do
+modelo, num único arquivo SQLite local ao nó (WAL, leitura via mmap)
+aberto por todos os workers: um retry ou um estudo repetido encontra o
+resultado mesmo caindo em outro worker.
+
+Para manter o cache em memória, aponte o caminho para um tmpfs
+(ex.: /dev/shm/pulmovision-resultados.sqlite3).
+
+O tamanho é limitado por `max_entries`: ao passar do limite, as entradas
+acessadas há mais tempo são removidas em lote, na mesma transação da
+inclusão. O LRU é aproximado: o horário de acesso só é regravado depois
+de `touch_interval` segundos, para que os hits sejam quase só leituras.
+
+Falhas do cache (arquivo ocupado, disco cheio, arquivo corrompido) nunca
+falham a predição: contam como miss e aparecem nas estatísticas.
+
+Independente de framework: usado pelo Predictor da API FastAPI e pelo
+ServicoPredicao da API Django.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS resultados (
+    chave TEXT PRIMARY KEY,
+    resultado TEXT NOT NULL,
+    criado_em REAL NOT NULL,
+    acessado_em REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_resultados_acesso ON resultados (acessado_em);
+CREATE TABLE IF NOT EXISTS contadores (
+    nome TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+) WITHOUT ROWID;
+INSERT OR IGNORE INTO contadores VALUES ('entradas', 0), ('removidas', 0);
+CREATE TRIGGER IF NOT EXISTS resultados_inclusao AFTER INSERT ON resultados
+BEGIN UPDATE contadores SET valor = valor + 1 WHERE nome = 'entradas'; END;
+CREATE TRIGGER IF NOT EXISTS resultados_remocao AFTER DELETE ON resultados
+BEGIN UPDATE contadores SET valor = valor - 1 WHERE nome = 'entradas'; END;
+"""
+
+# Espera máxima pelo lock de escrita de outro worker (segundos); depois disso, miss
+_BUSY_TIMEOUT = 0.1
+# Leituras pelo mmap do arquivo, sem cópia para o cache de páginas do SQLite
+_MMAP_SIZE = 256 * 1024 * 1024
+# Ao passar do limite, remove até sobrar esta fração (remoções em lote)
+_EVICT_TO = 0.9
+
+
+def cache_key(digest: str, model_version: str) -> str:
+    """Chave de um resultado: versão do modelo + content_hash() da imagem."""
+    return f"{model_version}:{digest}"
+
+
+class ResultCache:
+    """
+    Cache de resultados em `path`, compartilhado pelos processos do nó.
+
+    Cada thread de cada processo abre a sua conexão; o SQLite (WAL)
+    coordena leitores e o escritor entre processos.
+
+    Args:
+        path: Arquivo SQLite (local ao nó; tmpfs para ficar em memória)
+        max_entries: Resultados guardados no máximo
+        touch_interval: Segundos entre atualizações do horário de acesso
+    """
+
+    def __init__(self, path: str, max_entries: int = 100000, touch_interval: float = 60.0):
+        if max_entries < 1:
+            raise ValueError(f"max_entries deve ser positivo: {max_entries}")
+
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evicted = 0
+        self._errors = 0
+
+        # Cria o esquema já no processo que instancia o cache
+        self._connection()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexão desta thread (reaberta depois de um fork)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(
+                str(self.path), timeout=_BUSY_TIMEOUT, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Perder o cache num crash do sistema é aceitável
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(f"PRAGMA mmap_size={_MMAP_SIZE}")
+            conn.executescript(_SCHEMA)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _count(self, counter: str, n: int = 1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + n)
+
+    def _failed(self, operation: str, error: Exception):
+        with self._lock:
+            self._errors += 1
+            errors = self._errors
+        if errors % 100 == 1:
+            # Um aviso a cada 100 falhas (ex.: escrita disputada por muitos workers)
+            logger.warning("Cache de resultados: falha em %s (%d até agora): %s", operation, errors, error)
+
+    # ------------------------------------------------------------------- API
+
+    def get(self, key: str) -> Optional[dict]:
+        """Resultado guardado (um dict novo a cada chamada) ou None."""
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT resultado, acessado_em FROM resultados WHERE chave = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._count("_misses")
+                return None
+
+            now = time.time()
+            if now - row[1] >= self.touch_interval:
+                try:
+                    conn.execute("UPDATE resultados SET acessado_em = ? WHERE chave = ?", (now, key))
+                except sqlite3.OperationalError:
+                    pass  # outro worker escrevendo: o acesso fica para o próximo hit
+        except sqlite3.Error as e:
+            self._failed("leitura", e)
+            self._count("_misses")
+            return None
+
+        self._count("_hits")
+        return json.loads(row[0])
+
+    def put(self, key: str, result: dict):
+        """
+        Guarda um resultado; a chave já existente é mantida (mesma imagem
+        e mesmo modelo dão o mesmo resultado).
+        """
+        now = time.time()
+        value = json.dumps(result)
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                inserted = conn.execute(
+                    "INSERT OR IGNORE INTO resultados VALUES (?, ?, ?, ?)",
+                    (key, value, now, now)
+                ).rowcount
+                evicted = self._evict(conn) if inserted else 0
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            self._failed("gravação", e)
+            return
+
+        if inserted:
+            self._count("_stores")
+        if evicted:
+            self._count("_evicted", evicted)
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        """Remove as entradas menos usadas se o limite foi ultrapassado."""
+        entries = conn.execute("SELECT valor FROM contadores WHERE nome = 'entradas'").fetchone()[0]
+        if entries <= self.max_entries:
+            return 0
+
+        excess = entries - int(self.max_entries * _EVICT_TO)
+        evicted = conn.execute(
+            "DELETE FROM resultados WHERE chave IN "
+            "(SELECT chave FROM resultados ORDER BY acessado_em LIMIT ?)",
+            (excess,)
+        ).rowcount
+        conn.execute(
+            "UPDATE contadores SET valor = valor + ? WHERE nome = 'removidas'", (evicted,)
+        )
+        return evicted
+
+    def clear(self):
+        """Remove todos os resultados (de todos os workers)."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM resultados")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def close(self):
+        """Fecha a conexão da thread atual."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local.conn = None
+
+    def metrics(self) -> dict:
+        """Contadores deste processo e ocupação do cache compartilhado."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            local = {
+                "hits": self._hits,
+                "misses": self._misses,
+                "taxa_acerto": round(self._hits / lookups, 4) if lookups else 0.0,
+                "gravados": self._stores,
+                "removidos": self._evicted,
+                "erros": self._errors,
+            }
+
+        shared = {}
+        try:
+            counters = dict(self._connection().execute("SELECT nome, valor FROM contadores"))
+            shared = {"entradas": counters["entradas"], "removidas": counters["removidas"]}
+        except sqlite3.Error as e:
+            self._failed("métricas", e)
+
+        size = sum(
+            p.stat().st_size
+            for p in (self.path, Path(f"{self.path}-wal"))
+            if p.exists()
+        )
+        return {
+            "caminho": str(self.path),
+            "max_entradas": self.max_entries,
+            "tamanho_bytes": size,
+            "processo": local,
+            "compartilhado": shared,
+        }
+
+
+# Instância global da API FastAPI (o Django mantém a sua em api.servicos.cache_resultados)
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """
+    Obtém o cache de resultados da API FastAPI.
+
+    Returns:
+        ResultCache ou None se RESULT_CACHE_ENABLED for False
+    """
+    global _cache
+
+    from app.config import settings
+
+    if not settings.RESULT_CACHE_ENABLED:
+        return None
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache(
+                path=settings.RESULT_CACHE_PATH,
+                max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+                touch_interval=settings.RESULT_CACHE_TOUCH_INTERVAL
+            )
+
+    return _cache
@@ -0,0 +1,289 @@
+"""
+Streaming de Arquivos Compactados
+Lê um ZIP/TAR direto do corpo da requisição e devolve resultados em
+NDJSON à medida que cada batch termina
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+from app.config import settings
+from app.core.audit import REJEITAR, content_hash
+from app.core.pipeline import PRIORIDADE_NORMAL
+from app.utils.archive import StreamBuffer, iter_archive_stream
+
+logger = logging.getLogger(__name__)
+
+# Marca de fim da fila de resultados
+_END = object()
+
+_AUDIT_FULL = "Registro de auditoria saturado. Tente novamente em instantes."
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse que pode ser enviada enquanto o corpo da requisição
+    ainda está sendo lido.
+
+    A StreamingResponse padrão (ASGI < 2.4) consome `receive()` para
+    detectar desconexão e descartaria os pedaços do corpo. Aqui a
+    desconexão é detectada pela própria leitura do corpo.
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        finally:
+            # Cliente desconectado no meio do envio: encerrar já o gerador
+            # (e a thread que o alimenta), sem esperar o coletor de lixo
+            aclose = getattr(self.body_iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        if self.background is not None:
+            await self.background()
+
+
+class ArchivePredictionStream:
+    """
+    Predição sobre as entradas de um arquivo compactado em streaming.
+
+    O corpo da requisição alimenta um StreamBuffer limitado; uma thread
+    própria (fora do executor padrão do asyncio, compartilhado pelo resto
+    da API) lê as entradas em sequência e as envia ao pipeline (ou ao
+    Predictor em batch). Cada resultado vira uma linha NDJSON, entregue
+    ao event loop por call_soon_threadsafe. A memória usada é limitada
+    pelo buffer de entrada, pelas imagens em voo e pelas linhas
+    pendentes, independentemente do tamanho do arquivo.
+
+    Com `audit`, cada predição concluída é registrada (origem "arquivo").
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        predictor,
+        validator,
+        pipeline=None,
+        batch_size: int = 8,
+        buffer_chunks: int = 16,
+        max_pending_lines: int = 64,
+        priority: int = PRIORIDADE_NORMAL,
+        audit=None,
+        request_id: str = None
+    ):
+        self.kind = kind
+        self.predictor = predictor
+        self.validator = validator
+        self.pipeline = pipeline
+        self.batch_size = max(1, batch_size)
+        self.priority = priority
+        self.audit = audit
+        self.request_id = request_id
+
+        self.buffer_chunks = buffer_chunks
+        self.max_pending_lines = max_pending_lines
+
+        # Criados em run(), no event loop da requisição
+        self._loop = None
+        self._lines = None
+        self._input_space = None
+        self._input = None
+
+        # Linhas entregues ao event loop e ainda não enviadas ao cliente
+        self._line_slots = threading.Semaphore(max_pending_lines)
+        self._closed = threading.Event()
+        self.total = 0
+        self.failed = 0
+
+    # ------------------------------------------------------------ produção
+
+    def _deliver(self, item):
+        """Entrega ao event loop (ignorado se ele já encerrou)."""
+        try:
+            self._loop.call_soon_threadsafe(self._lines.put_nowait, item)
+        except RuntimeError:
+            self._closed.set()
+
+    def _consumed(self):
+        """StreamBuffer: um pedaço do corpo foi lido, há espaço para outro."""
+        try:
+            self._loop.call_soon_threadsafe(self._input_space.release)
+        except RuntimeError:
+            self._closed.set()
+
+    def _put(self, item):
+        """Envia uma linha ao cliente; bloqueia se ele estiver lento."""
+        self._line_slots.acquire()
+        if not self._closed.is_set():
+            self._deliver(item)
+
+    def _emit(self, record: dict):
+        """Envia uma linha NDJSON."""
+        if "arquivo" in record and "erro" in record:
+            self.failed += 1
+        self._put(record)
+
+    def _audit_full(self) -> bool:
+        """Com AUDIT_ON_FULL=rejeitar, não predizer sem espaço para o registro."""
+        return self.audit is not None and self.audit.on_full == REJEITAR and not self.audit.has_capacity()
+
+    def _record(self, name: str, digest: str, result: dict, started: float):
+        if self.audit is not None:
+            self.audit.record(
+                digest, result,
+                latency_ms=(time.perf_counter() - started) * 1000,
+                filename=name,
+                request_id=self.request_id,
+                origin="arquivo"
+            )
+
+    def _process(self):
+        """Thread: lê as entradas e executa as predições."""
+        try:
+            entries = iter_archive_stream(
+                self._input,
+                self.kind,
+                settings.ALLOWED_EXTENSIONS,
+                settings.MAX_IMAGE_SIZE_MB * 1024 * 1024
+            )
+            if self.pipeline is not None:
+                self._process_pipeline(entries)
+            else:
+                self._process_batches(entries)
+        except Exception as e:
+            if not self._closed.is_set():
+                logger.warning("Erro ao ler arquivo compactado: %s", e)
+                self._emit({"erro": f"Arquivo compactado inválido: {str(e)}"})
+        finally:
+            self._emit({"fim": True, "total": self.total, "falhas": self.failed})
+            self._deliver(_END)
+            self._input.close()
+
+    def _process_pipeline(self, entries):
+        # Mantém até 2 batches em voo: o pipeline segue ocupado enquanto
+        # os resultados mais antigos são emitidos em ordem
+        in_flight = deque()
+
+        for name, data, erro in entries:
+            self.total += 1
+            if erro is None and self._audit_full():
+                erro = _AUDIT_FULL
+            if erro is not None:
+                self._emit({"arquivo": name, "erro": erro})
+                continue
+
+            started = time.perf_counter()
+            digest = content_hash(data) if self.audit is not None else None
+            in_flight.append((name, digest, started, self.pipeline.submit(
+                data, name, block=True, priority=self.priority
+            )))
+            if len(in_flight) >= 2 * self.batch_size:
+                self._emit_result(*in_flight.popleft())
+
+        while in_flight:
+            self._emit_result(*in_flight.popleft())
+
+    def _emit_result(self, name, digest, started, future):
+        try:
+            result = future.result()
+        except Exception as e:
+            self._emit({"arquivo": name, "erro": getattr(e, "detail", str(e))})
+            return
+        self._record(name, digest, result, started)
+        self._emit({"arquivo": name, **result})
+
+    def _process_batches(self, entries):
+        batch = []
+
+        def flush():
+            started = time.perf_counter()
+            valid = []
+            for name, data in batch:
+                try:
+                    self.validator.validate(data, name)
+                    valid.append((name, data))
+                except Exception as e:
+                    self._emit({"arquivo": name, "erro": getattr(e, "detail", str(e))})
+
+            results = self.predictor.predict_batch([data for _, data in valid])
+            for (name, data), result in zip(valid, results):
+                if "error" in result:
+                    self._emit({"arquivo": name, "erro": result["error"]})
+                else:
+                    self._record(name, content_hash(data), result, started)
+                    self._emit({"arquivo": name, **result})
+            batch.clear()
+
+        for name, data, erro in entries:
+            self.total += 1
+            if erro is None and self._audit_full():
+                erro = _AUDIT_FULL
+            if erro is not None:
+                self._emit({"arquivo": name, "erro": erro})
+                continue
+
+            batch.append((name, data))
+            if len(batch) >= self.batch_size:
+                flush()
+
+        if batch:
+            flush()
+
+    # ------------------------------------------------------------- consumo
+
+    async def _feed(self, body: AsyncIterator[bytes]):
+        """Copia o corpo da requisição para o buffer de entrada, sem bloquear o loop."""
+        try:
+            async for chunk in body:
+                if chunk:
+                    # Espera a thread consumir um pedaço se o buffer estiver cheio
+                    await self._input_space.acquire()
+                    self._input.feed_nowait(chunk)
+        finally:
+            self._input.feed_nowait(None)
+
+    def close(self):
+        """Interrompe a leitura e libera a thread, onde quer que esteja bloqueada."""
+        self._closed.set()
+        self._input.close()
+        # Acorda um _put() à espera de espaço na saída
+        for _ in range(self.max_pending_lines):
+            self._line_slots.release()
+
+    async def run(self, body: AsyncIterator[bytes]) -> AsyncIterator[str]:
+        """
+        Processa o corpo da requisição e gera as linhas NDJSON.
+
+        Se o cliente desconectar, a leitura e o processamento são
+        interrompidos e a thread termina.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._lines = asyncio.Queue()
+        self._input_space = asyncio.Semaphore(self.buffer_chunks)
+        self._input = StreamBuffer(
+            max_chunks=self.buffer_chunks,
+            on_consumed=self._consumed
+        )
+
+        feeder = asyncio.create_task(self._feed(body))
+        worker = threading.Thread(target=self._process, name="archive-stream", daemon=True)
+        worker.start()
+
+        try:
+            while True:
+                record = await self._lines.get()
+                if record is _END:
+                    break
+                self._line_slots.release()
+                yield json.dumps(record, ensure_ascii=False) + "\n"
+        finally:
+            self.close()
+            feeder.cancel()
+            await asyncio.gather(feeder, return_exceptions=True)
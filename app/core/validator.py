@@ -3,12 +3,11 @@ Image Validator - Validação de Imagens
 Verifica se imagem é válida antes de processar
 """
 
-from PIL import Image
-import io
 import logging
 
 from app.config import settings
 from app.utils.exceptions import InvalidImageException, ImageTooLargeException
+from app.utils.image_processing import is_tensor_payload, open_image, read_tensor
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +37,11 @@ class ImageValidator:
         # 1. Validar tamanho
         self._validate_size(image_data)
         
+        # Cliente leve (tensor já em IMAGE_SIZE): só forma e tipo
+        if settings.TENSOR_INPUT_ENABLED and is_tensor_payload(image_data):
+            self._validate_tensor(image_data)
+            return
+        
         # 2. Validar extensão
         if filename:
             self._validate_extension(filename)
@@ -50,6 +54,17 @@ class ImageValidator:
         
         logger.debug("✓ Imagem validada com sucesso")
     
+    def validate_cached(self, image_data: bytes, filename: str = None):
+        """
+        Valida imagem cujo conteúdo já foi validado e predito (resultado
+        no cache): só o nome do arquivo pode ter mudado.
+        
+        Raises:
+            InvalidImageException: Se a extensão não for aceita
+        """
+        if filename and not (settings.TENSOR_INPUT_ENABLED and is_tensor_payload(image_data)):
+            self._validate_extension(filename)
+    
     def _validate_size(self, image_data: bytes):
         """Valida tamanho do arquivo."""
         size_mb = len(image_data) / (1024 * 1024)
@@ -62,6 +77,15 @@ class ImageValidator:
         
         logger.debug(f"Tamanho da imagem: {size_mb:.2f}MB")
     
+    def _validate_tensor(self, image_data: bytes):
+        """Valida tensor de cliente leve (.npy ou PVT1): uint8 e forma do modelo."""
+        try:
+            read_tensor(image_data, settings.IMAGE_SIZE)
+        except ValueError as e:
+            raise InvalidImageException(f"Tensor inválido: {str(e)}")
+        
+        logger.debug("✓ Tensor validado")
+    
     def _validate_extension(self, filename: str):
         """Valida extensão do arquivo."""
         extension = filename.split('.')[-1].lower()
@@ -77,7 +101,7 @@ class ImageValidator:
     def _validate_format(self, image_data: bytes):
         """Valida formato e integridade da imagem."""
         try:
-            img = Image.open(io.BytesIO(image_data))
+            img = open_image(image_data)
             
             # Verificar formato
             if img.format.lower() not in ['jpeg', 'jpg', 'png']:
@@ -98,7 +122,7 @@ class ImageValidator:
     def _validate_dimensions(self, image_data: bytes):
         """Valida dimensões da imagem."""
         try:
-            img = Image.open(io.BytesIO(image_data))
+            img = open_image(image_data)
             width, height = img.size
             
             # Verificar dimensões mínimas
@@ -140,7 +164,7 @@ class ImageValidator:
             bool: True se parecer raio-X
         """
         try:
-            img = Image.open(io.BytesIO(image_data))
+            img = open_image(image_data)
             
             # Converter para grayscale
             if img.mode != 'L':
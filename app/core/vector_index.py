@@ -0,0 +1,291 @@
+"""
+Vector Index - Índice de Casos Semelhantes
+Busca por similaridade (cosseno) entre o embedding de uma radiografia e
+os embeddings de um conjunto de referência de casos confirmados.
+
+A matriz de embeddings fica em disco (.npy) e é mapeada em memória: a
+busca exata é um produto matricial NumPy em blocos, sem carregar tudo
+para a RAM. Para conjuntos grandes, o índice pode ter listas invertidas
+(IVF): os vetores ficam agrupados por centróide e a busca aproximada só
+percorre as `nprobe` listas mais próximas.
+
+Arquivos do diretório do índice:
+    manifest.json   dimensão, total, modelo de origem, listas
+    vectors.npy     float32 (N, D), normalizados, agrupados por lista
+    cases.jsonl     metadados de cada linha (arquivo, rótulo, ...)
+    centroids.npy   float32 (L, D), só com IVF
+    offsets.npy     int64 (L + 1,), início de cada lista em vectors.npy
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+# Linhas por bloco na busca exata (limita a memória temporária dos scores)
+_CHUNK_ROWS = 65536
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Normaliza as linhas para norma 1 (cosseno = produto escalar)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Índices dos k maiores scores, em ordem decrescente."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def spherical_kmeans(
+    vectors: np.ndarray,
+    n_lists: int,
+    iterations: int = 20,
+    sample_size: int = 100000,
+    seed: int = 0
+) -> np.ndarray:
+    """
+    Centróides (normalizados) por k-means esférico numa amostra dos vetores.
+
+    Returns:
+        float32 (n_lists, D)
+    """
+    rng = np.random.default_rng(seed)
+    if len(vectors) > sample_size:
+        sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))])
+    else:
+        sample = np.asarray(vectors)
+
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        for j in range(n_lists):
+            members = sample[assignment == j]
+            if len(members):
+                centroids[j] = members.sum(axis=0)
+            else:
+                # Lista vazia: recomeçar num vetor aleatório
+                centroids[j] = sample[rng.integers(len(sample))]
+        centroids = normalize(centroids)
+    return centroids
+
+
+def build_index(
+    vectors: np.ndarray,
+    cases: List[dict],
+    path: str,
+    n_lists: int = 0,
+    model: Optional[str] = None,
+    layer: Optional[str] = None
+) -> dict:
+    """
+    Grava o índice em `path` (substitui atomicamente um índice existente).
+
+    Args:
+        vectors: Embeddings (N, D)
+        cases: Metadados de cada linha (mesma ordem de `vectors`)
+        path: Diretório do índice
+        n_lists: Listas invertidas para a busca aproximada (0 = só exata)
+        model: Impressão digital do modelo que gerou os embeddings
+        layer: Camada de onde o embedding foi extraído
+
+    Returns:
+        dict: Manifesto gravado
+    """
+    if len(vectors) != len(cases):
+        raise ValueError("vectors e cases devem ter o mesmo tamanho")
+    if n_lists > len(vectors):
+        raise ValueError(f"{n_lists} listas para {len(vectors)} vetores")
+
+    vectors = normalize(vectors)
+    centroids = offsets = None
+    if n_lists > 0:
+        centroids = spherical_kmeans(vectors, n_lists)
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        order = np.argsort(assignment, kind="stable")
+        vectors = vectors[order]
+        cases = [cases[i] for i in order]
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))])
+
+    manifest = {
+        "formato": FORMAT_VERSION,
+        "total": int(len(vectors)),
+        "dimensao": int(vectors.shape[1]),
+        "listas": int(n_lists),
+        "modelo": model,
+        "camada": layer,
+        "criado_em": time.time(),
+    }
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=".index-", dir=target.parent))
+    try:
+        np.save(tmp / "vectors.npy", vectors)
+        if n_lists > 0:
+            np.save(tmp / "centroids.npy", centroids)
+            np.save(tmp / "offsets.npy", offsets.astype(np.int64))
+        with open(tmp / "cases.jsonl", "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(case, ensure_ascii=False) + "\n" for case in cases)
+        with open(tmp / "manifest.json", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        if target.exists():
+            old = target.with_name(f".{target.name}.old")
+            shutil.rmtree(old, ignore_errors=True)
+            os.rename(target, old)
+            os.rename(tmp, target)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.rename(tmp, target)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    return manifest
+
+
+class VectorIndex:
+    """Índice carregado (matriz mapeada em memória, somente leitura)."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        with open(self.path / "manifest.json", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("formato") != FORMAT_VERSION:
+            raise ValueError(f"Formato de índice não suportado: {self.manifest.get('formato')}")
+
+        self.vectors = np.load(self.path / "vectors.npy", mmap_mode="r")
+        with open(self.path / "cases.jsonl", encoding="utf-8") as f:
+            self.cases = [json.loads(line) for line in f if line.strip()]
+        if len(self.cases) != len(self.vectors):
+            raise ValueError("cases.jsonl e vectors.npy com tamanhos diferentes")
+
+        self.centroids = self.offsets = None
+        if self.manifest.get("listas"):
+            self.centroids = np.load(self.path / "centroids.npy")
+            self.offsets = np.load(self.path / "offsets.npy")
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @property
+    def dimension(self) -> int:
+        return self.vectors.shape[1]
+
+    def _exact(self, query: np.ndarray, k: int, start: int = 0, end: Optional[int] = None) -> tuple:
+        end = len(self.vectors) if end is None else end
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for chunk in range(start, end, _CHUNK_ROWS):
+            scores = self.vectors[chunk:min(chunk + _CHUNK_ROWS, end)] @ query
+            top = _top_k(scores, k)
+            best_rows = np.concatenate([best_rows, top + chunk])
+            best_scores = np.concatenate([best_scores, scores[top]])
+        order = _top_k(best_scores, k)
+        return best_rows[order], best_scores[order]
+
+    def search(self, embedding: np.ndarray, k: int, nprobe: int = 0) -> List[dict]:
+        """
+        Os k casos mais semelhantes ao embedding.
+
+        Args:
+            embedding: Vetor (D,) no espaço do índice
+            k: Número de casos
+            nprobe: Listas percorridas na busca aproximada (0 = exata)
+
+        Returns:
+            list: Metadados de cada caso com "similaridade", do mais
+                semelhante ao menos
+        """
+        query = normalize(embedding).reshape(-1)
+        if query.shape[0] != self.dimension:
+            raise ValueError(f"Embedding com dimensão {query.shape[0]}, índice com {self.dimension}")
+
+        if nprobe > 0 and self.centroids is not None and nprobe < len(self.centroids):
+            rows, scores = [], []
+            for j in _top_k(self.centroids @ query, nprobe):
+                r, s = self._exact(query, k, int(self.offsets[j]), int(self.offsets[j + 1]))
+                rows.append(r)
+                scores.append(s)
+            rows, scores = np.concatenate(rows), np.concatenate(scores)
+            order = _top_k(scores, k)
+            rows, scores = rows[order], scores[order]
+        else:
+            rows, scores = self._exact(query, k)
+
+        return [
+            {**self.cases[row], "similaridade": round(float(score), 4)}
+            for row, score in zip(rows, scores)
+        ]
+
+    def info(self) -> dict:
+        return {
+            "caminho": str(self.path),
+            "total": len(self),
+            "dimensao": self.dimension,
+            "listas": self.manifest.get("listas", 0),
+            "camada": self.manifest.get("camada"),
+        }
+
+
+# Instância global (False = tentativa de carga já falhou)
+_index = None
+
+
+def get_vector_index() -> Optional[VectorIndex]:
+    """
+    Obtém o índice de casos semelhantes.
+
+    Returns:
+        VectorIndex ou None se SIMILARITY_INDEX_PATH não estiver definido,
+        o índice não existir ou tiver sido gerado por outro modelo
+    """
+    global _index
+
+    from app.config import settings
+
+    if not settings.SIMILARITY_INDEX_PATH:
+        return None
+
+    if _index is None:
+        _index = False
+        path = Path(settings.SIMILARITY_INDEX_PATH)
+        if not (path / "manifest.json").exists():
+            logger.warning("Índice de casos semelhantes não encontrado em %s", path)
+            return None
+        try:
+            index = VectorIndex(str(path))
+        except (OSError, ValueError) as e:
+            logger.error("Índice de casos semelhantes inválido: %s", e)
+            return None
+
+        from app.core.model_cache import model_fingerprint
+        expected = index.manifest.get("modelo")
+        if expected and expected != model_fingerprint(settings.MODEL_PATH):
+            # Embeddings de outro modelo não são comparáveis
+            logger.error(
+                "Índice em %s foi gerado por outro modelo; reconstrua com `python -m app.cli build-index`",
+                path
+            )
+            return None
+
+        _index = index
+        logger.info("Índice de casos semelhantes: %d casos, dimensão %d", len(index), index.dimension)
+
+    return _index or None
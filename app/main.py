@@ -6,18 +6,32 @@ Sistema de detecção de doenças pulmonares via API REST
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+import asyncio
 import time
 import logging
 
 from app.config import settings
-from app.api.routes import health, predict, model, limitations
+from app.core.autotune import configure_threads
+
+# Threads do TensorFlow precisam ser definidas antes de o runtime iniciar
+configure_threads()
+
+from app.api.routes import health, predict, model, limitations, metrics, jobs, admin, drift, audit
+from app.api.middleware import AdmissionMiddleware, InteractiveTrafficMiddleware, WorkerRecyclingMiddleware
+from app.core.jobs import get_interactive_traffic
 from app.utils.exceptions import PulmoVisionException
+from app.utils.async_logging import begin_request, end_request, new_request_id, request_timings_ms
 from app.utils.logging import setup_logging
+from app.utils.tracing import configure_exporter, finish_trace, server_timing, start_trace
 
 # Configurar logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# Exportação dos traces (OTLP/JSON), se configurada
+if settings.TRACING_ENABLED:
+    configure_exporter(settings.TRACING_EXPORT_PATH, "pulmovision-api")
+
 # Criar aplicação FastAPI
 app = FastAPI(
     title=settings.API_TITLE,
@@ -37,29 +51,83 @@ app.add_middleware(
 )
 
 
+# Requisições de predição em andamento (os jobs em lote esperam por elas)
+app.add_middleware(InteractiveTrafficMiddleware, traffic=get_interactive_traffic())
+
+
+# Controle de admissão (limite de taxa e descarte de carga)
+app.add_middleware(
+    AdmissionMiddleware,
+    paths=settings.ADMISSION_PATHS,
+    api_keys=settings.ADMISSION_API_KEYS,
+    trusted_proxies=settings.TRUSTED_PROXIES
+)
+
+
+# Reciclagem do worker (por número de requisições ou RSS)
+app.add_middleware(WorkerRecyclingMiddleware, paths=settings.ADMISSION_PATHS)
+
+
 # Middleware de logging de requisições
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    """Log todas as requisições com tempo de resposta."""
+    """Log todas as requisições com tempo de resposta e trace por etapa."""
     start_time = time.time()
+    request_id = new_request_id(request.headers.get("X-Request-ID"))
+    context = begin_request(request_id)
+    tracing = start_trace(
+        f"{request.method} {request.url.path}",
+        request_id=request_id,
+        traceparent=request.headers.get("traceparent"),
+        attributes={"http.method": request.method, "http.target": request.url.path}
+    ) if settings.TRACING_ENABLED else None
+    status_code = 500
     
-    # Log da requisição
-    logger.info(f"Requisição: {request.method} {request.url.path}")
-    
-    # Processar requisição
-    response = await call_next(request)
-    
-    # Calcular tempo de processamento
-    process_time = time.time() - start_time
-    
-    # Log da resposta
-    logger.info(
-        f"Resposta: {request.method} {request.url.path} "
-        f"[{response.status_code}] - {process_time:.3f}s"
-    )
+    try:
+        # Log da requisição (argumentos preguiçosos: nada é formatado se o nível estiver desligado)
+        logger.debug("Requisição: %s %s", request.method, request.url.path)
+        
+        # Processar requisição
+        response = await call_next(request)
+        status_code = response.status_code
+        
+        # Calcular tempo de processamento
+        process_time = time.time() - start_time
+        
+        # Log da resposta: sucesso pode ser amostrado, 4xx/5xx nunca
+        if response.status_code >= 500:
+            level = logging.ERROR
+        elif response.status_code >= 400:
+            level = logging.WARNING
+        else:
+            level = logging.INFO
+        if logger.isEnabledFor(level):
+            logger.log(
+                level,
+                "Resposta: %s %s [%d] - %.3fs",
+                request.method, request.url.path, response.status_code, process_time,
+                extra={
+                    "metodo": request.method,
+                    "caminho": request.url.path,
+                    "status": response.status_code,
+                    "duracao_ms": round(process_time * 1000, 2),
+                    "etapas_ms": request_timings_ms(),
+                    "trace_id": tracing[0].trace_id if tracing else None,
+                }
+            )
+        
+        # Durações por etapa (Server-Timing) e id do trace
+        if tracing is not None:
+            response.headers["Server-Timing"] = server_timing(tracing[0])
+            response.headers["X-Trace-ID"] = tracing[0].trace_id
+    finally:
+        if tracing is not None:
+            finish_trace(tracing, status_code)
+        end_request(context)
     
     # Adicionar header com tempo de processamento
     response.headers["X-Process-Time"] = str(process_time)
+    response.headers["X-Request-ID"] = request_id
     
     return response
 
@@ -108,20 +176,87 @@ async def startup_event():
     logger.info(f"Modelo: {settings.MODEL_NAME} v{settings.MODEL_VERSION}")
     logger.info("=" * 60)
     
-    # Pré-carregar o modelo (warm-up)
-    try:
-        from app.core.model_loader import get_model
-        model = get_model()
-        logger.info("✓ Modelo carregado com sucesso")
-    except Exception as e:
-        logger.error(f"✗ Erro ao carregar modelo: {str(e)}")
-        raise
+    if settings.INFERENCE_MODE == "remote":
+        # Modelo na frota de workers (python -m app.worker): aqui só o broker
+        from app.core.broker import get_broker
+        if not get_broker().ping():
+            logger.warning("Broker de inferência indisponível: %s", settings.BROKER_URL)
+        if settings.BROKER_URL.startswith("memory://"):
+            # Sem broker compartilhado, um worker em threads neste processo consome a fila
+            from app.core.model_loader import warm_up_model
+            from app.worker import start_inference_worker
+            start_inference_worker()
+            warm_up_model()
+        logger.info("✓ Inferência remota via %s (fila %s)", settings.BROKER_URL, settings.BROKER_QUEUE)
+    else:
+        # Pré-carregar o modelo (warm-up)
+        try:
+            from app.core.model_loader import get_model, warm_up_model
+            model = get_model()
+            logger.info("✓ Modelo carregado com sucesso")
+            warm_up_model()
+            
+            # Modelo de triagem da cascata, se habilitada
+            from app.core.cascade import get_cascade
+            get_cascade()
+            
+            # Índice de casos semelhantes (aquecer também a saída de embedding)
+            from app.core.model_loader import get_embedding_model
+            from app.core.vector_index import get_vector_index
+            if get_vector_index() is not None:
+                warm_up_model(get_embedding_model())
+            
+            # Batch e workers de inferência (autotune ou configuração manual)
+            from app.core.autotune import autotune_startup
+            from app.core.pipeline import get_pipeline
+            autotune_startup(model, get_pipeline())
+        except Exception as e:
+            logger.error(f"✗ Erro ao carregar modelo: {str(e)}")
+            raise
+    
+    # Workers de jobs em lote (cedem a vez ao tráfego de /predict)
+    from app.core.jobs import start_job_runner
+    from app.core.pipeline import get_pipeline
+    pipeline = get_pipeline()
+    start_job_runner(
+        is_busy=(lambda: not pipeline.is_idle()) if pipeline else get_interactive_traffic().busy,
+        pipeline=pipeline
+    )
+    
+    # Amostrador de saúde (/health serve a última amostra) e atraso do event loop
+    from app.core.health_sampler import get_health_sampler
+    get_health_sampler().start(asyncio.get_running_loop())
+    
+    # Serviço gRPC interno (mesmo modelo e pipeline)
+    if settings.GRPC_ENABLED:
+        from app.rpc.server import start_grpc_server
+        start_grpc_server()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Executado no encerramento da API."""
     logger.info("Encerrando PulmoVision API")
+    
+    from app.core.audit import shutdown_audit_log
+    from app.core.health_sampler import shutdown_health_sampler
+    from app.core.jobs import stop_job_runner
+    from app.core.pipeline import shutdown_pipeline
+    from app.core.preprocess_pool import shutdown_preprocess_pool
+    shutdown_health_sampler()
+    if settings.GRPC_ENABLED:
+        from app.rpc.server import stop_grpc_server
+        stop_grpc_server()
+    stop_job_runner()
+    shutdown_pipeline()
+    shutdown_preprocess_pool()
+    if settings.INFERENCE_MODE == "remote":
+        from app.core.broker import shutdown_broker
+        from app.worker import stop_inference_worker
+        stop_inference_worker()
+        shutdown_broker()
+    # Depois do pipeline: as últimas predições ainda enfileiram registros
+    shutdown_audit_log()
 
 
 # Incluir routers
@@ -129,6 +264,11 @@ app.include_router(health.router, tags=["Health"])
 app.include_router(predict.router, tags=["Predição"])
 app.include_router(model.router, tags=["Modelo"])
 app.include_router(limitations.router, tags=["Informações"])
+app.include_router(metrics.router, tags=["Métricas"])
+app.include_router(drift.router, tags=["Métricas"])
+app.include_router(audit.router, tags=["Auditoria"])
+app.include_router(jobs.router, tags=["Jobs"])
+app.include_router(admin.router, tags=["Administração"], include_in_schema=False)
 
 
 # Root endpoint
@@ -0,0 +1,269 @@
+"""
+Roteador PulmoVision - Afinidade de Cache entre Instâncias
+Front-end pequeno na frente de várias instâncias da API (app.main): a
+mesma imagem (ou o mesmo estudo, via X-Study-Id) com a mesma versão do
+modelo (X-Model-Version) vai sempre para a mesma instância, onde o cache
+de resultados e o modelo já estão quentes.
+
+- Hashing consistente com carga limitada (app.core.hash_ring): uma
+  instância sobrecarregada repassa o excedente para a vizinha no anel.
+- Failover: instância que recusa conexão sai do anel até o health check
+  (GET /health) voltar a responder "healthy"; erro de transporte, tempo
+  esgotado e 503 (sobrecarga ou reciclagem) tentam a próxima instância,
+  até ROUTER_MAX_ATTEMPTS.
+- Uploads limitados a MAX_IMAGE_SIZE_MB por imagem (413) antes de
+  chegar às instâncias.
+- O endereço do cliente segue no X-Forwarded-For: configure o endereço
+  do roteador em TRUSTED_PROXIES das instâncias para que o limite de
+  taxa conte por cliente, e não pelo roteador.
+
+Roteia POST /predict e POST /predict/batch; as demais rotas continuam
+sendo servidas diretamente pelas instâncias.
+
+Teste local com três instâncias:
+
+    API_PORT=8001 python -m app.main &
+    API_PORT=8002 python -m app.main &
+    API_PORT=8003 python -m app.main &
+    ROUTER_BACKENDS='["http://127.0.0.1:8001","http://127.0.0.1:8002","http://127.0.0.1:8003"]' \\
+        python -m app.router.main
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import List, Optional
+
+import httpx
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+from starlette.datastructures import UploadFile
+
+from app.config import settings
+from app.core.hash_ring import HashRing
+from app.utils.logging import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# Headers da requisição repassados às instâncias
+_FORWARD_HEADERS = (
+    "X-Priority", "X-Deadline-Ms", "X-Request-ID", "X-API-Key",
+    "X-Study-Id", "X-Model-Version", "traceparent",
+)
+# Headers da resposta das instâncias devolvidos ao cliente
+_RETURN_HEADERS = ("Retry-After", "X-Request-ID", "X-Trace-ID", "Server-Timing", "X-Process-Time")
+
+app = FastAPI(
+    title=f"{settings.API_TITLE} - Roteador",
+    version=settings.API_VERSION,
+    docs_url=None,
+    redoc_url=None,
+)
+
+ring: Optional[HashRing] = None
+client: Optional[httpx.AsyncClient] = None
+_health_task: Optional[asyncio.Task] = None
+_failovers = 0
+
+
+def routing_key(study_id: Optional[str], model_version: Optional[str], contents: List[bytes]) -> str:
+    """Chave no anel: versão do modelo + id do estudo ou hash do conteúdo enviado."""
+    if not study_id:
+        digest = hashlib.sha256()
+        for content in contents:
+            digest.update(content)
+        study_id = digest.hexdigest()
+    return f"{model_version or ''}:{study_id}"
+
+
+async def _check(backend: str):
+    try:
+        response = await client.get(f"{backend}/health", timeout=2.0)
+        healthy = response.status_code == 200 and response.json().get("status") == "healthy"
+    except (httpx.HTTPError, ValueError):
+        healthy = False
+
+    if healthy and not ring.is_up(backend):
+        logger.info("Instância de volta ao anel: %s", backend)
+        ring.mark_up(backend)
+    elif not healthy and ring.is_up(backend):
+        logger.warning("Instância fora do anel: %s", backend)
+        ring.mark_down(backend)
+
+
+async def _health_loop():
+    while True:
+        await asyncio.gather(*[_check(backend) for backend in ring.nodes])
+        await asyncio.sleep(settings.ROUTER_HEALTH_INTERVAL)
+
+
+def _error(status_code: int, tipo: str, message: str, headers: Optional[dict] = None) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        headers=headers,
+        content={
+            "error": {
+                "type": tipo,
+                "message": message,
+                "timestamp": time.time()
+            }
+        }
+    )
+
+
+async def _read_body(request: Request, limit: int) -> Optional[bytes]:
+    """Corpo da requisição, ou None se passar de `limit` bytes (sem ler o resto)."""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > limit:
+        return None
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            return None
+    return bytes(body)
+
+
+async def _forward(request: Request, max_files: int = 1) -> Response:
+    """Repassa o upload à instância dona da chave (ou às seguintes, em falha)."""
+    global _failovers
+
+    max_size = settings.MAX_IMAGE_SIZE_MB * 1024 * 1024
+    too_large = f"Upload muito grande. Tamanho máximo: {settings.MAX_IMAGE_SIZE_MB}MB por imagem"
+
+    # Corpo limitado antes do parse: o multipart não é gravado sem limite
+    body = await _read_body(request, max_files * (max_size + 64 * 1024))
+    if body is None:
+        return _error(413, "upload_muito_grande", too_large)
+
+    async def replay():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    form = await Request(request.scope, replay).form(max_files=max_files)
+    files = []
+    for field, value in form.multi_items():
+        if isinstance(value, UploadFile):
+            if value.size is not None and value.size > max_size:
+                return _error(413, "upload_muito_grande", too_large)
+            files.append((field, (value.filename, await value.read(), value.content_type)))
+    key = routing_key(
+        request.headers.get("X-Study-Id"),
+        request.headers.get("X-Model-Version"),
+        [content for _, (_, content, _) in files]
+    )
+    headers = {name: request.headers[name] for name in _FORWARD_HEADERS if name in request.headers}
+
+    # Endereço do cliente para o limite de taxa das instâncias (TRUSTED_PROXIES)
+    if request.client is not None:
+        forwarded = request.headers.get("X-Forwarded-For")
+        headers["X-Forwarded-For"] = f"{forwarded}, {request.client.host}" if forwarded else request.client.host
+
+    candidates = ring.candidates(key)[:settings.ROUTER_MAX_ATTEMPTS]
+    last_error = "Nenhuma instância disponível"
+    for attempt, backend in enumerate(candidates):
+        if attempt:
+            _failovers += 1
+        ring.acquire(backend)
+        try:
+            response = await client.post(
+                f"{backend}{request.url.path}",
+                params=request.query_params,
+                files=files,
+                headers=headers,
+            )
+        except httpx.ConnectError as e:
+            ring.mark_down(backend)
+            logger.warning("Instância inacessível, fora do anel: %s (%s)", backend, e)
+            last_error = f"Instância inacessível: {backend}"
+            continue
+        except httpx.TimeoutException:
+            logger.warning("Tempo esgotado em %s", backend)
+            last_error = f"Tempo esgotado em {backend}"
+            continue
+        except httpx.TransportError as e:
+            # Conexão caiu no meio da resposta (ReadError, RemoteProtocolError...)
+            logger.warning("Erro de transporte em %s: %r", backend, e)
+            last_error = f"Erro de comunicação com {backend}"
+            continue
+        finally:
+            ring.release(backend)
+
+        if response.status_code == 503 and attempt + 1 < len(candidates):
+            # Sobrecarga ou reciclagem: a próxima instância do anel atende
+            last_error = f"Instância sobrecarregada: {backend}"
+            continue
+
+        returned = {name: response.headers[name] for name in _RETURN_HEADERS if name in response.headers}
+        returned["X-Backend"] = backend
+        return Response(
+            content=response.content,
+            status_code=response.status_code,
+            headers=returned,
+            media_type=response.headers.get("content-type"),
+        )
+
+    return _error(503, "sem_instancia", last_error, {"Retry-After": "1"})
+
+
+@app.post("/predict")
+async def predict(request: Request):
+    """Encaminha POST /predict com afinidade pelo conteúdo (ou X-Study-Id)."""
+    return await _forward(request)
+
+
+@app.post("/predict/batch")
+async def predict_batch(request: Request):
+    """Encaminha POST /predict/batch; a chave cobre todas as imagens do lote."""
+    return await _forward(request, max_files=settings.MAX_BATCH_FILES)
+
+
+@app.get("/health")
+async def health(response: Response):
+    """Saudável enquanto houver pelo menos uma instância no anel."""
+    up = [backend for backend in ring.nodes if ring.is_up(backend)]
+    if not up:
+        response.status_code = 503
+    return {"status": "healthy" if up else "unhealthy", "instancias_no_ar": len(up), "instancias": len(ring.nodes)}
+
+
+@app.get("/router/status")
+async def status():
+    """Instâncias, requisições em andamento e roteadas, desvios por carga e failovers."""
+    return {**ring.metrics(), "failovers": _failovers}
+
+
+@app.on_event("startup")
+async def startup_event():
+    global ring, client, _health_task
+
+    if not settings.ROUTER_BACKENDS:
+        raise RuntimeError("ROUTER_BACKENDS vazio: informe as URLs das instâncias")
+
+    ring = HashRing(
+        [backend.rstrip("/") for backend in settings.ROUTER_BACKENDS],
+        replicas=settings.ROUTER_REPLICAS,
+        load_factor=settings.ROUTER_LOAD_FACTOR
+    )
+    if client is None:
+        client = httpx.AsyncClient(timeout=httpx.Timeout(settings.ROUTER_TIMEOUT, connect=2.0))
+    _health_task = asyncio.create_task(_health_loop())
+    logger.info("Roteador com %d instâncias: %s", len(ring.nodes), ", ".join(ring.nodes))
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    global client
+
+    if _health_task is not None:
+        _health_task.cancel()
+    if client is not None:
+        await client.aclose()
+        client = None
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run("app.router.main:app", host=settings.API_HOST, port=settings.ROUTER_PORT)
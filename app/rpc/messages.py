@@ -0,0 +1,119 @@
+"""
+Messages - Mensagens Protobuf do Serviço de Inferência
+Monta, em tempo de execução, as mensagens descritas em pulmovision.proto
+(sem depender do protoc/grpc_tools no build). Os bytes no fio são os
+mesmos de stubs gerados a partir do .proto.
+"""
+
+from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
+
+PACKAGE = "pulmovision.v1"
+SERVICE = f"{PACKAGE}.Inference"
+
+_Field = descriptor_pb2.FieldDescriptorProto
+
+# Mensagens: nome -> [(campo, número, tipo, rótulo, tipo da mensagem/enum, oneof)]
+_MESSAGES = {
+    "Tensor": [
+        ("height", 1, _Field.TYPE_UINT32, None, None, None),
+        ("width", 2, _Field.TYPE_UINT32, None, None, None),
+        ("channels", 3, _Field.TYPE_UINT32, None, None, None),
+        ("data", 4, _Field.TYPE_BYTES, None, None, None),
+    ],
+    "PredictRequest": [
+        ("id", 1, _Field.TYPE_STRING, None, None, None),
+        ("image", 2, _Field.TYPE_BYTES, None, None, 0),
+        ("tensor", 3, _Field.TYPE_MESSAGE, None, "Tensor", 0),
+        ("filename", 4, _Field.TYPE_STRING, None, None, None),
+        ("priority", 5, _Field.TYPE_ENUM, None, "Priority", None),
+    ],
+    "Error": [
+        ("code", 1, _Field.TYPE_UINT32, None, None, None),
+        ("message", 2, _Field.TYPE_STRING, None, None, None),
+    ],
+    "PredictResponse": [
+        ("id", 1, _Field.TYPE_STRING, None, None, None),
+        ("class_index", 2, _Field.TYPE_UINT32, None, None, None),
+        ("confidence", 3, _Field.TYPE_FLOAT, None, None, None),
+        ("probabilities", 4, _Field.TYPE_FLOAT, _Field.LABEL_REPEATED, None, None),
+        ("error", 5, _Field.TYPE_MESSAGE, None, "Error", None),
+    ],
+    "ModelInfoRequest": [],
+    "ModelInfo": [
+        ("classes", 1, _Field.TYPE_STRING, _Field.LABEL_REPEATED, None, None),
+        ("name", 2, _Field.TYPE_STRING, None, None, None),
+        ("version", 3, _Field.TYPE_STRING, None, None, None),
+        ("architecture", 4, _Field.TYPE_STRING, None, None, None),
+        ("image_size", 5, _Field.TYPE_UINT32, None, None, None),
+        ("disclaimer", 6, _Field.TYPE_STRING, None, None, None),
+    ],
+}
+
+# Único oneof: PredictRequest.input
+_ONEOFS = {"PredictRequest": ["input"]}
+
+_PRIORITIES = [("PRIORITY_NORMAL", 0), ("PRIORITY_HIGH", 1), ("PRIORITY_LOW", 2)]
+
+# Métodos: nome -> (entrada, saída, stream do cliente, stream do servidor)
+METHODS = {
+    "Predict": ("PredictRequest", "PredictResponse", False, False),
+    "PredictStream": ("PredictRequest", "PredictResponse", True, True),
+    "GetModelInfo": ("ModelInfoRequest", "ModelInfo", False, False),
+}
+
+
+def _file_descriptor() -> descriptor_pb2.FileDescriptorProto:
+    proto = descriptor_pb2.FileDescriptorProto(
+        name="pulmovision.proto", package=PACKAGE, syntax="proto3"
+    )
+
+    enum = proto.enum_type.add(name="Priority")
+    for name, number in _PRIORITIES:
+        enum.value.add(name=name, number=number)
+
+    for message_name, fields in _MESSAGES.items():
+        message = proto.message_type.add(name=message_name)
+        for oneof in _ONEOFS.get(message_name, []):
+            message.oneof_decl.add(name=oneof)
+        for name, number, field_type, label, type_name, oneof_index in fields:
+            field = message.field.add(
+                name=name,
+                number=number,
+                type=field_type,
+                label=label or _Field.LABEL_OPTIONAL,
+                json_name=name,
+            )
+            if type_name:
+                field.type_name = f".{PACKAGE}.{type_name}"
+            if oneof_index is not None:
+                field.oneof_index = oneof_index
+
+    service = proto.service.add(name="Inference")
+    for name, (request, response, client_streaming, server_streaming) in METHODS.items():
+        service.method.add(
+            name=name,
+            input_type=f".{PACKAGE}.{request}",
+            output_type=f".{PACKAGE}.{response}",
+            client_streaming=client_streaming,
+            server_streaming=server_streaming,
+        )
+
+    return proto
+
+
+_pool = descriptor_pool.DescriptorPool()
+_file = _pool.Add(_file_descriptor())
+
+Tensor = message_factory.GetMessageClass(_pool.FindMessageTypeByName(f"{PACKAGE}.Tensor"))
+PredictRequest = message_factory.GetMessageClass(_pool.FindMessageTypeByName(f"{PACKAGE}.PredictRequest"))
+Error = message_factory.GetMessageClass(_pool.FindMessageTypeByName(f"{PACKAGE}.Error"))
+PredictResponse = message_factory.GetMessageClass(_pool.FindMessageTypeByName(f"{PACKAGE}.PredictResponse"))
+ModelInfoRequest = message_factory.GetMessageClass(_pool.FindMessageTypeByName(f"{PACKAGE}.ModelInfoRequest"))
+ModelInfo = message_factory.GetMessageClass(_pool.FindMessageTypeByName(f"{PACKAGE}.ModelInfo"))
+
+PRIORITY_NORMAL, PRIORITY_HIGH, PRIORITY_LOW = (number for _, number in _PRIORITIES)
+
+
+def method_path(name: str) -> str:
+    """Caminho completo do método (ex.: /pulmovision.v1.Inference/Predict)."""
+    return f"/{SERVICE}/{name}"
@@ -0,0 +1,347 @@
+"""
+gRPC Server - Serviço de Inferência para Tráfego Interno
+Predict (unário), PredictStream (bidirecional) e GetModelInfo sobre
+HTTP/2, com mensagens protobuf compactas: índice da classe e
+probabilidades, sem multipart nem o JSON completo de /predict.
+
+Roda no mesmo processo da API FastAPI (iniciado no startup com
+GRPC_ENABLED=True) e usa o mesmo modelo, o mesmo pipeline de batches,
+o mesmo registro de auditoria e as mesmas métricas. Com vários workers,
+todos escutam a mesma porta (SO_REUSEPORT) e o kernel distribui as
+conexões.
+
+Requer grpcio e protobuf.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+import grpc
+
+from app.config import settings
+from app.core.audit import content_hash, get_audit_log
+from app.core.pipeline import PRIORIDADE_ALTA, PRIORIDADE_BAIXA, PRIORIDADE_NORMAL, get_pipeline
+from app.rpc import messages
+from app.utils.exceptions import DeadlineExceededException
+from app.utils.image_processing import tensor_header
+
+logger = logging.getLogger(__name__)
+
+_PRIORITIES = {
+    messages.PRIORITY_NORMAL: PRIORIDADE_NORMAL,
+    messages.PRIORITY_HIGH: PRIORIDADE_ALTA,
+    messages.PRIORITY_LOW: PRIORIDADE_BAIXA,
+}
+
+# Código HTTP (status_code das exceções da API) -> status gRPC
+_STATUS = {
+    400: grpc.StatusCode.INVALID_ARGUMENT,
+    413: grpc.StatusCode.INVALID_ARGUMENT,
+    503: grpc.StatusCode.UNAVAILABLE,
+    504: grpc.StatusCode.DEADLINE_EXCEEDED,
+}
+
+# Fim das requisições de um stream
+_END = object()
+
+
+def _image_data(request) -> bytes:
+    """Bytes da imagem ou, para tensores, o formato PVT1 reconhecido pelo decode."""
+    if request.WhichOneof("input") == "tensor":
+        tensor = request.tensor
+        return tensor_header(tensor.height, tensor.width, tensor.channels) + tensor.data
+    return request.image
+
+
+def _error_code(error: Exception) -> int:
+    return getattr(error, "status_code", 500)
+
+
+def _error_detail(error: Exception) -> str:
+    return getattr(error, "detail", None) or str(error)
+
+
+class InferenceServicer:
+    """Implementação dos métodos do serviço pulmovision.v1.Inference."""
+
+    def __init__(self, pipeline=None, predictor=None, validator=None, stream_window: int = 32):
+        self.pipeline = pipeline
+        self.predictor = predictor
+        self.validator = validator
+        self.stream_window = stream_window
+        self.classes = list(settings.CLASSES)
+        self.audit = get_audit_log()
+
+        self._lock = threading.Lock()
+        self._calls = {name: 0 for name in messages.METHODS}
+        self._images = 0
+        self._errors = {}
+        self._active_streams = 0
+
+    # ---------------------------------------------------------------- execução
+
+    def _submit(self, request, deadline: Optional[float]) -> Future:
+        """Envia a imagem ao pipeline (ou prediz na hora, sem pipeline)."""
+        image_data = _image_data(request)
+        started = time.perf_counter()
+
+        if self.pipeline is not None:
+            try:
+                future = self.pipeline.submit(
+                    image_data,
+                    request.filename or None,
+                    priority=_PRIORITIES.get(request.priority, PRIORIDADE_NORMAL),
+                    deadline=deadline
+                )
+            except Exception as e:
+                # Fila cheia (503): falha só desta imagem
+                future = Future()
+                future.set_exception(e)
+        else:
+            future = Future()
+            try:
+                self.validator.validate(image_data, request.filename or None)
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise DeadlineExceededException("Prazo da requisição expirou antes do processamento.")
+                future.set_result(self.predictor.predict(image_data))
+            except Exception as e:
+                future.set_exception(e)
+
+        if self.audit is not None:
+            def record(done: Future):
+                if not done.cancelled() and done.exception() is None:
+                    self.audit.record(
+                        content_hash(image_data), done.result(),
+                        latency_ms=(time.perf_counter() - started) * 1000,
+                        filename=request.filename or None,
+                        request_id=request.id or None,
+                        origin="grpc"
+                    )
+            future.add_done_callback(record)
+
+        return future
+
+    def _response(self, request_id: str, result: dict):
+        label = result["resultado"]["rotulo"]
+        return messages.PredictResponse(
+            id=request_id,
+            class_index=self.classes.index(label),
+            confidence=result["resultado"]["confianca"],
+            probabilities=[result["probabilidades"][c] for c in self.classes]
+        )
+
+    def _count(self, method: str, images: int = 0, error: Optional[Exception] = None):
+        with self._lock:
+            if method:
+                self._calls[method] += 1
+            self._images += images
+            if error is not None:
+                code = _error_code(error)
+                self._errors[code] = self._errors.get(code, 0) + 1
+
+    @staticmethod
+    def _deadline(context) -> Optional[float]:
+        remaining = context.time_remaining()
+        return time.monotonic() + remaining if remaining is not None else None
+
+    # ---------------------------------------------------------------- métodos
+
+    def predict(self, request, context):
+        self._count("Predict")
+        future = self._submit(request, self._deadline(context))
+        context.add_callback(future.cancel)
+        try:
+            result = future.result()
+        except Exception as e:
+            self._count(None, error=e)
+            context.abort(_STATUS.get(_error_code(e), grpc.StatusCode.INTERNAL), _error_detail(e))
+        self._count(None, images=1)
+        return self._response(request.id, result)
+
+    def predict_stream(self, request_iterator, context):
+        """
+        Lê as requisições numa thread e envia cada imagem ao pipeline
+        assim que chega (as imagens do stream são agrupadas nos batches);
+        no máximo `stream_window` ficam pendentes. Falhas individuais
+        voltam como PredictResponse.error, sem encerrar o stream.
+        """
+        self._count("PredictStream")
+        pending = queue.Queue()
+        window = threading.Semaphore(self.stream_window)
+        in_flight = set()
+        cancelled = threading.Event()
+
+        def cancel():
+            cancelled.set()
+            window.release()  # libera a leitura, se estiver esperando a janela
+            for future in list(in_flight):
+                future.cancel()
+
+        context.add_callback(cancel)
+
+        def read():
+            try:
+                for request in request_iterator:
+                    window.acquire()
+                    if cancelled.is_set():
+                        break
+                    future = self._submit(request, self._deadline(context))
+                    in_flight.add(future)
+                    pending.put((request.id, future))
+            except Exception as e:
+                if not cancelled.is_set():
+                    logger.warning("Stream gRPC interrompido: %s", e)
+            finally:
+                pending.put(_END)
+
+        threading.Thread(target=read, name="grpc-stream-reader", daemon=True).start()
+
+        with self._lock:
+            self._active_streams += 1
+        try:
+            while True:
+                item = pending.get()
+                if item is _END:
+                    break
+                request_id, future = item
+                try:
+                    response = self._response(request_id, future.result())
+                    self._count(None, images=1)
+                except Exception as e:
+                    self._count(None, error=e)
+                    response = messages.PredictResponse(
+                        id=request_id,
+                        error=messages.Error(code=_error_code(e), message=_error_detail(e))
+                    )
+                finally:
+                    in_flight.discard(future)
+                    window.release()
+                yield response
+        finally:
+            with self._lock:
+                self._active_streams -= 1
+
+    def get_model_info(self, request, context):
+        self._count("GetModelInfo")
+        return messages.ModelInfo(
+            classes=self.classes,
+            name=settings.MODEL_NAME,
+            version=settings.MODEL_VERSION,
+            architecture=settings.MODEL_ARCHITECTURE,
+            image_size=settings.IMAGE_SIZE,
+            disclaimer=settings.DISCLAIMER
+        )
+
+    def metrics(self) -> dict:
+        """Contadores do serviço gRPC."""
+        with self._lock:
+            return {
+                "chamadas": dict(self._calls),
+                "imagens": self._images,
+                "erros": {str(code): n for code, n in sorted(self._errors.items())},
+                "streams_ativos": self._active_streams,
+            }
+
+    def handler(self) -> grpc.GenericRpcHandler:
+        """Handler genérico (sem stubs gerados) com os (de)serializadores das mensagens."""
+        request_types = {
+            "PredictRequest": messages.PredictRequest,
+            "ModelInfoRequest": messages.ModelInfoRequest,
+        }
+        implementations = {
+            "Predict": (grpc.unary_unary_rpc_method_handler, self.predict),
+            "PredictStream": (grpc.stream_stream_rpc_method_handler, self.predict_stream),
+            "GetModelInfo": (grpc.unary_unary_rpc_method_handler, self.get_model_info),
+        }
+        handlers = {}
+        for name, (make_handler, implementation) in implementations.items():
+            request_type = messages.METHODS[name][0]
+            handlers[name] = make_handler(
+                implementation,
+                request_deserializer=request_types[request_type].FromString,
+                response_serializer=lambda message: message.SerializeToString()
+            )
+        return grpc.method_handlers_generic_handler(messages.SERVICE, handlers)
+
+
+class GrpcServer:
+    """Servidor gRPC com o InferenceServicer, em threads próprias."""
+
+    def __init__(self, servicer: InferenceServicer, host: str, port: int, max_workers: int):
+        self.servicer = servicer
+        max_message = (settings.MAX_IMAGE_SIZE_MB + 1) * 1024 * 1024
+        self._server = grpc.server(
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="grpc"),
+            options=[
+                ("grpc.max_receive_message_length", max_message),
+                ("grpc.max_send_message_length", max_message),
+                ("grpc.so_reuseport", 1),
+            ]
+        )
+        self._server.add_generic_rpc_handlers((servicer.handler(),))
+        self.port = self._server.add_insecure_port(f"{host}:{port}")
+        if self.port == 0:
+            raise RuntimeError(f"Não foi possível escutar em {host}:{port}")
+
+    def start(self):
+        self._server.start()
+        logger.info("✓ Serviço gRPC escutando na porta %d", self.port)
+
+    def stop(self, grace: float = 5.0):
+        """Para de aceitar chamadas e espera até `grace` segundos pelas em andamento."""
+        self._server.stop(grace).wait()
+
+    def metrics(self) -> dict:
+        return {"porta": self.port, **self.servicer.metrics()}
+
+
+# Instância global (uma por worker)
+_server = None
+
+
+def get_grpc_server() -> Optional[GrpcServer]:
+    """Servidor gRPC em execução neste worker, ou None."""
+    return _server
+
+
+def start_grpc_server() -> GrpcServer:
+    """
+    Inicia o serviço gRPC com o pipeline global (ou um Predictor próprio,
+    que compartilha o modelo carregado, com PIPELINE_ENABLED=False).
+    """
+    global _server
+
+    if _server is None:
+        pipeline = get_pipeline()
+        predictor = validator = None
+        if pipeline is None:
+            from app.core.predictor import create_predictor
+            from app.core.preprocess_pool import get_preprocess_pool
+            from app.core.validator import ImageValidator
+            predictor = create_predictor(preprocess_pool=get_preprocess_pool())
+            validator = ImageValidator()
+
+        servicer = InferenceServicer(
+            pipeline=pipeline,
+            predictor=predictor,
+            validator=validator,
+            stream_window=settings.GRPC_STREAM_WINDOW
+        )
+        server = GrpcServer(servicer, settings.API_HOST, settings.GRPC_PORT, settings.GRPC_MAX_WORKERS)
+        server.start()
+        _server = server
+
+    return _server
+
+
+def stop_grpc_server():
+    """Encerra o servidor gRPC, se estiver rodando."""
+    global _server
+
+    if _server is not None:
+        _server.stop()
+        _server = None
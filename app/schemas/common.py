@@ -2,7 +2,7 @@
 """Schemas comuns"""
 from pydantic import BaseModel
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 class HealthResponse(BaseModel):
     status: str
@@ -12,6 +12,12 @@ class HealthResponse(BaseModel):
     model_loaded: bool
     memory_usage_percent: float
     memory_available_gb: float
+    model_version: Optional[str] = None
+    process_rss_mb: Optional[float] = None
+    process_cpu_percent: Optional[float] = None
+    process_threads: Optional[int] = None
+    event_loop_lag_ms: Optional[float] = None
+    queue_depth: Optional[int] = None
 
 class LimitationsResponse(BaseModel):
     limitacoes_tecnicas: List[str]
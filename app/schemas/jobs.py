@@ -0,0 +1,43 @@
+# ==================== app/schemas/jobs.py ====================
+"""Schemas de jobs assíncronos e predição em lote"""
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+class JobResponse(BaseModel):
+    job_id: str = Field(..., description="Identificador do job")
+    status: str = Field(..., description="pendente, processando ou concluido")
+    total: int = Field(..., description="Total de imagens no job")
+    processados: int = Field(..., description="Imagens já processadas")
+    falhas: int = Field(..., description="Imagens com erro")
+    progresso: float = Field(..., ge=0.0, le=1.0, description="Fração concluída (0-1)")
+    criado_em: datetime
+    atualizado_em: datetime
+
+class JobItemSchema(BaseModel):
+    indice: int
+    arquivo: str
+    status: str
+    resultado: Optional[Dict] = None
+    erro: Optional[str] = None
+
+class JobResultsResponse(BaseModel):
+    job_id: str
+    offset: int
+    limit: int
+    itens: List[JobItemSchema]
+    proximo_offset: Optional[int] = Field(
+        None, description="Offset da próxima página (None se não houver)"
+    )
+
+class BatchPredictResponse(BaseModel):
+    total: int
+    resultados: List[Dict] = Field(
+        ..., description="Um resultado por arquivo, na ordem de envio"
+    )
+
+
+class PathPredictRequest(BaseModel):
+    caminhos: List[str] = Field(
+        ..., min_length=1, description="Caminhos relativos a MOUNTED_IMAGES_ROOT"
+    )
@@ -1,7 +1,7 @@
 # ==================== app/schemas/model.py ====================
 """Schemas de informações do modelo"""
 from pydantic import BaseModel
-from typing import Dict, List
+from typing import Dict, List, Optional
 from datetime import datetime
 
 class ModelInfoResponse(BaseModel):
@@ -9,4 +9,5 @@ class ModelInfoResponse(BaseModel):
     classes: Dict
     dataset: Dict
     performance: Dict
-    treinamento: Dict
\ No newline at end of file
+    treinamento: Dict
+    execucao: Optional[Dict] = None
\ No newline at end of file
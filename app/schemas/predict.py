@@ -4,7 +4,7 @@ Modelos Pydantic para request/response de predição
 """
 
 from pydantic import BaseModel, Field
-from typing import Dict
+from typing import Dict, List
 
 
 class ResultadoSchema(BaseModel):
@@ -30,6 +30,22 @@ class ModeloSchema(BaseModel):
     versao: str = Field(..., description="Versão do modelo", example="1.0.0")
 
 
+class CascataSchema(BaseModel):
+    """Estágio da cascata de modelos que decidiu a predição."""
+    estagio: str = Field(..., description="triagem ou completo", example="triagem")
+    limiar: float = Field(..., description="Confiança mínima para decidir na triagem", example=0.9)
+
+
+class CasoSemelhanteSchema(BaseModel):
+    """Caso confirmado do índice de referência, semelhante à imagem enviada."""
+    arquivo: str = Field(..., description="Identificação da radiografia de referência", example="tuberculose/caso_0412.png")
+    rotulo: str = Field(..., description="Diagnóstico confirmado do caso", example="tuberculose")
+    similaridade: float = Field(..., description="Similaridade de cosseno entre os embeddings", example=0.91)
+    
+    class Config:
+        extra = "allow"
+
+
 class PredictResponse(BaseModel):
     """
     Resposta completa de predição.
@@ -65,6 +81,16 @@ class PredictResponse(BaseModel):
         description="Interpretação clínica básica"
     )
     
+    cascata: CascataSchema | None = Field(
+        None,
+        description="Presente quando a cascata de modelos está habilitada"
+    )
+    
+    casos_semelhantes: List[CasoSemelhanteSchema] | None = Field(
+        None,
+        description="Casos de referência mais semelhantes (com `similar` > 0)"
+    )
+    
     class Config:
         json_schema_extra = {
             "example": {
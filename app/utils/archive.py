@@ -0,0 +1,299 @@
+# ==================== app/utils/archive.py ====================
+"""Leitura de arquivos compactados (ZIP/TAR) com radiografias"""
+import queue
+import struct
+import tarfile
+import threading
+import zipfile
+import zlib
+from pathlib import PurePosixPath
+from typing import BinaryIO, Callable, Iterator, List, Optional, Tuple
+
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+def is_archive(filename: str) -> bool:
+    """Indica se o nome do arquivo corresponde a um arquivo compactado."""
+    return bool(filename) and filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+def _is_image(name: str, allowed_extensions: List[str]) -> bool:
+    path = PurePosixPath(name)
+    # Ignorar metadados de sistemas operacionais (__MACOSX/, ._arquivo)
+    if path.name.startswith(".") or "__MACOSX" in path.parts:
+        return False
+    return path.suffix.lower().lstrip(".") in allowed_extensions
+
+class ArchiveTooLarge(ValueError):
+    """Entrada do arquivo compactado acima do tamanho máximo."""
+
+def _too_large(name: str, max_entry_size: int) -> ArchiveTooLarge:
+    return ArchiveTooLarge(
+        f"{name}: imagem muito grande. Tamanho máximo: {max_entry_size / (1024 * 1024):.0f}MB"
+    )
+
+def _read_capped(entry: BinaryIO, name: str, max_entry_size: int) -> bytes:
+    # Lê no máximo um byte além do limite: um zip bomb não é expandido inteiro
+    data = entry.read(max_entry_size + 1)
+    if len(data) > max_entry_size:
+        raise _too_large(name, max_entry_size)
+    return data
+
+def iter_archive_images(
+    fileobj: BinaryIO,
+    filename: str,
+    allowed_extensions: List[str],
+    max_entry_size: int
+) -> Iterator[Tuple[str, bytes]]:
+    """
+    Itera as imagens de um ZIP ou TAR, uma entrada por vez.
+    Retorna tuplas (nome da entrada, bytes da imagem).
+    Levanta ArchiveTooLarge se uma entrada passar de `max_entry_size`
+    bytes (pelo tamanho declarado ou pelo que for de fato descompactado).
+    """
+    if filename.lower().endswith(".zip"):
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not _is_image(info.filename, allowed_extensions):
+                    continue
+                if info.file_size > max_entry_size:
+                    raise _too_large(info.filename, max_entry_size)
+                with archive.open(info) as entry:
+                    yield info.filename, _read_capped(entry, info.filename, max_entry_size)
+        return
+
+    with tarfile.open(fileobj=fileobj, mode="r:*") as archive:
+        for member in archive:
+            if member.isfile() and _is_image(member.name, allowed_extensions):
+                if member.size > max_entry_size:
+                    raise _too_large(member.name, max_entry_size)
+                yield member.name, _read_capped(
+                    archive.extractfile(member), member.name, max_entry_size
+                )
+
+# ---------------------------------------------------------------------------
+# Leitura em streaming (sem seek, sem extrair para disco)
+# ---------------------------------------------------------------------------
+
+_ZIP_LOCAL_HEADER = struct.Struct("<4s5H3I2H")
+_ZIP_LOCAL_SIGNATURE = b"PK\x03\x04"
+_ZIP_DESCRIPTOR_SIGNATURE = b"PK\x07\x08"
+_ZIP_END_SIGNATURES = (b"PK\x01\x02", b"PK\x05\x06", b"PK\x06\x06")
+_ZIP_FLAG_ENCRYPTED = 0x1
+_ZIP_FLAG_DESCRIPTOR = 0x8
+_ZIP_FLAG_UTF8 = 0x800
+_READ_SIZE = 64 * 1024
+
+class StreamBuffer:
+    """
+    Buffer limitado entre um produtor (corpo da requisição) e um leitor
+    síncrono. Oferece read(n) como um arquivo, sem suporte a seek.
+    """
+
+    def __init__(self, max_chunks: int = 16, on_consumed: Optional[Callable[[], None]] = None):
+        # Um lugar a mais para a marca de fim (None)
+        self._chunks = queue.Queue(maxsize=max_chunks + 1)
+        self._buffer = bytearray()
+        self._eof = False
+        self._closed = threading.Event()
+        self._on_consumed = on_consumed
+
+    def feed(self, chunk: Optional[bytes]):
+        """Adiciona um pedaço (None = fim). Bloqueia se o buffer estiver cheio."""
+        while not self._closed.is_set():
+            try:
+                self._chunks.put(chunk, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def feed_nowait(self, chunk: Optional[bytes]):
+        """
+        Adiciona um pedaço sem bloquear, para produtores no event loop.
+        O controle de fluxo fica com o produtor: no máximo `max_chunks`
+        pedaços sem `on_consumed`, mais a marca de fim.
+        """
+        self._chunks.put_nowait(chunk)
+
+    def close(self):
+        """Encerra o buffer; leituras e escritas pendentes são liberadas."""
+        self._closed.set()
+
+    def _next_chunk(self) -> Optional[bytes]:
+        while not self._closed.is_set():
+            try:
+                chunk = self._chunks.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if chunk is not None and self._on_consumed is not None:
+                self._on_consumed()
+            return chunk
+        raise EOFError("Leitura cancelada")
+
+    def read(self, n: int = -1) -> bytes:
+        while not self._eof and (n < 0 or len(self._buffer) < n):
+            chunk = self._next_chunk()
+            if chunk is None:
+                self._eof = True
+            else:
+                self._buffer += chunk
+
+        if n < 0 or n >= len(self._buffer):
+            data = bytes(self._buffer)
+            self._buffer.clear()
+        else:
+            data = bytes(self._buffer[:n])
+            del self._buffer[:n]
+        return data
+
+class _PushbackReader:
+    """Leitor que permite devolver bytes lidos a mais (fim de entradas deflate)."""
+
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+        self._pending = b""
+
+    def unread(self, data: bytes):
+        self._pending = data + self._pending
+
+    def read(self, n: int) -> bytes:
+        if self._pending:
+            data, self._pending = self._pending[:n], self._pending[n:]
+            return data
+        return self._stream.read(n)
+
+    def read_exact(self, n: int) -> bytes:
+        data = bytearray()
+        while len(data) < n:
+            chunk = self.read(n - len(data))
+            if not chunk:
+                raise EOFError("Arquivo compactado truncado")
+            data += chunk
+        return bytes(data)
+
+def _zip64_sizes(extra: bytes, csize: int, usize: int) -> Tuple[int, int, bool]:
+    """Lê tamanhos do campo extra ZIP64 (0x0001) quando o header traz 0xFFFFFFFF."""
+    offset = 0
+    while offset + 4 <= len(extra):
+        tag, length = struct.unpack_from("<2H", extra, offset)
+        if tag == 0x0001:
+            values = extra[offset + 4:offset + 4 + length]
+            pos = 0
+            if usize == 0xFFFFFFFF:
+                usize = struct.unpack_from("<Q", values, pos)[0]
+                pos += 8
+            if csize == 0xFFFFFFFF:
+                csize = struct.unpack_from("<Q", values, pos)[0]
+            return csize, usize, True
+        offset += 4 + length
+    return csize, usize, False
+
+def _iter_zip_stream(stream, allowed_extensions, max_entry_size):
+    reader = _PushbackReader(stream)
+
+    while True:
+        signature = reader.read(4)
+        if not signature:
+            return
+        if len(signature) < 4:
+            signature += reader.read_exact(4 - len(signature))
+        if signature in _ZIP_END_SIGNATURES:
+            # Diretório central (ou fim): não há mais entradas
+            return
+        if signature != _ZIP_LOCAL_SIGNATURE:
+            raise ValueError("Conteúdo não é um arquivo ZIP válido")
+
+        (_, _, flags, method, _, _, crc, csize, usize, name_len, extra_len) = (
+            _ZIP_LOCAL_HEADER.unpack(signature + reader.read_exact(26))
+        )
+        encoding = "utf-8" if flags & _ZIP_FLAG_UTF8 else "cp437"
+        name = reader.read_exact(name_len).decode(encoding, errors="replace")
+        csize, usize, zip64 = _zip64_sizes(reader.read_exact(extra_len), csize, usize)
+        has_descriptor = bool(flags & _ZIP_FLAG_DESCRIPTOR)
+
+        if flags & _ZIP_FLAG_ENCRYPTED:
+            raise ValueError(f"Entrada criptografada não suportada: {name}")
+        if method not in (0, 8):
+            raise ValueError(f"Método de compressão não suportado ({method}): {name}")
+        if method == 0 and has_descriptor:
+            raise ValueError(f"Entrada sem tamanho conhecido não suportada: {name}")
+
+        wanted = not name.endswith("/") and _is_image(name, allowed_extensions)
+        data = bytearray()
+        too_large = False
+
+        def keep(piece: bytes):
+            nonlocal too_large
+            if not wanted or too_large:
+                return
+            if len(data) + len(piece) > max_entry_size:
+                too_large = True
+                data.clear()
+            else:
+                data.extend(piece)
+
+        if method == 8:
+            decompressor = zlib.decompressobj(-15)
+            remaining = None if has_descriptor else csize
+            while not decompressor.eof:
+                size = _READ_SIZE if remaining is None else min(_READ_SIZE, remaining)
+                chunk = reader.read(size) if size else b""
+                if not chunk:
+                    raise EOFError(f"Entrada truncada: {name}")
+                if remaining is not None:
+                    remaining -= len(chunk)
+                keep(decompressor.decompress(chunk))
+            # Bytes lidos além do fim do stream deflate pertencem ao próximo registro
+            reader.unread(decompressor.unused_data)
+        else:
+            remaining = csize
+            while remaining:
+                chunk = reader.read_exact(min(_READ_SIZE, remaining))
+                remaining -= len(chunk)
+                keep(chunk)
+
+        if has_descriptor:
+            head = reader.read_exact(4)
+            size_len = 16 if zip64 else 8
+            if head == _ZIP_DESCRIPTOR_SIGNATURE:
+                head = reader.read_exact(4)
+            crc = struct.unpack("<I", head)[0]
+            reader.read_exact(size_len)
+
+        if not wanted:
+            continue
+        if too_large:
+            yield name, None, (
+                f"Imagem muito grande. Tamanho máximo: {max_entry_size / (1024 * 1024):.0f}MB"
+            )
+        elif zlib.crc32(data) != crc:
+            yield name, None, "Entrada corrompida (CRC inválido)"
+        else:
+            yield name, bytes(data), None
+
+def _iter_tar_stream(stream, allowed_extensions, max_entry_size):
+    # Modo "r|*": leitura sequencial, sem seek (aceita .tar, .tar.gz, ...)
+    with tarfile.open(fileobj=stream, mode="r|*") as archive:
+        for member in archive:
+            if not member.isfile() or not _is_image(member.name, allowed_extensions):
+                continue
+            if member.size > max_entry_size:
+                yield member.name, None, (
+                    f"Imagem muito grande. Tamanho máximo: {max_entry_size / (1024 * 1024):.0f}MB"
+                )
+                continue
+            yield member.name, archive.extractfile(member).read(), None
+
+def iter_archive_stream(
+    stream: BinaryIO,
+    kind: str,
+    allowed_extensions: List[str],
+    max_entry_size: int
+) -> Iterator[Tuple[str, Optional[bytes], Optional[str]]]:
+    """
+    Itera as imagens de um ZIP ou TAR lido sequencialmente de `stream`.
+
+    Apenas a entrada atual fica em memória. Retorna tuplas
+    (nome, bytes, erro); em entradas rejeitadas bytes é None.
+    """
+    if kind == "zip":
+        return _iter_zip_stream(stream, allowed_extensions, max_entry_size)
+    return _iter_tar_stream(stream, allowed_extensions, max_entry_size)
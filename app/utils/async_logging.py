@@ -0,0 +1,257 @@
+# ==================== app/utils/async_logging.py ====================
+"""
+Logging assíncrono e estruturado.
+
+Os registros vão para uma fila limitada e são escritos por uma thread
+(QueueListener), fora do caminho da requisição. Inclui formatação JSON
+com id da requisição e tempos por etapa, e amostragem de logs de sucesso
+(avisos e erros nunca são amostrados).
+
+Independente de framework: usado por app.utils.logging (FastAPI) e pelo
+LOGGING do Django (LOGGING_CONFIG em config/settings.py).
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.config
+import logging.handlers
+import queue
+import threading
+import uuid
+import zlib
+from datetime import datetime, timezone
+from typing import Optional
+
+# Contexto da requisição atual (definido pelos middlewares)
+_request_id: contextvars.ContextVar = contextvars.ContextVar("request_id", default=None)
+_timings: contextvars.ContextVar = contextvars.ContextVar("timings", default=None)
+
+# Atributos padrão do LogRecord (o resto veio de `extra=`)
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+# ==================== contexto da requisição ====================
+
+def new_request_id(incoming: Optional[str] = None) -> str:
+    """Usa o id recebido (ex.: X-Request-ID) ou gera um novo."""
+    return incoming[:64] if incoming else uuid.uuid4().hex
+
+
+def begin_request(request_id: str) -> tuple:
+    """Abre o contexto de logging da requisição. Devolve tokens para end_request."""
+    return _request_id.set(request_id), _timings.set({})
+
+
+def end_request(tokens: tuple):
+    request_token, timings_token = tokens
+    _request_id.reset(request_token)
+    _timings.reset(timings_token)
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def add_timing(stage: str, seconds: float):
+    """Registra o tempo de uma etapa na requisição atual (ignorado fora dela)."""
+    timings = _timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+def add_timings(timings: dict):
+    for stage, seconds in timings.items():
+        add_timing(stage, seconds)
+
+
+def request_timings_ms() -> dict:
+    """Tempos por etapa da requisição atual, em ms."""
+    return {stage: round(seconds * 1000, 2) for stage, seconds in (_timings.get() or {}).items()}
+
+
+# ==================== formatação e filtros ====================
+
+class JsonFormatter(logging.Formatter):
+    """Um objeto JSON por linha: horário, nível, logger, mensagem, request_id e extras."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            data["request_id"] = request_id
+
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                data[key] = value
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["excecao"] = record.exc_text
+
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Copia o id da requisição para o registro (na thread que gerou o log)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = _request_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Mantém uma fração `rate` dos registros abaixo de WARNING.
+
+    A decisão é por requisição (hash do request_id), então os logs de uma
+    requisição amostrada aparecem completos. Fora de requisições, e de
+    WARNING para cima, nada é descartado.
+    """
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.rate = max(0.0, min(1.0, rate))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1.0 or record.levelno >= logging.WARNING:
+            return True
+        request_id = getattr(record, "request_id", None) or _request_id.get()
+        if request_id is None:
+            return True
+        return (zlib.crc32(request_id.encode()) % 10000) < self.rate * 10000
+
+
+# ==================== fila ====================
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler com fila limitada que nunca bloqueia a requisição.
+
+    Com a fila cheia, registros abaixo de WARNING são descartados (e
+    contados); avisos e erros esperam até `error_timeout` segundos.
+    """
+
+    def __init__(self, queue_size: int = 10000, error_timeout: float = 1.0):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.error_timeout = error_timeout
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolver mensagem e traceback aqui; a thread de escrita formata
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno >= logging.WARNING:
+                try:
+                    self.queue.put(record, timeout=self.error_timeout)
+                    return
+                except queue.Full:
+                    pass
+            self.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional[AsyncQueueHandler] = None
+_logger: Optional[logging.Logger] = None
+_lock = threading.Lock()
+
+
+def enable_async_logging(
+    logger: Optional[logging.Logger] = None,
+    queue_size: int = 10000,
+    sample_rate: float = 1.0
+) -> AsyncQueueHandler:
+    """
+    Move os handlers atuais de `logger` (padrão: root) para trás de uma
+    fila escrita por uma thread dedicada.
+
+    Os handlers originais continuam fazendo a escrita (stdout, arquivo
+    rotativo...) com seus formatters; só saem da thread da requisição.
+    """
+    global _listener, _handler, _logger
+
+    logger = logger or logging.getLogger()
+
+    with _lock:
+        if _handler is not None:
+            return _handler
+
+        targets = [h for h in logger.handlers if not isinstance(h, AsyncQueueHandler)]
+        handler = AsyncQueueHandler(queue_size=queue_size)
+        handler.addFilter(RequestContextFilter())
+        if sample_rate < 1.0:
+            handler.addFilter(SamplingFilter(sample_rate))
+
+        listener = logging.handlers.QueueListener(
+            handler.queue, *targets, respect_handler_level=True
+        )
+        for target in targets:
+            logger.removeHandler(target)
+        logger.addHandler(handler)
+        listener.start()
+
+        _listener, _handler, _logger = listener, handler, logger
+        atexit.register(stop_async_logging)
+        return handler
+
+
+def stop_async_logging():
+    """Esvazia a fila e devolve os handlers ao logger (idempotente)."""
+    global _listener, _handler, _logger
+
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+
+        if _handler in _logger.handlers:
+            _logger.removeHandler(_handler)
+            for target in _listener.handlers:
+                _logger.addHandler(target)
+        _listener, _handler, _logger = None, None, None
+
+
+def async_logging_metrics() -> Optional[dict]:
+    """Fila e descartes do logging assíncrono (None se inativo)."""
+    handler = _handler
+    if handler is None:
+        return None
+    return {
+        "fila": handler.queue.qsize(),
+        "fila_max": handler.queue.maxsize,
+        "descartados": handler.dropped,
+    }
+
+
+def dict_config_async(config: dict):
+    """
+    Substituto de logging.config.dictConfig para o LOGGING_CONFIG do Django.
+
+    Aplica o dicionário normalmente e, em seguida, coloca os handlers do
+    root atrás da fila. Opções na chave "assincrono":
+    {"tamanho_fila": int, "amostragem": float}.
+    """
+    config = dict(config)
+    options = config.pop("assincrono", {})
+    logging.config.dictConfig(config)
+    enable_async_logging(
+        queue_size=options.get("tamanho_fila", 10000),
+        sample_rate=options.get("amostragem", 1.0)
+    )
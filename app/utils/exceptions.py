@@ -18,3 +18,11 @@ class ImageTooLargeException(PulmoVisionException):
 class PredictionException(PulmoVisionException):
     def __init__(self, detail: str):
         super().__init__(status_code=500, detail=detail, error_type="prediction_error")
+
+class ServiceOverloadedException(PulmoVisionException):
+    def __init__(self, detail: str):
+        super().__init__(status_code=503, detail=detail, error_type="service_overloaded")
+
+class DeadlineExceededException(PulmoVisionException):
+    def __init__(self, detail: str):
+        super().__init__(status_code=504, detail=detail, error_type="deadline_exceeded")
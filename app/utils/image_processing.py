@@ -1,6 +1,75 @@
 # ==================== app/utils/image_processing.py ====================
 """Processamento de imagens"""
+import io
+import struct
+
 import numpy as np
+from PIL import Image
+
+# Entrada de clientes leves: tensor uint8 já no tamanho do modelo, em .npy
+# ou bytes crus (H, W, C) precedidos de um cabeçalho de 9 bytes
+TENSOR_MAGIC = b"PVT1"
+_TENSOR_HEADER = struct.Struct("<4sHHB")  # magic, altura, largura, canais
+_NPY_MAGIC = b"\x93NUMPY"
+
+def is_tensor_payload(data) -> bool:
+    """True se os bytes forem um tensor de cliente leve (.npy ou PVT1)."""
+    return data[:4] == TENSOR_MAGIC or data[:6] == _NPY_MAGIC
+
+def tensor_header(height: int, width: int, channels: int) -> bytes:
+    """Cabeçalho PVT1, seguido de height * width * channels bytes uint8."""
+    return _TENSOR_HEADER.pack(TENSOR_MAGIC, height, width, channels)
+
+def encode_tensor(img_array: np.ndarray) -> bytes:
+    """Serializa (H, W, C) uint8 no formato PVT1 (lado do cliente)."""
+    img_array = np.ascontiguousarray(img_array, dtype=np.uint8)
+    if img_array.ndim == 2:
+        img_array = img_array[..., np.newaxis]
+    return tensor_header(*img_array.shape) + img_array.tobytes()
+
+def read_tensor(data, image_size: int) -> np.ndarray:
+    """
+    Lê um tensor de cliente leve sem PIL: só valida forma e tipo.
+    Aceita uint8 (image_size, image_size) ou com 1 ou 3 canais.
+    Retorna array uint8 (image_size, image_size, 3), sem cópia com 3 canais.
+
+    Raises:
+        ValueError: Se o cabeçalho, o tipo ou a forma forem inválidos
+    """
+    if data[:4] == TENSOR_MAGIC:
+        if len(data) < _TENSOR_HEADER.size:
+            raise ValueError("Cabeçalho PVT1 incompleto")
+        _, height, width, channels = _TENSOR_HEADER.unpack_from(data)
+        shape, dtype, fortran = (height, width, channels), np.dtype(np.uint8), False
+        offset = _TENSOR_HEADER.size
+    else:
+        fp = io.BytesIO(data)
+        version = np.lib.format.read_magic(fp)
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(fp)
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(fp)
+        offset = fp.tell()
+
+    if dtype != np.uint8:
+        raise ValueError(f"Tensor deve ser uint8, recebido {dtype}")
+    if len(shape) == 2:
+        shape = (*shape, 1)
+    if len(shape) != 3 or shape[:2] != (image_size, image_size) or shape[2] not in (1, 3):
+        raise ValueError(
+            f"Tensor deve ter forma ({image_size}, {image_size}, 3) ou "
+            f"({image_size}, {image_size}, 1), recebido {tuple(shape)}"
+        )
+
+    count = shape[0] * shape[1] * shape[2]
+    if len(data) - offset != count:
+        raise ValueError(f"Tensor com {len(data) - offset} bytes de dados, esperado {count}")
+
+    img_array = np.frombuffer(data, dtype=np.uint8, count=count, offset=offset)
+    img_array = img_array.reshape(shape, order="F" if fortran else "C")
+    if shape[2] == 1:
+        img_array = np.repeat(img_array, 3, axis=2)
+    return img_array
 
 def preprocess_image(img_array: np.ndarray) -> np.ndarray:
     """
@@ -9,3 +78,34 @@ def preprocess_image(img_array: np.ndarray) -> np.ndarray:
     """
     img_array = img_array / 127.5 - 1.0
     return img_array.astype(np.float32)
+
+def open_image(image_data: bytes) -> Image.Image:
+    """Abre a imagem a partir dos bytes (sem decodificar os pixels)."""
+    return Image.open(io.BytesIO(image_data))
+
+def decode_image(image_data: bytes, image_size: int) -> np.ndarray:
+    """
+    Decodifica a imagem e redimensiona para (image_size, image_size, 3).
+    Retorna array uint8 RGB, ainda sem normalização.
+    Tensores de clientes leves são usados como estão (sem PIL).
+    """
+    if is_tensor_payload(image_data):
+        return read_tensor(image_data, image_size)
+
+    img = open_image(image_data)
+
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    img = img.resize((image_size, image_size), Image.BILINEAR)
+    return np.asarray(img, dtype=np.uint8)
+
+def preprocess_into(image_data: bytes, image_size: int, out: np.ndarray) -> np.ndarray:
+    """
+    Decodifica e normaliza a imagem diretamente em `out` (float32).
+    Mesmo resultado de preprocess_image, sem arrays intermediários extras.
+    """
+    out[...] = decode_image(image_data, image_size)
+    np.divide(out, 127.5, out=out)
+    np.subtract(out, 1.0, out=out)
+    return out
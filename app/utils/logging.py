@@ -3,17 +3,29 @@
 import logging
 import sys
 from app.config import settings
+from app.utils.async_logging import JsonFormatter, RequestContextFilter, enable_async_logging
 
 def setup_logging():
     """Configura logging estruturado."""
+    handler = logging.StreamHandler(sys.stdout)
+    if settings.LOG_JSON:
+        handler.setFormatter(JsonFormatter())
+        handler.addFilter(RequestContextFilter())
+    else:
+        handler.setFormatter(logging.Formatter(settings.LOG_FORMAT))
+    
     logging.basicConfig(
         level=getattr(logging, settings.LOG_LEVEL),
-        format=settings.LOG_FORMAT,
-        handlers=[
-            logging.StreamHandler(sys.stdout)
-        ]
+        handlers=[handler]
     )
     
+    # Escrita numa thread dedicada, fora do caminho da requisição
+    if settings.LOG_ASYNC:
+        enable_async_logging(
+            queue_size=settings.LOG_QUEUE_SIZE,
+            sample_rate=settings.LOG_SAMPLE_RATE
+        )
+    
     # Silenciar logs verbosos do TensorFlow
     logging.getLogger('tensorflow').setLevel(logging.ERROR)
     
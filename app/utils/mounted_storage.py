@@ -0,0 +1,46 @@
+# ==================== app/utils/mounted_storage.py ====================
+"""Acesso a imagens em volume montado (compartilhado com o gateway PACS)"""
+from pathlib import Path
+
+def resolve_mounted_path(root: str, path: str) -> Path:
+    """
+    Resolve `path` (relativo ou absoluto) dentro de `root`.
+    Links simbólicos são resolvidos antes da verificação.
+
+    Raises:
+        PermissionError: Se o caminho final estiver fora de `root`
+        ValueError: Se o caminho for inválido (ex.: byte nulo)
+    """
+    if "\0" in path:
+        raise ValueError(f"Caminho inválido: {path!r}")
+
+    root_path = Path(root).resolve()
+    resolved = (root_path / path).resolve()
+
+    if not resolved.is_relative_to(root_path):
+        raise PermissionError(f"Caminho fora do diretório permitido: {path}")
+
+    return resolved
+
+def read_mounted(path: Path, max_size: int) -> bytes:
+    """
+    Lê o arquivo do volume, até max_size bytes.
+
+    Leitura comum, sem mmap: o gateway pode truncar ou reescrever o
+    arquivo durante a predição, e acessar um mapeamento de arquivo
+    truncado derruba o processo com SIGBUS. Aqui o pior caso é uma
+    imagem incompleta, recusada pela validação.
+
+    Raises:
+        FileNotFoundError: Se o arquivo não existir
+        ValueError: Se o arquivo estiver vazio ou exceder max_size
+    """
+    with open(path, "rb") as f:
+        data = f.read(max_size + 1)
+    if not data:
+        raise ValueError("Arquivo vazio")
+    if len(data) > max_size:
+        raise ValueError(
+            f"Imagem muito grande. Tamanho máximo: {max_size / (1024 * 1024):.0f}MB"
+        )
+    return data
@@ -0,0 +1,358 @@
+# ==================== app/utils/tracing.py ====================
+"""
+Rastreamento por requisição.
+
+Cada requisição abre um trace (id compatível com W3C/OpenTelemetry) com
+spans aninhados para as etapas: leitura, validação, estágios do pipeline
+(com o lote de inferência de que a imagem participou) e serialização da
+resposta. As durações vão para o header `Server-Timing` e, opcionalmente,
+para um arquivo no formato OTLP/JSON (uma exportação por linha).
+
+Independente de framework: usado pelo middleware do FastAPI (app.main) e
+pelo LogMiddleware do Django.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from app.utils.async_logging import add_timing
+
+logger = logging.getLogger(__name__)
+
+# Tipos de span do OpenTelemetry
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+
+# Códigos de status do OpenTelemetry
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+_HEX32 = re.compile(r"^[0-9a-f]{32}$")
+
+_trace: contextvars.ContextVar = contextvars.ContextVar("trace", default=None)
+_span_id: contextvars.ContextVar = contextvars.ContextVar("span_id", default=None)
+
+
+def new_span_id() -> str:
+    return os.urandom(8).hex()
+
+
+class Span:
+    """Intervalo de tempo nomeado dentro de um trace (tempos em ns de época)."""
+
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+        "kind", "attributes", "links", "status",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str] = None,
+        start_ns: Optional[int] = None,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[dict] = None,
+        span_id: Optional[str] = None
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = span_id or new_span_id()
+        self.parent_id = parent_id
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns = None
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.links = []
+        self.status = STATUS_UNSET
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+
+class Trace:
+    """Spans de uma requisição. Estágios do pipeline adicionam spans de outras threads."""
+
+    def __init__(self, trace_id: str, request_id: Optional[str] = None):
+        self.trace_id = trace_id
+        self.request_id = request_id
+        self.root: Optional[Span] = None
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def record(
+        self,
+        name: str,
+        start_ns: int,
+        end_ns: int,
+        parent_id: Optional[str] = None,
+        attributes: Optional[dict] = None,
+        links: Optional[list] = None,
+        error: bool = False
+    ) -> Span:
+        """Registra um span já medido (ex.: por uma thread do pipeline)."""
+        span = Span(name, self.trace_id, parent_id or self.root.span_id, start_ns, attributes=attributes)
+        span.end_ns = end_ns
+        span.links = links or []
+        if error:
+            span.status = STATUS_ERROR
+        self.add(span)
+        return span
+
+    def stage_durations_ms(self) -> Dict[str, float]:
+        """Duração somada por nome de span (sem a raiz), na ordem de início."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start_ns)
+        durations = {}
+        seen = set()
+        for span in spans:
+            # Imagens da mesma requisição no mesmo lote têm o mesmo intervalo
+            key = (span.name, span.start_ns, span.end_ns)
+            if span is self.root or span.end_ns is None or key in seen:
+                continue
+            seen.add(key)
+            durations[span.name] = durations.get(span.name, 0.0) + span.duration_ms
+        return durations
+
+
+# ==================== contexto ====================
+
+def parse_traceparent(header: Optional[str]) -> Optional[tuple]:
+    """(trace_id, span_id pai) de um header W3C `traceparent`, ou None."""
+    if not header:
+        return None
+    match = _TRACEPARENT.match(header.strip().lower())
+    if not match or set(match.group(1)) == {"0"}:
+        return None
+    return match.group(1), match.group(2)
+
+
+def start_trace(
+    name: str,
+    request_id: Optional[str] = None,
+    traceparent: Optional[str] = None,
+    attributes: Optional[dict] = None
+) -> tuple:
+    """
+    Abre o trace da requisição e seu span raiz (SERVER).
+
+    Continua o trace do cliente se `traceparent` for válido; senão usa o
+    request_id como trace id quando ele já tem o formato (32 hex).
+
+    Returns:
+        Tokens para finish_trace
+    """
+    parent = parse_traceparent(traceparent)
+    if parent is not None:
+        trace_id, parent_id = parent
+    else:
+        trace_id = request_id if request_id and _HEX32.match(request_id) else os.urandom(16).hex()
+        parent_id = None
+
+    trace = Trace(trace_id, request_id)
+    attributes = dict(attributes or {})
+    if request_id:
+        attributes["request.id"] = request_id
+    trace.root = Span(name, trace_id, parent_id, kind=SPAN_KIND_SERVER, attributes=attributes)
+    trace.add(trace.root)
+
+    return trace, _trace.set(trace), _span_id.set(trace.root.span_id)
+
+
+def finish_trace(tokens: tuple, status_code: Optional[int] = None) -> Trace:
+    """Fecha o span raiz, restaura o contexto e envia o trace ao exportador."""
+    trace, trace_token, span_token = tokens
+    _trace.reset(trace_token)
+    _span_id.reset(span_token)
+
+    trace.root.end_ns = time.time_ns()
+    if status_code is not None:
+        trace.root.attributes["http.status_code"] = status_code
+        if status_code >= 500:
+            trace.root.status = STATUS_ERROR
+
+    exporter = _exporter
+    if exporter is not None:
+        exporter.export(trace)
+    return trace
+
+
+def current_context() -> tuple:
+    """(trace, span_id atual) para levar o contexto a outra thread."""
+    return _trace.get(), _span_id.get()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Span filho do span atual. Fora de uma requisição rastreada, só mede o
+    tempo para os logs (etapas_ms).
+    """
+    trace = _trace.get()
+    start = time.perf_counter()
+    if trace is None:
+        try:
+            yield None
+        finally:
+            add_timing(name, time.perf_counter() - start)
+        return
+
+    current = Span(name, trace.trace_id, _span_id.get(), attributes=attributes)
+    token = _span_id.set(current.span_id)
+    try:
+        yield current
+    except BaseException:
+        current.status = STATUS_ERROR
+        raise
+    finally:
+        _span_id.reset(token)
+        current.end_ns = time.time_ns()
+        trace.add(current)
+        add_timing(name, time.perf_counter() - start)
+
+
+def server_timing(trace: Trace) -> str:
+    """Valor do header Server-Timing: cada etapa e o total, em ms."""
+    parts = [f"{name};dur={ms:.2f}" for name, ms in trace.stage_durations_ms().items()]
+    parts.append(f"total;dur={trace.root.duration_ms:.2f}")
+    return ", ".join(parts)
+
+
+# ==================== exportação (OTLP/JSON) ====================
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict) -> list:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+def to_otlp(trace: Trace, service_name: str) -> dict:
+    """Trace no formato ExportTraceServiceRequest do OTLP/JSON."""
+    with trace._lock:
+        spans = list(trace.spans)
+
+    otlp_spans = []
+    for s in spans:
+        item = {
+            "traceId": s.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": s.kind,
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns or s.start_ns),
+            "attributes": _otlp_attributes(s.attributes),
+            "status": {"code": s.status},
+        }
+        if s.parent_id:
+            item["parentSpanId"] = s.parent_id
+        if s.links:
+            item["links"] = [
+                {"traceId": trace_id, "spanId": span_id} for trace_id, span_id in s.links
+            ]
+        otlp_spans.append(item)
+
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": service_name})},
+            "scopeSpans": [{
+                "scope": {"name": "pulmovision.tracing"},
+                "spans": otlp_spans,
+            }],
+        }]
+    }
+
+
+class FileSpanExporter:
+    """
+    Exporta traces para um arquivo JSON Lines (OTLP/JSON) numa thread
+    própria, fora do caminho da requisição. Com a fila cheia, o trace é
+    descartado e contado.
+    """
+
+    def __init__(self, path: str, service_name: str = "pulmovision", queue_size: int = 2048):
+        self.path = path
+        self.service_name = service_name
+        self.exported = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, trace: Trace):
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                trace = self._queue.get()
+                if trace is None:
+                    return
+                try:
+                    f.write(json.dumps(to_otlp(trace, self.service_name), ensure_ascii=False) + "\n")
+                    if self._queue.empty():
+                        f.flush()
+                    self.exported += 1
+                except Exception as e:
+                    logger.warning("Falha ao exportar trace: %s", e)
+
+    def shutdown(self):
+        """Grava o que está na fila e encerra a thread."""
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def metrics(self) -> dict:
+        return {
+            "arquivo": self.path,
+            "exportados": self.exported,
+            "descartados": self.dropped,
+            "fila": self._queue.qsize(),
+        }
+
+
+_exporter: Optional[FileSpanExporter] = None
+
+
+def configure_exporter(path: Optional[str], service_name: str = "pulmovision") -> Optional[FileSpanExporter]:
+    """Ativa a exportação para `path` (None desativa). Idempotente para o mesmo arquivo."""
+    global _exporter
+
+    if _exporter is not None and path == _exporter.path:
+        return _exporter
+    if _exporter is not None:
+        _exporter.shutdown()
+        _exporter = None
+    if path:
+        _exporter = FileSpanExporter(path, service_name)
+        atexit.register(_exporter.shutdown)
+        logger.info("Traces exportados para %s", path)
+    return _exporter
+
+
+def get_exporter() -> Optional[FileSpanExporter]:
+    return _exporter
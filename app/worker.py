@@ -0,0 +1,348 @@
+"""
+PulmoVision Worker - Frota de Inferência
+Consome a fila do broker (BROKER_URL/BROKER_QUEUE) em batches, executa o
+Predictor (normalização, cascata, modelo e embeddings) e devolve as
+probabilidades no canal de resposta de cada requisição.
+
+Cada mensagem diz qual normalização aplicar (a da API FastAPI ou a
+preprocess_input da API Django) e, opcionalmente, qual modelo espera;
+o worker com outro modelo (MODEL_PATH e cascata) responde com erro em vez
+de devolver probabilidades de um modelo diferente do da API.
+
+Escala separado das APIs: as APIs com INFERENCE_MODE=remote só recebem
+os uploads, decodificam e enfileiram.
+
+Uso:
+    BROKER_URL=redis://localhost:6379/0 python -m app.worker
+    BROKER_URL=redis://localhost:6379/0 python -m app.worker --threads 2 --batch-size 64
+"""
+
+import argparse
+import logging
+import signal
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.core.broker import Broker, decode_message, encode_message
+from app.core.remote import NORMALIZE_EFFICIENTNET, NORMALIZE_MINUS1_1
+
+logger = logging.getLogger("app.worker")
+
+
+def _efficientnet_preprocess(batch: np.ndarray) -> np.ndarray:
+    from tensorflow.keras.applications.efficientnet import preprocess_input
+    return preprocess_input(batch.astype(np.float32))
+
+
+def model_id() -> str:
+    """
+    Identidade do modelo deste worker: hash dos pesos de MODEL_PATH e,
+    com a cascata, do modelo de triagem e do limiar (a cascata muda o
+    resultado).
+    """
+    from app.core.model_cache import model_fingerprint
+
+    parts = [model_fingerprint(settings.MODEL_PATH)]
+    if settings.CASCADE_ENABLED:
+        parts += ["cascata", model_fingerprint(settings.SCREENING_MODEL_PATH), str(settings.CASCADE_THRESHOLD)]
+    return ":".join(parts)
+
+
+class InferenceWorker:
+    """
+    Consumidor da fila de inferência.
+
+    Args:
+        broker: Broker compartilhado com as APIs
+        predictor: Predictor local (com modelo) que executa os batches
+        queue_name: Fila de trabalho
+        batch_size: Mensagens retiradas da fila por batch
+        poll_timeout: Espera máxima por mensagens antes de verificar o
+            sinal de parada (segundos)
+        threads: Threads consumindo a fila (batches em paralelo)
+        model: Identidade do modelo (model_id()); requisições que esperam
+            outro modelo são recusadas. None aceita qualquer requisição
+    """
+
+    def __init__(
+        self,
+        broker: Broker,
+        predictor,
+        queue_name: str,
+        batch_size: int = 32,
+        poll_timeout: float = 1.0,
+        threads: int = 1,
+        model: Optional[str] = None
+    ):
+        self.broker = broker
+        self.predictor = predictor
+        self.queue_name = queue_name
+        self.batch_size = batch_size
+        self.poll_timeout = poll_timeout
+        self.threads = threads
+        self.model = model
+        self.normalizers = {
+            NORMALIZE_MINUS1_1: predictor._normalize,
+            NORMALIZE_EFFICIENTNET: _efficientnet_preprocess,
+        }
+
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._images = 0
+        self._expired = 0
+        self._invalid = 0
+        self._rejected = 0
+        self._errors = 0
+        self._busy_seconds = 0.0
+
+    def _count(self, counter: str, n=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + n)
+
+    def _reply(self, header: dict, reply: dict, payload: bytes = b""):
+        reply["id"] = header["id"]
+        # A resposta só interessa até o prazo da requisição
+        ttl = max(1.0, header["prazo"] - time.time()) if header.get("prazo") else settings.REMOTE_TIMEOUT
+        try:
+            self.broker.reply(header["responder_em"], encode_message(reply, payload), ttl)
+        except Exception as e:
+            logger.error("Falha ao responder %s: %s", header["id"], e)
+
+    def _rejection(self, header: dict) -> Optional[str]:
+        """Motivo para recusar a requisição (None se o worker pode atendê-la)."""
+        normalization = header.get("normalizacao", NORMALIZE_MINUS1_1)
+        if normalization not in self.normalizers:
+            return f"normalização não suportada pelo worker: {normalization}"
+        if header.get("modelo") is not None and header["modelo"] != self.model:
+            return f"modelo {header['modelo']} diferente do modelo do worker ({self.model})"
+        return None
+
+    def run_once(self) -> int:
+        """
+        Processa um batch da fila.
+
+        Returns:
+            int: Imagens processadas (0 se a fila estava vazia)
+        """
+        messages = self.broker.pop(self.queue_name, self.batch_size, self.poll_timeout)
+        if not messages:
+            return 0
+
+        now = time.time()
+        groups = {}
+        for message in messages:
+            try:
+                header, payload = decode_message(message)
+                images = np.frombuffer(payload, dtype=np.uint8).reshape(header["forma"])
+            except Exception as e:
+                logger.warning("Mensagem inválida descartada: %s", e)
+                self._count("_invalid")
+                continue
+            if header.get("prazo") is not None and now >= header["prazo"]:
+                # Quem enviou já desistiu de esperar
+                self._count("_expired")
+                continue
+            rejection = self._rejection(header)
+            if rejection is not None:
+                logger.warning("Requisição %s recusada: %s", header["id"], rejection)
+                self._count("_rejected")
+                self._reply(header, {"erro": rejection})
+                continue
+            normalization = header.get("normalizacao", NORMALIZE_MINUS1_1)
+            groups.setdefault(normalization, []).append((header, images))
+
+        # Um batch do modelo por normalização
+        return sum(self._process(normalization, requests) for normalization, requests in groups.items())
+
+    def _process(self, normalization: str, requests: list) -> int:
+        start = time.perf_counter()
+        try:
+            batch = np.concatenate([images for _, images in requests])
+            predictions, _, embeddings = self.predictor._infer_staged(self.normalizers[normalization](batch))
+            predictions = np.asarray(predictions, dtype=np.float32)
+            if embeddings is not None:
+                embeddings = np.asarray(embeddings, dtype=np.float32)
+        except Exception as e:
+            logger.error("Erro na inferência do batch: %s", e, exc_info=True)
+            self._count("_errors", len(requests))
+            for header, _ in requests:
+                self._reply(header, {"erro": str(e)})
+            return 0
+        finally:
+            self._count("_busy_seconds", time.perf_counter() - start)
+
+        offset = 0
+        for header, images in requests:
+            end = offset + len(images)
+            reply = {
+                "classes": list(self.predictor.classes),
+                "forma": list(predictions[offset:end].shape),
+            }
+            payload = predictions[offset:end].tobytes()
+            if embeddings is not None:
+                reply["forma_embeddings"] = list(embeddings[offset:end].shape)
+                payload += embeddings[offset:end].tobytes()
+            self._reply(header, reply, payload)
+            offset = end
+
+        self._count("_batches")
+        self._count("_images", len(batch))
+        return len(batch)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                # Broker indisponível: tentar de novo sem girar em falso
+                logger.error("Erro ao consumir a fila %s: %s", self.queue_name, e)
+                self._stop.wait(self.poll_timeout)
+
+    def start(self):
+        """Inicia as threads consumidoras."""
+        self._stop.clear()
+        for i in range(self.threads):
+            thread = threading.Thread(target=self._run, name=f"worker-inferencia-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(
+            "Worker de inferência consumindo %s (%d threads, batch %d)",
+            self.queue_name, self.threads, self.batch_size
+        )
+
+    def stop(self, timeout: Optional[float] = None):
+        """Para após o batch em andamento de cada thread."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout if timeout is not None else self.poll_timeout + 30)
+        self._threads = []
+
+    def wait(self):
+        """Bloqueia até stop() (ex.: chamado pelo handler de SIGTERM)."""
+        while not self._stop.wait(1.0):
+            pass
+
+    def metrics(self) -> dict:
+        """Batches, imagens, mensagens descartadas e tamanho médio dos batches."""
+        with self._lock:
+            return {
+                "fila": self.queue_name,
+                "modelo": self.model,
+                "threads": self.threads,
+                "batches": self._batches,
+                "imagens": self._images,
+                "batch_medio": round(self._images / self._batches, 2) if self._batches else 0.0,
+                "expiradas": self._expired,
+                "invalidas": self._invalid,
+                "recusadas": self._rejected,
+                "erros": self._errors,
+                "tempo_ocupado_s": round(self._busy_seconds, 3),
+            }
+
+
+def _local_predictor():
+    """Predictor com o modelo deste processo (o cache de resultados fica nas APIs)."""
+    from app.core.predictor import Predictor
+
+    predictor = Predictor()
+    predictor.result_cache = None
+    predictor._load_model()
+    return predictor
+
+
+# Worker no mesmo processo da API (BROKER_URL=memory://, desenvolvimento e testes)
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def start_inference_worker() -> InferenceWorker:
+    """Inicia (uma vez) um worker em threads consumindo o broker global."""
+    global _worker
+
+    from app.core.broker import get_broker
+
+    with _worker_lock:
+        if _worker is None:
+            worker = InferenceWorker(
+                get_broker(),
+                _local_predictor(),
+                settings.BROKER_QUEUE,
+                batch_size=settings.WORKER_BATCH_SIZE,
+                poll_timeout=settings.WORKER_POLL_TIMEOUT,
+                model=model_id()
+            )
+            worker.start()
+            _worker = worker
+
+    return _worker
+
+
+def get_inference_worker() -> Optional[InferenceWorker]:
+    """Worker do processo, se iniciado por start_inference_worker()."""
+    return _worker
+
+
+def stop_inference_worker():
+    """Encerra o worker do processo, se iniciado."""
+    global _worker
+
+    with _worker_lock:
+        if _worker is not None:
+            _worker.stop()
+            _worker = None
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.worker", description="PulmoVision - worker de inferência")
+    parser.add_argument("--threads", type=int, default=1, help="threads consumindo a fila")
+    parser.add_argument("--batch-size", type=int, default=settings.WORKER_BATCH_SIZE)
+    parser.add_argument("--queue", default=settings.BROKER_QUEUE)
+    return parser
+
+
+def main(argv=None):
+    from app.core.autotune import configure_threads
+
+    # Threads do TensorFlow precisam ser definidas antes de o runtime iniciar
+    configure_threads()
+
+    from app.core.broker import get_broker, shutdown_broker
+    from app.core.model_loader import warm_up_model
+    from app.utils.logging import setup_logging
+
+    setup_logging()
+    args = build_parser().parse_args(argv)
+
+    if settings.BROKER_URL.startswith("memory://"):
+        raise SystemExit("O worker separado requer um broker compartilhado: BROKER_URL=redis://...")
+
+    predictor = _local_predictor()
+    warm_up_model()
+
+    worker = InferenceWorker(
+        get_broker(),
+        predictor,
+        args.queue,
+        batch_size=args.batch_size,
+        poll_timeout=settings.WORKER_POLL_TIMEOUT,
+        threads=args.threads,
+        model=model_id()
+    )
+    signal.signal(signal.SIGTERM, lambda *_: worker._stop.set())
+    signal.signal(signal.SIGINT, lambda *_: worker._stop.set())
+    worker.start()
+    worker.wait()
+
+    logger.info("Encerrando worker de inferência: %s", worker.metrics())
+    worker.stop()
+    shutdown_broker()
+
+
+if __name__ == "__main__":
+    main()
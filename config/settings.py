@@ -27,6 +27,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'api.middlewares.seguranca.SegurancaMiddleware',
     'api.middlewares.logs.LogMiddleware',
+    'api.middlewares.reciclagem.ReciclagemMiddleware',
+    'api.middlewares.admissao.AdmissaoMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -78,7 +80,85 @@ MAX_IMAGE_SIZE_MB = int(os.getenv('MAX_IMAGE_SIZE_MB', '10'))
 ALLOWED_IMAGE_FORMATS = os.getenv('ALLOWED_IMAGE_FORMATS', 'jpg,jpeg,png').split(',')
 RATE_LIMIT_PER_MINUTE = int(os.getenv('RATE_LIMIT_PER_MINUTE', '30'))
 
+# Carregar o modelo no ready() do app (False: carrega na primeira predição;
+# útil para comandos de gerenciamento e workers que não fazem inferência)
+PRELOAD_MODELO = os.getenv('PRELOAD_MODELO', 'True') == 'True'
+
+# Carregamento rápido do modelo (pesos convertidos e lidos do cache). Só reduz
+# o tempo de carregamento; cada processo mantém sua cópia dos pesos
+MODELO_CARREGAMENTO_RAPIDO = os.getenv('MODELO_CARREGAMENTO_RAPIDO', 'False') == 'True'
+MODELO_CACHE_DIR = os.path.join(BASE_DIR, 'data', 'model_cache')
+
+# Controle de admissão, desligado por padrão (limites com valor 0 ficam desativados)
+ADMISSAO_ATIVA = os.getenv('ADMISSAO_ATIVA', 'False') == 'True'
+RATE_LIMIT_BURST = int(os.getenv('RATE_LIMIT_BURST', '5'))
+MAX_REQUISICOES_CONCORRENTES = int(os.getenv('MAX_REQUISICOES_CONCORRENTES', '4'))
+LIMITE_RSS_MB = int(os.getenv('LIMITE_RSS_MB', '0'))
+ADMISSAO_CAMINHOS = ['/predicao']
+# X-API-Key com limite próprio (separadas por vírgula); as demais contam pelo IP
+ADMISSAO_CHAVES_API = [c for c in os.getenv('ADMISSAO_CHAVES_API', '').split(',') if c]
+# IPs/CIDRs cujo X-Forwarded-For vale (ex.: o roteador); dos demais, vale REMOTE_ADDR
+ADMISSAO_PROXIES_CONFIAVEIS = [p for p in os.getenv('ADMISSAO_PROXIES_CONFIAVEIS', '').split(',') if p]
+
+# Reciclagem do worker: drena e encerra com SIGTERM para o gunicorn subir
+# outro (0 = desativado)
+RECICLAGEM_MAX_REQUISICOES = int(os.getenv('RECICLAGEM_MAX_REQUISICOES', '0'))
+RECICLAGEM_MAX_RSS_MB = int(os.getenv('RECICLAGEM_MAX_RSS_MB', '0'))
+RECICLAGEM_TIMEOUT_DRENAGEM = float(os.getenv('RECICLAGEM_TIMEOUT_DRENAGEM', '30'))
+
+# Tracing por requisição (header Server-Timing) e exportação OTLP/JSON opcional;
+# desligado por padrão
+TRACING_ATIVO = os.getenv('TRACING_ATIVO', 'False') == 'True'
+TRACING_ARQUIVO = os.getenv('TRACING_ARQUIVO') or None
+
+# Auditoria das predições (segmentos SQLite diários gravados em lotes por
+# uma thread; AUDITORIA_FILA_CHEIA: descartar ou rejeitar com 503); desligada
+# por padrão
+AUDITORIA_ATIVA = os.getenv('AUDITORIA_ATIVA', 'False') == 'True'
+AUDITORIA_DIR = os.getenv('AUDITORIA_DIR', os.path.join(BASE_DIR, 'data', 'auditoria'))
+AUDITORIA_TAMANHO_FILA = int(os.getenv('AUDITORIA_TAMANHO_FILA', '10000'))
+AUDITORIA_TAMANHO_LOTE = int(os.getenv('AUDITORIA_TAMANHO_LOTE', '256'))
+AUDITORIA_INTERVALO_GRAVACAO = float(os.getenv('AUDITORIA_INTERVALO_GRAVACAO', '1.0'))
+AUDITORIA_SYNCHRONOUS = os.getenv('AUDITORIA_SYNCHRONOUS', 'NORMAL')
+AUDITORIA_FILA_CHEIA = os.getenv('AUDITORIA_FILA_CHEIA', 'descartar')
+
+# Cache de resultados compartilhado pelos workers do nó (hash da imagem +
+# versão do modelo); em tmpfs (ex.: /dev/shm/...) fica todo em memória.
+# Desligado por padrão
+CACHE_RESULTADOS_ATIVO = os.getenv('CACHE_RESULTADOS_ATIVO', 'False') == 'True'
+CACHE_RESULTADOS_CAMINHO = os.getenv(
+    'CACHE_RESULTADOS_CAMINHO', os.path.join(BASE_DIR, 'data', 'cache_resultados.sqlite3')
+)
+CACHE_RESULTADOS_MAX_ENTRADAS = int(os.getenv('CACHE_RESULTADOS_MAX_ENTRADAS', '100000'))
+CACHE_RESULTADOS_INTERVALO_ACESSO = float(os.getenv('CACHE_RESULTADOS_INTERVALO_ACESSO', '60'))
+
+# Inferência remota: as imagens (uint8) vão para a fila do broker e a frota
+# de workers (python -m app.worker) devolve as probabilidades; o modelo não
+# é carregado aqui. BROKER_URL memory:// sobe um worker em threads no processo.
+# Os workers aplicam o preprocess_input do EfficientNet (o mesmo desta API) e
+# só atendem se o modelo deles (MODEL_PATH, sem cascata) for o desta API:
+# INFERENCIA_REMOTA_MODELO é a identidade esperada (python -c "from app.worker
+# import model_id; print(model_id())" no worker); vazio, usa o hash do
+# modelo.keras mais recente de MODELOS_DIR. Sem identidade, a inferência é local
+INFERENCIA_REMOTA = os.getenv('INFERENCIA_REMOTA', 'False') == 'True'
+INFERENCIA_REMOTA_MODELO = os.getenv('INFERENCIA_REMOTA_MODELO') or None
+BROKER_URL = os.getenv('BROKER_URL', 'memory://')
+BROKER_FILA = os.getenv('BROKER_FILA', 'pulmovision:inferencia')
+INFERENCIA_REMOTA_TIMEOUT = float(os.getenv('INFERENCIA_REMOTA_TIMEOUT', '30'))
+
+# Token das rotas de administração (admin/perfil/*, admin/auditoria); sem token, as rotas respondem 404
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN') or None
+
 # Logging
+# LOG_JSON: uma linha JSON por registro (com request_id e tempos por etapa)
+# LOG_ASSINCRONO: escrita em arquivo/console numa thread dedicada, com a
+# fração LOG_AMOSTRAGEM dos logs de sucesso (avisos e erros sempre ficam)
+LOG_JSON = os.getenv('LOG_JSON', 'False') == 'True'
+LOG_ASSINCRONO = os.getenv('LOG_ASSINCRONO', 'False') == 'True'
+LOG_AMOSTRAGEM = float(os.getenv('LOG_AMOSTRAGEM', '1.0'))
+if LOG_ASSINCRONO:
+    LOGGING_CONFIG = 'app.utils.async_logging.dict_config_async'
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -87,6 +167,14 @@ LOGGING = {
             'format': '{levelname} {asctime} {module} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'app.utils.async_logging.JsonFormatter',
+        },
+    },
+    'filters': {
+        'requisicao': {
+            '()': 'app.utils.async_logging.RequestContextFilter',
+        },
     },
     'handlers': {
         'file': {
@@ -95,16 +183,22 @@ LOGGING = {
             'filename': BASE_DIR / 'logs' / 'api.log',
             'maxBytes': 1024 * 1024 * 10,  # 10MB
             'backupCount': 5,
-            'formatter': 'verbose',
+            'formatter': 'json' if LOG_JSON else 'verbose',
+            'filters': ['requisicao'],
         },
         'console': {
             'level': 'INFO',
             'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+            'formatter': 'json' if LOG_JSON else 'verbose',
+            'filters': ['requisicao'],
         },
     },
     'root': {
         'handlers': ['console', 'file'],
         'level': 'INFO',
     },
+    'assincrono': {
+        'tamanho_fila': 10000,
+        'amostragem': LOG_AMOSTRAGEM,
+    },
 }
\ No newline at end of file
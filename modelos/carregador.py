@@ -1,7 +1,6 @@
 import os
 import json
 from pathlib import Path
-import tensorflow as tf
 from django.conf import settings
 import logging
 from datetime import datetime
@@ -92,7 +91,13 @@ class CarregadorModelo:
             
             # 3. Carregar modelo TensorFlow (.keras)
             logger.info(f"📥 Carregando modelo: {arquivos['modelo']}")
-            cls._modelo = tf.keras.models.load_model(str(arquivos['modelo']))
+            if getattr(settings, 'MODELO_CARREGAMENTO_RAPIDO', False):
+                # Pesos mapeados do artefato em cache (criado no primeiro carregamento)
+                from app.core.model_cache import load_model_fast
+                cls._modelo = load_model_fast(arquivos['modelo'], settings.MODELO_CACHE_DIR)
+            else:
+                import tensorflow as tf
+                cls._modelo = tf.keras.models.load_model(str(arquivos['modelo']))
             
             # 4. Carregar configuração (config.json do treinamento)
             logger.info(f"📥 Carregando configuração: {arquivos['config']}")
@@ -128,6 +133,13 @@ class CarregadorModelo:
             cls.carregar_modelo()
         return cls._modelo
     
+    @classmethod
+    def obter_diretorio(cls):
+        """Retorna o diretório do modelo carregado (None se não carregado)"""
+        if not cls._carregado:
+            cls.carregar_modelo()
+        return cls._diretorio_modelo
+    
     @classmethod
     def obter_informacoes(cls):
         """
@@ -0,0 +1,683 @@
+# ==================== scripts/benchmark.py ====================
+"""Benchmarks de desempenho da API PulmoVision
+
+Uso:
+    python scripts/benchmark.py preprocess --images 400 --threads 16 --workers 16
+    python scripts/benchmark.py preprocess --dir caminho/para/radiografias
+    python scripts/benchmark.py startup --model app/models/modelo_pulmonares.keras
+    python scripts/benchmark.py startup --django
+    python scripts/benchmark.py logging --requests 4000 --threads 8 --slow-sink-ms 0.2
+    python scripts/benchmark.py soak --predictions 200000 --max-slope-mb 0.5
+    python scripts/benchmark.py soak --target django --duration 3600
+"""
+import argparse
+import ctypes
+import ctypes.util
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import psutil
+from PIL import Image
+
+# Permite executar a partir da raiz do repositório
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def load_images(args) -> list:
+    """Carrega imagens de um diretório ou gera radiografias sintéticas."""
+    if args.dir:
+        paths = sorted(
+            p for p in Path(args.dir).iterdir()
+            if p.suffix.lower() in (".jpg", ".jpeg", ".png")
+        )
+        return [p.read_bytes() for p in paths[:args.images]]
+
+    rng = np.random.default_rng(0)
+    images = []
+    for _ in range(min(args.images, 16)):
+        # Gradiente + ruído: comprime como uma radiografia real, não como ruído puro
+        base = np.linspace(40, 200, args.size, dtype=np.float32)[None, :]
+        noise = rng.normal(0, 25, (args.size, args.size)).astype(np.float32)
+        pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+
+        buffer = io.BytesIO()
+        Image.fromarray(pixels, mode="L").save(buffer, format=args.format)
+        images.append(buffer.getvalue())
+
+    # Repetir as imagens geradas até atingir o total pedido
+    return [images[i % len(images)] for i in range(args.images)]
+
+
+def cpu_seconds(process: psutil.Process) -> float:
+    """Tempo de CPU (user + system) do processo e de todos os filhos."""
+    total = 0.0
+    for proc in [process] + process.children(recursive=True):
+        try:
+            times = proc.cpu_times()
+            total += times.user + times.system
+        except psutil.NoSuchProcess:
+            pass
+    return total
+
+
+def measure(name: str, fn, images: list, threads: int) -> dict:
+    """Executa fn em cada imagem com N threads e mede throughput e CPU."""
+    process = psutil.Process()
+
+    # Aquecimento (inicia processos do pool, caches do PIL, etc.)
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(fn, images[:threads]))
+
+    cpu_start = cpu_seconds(process)
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(fn, images))
+
+    wall = time.perf_counter() - start
+    cpu = cpu_seconds(process) - cpu_start
+    cores = psutil.cpu_count() or 1
+
+    return {
+        "modo": name,
+        "imagens": len(images),
+        "tempo_s": wall,
+        "imagens_por_s": len(images) / wall,
+        "cpu_percent": 100.0 * cpu / (wall * cores),
+    }
+
+
+def bench_preprocess(args):
+    """Compara Predictor._preprocess (thread) com o PreprocessPool."""
+    from app.core.predictor import Predictor
+    from app.core.preprocess_pool import PreprocessPool
+    from app.config import settings
+
+    images = load_images(args)
+    workers = args.workers or os.cpu_count()
+    print(
+        f"{len(images)} imagens, {args.threads} threads, "
+        f"{workers} processos, {psutil.cpu_count()} núcleos\n"
+    )
+
+    predictor = Predictor()
+    results = [
+        measure("thread (_preprocess)", predictor._preprocess, images, args.threads)
+    ]
+
+    pool = PreprocessPool(
+        workers=workers,
+        slots=args.threads * 2,
+        image_size=settings.IMAGE_SIZE
+    )
+
+    def via_pool(image_data):
+        with pool.preprocess(image_data) as tensor:
+            return float(tensor[0, 0, 0, 0])
+
+    try:
+        results.append(measure("processos (shared memory)", via_pool, images, args.threads))
+    finally:
+        pool.shutdown()
+
+    print(f"{'modo':<28}{'img/s':>10}{'tempo (s)':>12}{'CPU %':>10}")
+    for r in results:
+        print(
+            f"{r['modo']:<28}{r['imagens_por_s']:>10.1f}"
+            f"{r['tempo_s']:>12.2f}{r['cpu_percent']:>10.1f}"
+        )
+
+
+# ==================== startup ====================
+
+STARTUP_MODES = {
+    "load_model": "tf.keras.models.load_model (get_model atual)",
+    "rapido-frio": "load_model_fast, conversão do artefato",
+    "rapido": "load_model_fast, artefato em cache (mmap)",
+    "django": "CarregadorModelo.carregar_modelo",
+    "django-rapido": "CarregadorModelo com MODELO_CARREGAMENTO_RAPIDO",
+}
+
+
+def _memory_mb(process: psutil.Process) -> tuple:
+    """(RSS, PSS) em MB; PSS divide as páginas compartilhadas entre processos."""
+    info = process.memory_full_info()
+    pss = getattr(info, "pss", None)
+    return info.rss / (1024 * 1024), pss / (1024 * 1024) if pss is not None else None
+
+
+def startup_child(args):
+    """Executado num processo novo: mede import, carga e primeira predição."""
+    process = psutil.Process()
+    start = time.perf_counter()
+    import tensorflow as tf
+    import_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if args.mode == "load_model":
+        model = tf.keras.models.load_model(args.model, compile=False)
+    elif args.mode in ("rapido-frio", "rapido"):
+        from app.core.model_cache import load_model_fast
+        model = load_model_fast(args.model, args.cache_dir)
+    else:
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+        import django
+        from django.conf import settings as django_settings
+        django.setup()
+        django_settings.MODELO_CARREGAMENTO_RAPIDO = args.mode == "django-rapido"
+        django_settings.MODELO_CACHE_DIR = args.cache_dir
+
+        from modelos.carregador import CarregadorModelo
+        CarregadorModelo.carregar_modelo()
+        model = CarregadorModelo.obter_modelo()
+        if model is None:
+            raise SystemExit("CarregadorModelo não carregou nenhum modelo")
+    load_s = time.perf_counter() - start
+    rss, pss = _memory_mb(process)
+
+    size = model.input_shape[1]
+    batch = np.zeros((1, size, size, 3), dtype=np.float32)
+    start = time.perf_counter()
+    model.predict(batch, verbose=0)
+    first_s = time.perf_counter() - start
+
+    print(json.dumps({
+        "modo": args.mode,
+        "import_tf_s": import_s,
+        "carga_s": load_s,
+        "primeira_predicao_s": first_s,
+        "rss_mb": rss,
+        "pss_mb": pss,
+    }))
+
+
+def _run_child(mode: str, model: str, cache_dir: str) -> dict:
+    command = [
+        sys.executable, os.path.abspath(__file__), "_startup-child",
+        "--mode", mode, "--model", model, "--cache-dir", cache_dir,
+    ]
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL="3")
+    output = subprocess.run(
+        command, capture_output=True, text=True, env=env, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def bench_startup(args):
+    """
+    Inicialização a frio: cada medição roda num processo novo para que
+    nada (runtime do TensorFlow, arquivos já abertos) seja reaproveitado.
+    """
+    modes = ["load_model", "rapido-frio", "rapido"]
+    model = args.model
+    if args.django:
+        from modelos.carregador import CarregadorModelo  # noqa: F401 (valida o import)
+        base = Path(__file__).resolve().parent.parent / "modelos" / "saved_models"
+        recent = max((d for d in base.iterdir() if d.is_dir()), key=lambda d: d.stat().st_mtime)
+        model = str(recent / "modelo.keras")
+        modes += ["django", "django-rapido"]
+
+    if not model or not Path(model).exists():
+        raise SystemExit(f"Modelo não encontrado: {model}")
+
+    cache_dir = tempfile.mkdtemp(prefix="pulmovision-model-cache-")
+    print(f"Modelo: {model} ({Path(model).stat().st_size / (1024 * 1024):.1f} MB)")
+    print(f"{args.repeat} execuções por modo, {psutil.cpu_count()} núcleos\n")
+
+    results = {mode: [] for mode in modes}
+    try:
+        for _ in range(args.repeat):
+            for mode in modes:
+                if mode == "rapido-frio":
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+                results[mode].append(_run_child(mode, model, cache_dir))
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"{'modo':<16}{'import TF (s)':>15}{'carga (s)':>12}{'1ª pred (s)':>13}{'RSS (MB)':>11}{'PSS (MB)':>11}")
+    for mode in modes:
+        runs = results[mode]
+
+        def median(key):
+            values = [r[key] for r in runs if r[key] is not None]
+            return float(np.median(values)) if values else float("nan")
+
+        print(
+            f"{mode:<16}{median('import_tf_s'):>15.2f}{median('carga_s'):>12.2f}"
+            f"{median('primeira_predicao_s'):>13.2f}{median('rss_mb'):>11.1f}{median('pss_mb'):>11.1f}"
+        )
+    print()
+    for mode in modes:
+        print(f"  {mode:<16}{STARTUP_MODES[mode]}")
+
+
+# ==================== logging ====================
+
+class SlowStream(io.StringIO):
+    """Stream que demora `delay` segundos por escrita (pipe de stdout cheio)."""
+
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+
+    def write(self, text):
+        if self.delay:
+            time.sleep(self.delay)
+        return len(text)
+
+
+def _configure_logging(mode: str, directory: str, args):
+    """Reconfigura o root como em produção: console + arquivo rotativo."""
+    import logging
+    import logging.handlers
+    from app.utils.async_logging import (
+        JsonFormatter, RequestContextFilter, enable_async_logging, stop_async_logging
+    )
+
+    stop_async_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.setLevel(logging.INFO)
+
+    handlers = [
+        logging.StreamHandler(SlowStream(args.slow_sink_ms / 1000)),
+        logging.handlers.RotatingFileHandler(
+            os.path.join(directory, f"{mode}.log"), maxBytes=1024 * 1024, backupCount=2
+        ),
+    ]
+    for handler in handlers:
+        if "json" in mode:
+            handler.setFormatter(JsonFormatter())
+            handler.addFilter(RequestContextFilter())
+        else:
+            handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+        root.addHandler(handler)
+
+    if mode.startswith("assincrono"):
+        rate = args.sample_rate if "amostragem" in mode else 1.0
+        enable_async_logging(queue_size=args.queue_size, sample_rate=rate)
+
+
+def bench_logging(args):
+    """
+    Latência de requisições simuladas com o logging de cada modo.
+
+    Cada requisição espera `--work-ms` (a inferência, que libera o GIL) e registra as mesmas linhas
+    do caminho de /predict (início, conclusão e resposta com tempos por
+    etapa). O console é um stream lento (`--slow-sink-ms` por escrita) e há
+    um arquivo rotativo, como no LOGGING do Django.
+    """
+    import logging
+    from app.utils.async_logging import (
+        add_timing, begin_request, end_request, new_request_id,
+        request_timings_ms, stop_async_logging
+    )
+
+    logger = logging.getLogger("benchmark.requisicao")
+    modes = ["sincrono-texto", "sincrono-json", "assincrono-json", "assincrono-json-amostragem"]
+
+    def request(i):
+        start = time.perf_counter()
+        context = begin_request(new_request_id())
+        try:
+            logger.info("Nova requisição de predição: %s", f"img{i}.png")
+            time.sleep(args.work_ms / 1000)  # inferência (fora do GIL)
+            add_timing("inferencia", args.work_ms / 1000)
+            logger.info("Predição concluída: %s (confiança: %.2f%%)", "normal", 97.5)
+            logger.info(
+                "Resposta: %s %s [%d] - %.3fs", "POST", "/predict", 200, time.perf_counter() - start,
+                extra={"status": 200, "etapas_ms": request_timings_ms()}
+            )
+        finally:
+            end_request(context)
+        return time.perf_counter() - start
+
+    print(
+        f"{args.requests} requisições, {args.threads} threads, trabalho {args.work_ms} ms, "
+        f"console lento {args.slow_sink_ms} ms/escrita, amostragem {args.sample_rate}\n"
+    )
+    print(f"{'modo':<28}{'req/s':>9}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}{'drenagem (s)':>14}")
+
+    directory = tempfile.mkdtemp(prefix="pulmovision-logging-")
+    try:
+        for mode in modes:
+            _configure_logging(mode, directory, args)
+            with ThreadPoolExecutor(max_workers=args.threads) as executor:
+                list(executor.map(request, range(args.threads)))  # aquecimento
+
+                start = time.perf_counter()
+                latencies = np.array(list(executor.map(request, range(args.requests)))) * 1000
+                wall = time.perf_counter() - start
+
+            # Tempo até a thread de escrita esvaziar a fila (fora da latência)
+            start = time.perf_counter()
+            stop_async_logging()
+            drain = time.perf_counter() - start
+
+            print(
+                f"{mode:<28}{args.requests / wall:>9.0f}"
+                f"{np.percentile(latencies, 50):>10.2f}{np.percentile(latencies, 95):>10.2f}"
+                f"{np.percentile(latencies, 99):>10.2f}{drain:>14.2f}"
+            )
+    finally:
+        _configure_logging("sincrono-texto", directory, argparse.Namespace(slow_sink_ms=0))
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+# ==================== soak ====================
+
+SOAK_TARGETS = {
+    "predictor": "Predictor.predict (FastAPI)",
+    "django": "ProcessadorImagem.processar + ServicoPredicao.predizer (Django)",
+}
+
+
+def soak_images(count: int, seed: int = 0) -> list:
+    """
+    Mistura variada de radiografias sintéticas: tamanhos, proporções,
+    modos de cor e formatos diferentes, para exercitar os caminhos de
+    decodificação e conversão do PIL.
+    """
+    rng = np.random.default_rng(seed)
+    sizes = [(256, 256), (512, 512), (1024, 1024), (2048, 2048), (1536, 2048), (2048, 1200), (300, 700)]
+    modes = ["L", "RGB", "RGBA", "P"]
+    images = []
+    for i in range(count):
+        width, height = sizes[i % len(sizes)]
+        mode = modes[(i // len(sizes)) % len(modes)]
+        image_format = "PNG" if mode in ("RGBA", "P") or i % 3 == 0 else "JPEG"
+
+        base = np.linspace(40, 200, width, dtype=np.float32)[None, :]
+        noise = rng.normal(0, 25, (height, width)).astype(np.float32)
+        image = Image.fromarray(np.clip(base + noise, 0, 255).astype(np.uint8), mode="L")
+        if mode == "P":
+            image = image.convert("P", palette=Image.ADAPTIVE)
+        else:
+            image = image.convert(mode)
+
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format)
+        images.append(buffer.getvalue())
+    return images
+
+
+class _MallInfo2(ctypes.Structure):
+    _fields_ = [(name, ctypes.c_size_t) for name in (
+        "arena", "ordblks", "smblks", "hblks", "hblkhd",
+        "usmblks", "fsmblks", "uordblks", "fordblks", "keepcost",
+    )]
+
+
+def _native_heap() -> tuple:
+    """
+    (em uso, livre) do malloc da glibc em MB, ou (None, None).
+
+    Memória "livre" que cresce sem voltar ao sistema é fragmentação: o
+    RSS sobe sem que nada esteja de fato alocado.
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+        mallinfo2 = libc.mallinfo2
+    except (OSError, AttributeError):
+        return None, None
+    mallinfo2.restype = _MallInfo2
+    info = mallinfo2()
+    mb = 1024 * 1024
+    return (info.uordblks + info.hblkhd) / mb, info.fordblks / mb
+
+
+def _tf_allocator_mb():
+    """Bytes em uso no alocador do TensorFlow (só dispositivos que expõem a estatística)."""
+    import tensorflow as tf
+    for device in ("GPU:0", "CPU:0"):
+        try:
+            return tf.config.experimental.get_memory_info(device)["current"] / (1024 * 1024)
+        except (ValueError, RuntimeError):
+            continue
+    return None
+
+
+def soak_child(args):
+    """Executado num processo novo: predições em loop, uma amostra JSON por linha."""
+    process = psutil.Process()
+    images = soak_images(args.images, args.seed)
+    rng = np.random.default_rng(args.seed)
+
+    if args.target == "predictor":
+        if args.model:
+            os.environ["MODEL_PATH"] = args.model
+        from app.core.predictor import Predictor
+        predictor = Predictor()
+        # As imagens se repetem: medir o modelo, não o cache de resultados
+        predictor.result_cache = None
+
+        def predict(image_data):
+            predictor.predict(image_data)
+    else:
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+        import django
+        django.setup()
+        from api.servicos.predictor import ServicoPredicao
+        from api.servicos.processador_imagem import ProcessadorImagem
+        from modelos.carregador import CarregadorModelo
+
+        if args.model:
+            from app.core.model_cache import load_model_fast
+            from django.conf import settings as django_settings
+            CarregadorModelo._modelo = load_model_fast(args.model, django_settings.MODELO_CACHE_DIR)
+            CarregadorModelo._carregado = True
+        else:
+            CarregadorModelo.carregar_modelo()
+
+        def predict(image_data):
+            ServicoPredicao.predizer(ProcessadorImagem.processar(io.BytesIO(image_data)))
+
+    def sample(done: int, elapsed: float):
+        in_use, free = _native_heap()
+        print(json.dumps({
+            "n": done,
+            "t": elapsed,
+            "rss_mb": process.memory_info().rss / (1024 * 1024),
+            "heap_blocos": sys.getallocatedblocks(),
+            "nativo_mb": in_use,
+            "nativo_livre_mb": free,
+            "tf_mb": _tf_allocator_mb(),
+        }), flush=True)
+
+    start = time.perf_counter()
+    done = 0
+    while done < args.predictions:
+        if args.duration and time.perf_counter() - start >= args.duration:
+            break
+        predict(images[rng.integers(len(images))])
+        done += 1
+        if done % args.sample_every == 0:
+            sample(done, time.perf_counter() - start)
+    if done % args.sample_every:
+        sample(done, time.perf_counter() - start)
+
+
+def _slope_per_1k(samples: list, key: str):
+    """Inclinação (unidades por 1000 predições) da reta ajustada por mínimos quadrados."""
+    points = [(s["n"], s[key]) for s in samples if s.get(key) is not None]
+    if len(points) < 3:
+        return None
+    n, values = np.array(points, dtype=np.float64).T
+    return float(np.polyfit(n / 1000, values, 1)[0])
+
+
+def bench_soak(args):
+    """
+    Teste de resistência: centenas de milhares de predições num processo
+    novo por alvo, amostrando RSS, heap Python (blocos alocados), malloc
+    da glibc e alocador do TensorFlow. Ajusta a reta de crescimento
+    depois do aquecimento e falha (código 1) se o RSS crescer mais que
+    `--max-slope-mb` por 1000 predições.
+    """
+    targets = list(SOAK_TARGETS) if args.target == "ambos" else [args.target]
+    print(
+        f"{args.predictions} predições por alvo"
+        + (f" (no máximo {args.duration:.0f}s)" if args.duration else "")
+        + f", amostra a cada {args.sample_every}, {args.images} imagens variadas, "
+        f"limite {args.max_slope_mb} MB/1000 predições\n"
+    )
+
+    failed = False
+    results = []
+    for target in targets:
+        command = [
+            sys.executable, os.path.abspath(__file__), "_soak-child",
+            "--target", target, "--predictions", str(args.predictions),
+            "--duration", str(args.duration), "--sample-every", str(args.sample_every),
+            "--images", str(args.images), "--seed", str(args.seed),
+        ]
+        if args.model:
+            command += ["--model", args.model]
+        env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL="3")
+
+        samples = []
+        with subprocess.Popen(
+            command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=env
+        ) as child:
+            for line in child.stdout:
+                try:
+                    samples.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+                last = samples[-1]
+                print(
+                    f"\r  {target}: {last['n']} predições, {last['n'] / last['t']:.1f}/s, "
+                    f"RSS {last['rss_mb']:.0f} MB",
+                    end="", flush=True
+                )
+        print()
+        if child.returncode != 0 or not samples:
+            raise SystemExit(f"Soak de {target} terminou com código {child.returncode}")
+
+        if args.samples_out:
+            with open(f"{args.samples_out}.{target}.jsonl", "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(s) + "\n" for s in samples)
+
+        # Descartar o aquecimento (grafo do tf.function, caches do PIL, arenas do malloc)
+        steady = [s for s in samples if s["n"] > args.warmup] or samples
+        rss_slope = _slope_per_1k(steady, "rss_mb")
+        passed = rss_slope is None or rss_slope <= args.max_slope_mb
+        failed |= not passed
+        results.append((target, samples, steady, rss_slope, passed))
+
+    print(
+        f"\n{'alvo':<11}{'pred':>9}{'pred/s':>8}{'RSS ini':>9}{'RSS fim':>9}"
+        f"{'RSS/1k':>9}{'heap/1k':>10}{'malloc/1k':>11}{'livre/1k':>10}{'TF/1k':>8}  resultado"
+    )
+    for target, samples, steady, rss_slope, passed in results:
+        def slope(key, unit="{:+.3f}"):
+            value = _slope_per_1k(steady, key)
+            return unit.format(value) if value is not None else "-"
+
+        last = samples[-1]
+        print(
+            f"{target:<11}{last['n']:>9}{last['n'] / last['t']:>8.1f}"
+            f"{steady[0]['rss_mb']:>9.0f}{last['rss_mb']:>9.0f}"
+            f"{slope('rss_mb'):>9}{slope('heap_blocos', '{:+.0f}'):>10}"
+            f"{slope('nativo_mb'):>11}{slope('nativo_livre_mb'):>10}{slope('tf_mb'):>8}"
+            f"  {'ok' if passed else 'FALHOU'}"
+        )
+    print("\n  RSS, malloc, livre e TF em MB por 1000 predições; heap em blocos Python por 1000 predições")
+    for target in targets:
+        print(f"  {target:<11}{SOAK_TARGETS[target]}")
+
+    if failed:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks PulmoVision")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    preprocess = subparsers.add_parser(
+        "preprocess", help="Preprocessamento em thread vs pool de processos"
+    )
+    preprocess.add_argument("--images", type=int, default=400, help="Total de imagens")
+    preprocess.add_argument("--dir", help="Diretório com radiografias reais")
+    preprocess.add_argument("--size", type=int, default=2048, help="Lado das imagens sintéticas")
+    preprocess.add_argument("--format", default="JPEG", help="Formato das imagens sintéticas")
+    preprocess.add_argument("--threads", type=int, default=16, help="Requisições concorrentes")
+    preprocess.add_argument("--workers", type=int, default=0, help="Processos do pool (0 = núcleos)")
+    preprocess.set_defaults(func=bench_preprocess)
+
+    startup = subparsers.add_parser(
+        "startup", help="Tempo de inicialização e RSS: load_model vs cache mapeado"
+    )
+    startup.add_argument("--model", default=None, help="Arquivo .keras (padrão: MODEL_PATH)")
+    startup.add_argument("--django", action="store_true", help="Incluir o CarregadorModelo do Django")
+    startup.add_argument("--repeat", type=int, default=3, help="Execuções por modo (mediana)")
+    startup.set_defaults(func=bench_startup)
+
+    logging_parser = subparsers.add_parser(
+        "logging", help="Latência de requisição: logging síncrono vs fila assíncrona"
+    )
+    logging_parser.add_argument("--requests", type=int, default=4000, help="Total de requisições")
+    logging_parser.add_argument("--threads", type=int, default=8, help="Requisições concorrentes")
+    logging_parser.add_argument("--work-ms", type=float, default=1.0, help="Trabalho por requisição")
+    logging_parser.add_argument(
+        "--slow-sink-ms", type=float, default=0.2, help="Atraso por escrita no console"
+    )
+    logging_parser.add_argument("--sample-rate", type=float, default=0.1, help="Fração dos logs de sucesso")
+    logging_parser.add_argument("--queue-size", type=int, default=10000, help="Tamanho da fila")
+    logging_parser.set_defaults(func=bench_logging)
+
+    soak = subparsers.add_parser(
+        "soak", help="Teste de resistência: crescimento de memória em predições repetidas"
+    )
+    soak.add_argument(
+        "--target", choices=list(SOAK_TARGETS) + ["ambos"], default="ambos", help="Caminho de predição"
+    )
+    soak.add_argument("--predictions", type=int, default=200000, help="Predições por alvo")
+    soak.add_argument("--duration", type=float, default=0, help="Limite em segundos por alvo (0 = sem)")
+    soak.add_argument("--sample-every", type=int, default=500, help="Predições entre amostras")
+    soak.add_argument("--warmup", type=int, default=2000, help="Predições ignoradas no ajuste")
+    soak.add_argument("--images", type=int, default=56, help="Imagens distintas na mistura")
+    soak.add_argument("--seed", type=int, default=0, help="Semente da mistura e da ordem")
+    soak.add_argument("--model", default=None, help="Arquivo .keras (padrão: o de cada alvo)")
+    soak.add_argument(
+        "--max-slope-mb", type=float, default=0.5, help="Crescimento máximo do RSS por 1000 predições"
+    )
+    soak.add_argument("--samples-out", default=None, help="Prefixo dos arquivos com as amostras")
+    soak.set_defaults(func=bench_soak)
+
+    soak_worker = subparsers.add_parser("_soak-child")
+    soak_worker.add_argument("--target", choices=list(SOAK_TARGETS), required=True)
+    soak_worker.add_argument("--predictions", type=int, required=True)
+    soak_worker.add_argument("--duration", type=float, default=0)
+    soak_worker.add_argument("--sample-every", type=int, required=True)
+    soak_worker.add_argument("--images", type=int, required=True)
+    soak_worker.add_argument("--seed", type=int, default=0)
+    soak_worker.add_argument("--model", default=None)
+    soak_worker.set_defaults(func=soak_child)
+
+    child = subparsers.add_parser("_startup-child")
+    child.add_argument("--mode", choices=list(STARTUP_MODES), required=True)
+    child.add_argument("--model", required=True)
+    child.add_argument("--cache-dir", required=True)
+    child.set_defaults(func=startup_child)
+
+    args = parser.parse_args()
+    if args.comando == "startup" and not args.django and args.model is None:
+        from app.config import settings
+        args.model = settings.MODEL_PATH
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# ==================== scripts/trace_collector.py ====================
+"""Coletor local de traces (substituto do OpenTelemetry Collector para testes)
+
+Lê o arquivo OTLP/JSON gravado pelo exportador (TRACING_EXPORT_PATH no
+FastAPI, TRACING_ARQUIVO no Django), valida a estrutura e mostra cada
+trace como árvore de spans, com lote e links das etapas em micro-batch.
+No fim, resume a duração por etapa.
+
+Uso:
+    python scripts/trace_collector.py data/traces.jsonl
+    python scripts/trace_collector.py data/traces.jsonl --follow
+    python scripts/trace_collector.py data/traces.jsonl --summary
+"""
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+REQUIRED_SPAN_FIELDS = ("traceId", "spanId", "name", "startTimeUnixNano", "endTimeUnixNano")
+
+
+def _attribute_value(value: dict):
+    for kind in ("stringValue", "intValue", "doubleValue", "boolValue"):
+        if kind in value:
+            return int(value[kind]) if kind == "intValue" else value[kind]
+    return None
+
+
+def parse_export(line: str) -> list:
+    """Spans de uma linha OTLP/JSON. ValueError se a estrutura for inválida."""
+    data = json.loads(line)
+    spans = []
+    for resource_spans in data["resourceSpans"]:
+        for scope_spans in resource_spans["scopeSpans"]:
+            for span in scope_spans["spans"]:
+                missing = [field for field in REQUIRED_SPAN_FIELDS if field not in span]
+                if missing:
+                    raise ValueError(f"span sem {', '.join(missing)}")
+                if len(span["traceId"]) != 32 or len(span["spanId"]) != 16:
+                    raise ValueError(f"ids inválidos em {span['name']}")
+                spans.append(span)
+    return spans
+
+
+def _duration_ms(span: dict) -> float:
+    return (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6
+
+
+def print_trace(spans: list):
+    """Árvore de spans de um trace, ordenada pelo início."""
+    ids = {span["spanId"] for span in spans}
+    children = defaultdict(list)
+    roots = []
+    for span in sorted(spans, key=lambda s: int(s["startTimeUnixNano"])):
+        parent = span.get("parentSpanId")
+        if parent in ids:
+            children[parent].append(span)
+        else:
+            roots.append(span)
+
+    origin = min(int(s["startTimeUnixNano"]) for s in spans)
+
+    def show(span, depth):
+        attributes = {a["key"]: _attribute_value(a["value"]) for a in span.get("attributes", [])}
+        offset = (int(span["startTimeUnixNano"]) - origin) / 1e6
+        extra = []
+        if "lote.id" in attributes:
+            extra.append(f"lote {attributes['lote.id']} ({attributes.get('lote.tamanho')} imagens)")
+        if "fila_ms" in attributes:
+            extra.append(f"fila {attributes['fila_ms']:.1f} ms")
+        if span.get("links"):
+            extra.append(f"{len(span['links'])} links")
+        if span.get("status", {}).get("code") == 2:
+            extra.append("ERRO")
+        print(
+            f"  {'  ' * depth}{span['name']:<{32 - 2 * depth}}"
+            f"{_duration_ms(span):>9.2f} ms  +{offset:.2f}"
+            + (f"  [{', '.join(extra)}]" if extra else "")
+        )
+        for child in children[span["spanId"]]:
+            show(child, depth + 1)
+
+    print(f"trace {spans[0]['traceId']}")
+    for root in roots:
+        show(root, 0)
+    print()
+
+
+def print_summary(durations: dict):
+    print(f"{'etapa':<20}{'spans':>8}{'p50 (ms)':>11}{'p95 (ms)':>11}{'máx (ms)':>11}")
+    for name, values in sorted(durations.items(), key=lambda item: -np.median(item[1])):
+        values = np.array(values)
+        print(
+            f"{name:<20}{len(values):>8}{np.percentile(values, 50):>11.2f}"
+            f"{np.percentile(values, 95):>11.2f}{values.max():>11.2f}"
+        )
+
+
+def follow(f):
+    """Linhas novas do arquivo, como `tail -f`."""
+    while True:
+        line = f.readline()
+        if line:
+            yield line
+        else:
+            time.sleep(0.2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coletor local de traces OTLP/JSON")
+    parser.add_argument("path", help="Arquivo gravado pelo exportador")
+    parser.add_argument("--follow", action="store_true", help="Continuar lendo novas linhas")
+    parser.add_argument("--summary", action="store_true", help="Mostrar só o resumo por etapa")
+    args = parser.parse_args()
+
+    durations = defaultdict(list)
+    traces = invalid = 0
+
+    with open(args.path, encoding="utf-8") as f:
+        lines = follow(f) if args.follow else f
+        try:
+            for number, line in enumerate(lines, 1):
+                if not line.strip():
+                    continue
+                try:
+                    spans = parse_export(line)
+                except (ValueError, KeyError, TypeError) as e:
+                    invalid += 1
+                    print(f"linha {number} inválida: {e}", file=sys.stderr)
+                    continue
+
+                traces += 1
+                for span in spans:
+                    # Span SERVER = requisição inteira
+                    name = "total" if span.get("kind") == 2 else span["name"]
+                    durations[name].append(_duration_ms(span))
+                if not args.summary:
+                    print_trace(spans)
+        except KeyboardInterrupt:
+            pass
+
+    print(f"{traces} traces, {invalid} linhas inválidas\n")
+    if durations:
+        print_summary(durations)
+    sys.exit(1 if invalid else 0)
+
+
+if __name__ == "__main__":
+    main()
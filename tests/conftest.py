@@ -0,0 +1,31 @@
+"""Fixtures compartilhadas dos testes"""
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+
+def png_bytes(size: int = 64, seed: int = 0) -> bytes:
+    """Imagem RGB aleatória (reprodutível pela semente) codificada em PNG."""
+    pixels = np.random.default_rng(seed).integers(0, 256, (size, size, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def png():
+    return png_bytes()
+
+
+@pytest.fixture(scope="session")
+def django_setup():
+    """Configura o Django (config.settings) sem pré-carregar o modelo."""
+    import os
+
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    os.environ.setdefault("PRELOAD_MODELO", "False")
+    django.setup()
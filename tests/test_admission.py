@@ -0,0 +1,190 @@
+"""Controle de admissão: token bucket, teto de concorrência e middleware"""
+import asyncio
+import json
+
+import pytest
+
+from app.api import middleware
+from app.api.middleware import AdmissionMiddleware
+from app.core import admission
+from app.core.admission import (
+    CONCORRENCIA,
+    LIMITE_TAXA,
+    AdmissionController,
+    AdmissionRejected,
+    TokenBucket,
+    client_key,
+    parse_networks,
+    peer_address,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(admission.time, "monotonic", clock)
+    return clock
+
+
+def test_token_bucket_burst_then_refill(clock):
+    bucket = TokenBucket(rate=2.0, capacity=3)
+
+    assert [bucket.take() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.take() == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert bucket.take() == 0.0
+    # Reposição limitada à capacidade
+    clock.now += 60
+    assert [bucket.take() for _ in range(4)][-1] == pytest.approx(0.5)
+
+
+def test_rate_limit_is_per_client(clock):
+    controller = AdmissionController(rate_per_minute=60, burst=1)
+
+    controller.acquire("a")
+    controller.acquire("b")
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire("a")
+
+    assert rejected.value.status_code == 429
+    assert rejected.value.retry_after == pytest.approx(1.0)
+    clock.now += 1
+    controller.acquire("a")
+    assert controller.metrics()["rejeitadas"][LIMITE_TAXA] == 1
+
+
+def test_concurrency_ceiling_and_release():
+    controller = AdmissionController(max_concurrent=2)
+
+    controller.acquire("a")
+    controller.acquire("a")
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire("b")
+    assert rejected.value.status_code == 503
+
+    controller.release()
+    controller.acquire("b")
+
+    metrics = controller.metrics()
+    assert metrics["em_andamento"] == 2
+    assert metrics["rejeitadas"][CONCORRENCIA] == 1
+
+
+def test_client_key_ignores_unknown_api_keys():
+    assert client_key("segredo", "10.0.0.1", {"segredo"}) == "chave:segredo"
+    assert client_key("qualquer", "10.0.0.1", {"segredo"}) == "10.0.0.1"
+    assert client_key(None, None, ()) == "anonimo"
+
+
+def test_peer_address_trusts_forwarded_for_only_from_proxies():
+    proxies = parse_networks(["10.0.0.0/8"])
+
+    assert peer_address("10.0.0.5", "1.2.3.4, 10.0.0.9", proxies) == "1.2.3.4"
+    # Endereço forjado pelo cliente antes do proxy não vale
+    assert peer_address("10.0.0.5", "6.6.6.6, 1.2.3.4", proxies) == "1.2.3.4"
+    assert peer_address("5.5.5.5", "1.2.3.4", proxies) == "5.5.5.5"
+    assert peer_address("10.0.0.5", None, proxies) == "10.0.0.5"
+
+
+def _scope(path="/predict"):
+    return {
+        "type": "http",
+        "method": "POST",
+        "path": path,
+        "headers": [(b"x-api-key", b"rotativa")],
+        "client": ("1.2.3.4", 5000),
+    }
+
+
+async def _call(app, scope):
+    sent = []
+
+    async def receive():
+        # Cliente desconecta antes de enviar o corpo
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent
+
+
+def test_middleware_releases_slot_on_disconnect(monkeypatch):
+    controller = AdmissionController(max_concurrent=1)
+    monkeypatch.setattr(middleware, "get_admission_controller", lambda: controller)
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(controller.metrics()["em_andamento"])
+        assert (await receive())["type"] == "http.disconnect"
+
+    wrapped = AdmissionMiddleware(app, paths=["/predict"])
+    asyncio.run(_call(wrapped, _scope()))
+    asyncio.run(_call(wrapped, _scope()))
+
+    assert seen == [1, 1]
+    assert controller.metrics()["em_andamento"] == 0
+
+
+def test_middleware_releases_slot_when_app_fails(monkeypatch):
+    controller = AdmissionController(max_concurrent=1)
+    monkeypatch.setattr(middleware, "get_admission_controller", lambda: controller)
+
+    async def app(scope, receive, send):
+        raise RuntimeError("falhou")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(_call(AdmissionMiddleware(app, paths=["/predict"]), _scope()))
+
+    assert controller.metrics()["em_andamento"] == 0
+
+
+def test_middleware_rejects_while_slot_is_held(monkeypatch):
+    controller = AdmissionController(max_concurrent=1)
+    monkeypatch.setattr(middleware, "get_admission_controller", lambda: controller)
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def app(scope, receive, send):
+            await release.wait()
+
+        wrapped = AdmissionMiddleware(app, paths=["/predict"])
+        first = asyncio.create_task(_call(wrapped, _scope()))
+        await asyncio.sleep(0)
+        rejected = await _call(wrapped, _scope())
+        release.set()
+        await first
+        return rejected
+
+    rejected = asyncio.run(scenario())
+
+    assert rejected[0]["status"] == 503
+    assert dict(rejected[0]["headers"])[b"retry-after"] == b"1"
+    assert json.loads(rejected[1]["body"])["error"]["type"] == CONCORRENCIA
+    assert controller.metrics()["em_andamento"] == 0
+
+
+def test_middleware_ignores_other_paths(monkeypatch):
+    controller = AdmissionController(max_concurrent=1)
+    controller.acquire("ocupado")
+    monkeypatch.setattr(middleware, "get_admission_controller", lambda: controller)
+    calls = []
+
+    async def app(scope, receive, send):
+        calls.append(scope["path"])
+
+    asyncio.run(_call(AdmissionMiddleware(app, paths=["/predict"]), _scope("/health")))
+
+    assert calls == ["/health"]
+    assert controller.metrics()["em_andamento"] == 1
@@ -0,0 +1,143 @@
+"""Leitura sequencial (sem seek) de arquivos ZIP e TAR"""
+import io
+import tarfile
+import threading
+import zipfile
+
+import pytest
+
+from app.utils.archive import StreamBuffer, iter_archive_stream
+
+IMAGES = {"a.png": b"\x89PNG" + bytes(range(256)) * 40, "sub/b.jpg": b"\xff\xd8" + b"b" * 5000}
+ALLOWED = ["png", "jpg"]
+
+
+class Unseekable:
+    """Arquivo só de leitura/escrita sequencial (como o corpo de uma requisição)."""
+
+    def __init__(self, data: bytes = b""):
+        self._buffer = io.BytesIO(data)
+        self.data = bytearray()
+
+    def read(self, n=-1):
+        return self._buffer.read(n)
+
+    def write(self, data):
+        self.data += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+def _zip(compression=zipfile.ZIP_DEFLATED, seekable=True, force_zip64=False, entries=IMAGES):
+    target = io.BytesIO() if seekable else Unseekable()
+    with zipfile.ZipFile(target, "w", compression) as archive:
+        archive.writestr("leia.txt", b"ignorado")
+        archive.writestr("pasta/", b"")
+        for name, data in entries.items():
+            with archive.open(name, "w", force_zip64=force_zip64) as entry:
+                entry.write(data)
+    return target.getvalue() if seekable else bytes(target.data)
+
+
+def _read(data: bytes, kind="zip", max_entry_size=1024 * 1024):
+    return list(iter_archive_stream(Unseekable(data), kind, ALLOWED, max_entry_size))
+
+
+def _flags(data: bytes) -> int:
+    return int.from_bytes(data[6:8], "little")
+
+
+@pytest.mark.parametrize("compression", [zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED])
+def test_zip_entries(compression):
+    assert _read(_zip(compression)) == [(name, data, None) for name, data in IMAGES.items()]
+
+
+def test_zip_with_data_descriptor():
+    data = _zip(seekable=False)
+    # Escrito sem seek: tamanhos e CRC vão no data descriptor, depois dos dados
+    assert _flags(data) & 0x8
+
+    assert _read(data) == [(name, data, None) for name, data in IMAGES.items()]
+
+
+@pytest.mark.parametrize("seekable", [True, False])
+def test_zip64_entries(seekable):
+    data = _zip(seekable=seekable, force_zip64=True)
+
+    assert _read(data) == [(name, data, None) for name, data in IMAGES.items()]
+
+
+def test_zip_entry_over_limit_is_reported_and_parsing_continues():
+    entries = {"grande.png": b"\0" * 100_000, "pequena.png": b"ok"}
+
+    results = _read(_zip(seekable=False, entries=entries), max_entry_size=1000)
+
+    assert results[0][0] == "grande.png"
+    assert results[0][1] is None and "muito grande" in results[0][2]
+    assert results[1] == ("pequena.png", b"ok", None)
+
+
+def test_zip_crc_mismatch_is_reported():
+    data = bytearray(_zip(zipfile.ZIP_STORED, entries={"a.png": b"abcdef"}))
+    offset = data.index(b"abcdef")
+    data[offset] = ord("X")
+
+    assert _read(bytes(data)) == [("a.png", None, "Entrada corrompida (CRC inválido)")]
+
+
+def test_zip_rejects_non_zip_content():
+    with pytest.raises(ValueError):
+        _read(b"isto nao e um zip")
+
+
+@pytest.mark.parametrize("mode", ["w", "w:gz"])
+def test_tar_entries(mode):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=mode) as archive:
+        for name, data in {**IMAGES, "._a.png": b"metadados"}.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+
+    assert _read(buffer.getvalue(), "tar") == [(name, data, None) for name, data in IMAGES.items()]
+
+
+def test_stream_buffer_feeds_reader_from_another_thread():
+    data = _zip(seekable=False, force_zip64=True)
+    consumed = []
+    buffer = StreamBuffer(max_chunks=2, on_consumed=lambda: consumed.append(1))
+
+    def produce():
+        for i in range(0, len(data), 100):
+            buffer.feed(data[i:i + 100])
+        buffer.feed(None)
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    results = list(iter_archive_stream(buffer, "zip", ALLOWED, 1024 * 1024))
+    producer.join(timeout=5)
+
+    assert results == [(name, data, None) for name, data in IMAGES.items()]
+    assert not producer.is_alive()
+    assert len(consumed) == -(-len(data) // 100)
+
+
+def test_stream_buffer_close_releases_blocked_reader():
+    buffer = StreamBuffer()
+    errors = []
+
+    def read():
+        try:
+            buffer.read(10)
+        except EOFError as e:
+            errors.append(e)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    buffer.close()
+    reader.join(timeout=5)
+
+    assert not reader.is_alive()
+    assert len(errors) == 1
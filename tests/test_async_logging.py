@@ -0,0 +1,164 @@
+"""Logging assíncrono: formatação JSON, amostragem e fila limitada"""
+import json
+import logging
+
+import pytest
+
+from app.utils import async_logging
+from app.utils.async_logging import (
+    AsyncQueueHandler,
+    JsonFormatter,
+    RequestContextFilter,
+    SamplingFilter,
+    begin_request,
+    end_request,
+)
+
+
+def _record(level=logging.INFO, msg="mensagem %s", args=("x",), **extra):
+    record = logging.makeLogRecord({
+        "name": "teste", "levelno": level, "levelname": logging.getLevelName(level),
+        "msg": msg, "args": args,
+    })
+    record.__dict__.update(extra)
+    return record
+
+
+@pytest.fixture
+def request_context():
+    tokens = begin_request("req-1")
+    yield
+    end_request(tokens)
+
+
+def test_json_formatter_fields_and_extras():
+    line = JsonFormatter().format(_record(request_id="req-1", imagens=3, caminho=object))
+
+    data = json.loads(line)
+    assert data["nivel"] == "INFO"
+    assert data["logger"] == "teste"
+    assert data["mensagem"] == "mensagem x"
+    assert data["request_id"] == "req-1"
+    assert data["imagens"] == 3
+    assert isinstance(data["caminho"], str)
+    assert data["ts"].endswith("+00:00")
+    assert "\n" not in line
+
+
+def test_json_formatter_includes_exception_and_omits_empty_request_id():
+    try:
+        raise RuntimeError("falhou")
+    except RuntimeError:
+        import sys
+        record = _record(level=logging.ERROR, exc_info=sys.exc_info(), request_id=None)
+
+    data = json.loads(JsonFormatter().format(record))
+
+    assert "request_id" not in data
+    assert "RuntimeError: falhou" in data["excecao"]
+
+
+def test_request_context_filter_copies_current_id(request_context):
+    record = _record()
+
+    assert RequestContextFilter().filter(record)
+    assert record.request_id == "req-1"
+
+
+def test_sampling_keeps_warnings_and_logs_outside_requests():
+    sampler = SamplingFilter(0.0)
+
+    assert not sampler.filter(_record(request_id="req-1"))
+    assert sampler.filter(_record(level=logging.WARNING, request_id="req-1"))
+    assert sampler.filter(_record(level=logging.ERROR, request_id="req-1"))
+    assert sampler.filter(_record())
+
+
+def test_sampling_decision_is_per_request():
+    sampler = SamplingFilter(0.3)
+    request_ids = [f"req-{n}" for n in range(2000)]
+
+    kept = [rid for rid in request_ids if sampler.filter(_record(request_id=rid))]
+
+    # Todos os logs de uma requisição amostrada aparecem
+    assert all(sampler.filter(_record(level=logging.DEBUG, request_id=rid)) for rid in kept)
+    assert 0.25 < len(kept) / len(request_ids) < 0.35
+    assert SamplingFilter(1.0).filter(_record(request_id="req-1"))
+    assert SamplingFilter(5.0).rate == 1.0
+
+
+def test_sampling_uses_context_when_record_has_no_id(request_context):
+    assert not SamplingFilter(0.0).filter(_record())
+
+
+def test_full_queue_drops_info_and_waits_for_warnings():
+    handler = AsyncQueueHandler(queue_size=1, error_timeout=0.01)
+
+    handler.emit(_record())
+    handler.emit(_record())
+    handler.emit(_record(level=logging.WARNING))
+
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 2
+
+
+def test_prepare_resolves_message_and_traceback():
+    try:
+        raise ValueError("ruim")
+    except ValueError:
+        import sys
+        record = _record(level=logging.ERROR, exc_info=sys.exc_info())
+
+    prepared = AsyncQueueHandler().prepare(record)
+
+    assert prepared.msg == "mensagem x"
+    assert prepared.args is None
+    assert prepared.exc_info is None
+    assert "ValueError: ruim" in prepared.exc_text
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def isolated_logger():
+    # Outro teste (ou o setup da API) pode ter ativado a fila no root
+    async_logging.stop_async_logging()
+    logger = logging.getLogger("teste.async_logging")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    target = ListHandler()
+    logger.addHandler(target)
+    yield logger, target
+    async_logging.stop_async_logging()
+    logger.removeHandler(target)
+
+
+def test_enable_moves_handlers_behind_queue_and_stop_restores(isolated_logger, request_context):
+    logger, target = isolated_logger
+
+    handler = async_logging.enable_async_logging(logger, sample_rate=1.0)
+    assert async_logging.enable_async_logging(logger) is handler
+    assert handler in logger.handlers and target not in logger.handlers
+
+    logger.info("processada %d", 1)
+    async_logging.stop_async_logging()
+
+    assert target in logger.handlers and handler not in logger.handlers
+    assert [r.getMessage() for r in target.records] == ["processada 1"]
+    assert target.records[0].request_id == "req-1"
+    assert async_logging.async_logging_metrics() is None
+
+
+def test_metrics_while_enabled(isolated_logger):
+    logger, _ = isolated_logger
+
+    async_logging.enable_async_logging(logger, queue_size=50)
+
+    assert async_logging.async_logging_metrics() == {"fila": 0, "fila_max": 50, "descartados": 0}
@@ -0,0 +1,253 @@
+"""Registro de auditoria: lotes, segmentos diários, somente inclusão e consultas"""
+import asyncio
+import io
+import sqlite3
+import threading
+import time
+import zipfile
+from concurrent.futures import Future
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core import audit as audit_module
+from app.core.audit import DESCARTAR, REJEITAR, AuditLog, content_hash
+from app.core.jobs import PENDENTE, JobRunner, JobStore
+from app.core.streaming import ArchivePredictionStream
+
+from tests.conftest import png_bytes
+
+
+def _result(label="normal", confidence=0.9):
+    return {
+        "resultado": {"rotulo": label, "confianca": confidence},
+        "probabilidades": {label: confidence},
+        "modelo": {"versao": "1.0.0"},
+    }
+
+
+def _ts(day: str, hour: int = 12) -> float:
+    return datetime.strptime(f"{day} {hour}", "%Y-%m-%d %H").replace(tzinfo=timezone.utc).timestamp()
+
+
+class PredictorFake:
+    def predict_batch(self, images):
+        return [_result("pneumonia", 0.8) for _ in images]
+
+
+class ValidatorFake:
+    def validate(self, data, name):
+        if data == b"ruim":
+            raise ValueError("imagem inválida")
+
+
+def _zip(entries: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in entries.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def _run_stream(stream, data: bytes) -> list:
+    async def body():
+        yield data
+
+    async def consume():
+        return [line async for line in stream.run(body())]
+
+    return asyncio.run(consume())
+
+
+@pytest.fixture
+def log(tmp_path):
+    log = AuditLog(str(tmp_path / "auditoria"), batch_size=3, flush_interval=0.2)
+    yield log
+    log.close()
+
+
+def _record_at(monkeypatch, log, ts, *args, **kwargs):
+    with monkeypatch.context() as m:
+        m.setattr(audit_module.time, "time", lambda: ts)
+        return log.record(*args, **kwargs)
+
+
+def test_records_are_written_in_batches(log):
+    for i in range(7):
+        assert log.record(f"h{i}", _result())
+    log.close()
+
+    metrics = log.metrics()
+    assert (metrics["enfileirados"], metrics["gravados"], metrics["descartados"]) == (7, 7, 0)
+    assert metrics["lotes"] == 3
+    assert len(log.query(limit=100)) == 7
+
+
+def test_records_go_to_daily_segments(monkeypatch, log):
+    _record_at(monkeypatch, log, _ts("2026-01-01", 23), "a", _result())
+    _record_at(monkeypatch, log, _ts("2026-01-02", 0), "b", _result())
+    _record_at(monkeypatch, log, _ts("2026-01-02", 1), "c", _result())
+    log.close()
+
+    assert [path.name for path in log.segments()] == [
+        "audit-2026-01-02.sqlite3", "audit-2026-01-01.sqlite3"
+    ]
+    # Só os segmentos do intervalo são abertos
+    assert [path.name for path in log.segments(start=_ts("2026-01-02"))] == ["audit-2026-01-02.sqlite3"]
+    assert [r["hash"] for r in log.query()] == ["c", "b", "a"]
+    assert {r["segmento"] for r in log.query(end=_ts("2026-01-01", 23))} == {"audit-2026-01-01.sqlite3"}
+
+
+@pytest.mark.parametrize("statement", [
+    "UPDATE registros SET classe = 'pneumonia'",
+    "DELETE FROM registros",
+])
+def test_segments_are_append_only(log, statement):
+    log.record("a", _result())
+    log.close()
+    conn = sqlite3.connect(str(log.segments()[0]))
+    try:
+        with pytest.raises(sqlite3.DatabaseError, match="somente inclusão"):
+            conn.execute(statement)
+    finally:
+        conn.close()
+
+    assert len(log.query()) == 1
+
+
+def test_query_filters(monkeypatch, log):
+    base = _ts("2026-03-10")
+    entries = [("x", "normal"), ("y", "pneumonia"), ("x", "pneumonia"), ("z", "normal")]
+    for i, (digest, label) in enumerate(entries):
+        _record_at(monkeypatch, log, base + i, digest, _result(label), filename=f"{i}.png", origin="teste")
+    log.close()
+
+    assert [r["arquivo"] for r in log.query(digest="x")] == ["2.png", "0.png"]
+    assert [r["arquivo"] for r in log.query(label="pneumonia")] == ["2.png", "1.png"]
+    assert [r["arquivo"] for r in log.query(start=base + 1, end=base + 2)] == ["2.png", "1.png"]
+    assert [r["arquivo"] for r in log.query(limit=2)] == ["3.png", "2.png"]
+    assert log.query(digest="x", label="normal")[0]["probabilidades"] == {"normal": 0.9}
+    assert log.query(digest="nenhum") == []
+
+
+def _blocked_writer(log):
+    """Segura o gravador no primeiro lote, para encher a fila."""
+    release = threading.Event()
+    writing = threading.Event()
+    write = log._write
+
+    def blocked(rows):
+        writing.set()
+        release.wait(5)
+        write(rows)
+
+    log._write = blocked
+    return writing, release
+
+
+@pytest.mark.parametrize("policy", [DESCARTAR, REJEITAR])
+def test_full_queue_never_blocks_and_counts_drops(tmp_path, policy):
+    log = AuditLog(str(tmp_path), queue_size=1, batch_size=1, flush_interval=0.05, on_full=policy)
+    writing, release = _blocked_writer(log)
+    try:
+        assert log.record("a", _result())
+        assert writing.wait(5)
+        assert log.record("b", _result())
+
+        assert not log.has_capacity()
+        assert not log.record("c", _result())
+        assert log.metrics()["descartados"] == 1
+    finally:
+        release.set()
+        log.close()
+
+    assert sorted(r["hash"] for r in log.query()) == ["a", "b"]
+
+
+def test_reject_policy_holds_jobs_until_queue_drains(tmp_path):
+    log = AuditLog(
+        str(tmp_path / "auditoria"), queue_size=1, batch_size=1, flush_interval=0.05, on_full=REJEITAR
+    )
+    writing, release = _blocked_writer(log)
+    store = JobStore(str(tmp_path / "jobs.db"), str(tmp_path / "imagens"))
+    runner = JobRunner(store, PredictorFake(), poll_interval=0.05, audit=log)
+    try:
+        log.record("a", _result())
+        assert writing.wait(5)
+        log.record("b", _result())
+        job_id = store.create_job([("a.png", png_bytes(128))])
+
+        runner.start()
+        time.sleep(0.3)
+        assert store.get_job(job_id)["status"] == PENDENTE
+
+        release.set()
+        deadline = time.monotonic() + 5
+        while store.get_job(job_id)["processados"] == 0:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+    finally:
+        release.set()
+        runner.stop()
+        store.close()
+        log.close()
+
+
+def test_job_predictions_are_audited(tmp_path, log):
+    store = JobStore(str(tmp_path / "jobs.db"), str(tmp_path / "imagens"))
+    image = png_bytes(128)
+    try:
+        job_id = store.create_job([("a.png", image), ("ruim.png", b"ruim")])
+        JobRunner(store, PredictorFake(), audit=log).process(store.claim(10))
+    finally:
+        store.close()
+    log.close()
+
+    records = log.query()
+    assert [(r["origem"], r["arquivo"], r["request_id"]) for r in records] == [("job", "a.png", job_id)]
+    assert records[0]["hash"] == content_hash(image)
+
+
+@pytest.mark.parametrize("with_pipeline", [False, True])
+def test_archive_predictions_are_audited(log, with_pipeline):
+    class PipelineFake:
+        def submit(self, data, name, block=True, priority=None):
+            future = Future()
+            if data == b"ruim":
+                future.set_exception(ValueError("imagem inválida"))
+            else:
+                future.set_result(_result("pneumonia", 0.8))
+            return future
+
+    stream = ArchivePredictionStream(
+        "zip", PredictorFake(), ValidatorFake(),
+        pipeline=PipelineFake() if with_pipeline else None,
+        audit=log, request_id="req-1"
+    )
+
+    lines = _run_stream(stream, _zip({"a.png": b"imagem-a", "b.png": b"ruim", "c.png": b"imagem-c"}))
+    log.close()
+
+    assert len(lines) == 4
+    records = log.query()
+    assert sorted((r["arquivo"], r["origem"], r["request_id"]) for r in records) == [
+        ("a.png", "arquivo", "req-1"), ("c.png", "arquivo", "req-1")
+    ]
+    assert {r["hash"] for r in records} == {content_hash(b"imagem-a"), content_hash(b"imagem-c")}
+
+
+def test_archive_entries_fail_when_reject_policy_queue_is_full(tmp_path):
+    log = AuditLog(str(tmp_path), queue_size=1, batch_size=1, flush_interval=0.05, on_full=REJEITAR)
+    writing, release = _blocked_writer(log)
+    try:
+        log.record("x", _result())
+        assert writing.wait(5)
+        log.record("y", _result())
+        stream = ArchivePredictionStream("zip", PredictorFake(), ValidatorFake(), audit=log)
+        lines = _run_stream(stream, _zip({"a.png": b"imagem-a"}))
+    finally:
+        release.set()
+        log.close()
+
+    assert "auditoria saturado" in lines[0]
+    assert stream.failed == 1
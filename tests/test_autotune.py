@@ -0,0 +1,115 @@
+"""Autotune: escolha da configuração, medição e cache por host/modelo"""
+import time
+
+import pytest
+
+from app.config import settings
+from app.core import autotune
+
+
+def _candidate(batch_size, workers, throughput, p95):
+    return {
+        "batch_size": batch_size, "workers": workers,
+        "throughput_ips": throughput, "latencia_p95_ms": p95,
+        "intra_op_threads": 4, "inter_op_threads": 1,
+    }
+
+
+CANDIDATES = [
+    _candidate(1, 1, 40.0, 30.0),
+    _candidate(8, 1, 180.0, 120.0),
+    _candidate(8, 2, 260.0, 240.0),
+    _candidate(32, 4, 400.0, 900.0),
+]
+
+
+@pytest.mark.parametrize("slo_ms, expected", [
+    (1000.0, (32, 4)),
+    (250.0, (8, 2)),
+    (240.0, (8, 2)),
+    (200.0, (8, 1)),
+    (30.0, (1, 1)),
+])
+def test_select_highest_throughput_within_slo(slo_ms, expected):
+    best = autotune.select(CANDIDATES, slo_ms)
+
+    assert (best["batch_size"], best["workers"]) == expected
+
+
+def test_select_lowest_latency_when_nothing_meets_slo():
+    best = autotune.select(CANDIDATES, 10.0)
+
+    assert (best["batch_size"], best["workers"]) == (1, 1)
+
+
+class SleepyModel:
+    """Latência proporcional ao batch: 1 ms por imagem."""
+
+    def __init__(self):
+        self.shapes = set()
+
+    def predict(self, batch, verbose=0):
+        self.shapes.add(batch.shape)
+        time.sleep(0.001 * len(batch))
+
+
+@pytest.fixture
+def model_file(tmp_path, monkeypatch):
+    path = tmp_path / "modelo.keras"
+    path.write_bytes(b"pesos")
+    monkeypatch.setattr(settings, "MODEL_PATH", str(path))
+    monkeypatch.setattr(settings, "AUTOTUNE_CACHE_PATH", str(tmp_path / "cache" / "autotune.json"))
+    monkeypatch.setattr(settings, "IMAGE_SIZE", 8)
+    return path
+
+
+def test_sweep_measures_every_combination(model_file):
+    model = SleepyModel()
+
+    results = autotune.sweep(model, [1, 4], [1, 2], duration=0.05)
+
+    assert [(r["batch_size"], r["workers"]) for r in results] == [(1, 1), (4, 1), (1, 2), (4, 2)]
+    assert model.shapes == {(1, 8, 8, 3), (4, 8, 8, 3)}
+    for result in results:
+        assert result["throughput_ips"] > 0
+        assert result["latencia_p95_ms"] >= result["latencia_p50_ms"] > 0
+
+
+def test_tune_in_process_picks_within_slo_and_round_trips(model_file, monkeypatch):
+    monkeypatch.setattr(autotune, "current_threads", lambda: (2, 1))
+    monkeypatch.setattr(autotune, "default_batch_sizes", lambda: [1, 16])
+    monkeypatch.setattr(autotune, "default_workers", lambda: [1])
+    monkeypatch.setattr(settings, "AUTOTUNE_DURATION", 0.05)
+    # Batch 16 leva ~16 ms: fora do SLO de 10 ms
+    monkeypatch.setattr(settings, "AUTOTUNE_SLO_MS", 10.0)
+
+    result = autotune.tune_in_process(SleepyModel())
+
+    assert result["max_batch_size"] == 1
+    assert result["inference_workers"] == 1
+    assert (result["intra_op_threads"], result["inter_op_threads"]) == (2, 1)
+    assert result["candidatos"] == 2
+
+    assert autotune.load_tuning() is None
+    autotune.save_tuning(result)
+    assert autotune.load_tuning() == result
+
+
+def test_tuning_is_keyed_by_model_hash(model_file):
+    autotune.save_tuning({"max_batch_size": 8})
+    assert autotune.load_tuning() == {"max_batch_size": 8}
+
+    model_file.write_bytes(b"outros pesos")
+
+    assert autotune.load_tuning() is None
+
+
+def test_unreadable_cache_is_ignored(model_file):
+    cache = settings.AUTOTUNE_CACHE_PATH
+    autotune.save_tuning({"max_batch_size": 8})
+    with open(cache, "w", encoding="utf-8") as f:
+        f.write("{corrompido")
+
+    assert autotune.load_tuning() is None
+    autotune.save_tuning({"max_batch_size": 4})
+    assert autotune.load_tuning() == {"max_batch_size": 4}
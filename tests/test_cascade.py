@@ -0,0 +1,83 @@
+"""Cascata triagem -> modelo completo por limiar de confiança"""
+import numpy as np
+import pytest
+
+from app.core.cascade import COMPLETO, TRIAGEM, ModelCascade
+
+
+class FakeModel:
+    """Devolve as probabilidades fixas e registra os batches recebidos."""
+
+    def __init__(self, predictions):
+        self.predictions = np.asarray(predictions, dtype=np.float32)
+        self.batches = []
+
+    def predict(self, batch, verbose=0):
+        self.batches.append(np.asarray(batch))
+        return self.predictions[np.asarray(batch)[:, 0, 0, 0].astype(int)]
+
+
+def _batch(n):
+    # O índice da imagem no primeiro pixel: os modelos falsos respondem por ele
+    batch = np.zeros((n, 4, 4, 3), dtype=np.float32)
+    batch[:, 0, 0, 0] = np.arange(n)
+    return batch
+
+
+SCREENING = [[0.95, 0.03, 0.02], [0.50, 0.30, 0.20], [0.10, 0.90, 0.00], [0.40, 0.20, 0.40]]
+FULL = [[0.0, 0.0, 1.0]] * 4
+
+
+def test_only_images_below_threshold_are_escalated():
+    screening, full = FakeModel(SCREENING), FakeModel(FULL)
+    cascade = ModelCascade(screening, full, threshold=0.9)
+
+    predictions, stages = cascade.predict(_batch(4))
+
+    assert stages == [TRIAGEM, COMPLETO, TRIAGEM, COMPLETO]
+    np.testing.assert_allclose(predictions[[0, 2]], np.asarray(SCREENING)[[0, 2]])
+    np.testing.assert_allclose(predictions[[1, 3]], np.asarray(FULL)[[1, 3]])
+    # Só as imagens incertas chegam ao modelo completo
+    assert len(full.batches) == 1
+    assert full.batches[0][:, 0, 0, 0].tolist() == [1, 3]
+
+
+def test_confidence_equal_to_threshold_stays_in_screening():
+    cascade = ModelCascade(FakeModel(SCREENING), FakeModel(FULL), threshold=0.95)
+
+    _, stages = cascade.predict(_batch(1))
+
+    assert stages == [TRIAGEM]
+
+
+def test_confident_batch_never_calls_full_model():
+    full = FakeModel(FULL)
+    cascade = ModelCascade(FakeModel(SCREENING), full, threshold=0.4)
+
+    _, stages = cascade.predict(_batch(4))
+
+    assert stages == [TRIAGEM] * 4
+    assert full.batches == []
+
+
+@pytest.mark.parametrize("threshold, escalated", [(0.0, 0), (0.6, 2), (1.01, 4)])
+def test_metrics_track_escalation_rate(threshold, escalated):
+    cascade = ModelCascade(FakeModel(SCREENING), FakeModel(FULL), threshold=threshold)
+
+    cascade.predict(_batch(4))
+    cascade.predict(_batch(4))
+    metrics = cascade.metrics()
+
+    assert metrics["limiar"] == threshold
+    assert metrics["imagens"] == 8
+    assert metrics["escalonadas"] == 2 * escalated
+    assert metrics["taxa_escalonamento"] == escalated / 4
+    assert (metrics["custo_completo_ms"] is None) == (escalated == 0)
+
+
+def test_metrics_before_any_prediction():
+    metrics = ModelCascade(FakeModel(SCREENING), FakeModel(FULL), threshold=0.9).metrics()
+
+    assert metrics["imagens"] == 0
+    assert metrics["taxa_escalonamento"] == 0.0
+    assert metrics["economia_custo"] is None
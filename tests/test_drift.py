@@ -0,0 +1,152 @@
+"""Monitor de deriva: histogramas, PSI, GET /drift e hits do cache de resultados"""
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import drift as drift_routes
+from app.core.drift import FEATURE_EDGES, DriftMonitor, _Feature, describe_input, psi
+from app.core.predictor import Predictor
+from app.core.result_cache import ResultCache
+
+from tests.conftest import png_bytes
+
+CLASSES = ["normal", "pneumonia", "tuberculose"]
+
+
+def _observe(monitor, n, mean, label="normal", confidence=0.9):
+    values = {"intensidade_media": mean, "largura": 1024, "altura": 1024, "proporcao": 1.0}
+    for _ in range(n):
+        monitor.observe(values, label, confidence)
+
+
+def test_feature_histogram_clamps_and_tracks_mean_and_std():
+    feature = _Feature([0.0, 1.0, 2.0, 3.0])
+    for value in (-5.0, 0.5, 1.5, 2.5, 99.0):
+        feature.add(value)
+
+    # Fora da faixa vai para o primeiro/último bin
+    assert feature.counts == [2, 1, 2]
+    assert feature.summary() == pytest.approx({
+        "media": round(np.mean([-5.0, 0.5, 1.5, 2.5, 99.0]), 4),
+        "desvio": round(np.std([-5.0, 0.5, 1.5, 2.5, 99.0], ddof=1), 4),
+    })
+
+
+def test_feature_merge_matches_single_pass():
+    values = np.random.default_rng(0).normal(100, 20, 300)
+    single, left, right = (_Feature(FEATURE_EDGES["intensidade_media"]) for _ in range(3))
+    for value in values:
+        single.add(value)
+    for value in values[:120]:
+        left.add(value)
+    for value in values[120:]:
+        right.add(value)
+
+    left.merge(right)
+
+    assert left.counts == single.counts
+    assert left.summary() == pytest.approx(single.summary())
+
+
+def test_psi():
+    assert psi([10, 20, 30], [1, 2, 3]) == pytest.approx(0.0)
+    assert psi([0, 0], [1, 1]) is None
+    assert psi([50, 50, 0, 0], [0, 0, 50, 50]) > 0.25
+
+
+def test_windows_close_at_window_size():
+    monitor = DriftMonitor(CLASSES, window_size=10, windows=2)
+    _observe(monitor, 35, 100.0)
+
+    report = monitor.report()
+    assert (report["janelas_fechadas"], report["total_observacoes"]) == (2, 35)
+    assert report["janela_atual"]["observacoes"] == 5
+    # Só as janelas em memória entram no agregado
+    assert report["agregado"]["observacoes"] == 25
+    assert report["agregado"]["caracteristicas"]["classe"]["proporcoes"]["normal"] == 1.0
+
+
+def test_report_against_saved_baseline(tmp_path):
+    reference = DriftMonitor(CLASSES, window_size=1000)
+    _observe(reference, 100, 100.0)
+    path = str(tmp_path / "base.json")
+    reference.save(path)
+
+    baseline = DriftMonitor.load_baseline(path, CLASSES)
+    stable = DriftMonitor(CLASSES, baseline=baseline)
+    _observe(stable, 50, 100.0)
+    shifted = DriftMonitor(CLASSES, baseline=baseline)
+    _observe(shifted, 50, 200.0, label="pneumonia")
+
+    assert stable.report()["janela_atual"]["deriva"] == "estavel"
+    report = shifted.report()["janela_atual"]
+    assert report["deriva"] == "significativa"
+    assert report["caracteristicas"]["intensidade_media"]["media_base"] == 100.0
+    assert report["caracteristicas"]["classe"]["deriva"] == "significativa"
+    # Classes diferentes: linha de base incompatível
+    assert DriftMonitor.load_baseline(path, ["a", "b"]) is None
+
+
+def test_describe_input_reads_decoded_tensor_and_header():
+    image = png_bytes(64)
+    decoded = np.full((32, 32, 3), 51, dtype=np.uint8)
+
+    values = describe_input(image, decoded=decoded)
+
+    assert values["intensidade_media"] == pytest.approx(51.0)
+    assert (values["largura"], values["altura"], values["proporcao"]) == (64, 64, 1.0)
+
+
+def test_drift_route(monkeypatch):
+    app = FastAPI()
+    app.include_router(drift_routes.router)
+    client = TestClient(app)
+
+    monkeypatch.setattr(drift_routes, "get_drift_monitor", lambda: None)
+    assert client.get("/drift").json() == {"ativo": False}
+
+    monitor = DriftMonitor(CLASSES)
+    _observe(monitor, 3, 100.0)
+    monkeypatch.setattr(drift_routes, "get_drift_monitor", lambda: monitor)
+    body = client.get("/drift").json()
+    assert body["ativo"] is True
+    assert body["total_observacoes"] == 3
+    assert body["linha_de_base"]["ativa"] is False
+
+
+@pytest.fixture
+def cached_predictor(tmp_path):
+    predictor = Predictor()
+    predictor.classes = CLASSES
+    predictor.drift = DriftMonitor(CLASSES)
+    predictor.result_cache = ResultCache(str(tmp_path / "resultados.sqlite3"))
+    predictor._cache_version = "teste"
+    predictor._load_model = lambda: None
+    predictor.inferences = 0
+
+    def infer(batch):
+        predictor.inferences += len(batch)
+        predictions = np.tile([0.1, 0.8, 0.1], (len(batch), 1))
+        return predictions, [None] * len(batch), None
+
+    predictor._infer_staged = infer
+    yield predictor
+    predictor.result_cache.close()
+
+
+def test_cache_hits_reach_drift_monitor(cached_predictor):
+    image = png_bytes(128)
+
+    first = cached_predictor.predict(image)
+    second = cached_predictor.predict(image)
+    batch = cached_predictor.predict_batch([image, image])
+
+    assert cached_predictor.inferences == 1
+    assert second == first and batch == [first, first]
+    # Características da entrada não vazam na resposta
+    assert "_deriva" not in second
+    report = cached_predictor.drift.report()["janela_atual"]
+    assert report["observacoes"] == 4
+    assert report["caracteristicas"]["largura"]["media"] == 128
+    assert report["caracteristicas"]["classe"]["proporcoes"]["pneumonia"] == 1.0
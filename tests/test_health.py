@@ -0,0 +1,119 @@
+"""Health check servido pelo amostrador em segundo plano"""
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import health as health_routes
+from app.core.health_sampler import HealthSampler
+from app.core.recycling import WorkerRecycler
+
+
+def _sampler(**kwargs):
+    kwargs.setdefault("model_state", lambda: (True, "loaded"))
+    return HealthSampler(model_version="1.0.0", **kwargs)
+
+
+def test_history_keeps_only_last_samples():
+    depth = iter(range(100))
+    sampler = _sampler(history_size=3, queue_depth=lambda: next(depth))
+
+    for _ in range(5):
+        sampler.sample()
+
+    assert [s["queue_depth"] for s in sampler.history()] == [2, 3, 4]
+    assert [s["queue_depth"] for s in sampler.history(2)] == [3, 4]
+    assert [s["queue_depth"] for s in sampler.history(10)] == [2, 3, 4]
+    assert sampler.latest() is sampler.history()[-1]
+
+
+def test_latest_samples_on_first_call():
+    sampler = _sampler()
+
+    sample = sampler.latest()
+
+    assert sampler.history() == [sample]
+    assert sample["model_loaded"] is True
+    assert sample["model_version"] == "1.0.0"
+    assert sample["process_rss_mb"] > 0
+    assert sample["event_loop_lag_ms"] is None
+
+
+def test_failing_queue_depth_does_not_break_sample():
+    def broken():
+        raise RuntimeError("pipeline parado")
+
+    assert _sampler(queue_depth=broken).sample()["queue_depth"] is None
+    assert HealthSampler().sample()["model_status"] == "unknown"
+
+
+def test_background_thread_fills_history():
+    sampler = _sampler(interval=0.01, history_size=4)
+    sampler.start()
+    try:
+        deadline = time.monotonic() + 5
+        while len(sampler.history()) < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        sampler.stop()
+
+    samples = sampler.history()
+    assert len(samples) == 4
+    assert samples == sorted(samples, key=lambda s: s["timestamp"])
+
+
+def test_event_loop_lag_is_reported_once():
+    sampler = _sampler(lag_interval=0.01)
+
+    async def block_loop():
+        task = asyncio.get_running_loop().create_task(sampler._watch_event_loop())
+        await asyncio.sleep(0)
+        time.sleep(0.1)  # bloqueia o loop
+        await asyncio.sleep(0.05)
+        sampler._stop.set()
+        await task
+
+    asyncio.run(block_loop())
+
+    assert sampler.sample()["event_loop_lag_ms"] >= 50
+    assert sampler.sample()["event_loop_lag_ms"] is None
+
+
+@pytest.fixture
+def client(monkeypatch):
+    sampler = _sampler(history_size=5)
+    for _ in range(5):
+        sampler.sample()
+    monkeypatch.setattr(health_routes, "get_health_sampler", lambda: sampler)
+    monkeypatch.setattr(health_routes, "get_worker_recycler", lambda: None)
+    app = FastAPI()
+    app.include_router(health_routes.router)
+    return TestClient(app)
+
+
+def test_health_serves_latest_sample(client):
+    response = client.get("/health")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "healthy"
+    assert response.json()["model_version"] == "1.0.0"
+
+
+def test_health_history_window(client):
+    assert len(client.get("/health/history").json()["samples"]) == 5
+    assert len(client.get("/health/history", params={"limit": 2}).json()["samples"]) == 2
+    assert client.get("/health/history", params={"limit": 0}).status_code == 422
+
+
+def test_health_reports_draining(client, monkeypatch):
+    recycler = WorkerRecycler(max_requests=1, jitter=0, on_recycle=lambda: None)
+    recycler.begin()
+    recycler.end()
+    monkeypatch.setattr(health_routes, "get_worker_recycler", lambda: recycler)
+
+    response = client.get("/health")
+
+    assert response.status_code == 503
+    assert response.json()["status"] == "draining"
@@ -0,0 +1,91 @@
+"""
+Orçamento de tempo de import dos workers web
+
+Mede `python -X importtime` dos pontos de entrada (app.main e config.wsgi)
+em processos novos e falha se algum passar do orçamento ou importar um
+módulo pesado (TensorFlow/Keras) que só deve ser carregado onde a
+inferência acontece.
+
+O carregamento do modelo não entra na conta: no FastAPI ele acontece no
+evento de startup e no Django é desativado com PRELOAD_MODELO=False.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Orçamento (ms) de cada ponto de entrada. Atualize junto com a mudança que
+# justificar o aumento.
+BUDGETS_MS = {
+    "app.main": 1500,
+    "config.wsgi": 1500,
+}
+
+# Módulos que o import do worker não pode carregar
+FORBIDDEN = ("tensorflow", "keras", "tf_keras")
+
+# Além do WSGI, importar as URLs puxa as views e os serviços
+STATEMENTS = {
+    "app.main": "import app.main",
+    "config.wsgi": "import config.wsgi, config.urls",
+}
+
+# Medições por alvo (vale a menor: descarta ruído de disco frio e da máquina)
+REPEAT = 3
+
+
+def measure(target: str) -> tuple:
+    """
+    Importa o alvo num processo novo com -X importtime.
+
+    Returns:
+        (tempo total em ms, {módulo: cumulativo em ms}, módulos proibidos importados)
+    """
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])),
+        PRELOAD_MODELO="False",
+        DJANGO_SETTINGS_MODULE="config.settings",
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STATEMENTS[target]],
+        capture_output=True, text=True, env=env, cwd=ROOT
+    )
+    assert result.returncode == 0, f"Falha ao importar {target}:\n{result.stderr[-2000:]}"
+
+    total_us = 0
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        cumulative = int(cumulative)
+        modules[name.strip()] = cumulative / 1000
+
+        # Nível 0 (sem indentação extra): imports feitos pelo próprio comando
+        if not name[1:].startswith(" "):
+            total_us += cumulative
+
+    forbidden = sorted(
+        name for name in modules
+        if name.split(".")[0] in FORBIDDEN
+    )
+    return total_us / 1000, modules, forbidden
+
+
+@pytest.mark.parametrize("target", list(BUDGETS_MS))
+def test_import_time_within_budget(target):
+    total_ms, modules, forbidden = min((measure(target) for _ in range(REPEAT)), key=lambda r: r[0])
+    slowest = ", ".join(
+        f"{name} {ms:.0f} ms"
+        for name, ms in sorted(modules.items(), key=lambda m: m[1], reverse=True)[:10]
+    )
+
+    assert not forbidden, f"{target} importou módulos proibidos: {', '.join(forbidden[:5])}"
+    assert total_ms <= BUDGETS_MS[target], (
+        f"{target}: {total_ms:.0f} ms (orçamento {BUDGETS_MS[target]} ms). Mais lentos: {slowest}"
+    )
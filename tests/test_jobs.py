@@ -0,0 +1,197 @@
+"""Fila persistente de jobs e limites dos arquivos compactados"""
+import io
+import sqlite3
+import time
+import zipfile
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import jobs as jobs_routes
+from app.config import settings
+from app.core.jobs import CONCLUIDO, ERRO, PENDENTE, PROCESSANDO, JobRunner, JobStore
+from app.utils.archive import ArchiveTooLarge, iter_archive_images
+
+from tests.conftest import png_bytes
+
+
+class FakePredictor:
+    def __init__(self):
+        self.calls = []
+
+    def predict_batch(self, images):
+        self.calls.append(len(images))
+        return [{"classe_predita": "NORMAL", "tamanho": len(data)} for data in images]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"), str(tmp_path / "imagens"))
+    yield store
+    store.close()
+
+
+def _item_status(store, job_id):
+    rows = store._conn.execute(
+        "SELECT status FROM job_itens WHERE job_id = ? ORDER BY indice", (job_id,)
+    ).fetchall()
+    return [row["status"] for row in rows]
+
+
+def test_claimed_items_return_to_queue_after_restart(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"), str(tmp_path / "imagens"))
+    images = [(name, png_bytes(128, seed=n)) for n, name in enumerate(["a.png", "b.png", "c.png"])]
+    job_id = store.create_job(images)
+
+    claimed = store.claim(2)
+    assert [item["indice"] for item in claimed] == [0, 1]
+    assert _item_status(store, job_id) == [PROCESSANDO, PROCESSANDO, PENDENTE]
+    # Reinício no meio do batch: os itens ficam "processando" no banco
+    store.close()
+
+    store = JobStore(str(tmp_path / "jobs.db"), str(tmp_path / "imagens"))
+    try:
+        assert _item_status(store, job_id) == [PENDENTE, PENDENTE, PENDENTE]
+
+        predictor = FakePredictor()
+        runner = JobRunner(store, predictor)
+        runner.process(store.claim(10))
+
+        job = store.get_job(job_id)
+        assert job["status"] == CONCLUIDO
+        assert (job["processados"], job["falhas"]) == (3, 0)
+        results = store.get_results(job_id)
+        assert [r["arquivo"] for r in results] == ["a.png", "b.png", "c.png"]
+        assert results[0]["resultado"]["tamanho"] == len(images[0][1])
+        assert predictor.calls == [3]
+        # Imagens removidas do disco depois de processadas
+        assert not (tmp_path / "imagens" / job_id).exists()
+    finally:
+        store.close()
+
+
+def test_invalid_image_marks_item_as_error(store):
+    job_id = store.create_job([("ok.png", png_bytes(128)), ("ruim.png", b"nao e imagem")])
+
+    JobRunner(store, FakePredictor()).process(store.claim(10))
+
+    job = store.get_job(job_id)
+    assert (job["status"], job["processados"], job["falhas"]) == (CONCLUIDO, 2, 1)
+    assert [r["status"] for r in store.get_results(job_id)] == [CONCLUIDO, ERRO]
+
+
+def test_empty_job_is_born_complete(store):
+    job_id = store.create_job([])
+
+    assert store.get_job(job_id)["status"] == CONCLUIDO
+    assert store.claim(10) == []
+
+
+def _zip(entries, declared_size=None):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in entries:
+            archive.writestr(name, data)
+    if declared_size is not None:
+        # Adultera o tamanho declarado no diretório central (zip bomb)
+        raw = bytearray(buffer.getvalue())
+        central = raw.rfind(b"PK\x01\x02")
+        raw[central + 24:central + 28] = declared_size.to_bytes(4, "little")
+        return io.BytesIO(bytes(raw))
+    buffer.seek(0)
+    return buffer
+
+
+def test_archive_images_skip_non_images():
+    archive = _zip([("a.png", b"a" * 10), ("leia.txt", b"x"), ("__MACOSX/._a.png", b"y")])
+
+    assert list(iter_archive_images(archive, "lote.zip", ["png"], 100)) == [("a.png", b"a" * 10)]
+
+
+def test_archive_entry_over_declared_size_is_rejected():
+    archive = _zip([("grande.png", b"\0" * 1000)])
+
+    with pytest.raises(ArchiveTooLarge):
+        list(iter_archive_images(archive, "lote.zip", ["png"], 100))
+
+
+def test_archive_entry_lying_about_its_size_is_not_expanded():
+    # Declara 10 bytes mas descompacta 1MB
+    archive = _zip([("bomba.png", b"\0" * (1024 * 1024))], declared_size=10)
+
+    with pytest.raises((ArchiveTooLarge, zipfile.BadZipFile)):
+        list(iter_archive_images(archive, "lote.zip", ["png"], 100))
+
+
+def _wait(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condição não atingida"
+        time.sleep(0.01)
+
+
+def test_batch_failure_keeps_results_already_computed(store):
+    class PartialPredictor:
+        def predict_batch(self, images):
+            # Segundo resultado inválido: falha no meio do batch
+            return [{"classe_predita": "NORMAL"}, None]
+
+    job_id = store.create_job([("a.png", png_bytes(128, seed=1)), ("b.png", png_bytes(128, seed=2))])
+    runner = JobRunner(store, PartialPredictor(), poll_interval=0.01)
+    runner.start()
+    try:
+        _wait(lambda: store.get_job(job_id)["status"] == CONCLUIDO)
+    finally:
+        runner.stop()
+
+    results = store.get_results(job_id)
+    assert [r["status"] for r in results] == [CONCLUIDO, ERRO]
+    assert results[0]["resultado"] == {"classe_predita": "NORMAL"}
+    assert results[1]["erro"].startswith("Erro interno")
+    assert store.get_job(job_id)["processados"] == 2
+
+
+def test_store_failure_does_not_kill_worker(store, monkeypatch):
+    job_id = store.create_job([("a.png", png_bytes(128))])
+    complete = store.complete
+    calls = []
+
+    def flaky_complete(items):
+        calls.append(len(items))
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        complete(items)
+
+    monkeypatch.setattr(store, "complete", flaky_complete)
+    runner = JobRunner(store, FakePredictor(), poll_interval=0.01)
+    runner.start()
+    try:
+        _wait(lambda: len(calls) == 1)
+        # Sobrevive e continua atendendo novos jobs
+        second = store.create_job([("b.png", png_bytes(128))])
+        _wait(lambda: store.get_job(second)["status"] == CONCLUIDO)
+        assert all(thread.is_alive() for thread in runner._threads)
+    finally:
+        runner.stop()
+
+    # O item do batch que falhou não foi contado duas vezes
+    job = store.get_job(job_id)
+    assert (job["processados"], _item_status(store, job_id)) == (0, [PROCESSANDO])
+
+
+@pytest.mark.parametrize("method, path", [
+    ("get", "/jobs/abc"),
+    ("get", "/jobs/abc/results"),
+    ("post", "/jobs"),
+])
+def test_job_routes_are_unavailable_when_disabled(monkeypatch, method, path):
+    monkeypatch.setattr(settings, "JOBS_ENABLED", False)
+    monkeypatch.setattr(jobs_routes, "get_job_store", lambda: pytest.fail("banco de jobs criado"))
+    app = FastAPI()
+    app.include_router(jobs_routes.router)
+
+    kwargs = {"files": [("files", ("a.png", png_bytes(128), "image/png"))]} if method == "post" else {}
+    response = getattr(TestClient(app), method)(path, **kwargs)
+
+    assert response.status_code == 503
@@ -0,0 +1,94 @@
+"""Cache de carregamento rápido do modelo (artefato JSON + pesos mapeados)"""
+import json
+
+import numpy as np
+import pytest
+
+from app.core import model_cache
+
+tf = pytest.importorskip("tensorflow")
+
+
+@pytest.fixture(scope="module")
+def keras_file(tmp_path_factory):
+    inputs = tf.keras.Input((8, 8, 3))
+    x = tf.keras.layers.Conv2D(4, 3)(inputs)
+    x = tf.keras.layers.GlobalAveragePooling2D()(x)
+    outputs = tf.keras.layers.Dense(3, activation="softmax")(x)
+    model = tf.keras.Model(inputs, outputs)
+    path = tmp_path_factory.mktemp("modelo") / "modelo.keras"
+    model.save(path)
+    return path
+
+
+@pytest.fixture
+def load_calls(monkeypatch):
+    """Conta as chamadas ao load_model padrão (caminho lento)."""
+    calls = []
+    load_model = tf.keras.models.load_model
+
+    def counting(*args, **kwargs):
+        calls.append(args)
+        return load_model(*args, **kwargs)
+
+    monkeypatch.setattr(tf.keras.models, "load_model", counting)
+    return calls
+
+
+def _manifest(cache_dir, keras_file):
+    return cache_dir / model_cache.model_fingerprint(keras_file) / "manifest.json"
+
+
+def _assert_same_weights(a, b):
+    assert len(a.get_weights()) == len(b.get_weights())
+    for x, y in zip(a.get_weights(), b.get_weights()):
+        np.testing.assert_array_equal(x, y)
+
+
+def test_fingerprint_follows_file_content(tmp_path):
+    path = tmp_path / "modelo.keras"
+    path.write_bytes(b"a")
+    first = model_cache.model_fingerprint(path)
+
+    assert model_cache.model_fingerprint(path) == first
+    path.write_bytes(b"bb")
+    assert model_cache.model_fingerprint(path) != first
+
+
+def test_artifact_round_trip(tmp_path, keras_file, load_calls):
+    cache_dir = tmp_path / "cache"
+
+    original = model_cache.load_model_fast(keras_file, cache_dir)
+    assert len(load_calls) == 1
+    manifest = json.loads(_manifest(cache_dir, keras_file).read_text())
+    assert manifest["formato"] == model_cache._FORMAT_VERSION
+    assert all(entry["offset"] % model_cache._ALIGNMENT == 0 for entry in manifest["pesos"])
+
+    cached = model_cache.load_model_fast(keras_file, cache_dir)
+
+    assert len(load_calls) == 1
+    _assert_same_weights(cached, original)
+    batch = np.random.default_rng(0).uniform(-1, 1, (2, 8, 8, 3)).astype(np.float32)
+    np.testing.assert_allclose(cached.predict(batch, verbose=0), original.predict(batch, verbose=0), atol=1e-6)
+
+
+@pytest.mark.parametrize("field, value", [("formato", model_cache._FORMAT_VERSION - 1), ("keras", "0.0.1")])
+def test_stale_artifact_is_rejected_and_rebuilt(tmp_path, keras_file, load_calls, field, value):
+    cache_dir = tmp_path / "cache"
+    original = model_cache.load_model_fast(keras_file, cache_dir)
+    path = _manifest(cache_dir, keras_file)
+    manifest = json.loads(path.read_text())
+    path.write_text(json.dumps({**manifest, field: value}))
+
+    with pytest.raises(ValueError, match="versão"):
+        model_cache._read_artifact(path.parent)
+
+    model = model_cache.load_model_fast(keras_file, cache_dir)
+
+    # Caiu no load_model padrão e publicou um manifesto novo, sem apagar os antigos
+    assert len(load_calls) == 2
+    _assert_same_weights(model, original)
+    rebuilt = json.loads(path.read_text())
+    assert rebuilt[field] == manifest[field]
+    assert rebuilt["arquivo_pesos"] != manifest["arquivo_pesos"]
+    assert (path.parent / manifest["arquivo_pesos"]).exists()
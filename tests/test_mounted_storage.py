@@ -0,0 +1,116 @@
+"""Predição por caminho em volume montado: resolução dentro da raiz"""
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import predict as predict_routes
+from app.config import settings
+from app.utils.mounted_storage import read_mounted, resolve_mounted_path
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path / "mnt"
+    (root / "estudo").mkdir(parents=True)
+    (root / "estudo" / "pa.png").write_bytes(b"imagem")
+    (tmp_path / "fora.png").write_bytes(b"segredo")
+    (tmp_path / "mnt2").mkdir()
+    (tmp_path / "mnt2" / "a.png").write_bytes(b"vizinho")
+    return root
+
+
+def test_relative_path_inside_root(root):
+    assert resolve_mounted_path(str(root), "estudo/pa.png") == (root / "estudo" / "pa.png").resolve()
+    assert resolve_mounted_path(str(root), "estudo/../estudo/pa.png") == (root / "estudo" / "pa.png").resolve()
+
+
+@pytest.mark.parametrize("path", [
+    "../fora.png",
+    "estudo/../../fora.png",
+    # Raiz vizinha com o mesmo prefixo (mnt2 começa com "mnt")
+    "../mnt2/a.png",
+])
+def test_paths_escaping_root_are_refused(root, path):
+    with pytest.raises(PermissionError):
+        resolve_mounted_path(str(root), path)
+
+
+def test_absolute_paths_must_be_inside_root(root):
+    inside = str(root / "estudo" / "pa.png")
+    assert resolve_mounted_path(str(root), inside) == (root / "estudo" / "pa.png").resolve()
+    with pytest.raises(PermissionError):
+        resolve_mounted_path(str(root), str(root.parent / "fora.png"))
+    with pytest.raises(PermissionError):
+        resolve_mounted_path(str(root), "/etc/passwd")
+
+
+def test_symlink_pointing_outside_root_is_refused(root):
+    os.symlink(root.parent / "fora.png", root / "estudo" / "atalho.png")
+    os.symlink(root.parent, root / "pasta")
+
+    with pytest.raises(PermissionError):
+        resolve_mounted_path(str(root), "estudo/atalho.png")
+    with pytest.raises(PermissionError):
+        resolve_mounted_path(str(root), "pasta/fora.png")
+
+
+def test_symlink_inside_root_is_followed(root):
+    os.symlink(root / "estudo" / "pa.png", root / "atalho.png")
+
+    assert resolve_mounted_path(str(root), "atalho.png") == (root / "estudo" / "pa.png").resolve()
+
+
+def test_nul_byte_is_invalid(root):
+    with pytest.raises(ValueError):
+        resolve_mounted_path(str(root), "estudo/pa.png\0.txt")
+
+
+def test_read_mounted_limits(root):
+    assert read_mounted(root / "estudo" / "pa.png", 100) == b"imagem"
+    with pytest.raises(ValueError):
+        read_mounted(root / "estudo" / "pa.png", 3)
+    (root / "vazio.png").write_bytes(b"")
+    with pytest.raises(ValueError):
+        read_mounted(root / "vazio.png", 100)
+
+
+@pytest.fixture
+def client(root, monkeypatch):
+    async def predict_many(images, **scheduling):
+        return [{"arquivo": name, "tamanho": len(data)} for name, data in images]
+
+    monkeypatch.setattr(settings, "MOUNTED_IMAGES_ROOT", str(root))
+    monkeypatch.setattr(predict_routes, "_predict_many", predict_many)
+    app = FastAPI()
+    app.include_router(predict_routes.router)
+    return TestClient(app)
+
+
+def test_predict_path_reads_files_inside_root(client):
+    response = client.post("/predict/path", json={"caminhos": ["estudo/pa.png", "estudo/nada.png"]})
+
+    assert response.status_code == 200
+    assert response.json()["resultados"] == [
+        {"arquivo": "estudo/pa.png", "tamanho": 6},
+        {"arquivo": "estudo/nada.png", "erro": "Arquivo não encontrado"},
+    ]
+
+
+@pytest.mark.parametrize("path, status", [
+    ("../fora.png", 403),
+    ("../mnt2/a.png", 403),
+    ("/etc/passwd", 403),
+    ("estudo/pa.png\0", 400),
+])
+def test_predict_path_refuses_invalid_paths(client, path, status):
+    response = client.post("/predict/path", json={"caminhos": ["estudo/pa.png", path]})
+
+    assert response.status_code == status
+
+
+def test_predict_path_disabled_without_root(client, monkeypatch):
+    monkeypatch.setattr(settings, "MOUNTED_IMAGES_ROOT", None)
+
+    assert client.post("/predict/path", json={"caminhos": ["estudo/pa.png"]}).status_code == 403
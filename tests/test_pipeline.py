@@ -0,0 +1,28 @@
+"""Estágios do pipeline: erros do handler resolvem o lote inteiro"""
+import pytest
+
+from app.core.pipeline import PRIORIDADE_NORMAL, PipelineItem, Stage
+
+
+def _item(name, priority=PRIORIDADE_NORMAL, deadline=None):
+    return PipelineItem(b"", filename=name, priority=priority, deadline=deadline)
+
+
+def test_stage_handler_error_resolves_every_item_in_batch():
+    def handler(items):
+        raise RuntimeError("falhou")
+
+    stage = Stage("teste", handler, batch_size=4, batch_timeout=0.2)
+    items = [_item(f"i{n}") for n in range(3)]
+    for item in items:
+        stage.queue.put(item)
+
+    stage.start()
+    try:
+        for item in items:
+            with pytest.raises(RuntimeError):
+                item.future.result(timeout=5)
+    finally:
+        stage.stop()
+
+    assert stage.metrics()["erros"] == 3
@@ -0,0 +1,55 @@
+"""Pool de preprocessamento em processos (memória compartilhada)"""
+import numpy as np
+import pytest
+
+from app.core.preprocess_pool import PreprocessPool
+from app.utils.image_processing import decode_image, preprocess_image
+
+from tests.conftest import png_bytes
+
+IMAGE_SIZE = 32
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = PreprocessPool(workers=1, slots=2, image_size=IMAGE_SIZE)
+    yield pool
+    pool.shutdown()
+
+
+def test_tensor_matches_in_process_preprocessing(pool, png):
+    expected = preprocess_image(decode_image(png, IMAGE_SIZE).astype(np.float32))
+
+    with pool.preprocess(png) as batch:
+        assert batch.shape == (1, IMAGE_SIZE, IMAGE_SIZE, 3)
+        assert batch.dtype == np.float32
+        np.testing.assert_allclose(batch[0], expected, atol=1e-6)
+
+
+def test_slots_are_written_in_shared_memory(pool):
+    images = [png_bytes(seed=1), png_bytes(seed=2)]
+    slots = [pool.acquire(timeout=1) for _ in images]
+    try:
+        for image, slot in zip(images, slots):
+            assert pool.submit(image, slot).result(timeout=30) == slot
+
+        batch = pool.view(sorted(slots))
+        # Slots consecutivos: view do bloco compartilhado, sem cópia
+        assert np.shares_memory(batch, pool._buffer)
+        for image, slot in zip(images, slots):
+            expected = preprocess_image(decode_image(image, IMAGE_SIZE).astype(np.float32))
+            np.testing.assert_allclose(pool.view([slot])[0], expected, atol=1e-6)
+    finally:
+        for slot in slots:
+            pool.release(slot)
+
+
+def test_slot_is_released_when_preprocessing_fails(pool):
+    with pytest.raises(Exception):
+        with pool.preprocess(b"isto nao e uma imagem"):
+            pass
+
+    # Os dois slots continuam disponíveis
+    slots = [pool.acquire(timeout=1) for _ in range(pool.slots)]
+    for slot in slots:
+        pool.release(slot)
@@ -0,0 +1,129 @@
+"""Perfilamento sob demanda: acesso restrito ao token de administração"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import admin as admin_routes
+from app.config import settings
+from app.core import profiling
+
+TOKEN = "segredo-admin"
+
+
+@pytest.mark.parametrize("expected, received, allowed", [
+    (TOKEN, TOKEN, True),
+    (TOKEN, "outro", False),
+    (TOKEN, None, False),
+    (TOKEN, "", False),
+    (None, TOKEN, False),
+    ("", "", False),
+])
+def test_check_admin_token(expected, received, allowed):
+    assert profiling.check_admin_token(expected, received) is allowed
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Substitui as capturas por versões instantâneas que registram a chamada."""
+    calls = []
+
+    def sample_stacks(duration, interval):
+        calls.append(("cpu", duration, interval))
+        return "MainThread;modulo:funcao:1 3\n", 3
+
+    def diff_allocations(duration, top, frames):
+        calls.append(("memoria", duration, top, frames))
+        return {"alocacoes": []}
+
+    monkeypatch.setattr(profiling, "sample_stacks", sample_stacks)
+    monkeypatch.setattr(profiling, "diff_allocations", diff_allocations)
+    return calls
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", TOKEN)
+    app = FastAPI()
+    app.include_router(admin_routes.router)
+    return TestClient(app)
+
+
+ROUTES = ["/admin/profile/cpu", "/admin/profile/tensorflow", "/admin/profile/memory"]
+
+
+@pytest.mark.parametrize("path", ROUTES)
+def test_routes_do_not_exist_without_admin_token(client, calls, monkeypatch, path):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", None)
+
+    assert client.post(path, headers={"X-Admin-Token": TOKEN}).status_code == 404
+    assert calls == []
+
+
+@pytest.mark.parametrize("path", ROUTES)
+@pytest.mark.parametrize("headers", [{}, {"X-Admin-Token": "errado"}, {"X-Admin-Token": TOKEN + "x"}])
+def test_wrong_or_missing_token_is_unauthorized(client, calls, path, headers):
+    assert client.post(path, headers=headers).status_code == 401
+    assert calls == []
+
+
+def test_cpu_profile_with_token(client, calls):
+    response = client.post(
+        "/admin/profile/cpu", params={"seconds": 2, "interval_ms": 10},
+        headers={"X-Admin-Token": TOKEN}
+    )
+
+    assert response.status_code == 200
+    assert response.text == "MainThread;modulo:funcao:1 3\n"
+    assert response.headers["X-Profile-Samples"] == "3"
+    assert "X-Worker-PID" in response.headers
+    assert calls == [("cpu", 2.0, 0.01)]
+
+
+def test_memory_profile_with_token(client, calls):
+    response = client.post("/admin/profile/memory", params={"seconds": 1}, headers={"X-Admin-Token": TOKEN})
+
+    assert response.status_code == 200
+    assert response.json() == {"alocacoes": []}
+    assert calls == [("memoria", 1.0, 25, 1)]
+
+
+def test_busy_profiler_returns_conflict(client, monkeypatch):
+    def busy(*args):
+        raise profiling.ProfilerBusy("Amostragem de CPU já em andamento neste worker")
+
+    monkeypatch.setattr(profiling, "sample_stacks", busy)
+
+    assert client.post("/admin/profile/cpu", headers={"X-Admin-Token": TOKEN}).status_code == 409
+
+
+def test_sample_stacks_is_exclusive():
+    assert profiling._cpu_lock.acquire(blocking=False)
+    try:
+        with pytest.raises(profiling.ProfilerBusy):
+            profiling.sample_stacks(0.01)
+    finally:
+        profiling._cpu_lock.release()
+
+
+def test_django_profile_views_require_admin_token(django_setup, calls):
+    from django.http import Http404
+    from django.test import RequestFactory, override_settings
+
+    from api.views.perfilamento import perfil_cpu
+
+    factory = RequestFactory()
+
+    with override_settings(ADMIN_TOKEN=None):
+        with pytest.raises(Http404):
+            perfil_cpu(factory.post("/", HTTP_X_ADMIN_TOKEN=TOKEN))
+
+    with override_settings(ADMIN_TOKEN=TOKEN):
+        assert perfil_cpu(factory.post("/")).status_code == 401
+        assert perfil_cpu(factory.post("/", HTTP_X_ADMIN_TOKEN="errado")).status_code == 401
+        assert perfil_cpu(factory.get("/", HTTP_X_ADMIN_TOKEN=TOKEN)).status_code == 405
+        assert calls == []
+
+        response = perfil_cpu(factory.post("/?segundos=1", HTTP_X_ADMIN_TOKEN=TOKEN))
+        assert response.status_code == 200
+        assert response["X-Profile-Samples"] == "3"
+        assert calls == [("cpu", 1.0, 0.005)]
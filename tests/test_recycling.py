@@ -0,0 +1,145 @@
+"""Reciclagem do worker: contagem, drenagem e 503 enquanto drena"""
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.api import middleware as middleware_module
+from app.api.middleware import WorkerRecyclingMiddleware
+from app.core import recycling
+from app.core.recycling import MEMORIA, REQUISICOES, WorkerRecycler
+
+
+def _recycler(**kwargs):
+    recycled = threading.Event()
+    recycler = WorkerRecycler(jitter=0, on_recycle=recycled.set, **kwargs)
+    return recycler, recycled
+
+
+def test_drains_after_max_requests():
+    recycler, recycled = _recycler(max_requests=2)
+
+    for _ in range(2):
+        assert recycler.begin()
+        recycler.end()
+
+    assert recycled.wait(5)
+    assert recycler.draining
+    assert not recycler.begin()
+    assert not recycler.begin()
+    metrics = recycler.metrics()
+    assert metrics["motivo"] == REQUISICOES
+    assert metrics["atendidas"] == 2
+    assert metrics["recusadas_drenando"] == 2
+    assert metrics["em_andamento"] == 0
+
+
+def test_drain_waits_for_requests_in_flight():
+    recycler, recycled = _recycler(max_requests=1)
+    assert recycler.begin()
+    assert recycler.begin()
+
+    recycler.end()
+
+    assert recycler.draining
+    assert not recycled.wait(0.1)
+    recycler.end()
+    assert recycled.wait(5)
+    assert recycler.metrics()["atendidas"] == 2
+
+
+def test_drain_gives_up_after_timeout():
+    recycler, recycled = _recycler(max_requests=1, drain_timeout=0.05)
+    recycler.begin()
+    recycler.begin()
+
+    recycler.end()
+
+    assert recycled.wait(5)
+    assert recycler.metrics()["em_andamento"] == 1
+
+
+def test_drains_above_rss_limit(monkeypatch):
+    rss = {"mb": 100.0}
+    monkeypatch.setattr(recycling, "read_rss_mb", lambda: rss["mb"])
+    recycler, recycled = _recycler(max_rss_mb=500, rss_interval=0)
+
+    recycler.begin()
+    recycler.end()
+    assert not recycler.draining
+
+    rss["mb"] = 800.0
+    recycler.begin()
+    recycler.end()
+
+    assert recycled.wait(5)
+    assert recycler.metrics()["motivo"] == MEMORIA
+    assert recycler.metrics()["rss_mb"] == 800.0
+
+
+def test_jitter_only_adds_requests():
+    limits = {WorkerRecycler(max_requests=100, jitter=0.1).max_requests for _ in range(50)}
+
+    assert min(limits) >= 100 and max(limits) <= 110
+    assert WorkerRecycler(max_requests=0, jitter=0.5).max_requests == 0
+
+
+@pytest.fixture
+def app_with(monkeypatch):
+    def build(recycler):
+        app = FastAPI()
+        app.add_middleware(WorkerRecyclingMiddleware, paths=["/predict"])
+        monkeypatch.setattr(middleware_module, "get_worker_recycler", lambda: recycler)
+        return app
+    return build
+
+
+def test_streamed_request_counts_until_body_is_sent(app_with):
+    recycler, recycled = _recycler(max_requests=1)
+    app = app_with(recycler)
+    observed = []
+
+    @app.post("/predict/archive")
+    async def archive():
+        def body():
+            for chunk in (b"a", b"b", b"c"):
+                # Endpoint já retornou, mas a requisição segue em andamento
+                observed.append((recycler.metrics()["em_andamento"], recycled.is_set()))
+                yield chunk
+        return StreamingResponse(body())
+
+    response = TestClient(app).post("/predict/archive")
+
+    assert response.content == b"abc"
+    assert observed == [(1, False)] * 3
+    assert recycled.wait(5)
+    assert recycler.metrics()["atendidas"] == 1
+
+
+def test_draining_worker_refuses_with_connection_close(app_with):
+    recycler, recycled = _recycler(max_requests=1)
+    app = app_with(recycler)
+
+    @app.post("/predict")
+    async def predict():
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    client = TestClient(app)
+    assert client.post("/predict").status_code == 200
+    assert recycled.wait(5)
+
+    response = client.post("/predict")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.headers["Connection"] == "close"
+    assert response.json()["error"]["type"] == "reciclando"
+    # Fora dos caminhos de admissão: sem contagem nem recusa
+    assert client.get("/health").status_code == 200
+    assert recycler.metrics()["atendidas"] == 1
+    assert recycler.metrics()["recusadas_drenando"] == 1
@@ -0,0 +1,236 @@
+"""Inferência remota: cliente, broker em memória e worker"""
+import time
+
+import numpy as np
+import pytest
+
+from app.core.broker import InProcessBroker, decode_message, encode_message
+from app.core.remote import (
+    NORMALIZE_MINUS1_1,
+    RemoteInferenceClient,
+    RemoteInferenceError,
+    RemoteInferenceTimeout,
+)
+from app.worker import InferenceWorker
+
+QUEUE = "inferencia-teste"
+
+
+class FakePredictor:
+    """Probabilidades derivadas da média da imagem já normalizada."""
+
+    classes = ["NORMAL", "PNEUMONIA"]
+
+    def __init__(self, embeddings=True):
+        self.embeddings = embeddings
+        self.batches = []
+
+    def _normalize(self, batch):
+        return batch.astype(np.float32) / 127.5 - 1.0
+
+    def _infer_staged(self, batch):
+        self.batches.append(len(batch))
+        mean = batch.reshape(len(batch), -1).mean(axis=1)
+        probability = (mean + 1.0) / 2.0
+        predictions = np.zeros((len(batch), len(self.classes)), dtype=np.float32)
+        predictions[:, 0], predictions[:, 1] = 1.0 - probability, probability
+        embeddings = np.repeat(mean[:, None], 4, axis=1) if self.embeddings else None
+        return predictions, None, embeddings
+
+
+@pytest.fixture
+def broker():
+    broker = InProcessBroker()
+    yield broker
+    broker.close()
+
+
+@pytest.fixture
+def worker(broker):
+    worker = InferenceWorker(broker, FakePredictor(), QUEUE, poll_timeout=0.05, model="modelo-a")
+    worker.start()
+    yield worker
+    worker.stop()
+
+
+def _images(*values):
+    return np.stack([np.full((8, 8, 3), value, dtype=np.uint8) for value in values])
+
+
+def test_round_trip_through_worker(broker, worker):
+    client = RemoteInferenceClient(broker, QUEUE, timeout=5, model="modelo-a")
+
+    classes, probabilities, embeddings = client.infer(_images(0, 255))
+
+    assert classes == FakePredictor.classes
+    np.testing.assert_allclose(probabilities, [[1.0, 0.0], [0.0, 1.0]], atol=1e-6)
+    np.testing.assert_allclose(embeddings, [[-1.0] * 4, [1.0] * 4], atol=1e-6)
+    assert client.metrics()["requisicoes"] == 1
+    assert worker.metrics()["imagens"] == 2
+
+
+def test_round_trip_without_embeddings(broker):
+    worker = InferenceWorker(broker, FakePredictor(embeddings=False), QUEUE, poll_timeout=0.05)
+    worker.start()
+    try:
+        _, probabilities, embeddings = RemoteInferenceClient(broker, QUEUE, timeout=5).infer(_images(255))
+    finally:
+        worker.stop()
+
+    assert embeddings is None
+    np.testing.assert_allclose(probabilities, [[0.0, 1.0]], atol=1e-6)
+
+
+def test_timeout_without_worker(broker):
+    client = RemoteInferenceClient(broker, QUEUE, timeout=0.1)
+
+    with pytest.raises(RemoteInferenceTimeout):
+        client.infer(_images(0))
+
+    assert client.metrics()["tempo_esgotado"] == 1
+
+
+def test_worker_discards_expired_messages(broker):
+    with pytest.raises(RemoteInferenceTimeout):
+        RemoteInferenceClient(broker, QUEUE, timeout=0.05).infer(_images(0))
+
+    predictor = FakePredictor()
+    worker = InferenceWorker(broker, predictor, QUEUE, poll_timeout=0.05)
+
+    assert worker.run_once() == 0
+    assert worker.metrics()["expiradas"] == 1
+    assert predictor.batches == []
+
+
+def test_worker_with_other_model_rejects_request(broker, worker):
+    client = RemoteInferenceClient(broker, QUEUE, timeout=5, model="modelo-b")
+
+    with pytest.raises(RemoteInferenceError, match="modelo-b"):
+        client.infer(_images(0))
+
+    assert worker.metrics()["recusadas"] == 1
+    assert client.metrics()["erros"] == 1
+
+
+def test_worker_rejects_unknown_normalization(broker, worker):
+    client = RemoteInferenceClient(broker, QUEUE, timeout=5, normalization="desconhecida")
+
+    with pytest.raises(RemoteInferenceError, match="normalização"):
+        client.infer(_images(0))
+
+
+def test_worker_batches_requests_by_normalization(broker):
+    predictor = FakePredictor()
+    worker = InferenceWorker(broker, predictor, QUEUE, poll_timeout=0.05)
+    worker.normalizers["outra"] = lambda batch: np.zeros(batch.shape, dtype=np.float32)
+
+    for normalization in (NORMALIZE_MINUS1_1, "outra", NORMALIZE_MINUS1_1):
+        header = {
+            "id": normalization,
+            "responder_em": f"{QUEUE}:resposta:{normalization}",
+            "forma": [1, 8, 8, 3],
+            "prazo": time.time() + 5,
+            "normalizacao": normalization,
+        }
+        broker.push(QUEUE, encode_message(header, _images(255).tobytes()))
+
+    assert worker.run_once() == 3
+    assert sorted(predictor.batches) == [1, 2]
+
+    header, payload = decode_message(broker.wait_reply(f"{QUEUE}:resposta:outra", 1))
+    np.testing.assert_allclose(
+        np.frombuffer(payload, dtype=np.float32)[:2], [0.5, 0.5], atol=1e-6
+    )
+
+
+@pytest.fixture
+def servico_remoto(django_setup, monkeypatch):
+    from api.servicos.inferencia_remota import ServicoInferenciaRemota
+
+    monkeypatch.setattr(ServicoInferenciaRemota, "_cliente", None)
+    monkeypatch.setattr(ServicoInferenciaRemota, "_desativada", False)
+    return ServicoInferenciaRemota
+
+
+def _django_remote_settings():
+    from django.test import override_settings
+
+    return override_settings(
+        INFERENCIA_REMOTA=True,
+        INFERENCIA_REMOTA_MODELO="modelo-django",
+        BROKER_URL="memory://",
+        INFERENCIA_REMOTA_TIMEOUT=5
+    )
+
+
+def test_django_memory_broker_falls_back_to_local_on_model_mismatch(servico_remoto, monkeypatch):
+    from app import worker as worker_module
+
+    monkeypatch.setattr(worker_module, "model_id", lambda: "modelo-fastapi")
+    monkeypatch.setattr(
+        worker_module, "start_inference_worker",
+        lambda: pytest.fail("worker em memória iniciado com outro modelo")
+    )
+
+    with _django_remote_settings():
+        assert servico_remoto.obter() is None
+        assert servico_remoto._desativada
+
+
+def test_django_memory_broker_round_trip(servico_remoto, broker, monkeypatch):
+    from api.servicos.predictor import ServicoPredicao
+    from api.utilitarios.constantes import CLASSES
+    from app import worker as worker_module
+    from app.core.remote import NORMALIZE_EFFICIENTNET
+
+    predictor = FakePredictor()
+    # Ordem das classes do worker diferente da ordem da API Django
+    predictor.classes = ["pneumonia", "normal", "tuberculose"]
+    worker = InferenceWorker(broker, predictor, QUEUE, poll_timeout=0.05, model="modelo-django")
+    worker.normalizers[NORMALIZE_EFFICIENTNET] = predictor._normalize
+    monkeypatch.setattr(worker_module, "model_id", lambda: "modelo-django")
+    monkeypatch.setattr(worker_module, "start_inference_worker", lambda: worker)
+    worker.start()
+    try:
+        with _django_remote_settings():
+            cliente = servico_remoto.obter()
+            assert cliente is not None and cliente.model == "modelo-django"
+
+            predicao = ServicoPredicao._predizer_remoto(cliente, _images(255).astype(np.float32))
+    finally:
+        worker.stop()
+
+    # Colunas na ordem de CLASSES, não na do worker
+    np.testing.assert_allclose(
+        predicao[0], [{"normal": 1.0}.get(classe, 0.0) for classe in CLASSES], atol=1e-6
+    )
+
+
+@pytest.fixture
+def remote_settings(monkeypatch):
+    from app.config import settings
+    from app.core import remote
+
+    monkeypatch.setattr(settings, "INFERENCE_MODE", "remote")
+    monkeypatch.setattr(settings, "BROKER_URL", "memory://")
+    monkeypatch.setattr(remote, "_client", None)
+    return settings
+
+
+@pytest.mark.parametrize("configured, expected", [
+    ("modelo-configurado", "modelo-configurado"),
+    (None, "modelo-local"),
+])
+def test_fastapi_client_requires_worker_model(remote_settings, monkeypatch, configured, expected):
+    from app import worker as worker_module
+    from app.core.predictor import RemotePredictor
+    from app.core.remote import get_remote_client
+
+    monkeypatch.setattr(remote_settings, "REMOTE_MODEL", configured)
+    monkeypatch.setattr(worker_module, "model_id", lambda: "modelo-local")
+
+    client = get_remote_client()
+
+    assert client.model == expected
+    # Pesos diferentes, chaves diferentes no cache de resultados
+    assert RemotePredictor(client=client)._model_version().endswith(f":{expected}")
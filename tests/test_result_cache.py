@@ -0,0 +1,107 @@
+"""Cache de resultados compartilhado (SQLite)"""
+import pytest
+
+from app.core import result_cache
+from app.core.result_cache import ResultCache, cache_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(result_cache.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResultCache(str(tmp_path / "resultados.sqlite3"), max_entries=10, touch_interval=0)
+    yield cache
+    cache.close()
+
+
+def _keys(cache):
+    rows = cache._connection().execute("SELECT chave FROM resultados ORDER BY chave")
+    return [row[0] for row in rows]
+
+
+def test_round_trip_returns_a_new_dict(cache):
+    key = cache_key("abc", "v1")
+    cache.put(key, {"classe_predita": "NORMAL"})
+
+    first = cache.get(key)
+    first["classe_predita"] = "alterado"
+
+    assert cache.get(key) == {"classe_predita": "NORMAL"}
+    assert cache.get(cache_key("abc", "v2")) is None
+    assert cache.metrics()["processo"]["hits"] == 2
+
+
+def test_existing_key_is_kept(cache):
+    cache.put("k", {"v": 1})
+    cache.put("k", {"v": 2})
+
+    assert cache.get("k") == {"v": 1}
+    assert cache.metrics()["compartilhado"]["entradas"] == 1
+
+
+def test_eviction_removes_least_recently_used_in_batch(cache, clock):
+    for i in range(10):
+        clock.now += 1
+        cache.put(f"k{i}", {"i": i})
+
+    # k0 volta a ser a mais recente
+    clock.now += 1
+    assert cache.get("k0") == {"i": 0}
+
+    clock.now += 1
+    cache.put("k10", {"i": 10})
+
+    # Passou de 10: remove até sobrar 90% (9 entradas)
+    assert _keys(cache) == sorted(["k0", "k10"] + [f"k{i}" for i in range(3, 10)])
+    metrics = cache.metrics()
+    assert metrics["compartilhado"] == {"entradas": 9, "removidas": 2}
+    assert metrics["processo"]["removidos"] == 2
+
+
+def test_touch_interval_limits_access_updates(tmp_path, clock):
+    cache = ResultCache(str(tmp_path / "resultados.sqlite3"), max_entries=3, touch_interval=60)
+    try:
+        for key in ("a", "b", "c"):
+            clock.now += 1
+            cache.put(key, {})
+        # Acesso antes do intervalo não muda a ordem do LRU
+        clock.now += 1
+        cache.get("a")
+        clock.now += 1
+        cache.put("d", {})
+
+        assert _keys(cache) == ["c", "d"]
+    finally:
+        cache.close()
+
+
+def test_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "resultados.sqlite3")
+    writer, reader = ResultCache(path), ResultCache(path)
+    try:
+        writer.put("k", {"v": 1})
+        assert reader.get("k") == {"v": 1}
+
+        reader.clear()
+        assert writer.get("k") is None
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_max_entries_must_be_positive(tmp_path):
+    with pytest.raises(ValueError):
+        ResultCache(str(tmp_path / "resultados.sqlite3"), max_entries=0)
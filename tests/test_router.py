@@ -0,0 +1,176 @@
+"""Roteador com afinidade de cache: anel consistente, carga limitada e failover"""
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.core.hash_ring import HashRing
+from app.router import main as router_main
+
+NODES = ["http://a", "http://b", "http://c"]
+KEYS = [f"v1:estudo-{n}" for n in range(500)]
+
+
+def _owners(ring):
+    return {key: ring.candidates(key)[0] for key in KEYS}
+
+
+def test_key_ownership_is_stable():
+    owners = _owners(HashRing(NODES))
+
+    assert _owners(HashRing(NODES)) == owners
+    # Ordem das instâncias na configuração não muda o anel
+    assert _owners(HashRing(list(reversed(NODES)))) == owners
+    assert set(owners.values()) == set(NODES)
+
+
+def test_removing_a_node_only_moves_its_keys():
+    before = _owners(HashRing(NODES))
+    after = _owners(HashRing(["http://a", "http://c"]))
+
+    moved = {key for key in KEYS if before[key] != after[key]}
+    assert moved == {key for key in KEYS if before[key] == "http://b"}
+
+
+def test_mark_down_moves_keys_to_neighbours_and_mark_up_restores():
+    ring = HashRing(NODES)
+    before = _owners(ring)
+
+    ring.mark_down("http://b")
+    down = _owners(ring)
+    assert "http://b" not in down.values()
+    assert all(down[key] == before[key] for key in KEYS if before[key] != "http://b")
+    assert all(ring.candidates(key) == [n for n in HashRing(NODES).candidates(key) if n != "http://b"]
+               for key in KEYS[:20])
+
+    ring.mark_up("http://b")
+    assert _owners(ring) == before
+
+
+def test_load_above_factor_spills_to_next_node():
+    ring = HashRing(NODES, load_factor=1.25)
+    key = KEYS[0]
+    owner, neighbour, last = ring.candidates(key)
+
+    ring.acquire(owner)
+    # 1 em andamento (+1 chegando): capacidade ceil(1.25 * 2 / 3) = 1
+    assert ring.capacity() == 1
+    assert ring.candidates(key) == [neighbour, last, owner]
+    assert ring.metrics()["desvios_por_carga"] == 1
+
+    ring.acquire(neighbour)
+    # Carga média subiu: capacidade ceil(1.25 * 3 / 3) = 2, a dona volta
+    assert ring.capacity() == 2
+    assert ring.candidates(key)[0] == owner
+
+    ring.release(neighbour)
+    ring.release(owner)
+    assert ring.candidates(key) == [owner, neighbour, last]
+
+
+def test_ring_validates_arguments():
+    with pytest.raises(ValueError):
+        HashRing([])
+    with pytest.raises(ValueError):
+        HashRing(NODES, load_factor=1.0)
+
+
+@pytest.fixture
+def route(monkeypatch):
+    """Instala um MockTransport: `responses` mapeia instância -> resposta ou exceção."""
+    calls, responses = [], {}
+
+    def handler(request):
+        backend = f"{request.url.scheme}://{request.url.host}"
+        calls.append(backend)
+        outcome = responses.get(backend, httpx.Response(200, json={"instancia": backend}))
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(router_main, "ring", HashRing(NODES))
+    monkeypatch.setattr(router_main, "client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(router_main, "_failovers", 0)
+    monkeypatch.setattr(settings, "ROUTER_MAX_ATTEMPTS", 3)
+    return calls, responses
+
+
+def _post(study_id="estudo-1"):
+    client = TestClient(router_main.app)
+    return client.post(
+        "/predict",
+        files={"file": ("rx.png", b"imagem", "image/png")},
+        headers={"X-Study-Id": study_id, "X-Model-Version": "v1"},
+    )
+
+
+def _order(study_id="estudo-1"):
+    return router_main.ring.candidates(router_main.routing_key(study_id, "v1", []))
+
+
+def test_forward_goes_to_key_owner(route):
+    calls, _ = route
+    owner = _order()[0]
+
+    response = _post()
+
+    assert response.status_code == 200
+    assert response.headers["X-Backend"] == owner
+    assert response.json() == {"instancia": owner}
+    assert calls == [owner]
+    assert _post().headers["X-Backend"] == owner
+
+
+def test_forward_fails_over_on_connect_error(route):
+    calls, responses = route
+    owner, neighbour, _ = _order()
+    responses[owner] = httpx.ConnectError("recusada")
+
+    response = _post()
+
+    assert response.status_code == 200
+    assert response.headers["X-Backend"] == neighbour
+    assert calls == [owner, neighbour]
+    # Fora do anel até o health check, sem nova tentativa
+    assert not router_main.ring.is_up(owner)
+    assert _post().headers["X-Backend"] == neighbour
+    assert calls[2:] == [neighbour]
+    assert router_main._failovers == 1
+
+
+def test_forward_fails_over_on_503_without_marking_down(route):
+    calls, responses = route
+    owner, neighbour, _ = _order()
+    responses[owner] = httpx.Response(503, json={"error": "sobrecarga"}, headers={"Retry-After": "1"})
+
+    response = _post()
+
+    assert response.headers["X-Backend"] == neighbour
+    assert calls == [owner, neighbour]
+    assert router_main.ring.is_up(owner)
+
+
+def test_forward_returns_last_503_when_every_node_is_busy(route):
+    calls, responses = route
+    for node in NODES:
+        responses[node] = httpx.Response(503, json={"error": "sobrecarga"}, headers={"Retry-After": "2"})
+
+    response = _post()
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
+    assert response.headers["X-Backend"] == _order()[-1]
+    assert calls == _order()
+
+
+def test_forward_without_reachable_nodes(route):
+    calls, responses = route
+    for node in NODES:
+        responses[node] = httpx.ConnectError("recusada")
+
+    response = _post()
+
+    assert response.status_code == 503
+    assert response.json()["error"]["type"] == "sem_instancia"
+    assert len(calls) == 3
+    assert not any(router_main.ring.is_up(node) for node in NODES)
@@ -0,0 +1,122 @@
+"""Serviço gRPC: chamadas unárias e stream contra um servidor no processo"""
+import grpc
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.core.validator import ImageValidator
+from app.rpc import messages
+from app.rpc.server import GrpcServer, InferenceServicer
+from app.utils.image_processing import decode_image
+
+from tests.conftest import png_bytes
+
+IMAGE_SIZE = 16
+
+
+class FakePredictor:
+    """Classe pela média dos pixels decodificados: escuro, médio ou claro."""
+
+    def __init__(self):
+        self.inputs = []
+
+    def predict(self, image_data):
+        pixels = decode_image(image_data, IMAGE_SIZE)
+        self.inputs.append(pixels)
+        index = min(int(pixels.mean() // 86), 2)
+        probabilities = {c: 0.1 for c in settings.CLASSES}
+        probabilities[settings.CLASSES[index]] = 0.8
+        return {
+            "resultado": {"rotulo": settings.CLASSES[index], "confianca": 0.8},
+            "probabilidades": probabilities,
+        }
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(settings, "IMAGE_SIZE", IMAGE_SIZE)
+    monkeypatch.setattr(settings, "TENSOR_INPUT_ENABLED", True)
+    monkeypatch.setattr(settings, "AUDIT_ENABLED", False)
+    servicer = InferenceServicer(predictor=FakePredictor(), validator=ImageValidator(), stream_window=2)
+    server = GrpcServer(servicer, "127.0.0.1", 0, max_workers=4)
+    server.start()
+    yield server
+    server.stop(grace=0)
+
+
+@pytest.fixture
+def channel(server):
+    with grpc.insecure_channel(f"127.0.0.1:{server.port}") as channel:
+        yield channel
+
+
+def _method(channel, name):
+    request, response, client_streaming, server_streaming = messages.METHODS[name]
+    make = {
+        (False, False): channel.unary_unary,
+        (True, True): channel.stream_stream,
+    }[(client_streaming, server_streaming)]
+    return make(
+        messages.method_path(name),
+        request_serializer=lambda message: message.SerializeToString(),
+        response_deserializer=getattr(messages, response).FromString,
+    )
+
+
+def _tensor(value):
+    pixels = np.full((IMAGE_SIZE, IMAGE_SIZE, 3), value, dtype=np.uint8)
+    return messages.Tensor(height=IMAGE_SIZE, width=IMAGE_SIZE, channels=3, data=pixels.tobytes())
+
+
+def test_unary_predict_with_tensor(server, channel):
+    response = _method(channel, "Predict")(
+        messages.PredictRequest(id="r1", tensor=_tensor(250)), timeout=10
+    )
+
+    assert response.id == "r1"
+    assert response.class_index == 2
+    assert response.confidence == pytest.approx(0.8)
+    assert list(response.probabilities) == pytest.approx([0.1, 0.1, 0.8])
+    assert not response.HasField("error")
+    # O tensor chega ao preditor sem passar pelo PIL
+    np.testing.assert_array_equal(server.servicer.predictor.inputs[0], np.full((IMAGE_SIZE,) * 2 + (3,), 250))
+    assert server.metrics()["chamadas"]["Predict"] == 1
+
+
+def test_unary_predict_invalid_input_aborts(channel):
+    with pytest.raises(grpc.RpcError) as exc:
+        _method(channel, "Predict")(
+            messages.PredictRequest(id="r1", image=b"nao e imagem", filename="rx.png"), timeout=10
+        )
+
+    assert exc.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+
+
+def test_stream_keeps_order_and_reports_errors_per_item(server, channel):
+    requests = [
+        messages.PredictRequest(id="escuro", tensor=_tensor(10)),
+        messages.PredictRequest(id="png", image=png_bytes(128), filename="rx.png",
+                                priority=messages.PRIORITY_HIGH),
+        messages.PredictRequest(id="invalido", image=b"nao e imagem", filename="rx.png"),
+        messages.PredictRequest(id="claro", tensor=_tensor(250)),
+    ]
+
+    responses = list(_method(channel, "PredictStream")(iter(requests), timeout=10))
+
+    assert [r.id for r in responses] == ["escuro", "png", "invalido", "claro"]
+    assert responses[0].class_index == 0
+    assert responses[1].class_index == 1
+    assert responses[2].error.code == 400
+    assert responses[2].error.message
+    assert responses[3].class_index == 2
+    metrics = server.metrics()
+    assert metrics["imagens"] == 3
+    assert metrics["erros"] == {"400": 1}
+    assert metrics["streams_ativos"] == 0
+
+
+def test_get_model_info(channel):
+    info = _method(channel, "GetModelInfo")(messages.ModelInfoRequest(), timeout=10)
+
+    assert list(info.classes) == settings.CLASSES
+    assert info.image_size == IMAGE_SIZE
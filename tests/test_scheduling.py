@@ -0,0 +1,125 @@
+"""Prioridade e prazo das requisições: headers, filas por faixa e descarte"""
+import time
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.api.routes.predict import _check_deadline, _scheduling
+from app.core.pipeline import (
+    PRIORIDADE_ALTA,
+    PRIORIDADE_BAIXA,
+    PRIORIDADE_NORMAL,
+    _STOP,
+    LaneQueue,
+    PipelineItem,
+    Stage,
+    parse_priority,
+)
+from app.utils.exceptions import DeadlineExceededException
+
+
+def _item(name, priority=PRIORIDADE_NORMAL, deadline=None):
+    return PipelineItem(b"", filename=name, priority=priority, deadline=deadline)
+
+
+def _request(**headers):
+    raw = [(k.replace("_", "-").lower().encode(), v.encode()) for k, v in headers.items()]
+    return Request({"type": "http", "method": "POST", "path": "/predict", "headers": raw})
+
+
+def test_lane_queue_serves_higher_priority_first_and_fifo_within_lane():
+    lanes = LaneQueue()
+    for name, priority in [
+        ("n1", PRIORIDADE_NORMAL), ("b1", PRIORIDADE_BAIXA), ("a1", PRIORIDADE_ALTA),
+        ("n2", PRIORIDADE_NORMAL), ("a2", PRIORIDADE_ALTA), ("b2", PRIORIDADE_BAIXA),
+    ]:
+        lanes.put(_item(name, priority))
+
+    order = [lanes.get_nowait().filename for _ in range(6)]
+
+    assert order == ["a1", "a2", "n1", "n2", "b1", "b2"]
+
+
+def test_lane_queue_stop_signal_comes_after_items():
+    lanes = LaneQueue()
+    lanes.put(_item("b", PRIORIDADE_BAIXA))
+    lanes.put(_STOP)
+    lanes.put(_item("n"))
+
+    assert lanes.get_nowait().filename == "n"
+    assert lanes.get_nowait().filename == "b"
+    assert lanes.get_nowait() is _STOP
+
+
+def test_parse_priority():
+    assert parse_priority(None) == PRIORIDADE_NORMAL
+    assert parse_priority(" Alta ") == PRIORIDADE_ALTA
+    assert parse_priority("low") == PRIORIDADE_BAIXA
+    with pytest.raises(ValueError):
+        parse_priority("urgente")
+
+
+def test_stage_discards_expired_and_cancelled_items_before_handler():
+    handled, dropped = [], []
+
+    def handler(items):
+        for item in items:
+            handled.append(item.filename)
+            item.result = {"arquivo": item.filename}
+
+    stage = Stage("teste", handler, batch_size=8)
+    stage.on_drop = lambda item, reason: dropped.append((item.filename, reason))
+
+    expired = _item("vencido", deadline=time.monotonic() - 1)
+    cancelled = _item("cancelado")
+    cancelled.future.cancel()
+    live = _item("vivo", deadline=time.monotonic() + 60)
+    for item in (expired, cancelled, live):
+        stage.queue.put(item)
+
+    stage.start()
+    try:
+        assert live.future.result(timeout=5) == {"arquivo": "vivo"}
+    finally:
+        stage.stop()
+
+    assert handled == ["vivo"]
+    assert sorted(dropped) == [("cancelado", "cancelado"), ("vencido", "prazo")]
+    with pytest.raises(DeadlineExceededException):
+        expired.future.result(timeout=0)
+    assert stage.metrics()["processados"] == 1
+
+
+def test_scheduling_without_headers():
+    assert _scheduling(_request()) == {"priority": PRIORIDADE_NORMAL, "deadline": None}
+
+
+def test_scheduling_reads_priority_and_deadline():
+    before = time.monotonic()
+    scheduling = _scheduling(_request(X_Priority="baixa", X_Deadline_Ms="250"))
+
+    assert scheduling["priority"] == PRIORIDADE_BAIXA
+    assert before + 0.25 <= scheduling["deadline"] <= time.monotonic() + 0.25
+
+
+@pytest.mark.parametrize("value", ["abc", "nan", "inf", "-inf", "0", "-100"])
+def test_scheduling_rejects_invalid_deadline(value):
+    with pytest.raises(HTTPException) as exc:
+        _scheduling(_request(X_Deadline_Ms=value))
+
+    assert exc.value.status_code == 400
+
+
+def test_scheduling_rejects_unknown_priority():
+    with pytest.raises(HTTPException) as exc:
+        _scheduling(_request(X_Priority="urgente"))
+
+    assert exc.value.status_code == 400
+
+
+def test_check_deadline():
+    _check_deadline(None)
+    _check_deadline(time.monotonic() + 60)
+    with pytest.raises(DeadlineExceededException):
+        _check_deadline(time.monotonic() - 1)
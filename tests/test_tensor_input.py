@@ -0,0 +1,146 @@
+"""Entrada de tensores de clientes leves (.npy e PVT1)"""
+import io
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.core.validator import ImageValidator
+from app.utils.exceptions import InvalidImageException
+from app.utils.image_processing import (
+    TENSOR_MAGIC,
+    decode_image,
+    encode_tensor,
+    is_tensor_payload,
+    read_tensor,
+    tensor_header,
+)
+
+from tests.conftest import png_bytes
+
+SIZE = 8
+
+
+def _array(channels=3, dtype=np.uint8):
+    shape = (SIZE, SIZE, channels) if channels else (SIZE, SIZE)
+    return (np.arange(np.prod(shape)) % 256).astype(dtype).reshape(shape)
+
+
+def _npy(array, **kwargs):
+    buffer = io.BytesIO()
+    np.save(buffer, array, **kwargs)
+    return buffer.getvalue()
+
+
+def test_is_tensor_payload():
+    assert is_tensor_payload(encode_tensor(_array()))
+    assert is_tensor_payload(_npy(_array()))
+    assert not is_tensor_payload(png_bytes())
+    assert not is_tensor_payload(b"")
+
+
+def test_encode_tensor_round_trip():
+    array = _array()
+    data = encode_tensor(array)
+
+    assert data[:4] == TENSOR_MAGIC
+    result = read_tensor(data, SIZE)
+    assert result.dtype == np.uint8
+    np.testing.assert_array_equal(result, array)
+    # 3 canais: view dos bytes recebidos, sem cópia
+    assert not result.flags.owndata
+
+
+@pytest.mark.parametrize("channels", [None, 1])
+def test_grayscale_is_expanded_to_three_channels(channels):
+    array = _array(channels)
+
+    for data in (encode_tensor(array), _npy(array)):
+        result = read_tensor(data, SIZE)
+        assert result.shape == (SIZE, SIZE, 3)
+        for c in range(3):
+            np.testing.assert_array_equal(result[..., c], array.reshape(SIZE, SIZE))
+
+
+def test_npy_round_trip():
+    array = _array()
+
+    np.testing.assert_array_equal(read_tensor(_npy(array), SIZE), array)
+
+
+def test_fortran_order_npy_keeps_values():
+    array = _array()
+    data = _npy(np.asfortranarray(array))
+
+    np.testing.assert_array_equal(read_tensor(data, SIZE), array)
+
+
+@pytest.mark.parametrize("data", [
+    TENSOR_MAGIC,
+    tensor_header(SIZE, SIZE, 3)[:-1],
+    _npy(_array())[:20],
+], ids=["pvt1-so-magic", "pvt1-cabecalho-truncado", "npy-cabecalho-truncado"])
+def test_truncated_header_is_rejected(data):
+    with pytest.raises(ValueError):
+        read_tensor(data, SIZE)
+
+
+def test_wrong_magic_is_rejected():
+    with pytest.raises(ValueError):
+        read_tensor(b"PVT2" + encode_tensor(_array())[4:], SIZE)
+
+
+@pytest.mark.parametrize("data", [
+    _npy(_array(dtype=np.float32)),
+    _npy(_array(dtype=np.uint16)),
+    _npy(np.empty((SIZE, SIZE, 3), dtype=object), allow_pickle=True),
+], ids=["float32", "uint16", "object"])
+def test_wrong_dtype_is_rejected(data):
+    with pytest.raises(ValueError, match="uint8"):
+        read_tensor(data, SIZE)
+
+
+@pytest.mark.parametrize("array", [
+    np.zeros((SIZE, SIZE, 4), dtype=np.uint8),
+    np.zeros((SIZE, SIZE + 1, 3), dtype=np.uint8),
+    np.zeros((SIZE * SIZE * 3,), dtype=np.uint8),
+    np.zeros((1, SIZE, SIZE, 3), dtype=np.uint8),
+])
+def test_wrong_shape_is_rejected(array):
+    with pytest.raises(ValueError, match="forma"):
+        read_tensor(_npy(array), SIZE)
+
+
+@pytest.mark.parametrize("shape", [(SIZE, SIZE, 4), (SIZE, SIZE + 1, 3), (SIZE // 2, SIZE, 3)])
+def test_wrong_pvt1_shape_is_rejected(shape):
+    with pytest.raises(ValueError, match="forma"):
+        read_tensor(encode_tensor(np.zeros(shape, dtype=np.uint8)), SIZE)
+
+
+@pytest.mark.parametrize("extra", [-1, 1])
+def test_byte_count_mismatch_is_rejected(extra):
+    for data in (encode_tensor(_array()), _npy(_array())):
+        data = data[:extra] if extra < 0 else data + b"\0" * extra
+        with pytest.raises(ValueError, match="bytes"):
+            read_tensor(data, SIZE)
+
+
+def test_decode_image_uses_tensor_as_is():
+    array = _array()
+
+    np.testing.assert_array_equal(decode_image(encode_tensor(array), SIZE), array)
+
+
+def test_validator_accepts_tensor_only_when_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "IMAGE_SIZE", SIZE)
+    validator = ImageValidator()
+    data = encode_tensor(_array())
+
+    monkeypatch.setattr(settings, "TENSOR_INPUT_ENABLED", True)
+    validator.validate(data, "tensor.bin")
+    with pytest.raises(InvalidImageException, match="Tensor inválido"):
+        validator.validate(data[:-1], "tensor.bin")
+
+    monkeypatch.setattr(settings, "TENSOR_INPUT_ENABLED", False)
+    with pytest.raises(InvalidImageException):
+        validator.validate(data, "tensor.png")
@@ -0,0 +1,170 @@
+"""Rastreamento por requisição: spans aninhados, Server-Timing e exportação OTLP"""
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.utils.async_logging import begin_request, end_request, request_timings_ms
+from app.utils.tracing import (
+    STATUS_ERROR,
+    FileSpanExporter,
+    current_context,
+    finish_trace,
+    parse_traceparent,
+    server_timing,
+    span,
+    start_trace,
+    to_otlp,
+)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+def _by_name(trace):
+    return {s.name: s for s in trace.spans}
+
+
+def test_spans_nest_under_current_span():
+    tokens = start_trace("POST /predict", request_id="req-1")
+    with span("endpoint"):
+        with span("validacao", arquivo="rx.png"):
+            pass
+        with span("inferencia"):
+            outer_trace, inner_id = current_context()
+    trace = finish_trace(tokens, status_code=200)
+
+    spans = _by_name(trace)
+    assert outer_trace is trace
+    assert spans["inferencia"].span_id == inner_id
+    assert spans["endpoint"].parent_id == trace.root.span_id
+    assert spans["validacao"].parent_id == spans["endpoint"].span_id
+    assert spans["inferencia"].parent_id == spans["endpoint"].span_id
+    assert spans["validacao"].attributes == {"arquivo": "rx.png"}
+    assert trace.root.attributes["request.id"] == "req-1"
+    assert trace.root.attributes["http.status_code"] == 200
+    assert all(s.end_ns >= s.start_ns for s in trace.spans)
+    # Contexto restaurado: fora da requisição de novo
+    assert current_context() == (None, None)
+
+
+def test_span_error_marks_status():
+    tokens = start_trace("POST /predict")
+    with pytest.raises(RuntimeError):
+        with span("inferencia"):
+            raise RuntimeError("falhou")
+    trace = finish_trace(tokens, status_code=500)
+
+    assert _by_name(trace)["inferencia"].status == STATUS_ERROR
+    assert trace.root.status == STATUS_ERROR
+
+
+def test_span_outside_trace_only_records_timing():
+    context = begin_request("req-1")
+    try:
+        with span("leitura") as current:
+            assert current is None
+        assert "leitura" in request_timings_ms()
+    finally:
+        end_request(context)
+
+
+def test_trace_continues_client_traceparent():
+    tokens = start_trace("POST /predict", traceparent=f"00-{TRACE_ID}-{PARENT_ID}-01")
+    trace = finish_trace(tokens)
+
+    assert trace.trace_id == TRACE_ID
+    assert trace.root.parent_id == PARENT_ID
+
+
+@pytest.mark.parametrize("header", [None, "", "lixo", f"00-{'0' * 32}-{PARENT_ID}-01", f"00-{TRACE_ID}-curto-01"])
+def test_invalid_traceparent_is_ignored(header):
+    assert parse_traceparent(header) is None
+
+
+def test_request_id_in_trace_format_becomes_trace_id():
+    assert finish_trace(start_trace("GET /", request_id=TRACE_ID)).trace_id == TRACE_ID
+    assert finish_trace(start_trace("GET /", request_id="req-1")).trace_id != "req-1"
+
+
+def test_server_timing_sums_stages_and_skips_duplicate_batch_spans():
+    tokens = start_trace("POST /predict/batch")
+    trace = tokens[0]
+    start = time.time_ns()
+    # Duas imagens da requisição no mesmo lote: o intervalo conta uma vez
+    trace.record("inferencia", start, start + 4_000_000)
+    trace.record("inferencia", start, start + 4_000_000)
+    trace.record("validacao", start - 2_000_000, start - 1_000_000)
+    trace.record("validacao", start - 1_000_000, start)
+    finish_trace(tokens)
+
+    header = server_timing(trace)
+
+    parts = header.split(", ")
+    assert parts[0] == "validacao;dur=2.00"
+    assert parts[1] == "inferencia;dur=4.00"
+    assert parts[2].startswith("total;dur=")
+
+
+def test_otlp_export(tmp_path):
+    tokens = start_trace("POST /predict", traceparent=f"00-{TRACE_ID}-{PARENT_ID}-01")
+    with span("inferencia", lote=4):
+        pass
+    trace = finish_trace(tokens, status_code=200)
+    exporter = FileSpanExporter(str(tmp_path / "traces" / "traces.jsonl"), "teste")
+
+    exporter.export(trace)
+    exporter.shutdown()
+
+    lines = (tmp_path / "traces" / "traces.jsonl").read_text().splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0]) == to_otlp(trace, "teste")
+    spans = json.loads(lines[0])["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert {s["traceId"] for s in spans} == {TRACE_ID}
+    root = next(s for s in spans if s["name"] == "POST /predict")
+    child = next(s for s in spans if s["name"] == "inferencia")
+    assert root["parentSpanId"] == PARENT_ID
+    assert child["parentSpanId"] == root["spanId"]
+    assert child["attributes"] == [{"key": "lote", "value": {"intValue": "4"}}]
+    assert exporter.metrics()["exportados"] == 1
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    import app.main
+    from app.api.routes import predict as predict_routes
+
+    async def predict_many(images, **scheduling):
+        with span("inferencia"):
+            return [{"arquivo": name} for name, _ in images]
+
+    (tmp_path / "rx.png").write_bytes(b"imagem")
+    monkeypatch.setattr(settings, "TRACING_ENABLED", True)
+    monkeypatch.setattr(settings, "MOUNTED_IMAGES_ROOT", str(tmp_path))
+    monkeypatch.setattr(predict_routes, "_predict_many", predict_many)
+    return TestClient(app.main.app)
+
+
+def test_server_timing_header_on_traced_route(client):
+    response = client.post(
+        "/predict/path",
+        json={"caminhos": ["rx.png"]},
+        headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["X-Trace-ID"] == TRACE_ID
+    stages = [part.split(";")[0] for part in response.headers["Server-Timing"].split(", ")]
+    assert stages == ["endpoint", "inferencia", "serializacao", "total"]
+
+
+def test_no_server_timing_when_tracing_disabled(client, monkeypatch):
+    monkeypatch.setattr(settings, "TRACING_ENABLED", False)
+
+    response = client.post("/predict/path", json={"caminhos": ["rx.png"]})
+
+    assert response.status_code == 200
+    assert "Server-Timing" not in response.headers
+    assert "X-Trace-ID" not in response.headers
@@ -0,0 +1,112 @@
+"""Índice de casos semelhantes: busca exata e aproximada (IVF)"""
+import json
+
+import numpy as np
+import pytest
+
+from app.core import vector_index
+from app.core.vector_index import VectorIndex, build_index, normalize
+
+DIM = 16
+
+
+def _vectors(n, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, DIM)).astype(np.float32)
+
+
+def _cases(n):
+    return [{"arquivo": f"caso-{i}.png", "rotulo": "normal" if i % 2 else "pneumonia"} for i in range(n)]
+
+
+def _brute_force(vectors, query, k):
+    scores = normalize(vectors) @ normalize(query)
+    return [f"caso-{i}.png" for i in np.argsort(-scores)[:k]]
+
+
+@pytest.fixture
+def exact_index(tmp_path):
+    vectors = _vectors(300)
+    build_index(vectors, _cases(300), str(tmp_path / "indice"))
+    return VectorIndex(str(tmp_path / "indice")), vectors
+
+
+@pytest.mark.parametrize("k", [1, 5, 20])
+def test_exact_search_matches_brute_force(exact_index, k):
+    index, vectors = exact_index
+    query = _vectors(1, seed=7)[0]
+
+    results = index.search(query, k)
+
+    assert [r["arquivo"] for r in results] == _brute_force(vectors, query, k)
+    scores = [r["similaridade"] for r in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_query_equal_to_case_ranks_it_first(exact_index):
+    index, vectors = exact_index
+
+    # Escala não importa: cosseno
+    result = index.search(vectors[42] * 3.0, 3)[0]
+
+    assert result == {"arquivo": "caso-42.png", "rotulo": "pneumonia", "similaridade": 1.0}
+
+
+def test_k_larger_than_index(tmp_path):
+    build_index(_vectors(4), _cases(4), str(tmp_path / "indice"))
+
+    assert len(VectorIndex(str(tmp_path / "indice")).search(_vectors(1)[0], 10)) == 4
+
+
+def test_exact_search_across_chunks(exact_index, monkeypatch):
+    index, vectors = exact_index
+    monkeypatch.setattr(vector_index, "_CHUNK_ROWS", 7)
+    query = _vectors(1, seed=3)[0]
+
+    assert [r["arquivo"] for r in index.search(query, 10)] == _brute_force(vectors, query, 10)
+
+
+def test_wrong_dimension_is_rejected(exact_index):
+    index, _ = exact_index
+
+    with pytest.raises(ValueError):
+        index.search(np.ones(DIM + 1), 3)
+
+
+def test_ivf_search(tmp_path):
+    vectors = _vectors(400)
+    manifest = build_index(vectors, _cases(400), str(tmp_path / "indice"), n_lists=8, model="abc")
+    index = VectorIndex(str(tmp_path / "indice"))
+    query = vectors[123]
+
+    assert manifest["listas"] == 8
+    assert index.info()["listas"] == 8
+    assert index.offsets[0] == 0 and index.offsets[-1] == 400
+    # Todas as listas: mesmo resultado da busca exata
+    assert [r["arquivo"] for r in index.search(query, 10, nprobe=8)] == _brute_force(vectors, query, 10)
+    # Poucas listas: aproximada, mas o próprio caso está na lista do seu centróide
+    approximate = index.search(query, 5, nprobe=1)
+    assert approximate[0]["arquivo"] == "caso-123.png"
+    assert len(approximate) == 5
+
+
+def test_rebuild_replaces_index(tmp_path):
+    path = str(tmp_path / "indice")
+    build_index(_vectors(10), _cases(10), path)
+    build_index(_vectors(5, seed=1), _cases(5), path)
+
+    assert len(VectorIndex(path)) == 5
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["indice"]
+
+
+def test_invalid_index_files(tmp_path):
+    with pytest.raises(ValueError):
+        build_index(_vectors(3), _cases(2), str(tmp_path / "a"))
+    with pytest.raises(ValueError):
+        build_index(_vectors(3), _cases(3), str(tmp_path / "a"), n_lists=4)
+
+    path = tmp_path / "b"
+    build_index(_vectors(3), _cases(3), str(path))
+    manifest = json.loads((path / "manifest.json").read_text())
+    (path / "manifest.json").write_text(json.dumps({**manifest, "formato": 99}))
+    with pytest.raises(ValueError, match="Formato"):
+        VectorIndex(str(path))